@@ -797,6 +797,11 @@ class _AriendiServerSide:
             if (ctrl & 0x01) == 0:        # I-frame
                 peer_ns = (ctrl >> 1) & 0x07
                 peer_nr = (ctrl >> 5) & 0x07
+                if self.handshake_done and peer_ns != self._rx_ack:
+                    # Retransmitted duplicate: decrypting it again would skew the
+                    # AES-CTR stream.  HDLC receivers discard it; N(R) is unchanged.
+                    self.logger.info(f"[HDLC←] I-frame N(S)={peer_ns} out of sequence (expected {self._rx_ack}) — dropped")
+                    continue
                 self._rx_ack = (peer_ns + 1) % 8
                 cmd_byte = f"0x{payload[1]:02X}" if len(payload) >= 2 and payload[0] == _SEC_ENCRYPTED else f"sec=0x{payload[0]:02X}" if payload else "empty"
                 self.logger.info(f"[HDLC←] I-frame N(S)={peer_ns} N(R)={peer_nr} payload={len(payload)}B cmd={cmd_byte}")
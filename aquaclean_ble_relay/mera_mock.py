@@ -716,6 +716,13 @@ class MeraService(Service):
                     self._last_a5_frames = []
                     self._retransmit_count = 0
                     return
+                # The bridge's FrameCollector acks every 4 frames, not only at the
+                # end: a gap-free prefix (e.g. 0x0f of a 6-frame response) is an
+                # intermediate ack, not a loss report — retransmitting there
+                # delivers stray CONS frames into the bridge's next transaction.
+                if not [i for i in range(min(ack.bit_length(), n)) if not (ack >> i) & 1]:
+                    mock._log("·", f"FlowControl: intermediate ack (bitmask=0x{ack:02x} of 0x{expected:02x})")
+                    return
                 self._retransmit_count += 1
                 if self._retransmit_count > 3:
                     mock._log("!", f"FlowControl: giving up after {self._retransmit_count - 1} retransmit(s) — app will retry proc")
@@ -755,6 +762,24 @@ class MeraService(Service):
                     await self._send_request_ack()
                     await self._frame_collector.add_frame(frame_index, raw[1:20])
 
+            elif ft in (_FrameType.FIRST, _FrameType.CONS):
+                # Requests longer than four SINGLE sub-frames (the bridge's
+                # FrameFactory.BuildSegmentFrames): byte 1 is the frame count
+                # on FIRST and the frame number on CONS, 18-byte payload —
+                # the same framing _build_frames uses for long responses.
+                # Acked per frame like the SINGLE path.
+                frame_number = raw[1]
+                if ft == _FrameType.FIRST:
+                    self._request_ack_bitmap = bytearray(8)
+                    self._request_ack_bitmap[0] |= 1
+                    await self._send_request_ack()
+                    await self._frame_collector.start_transaction(frame_number)
+                    await self._frame_collector.add_frame(0, raw[2:20])
+                else:
+                    self._request_ack_bitmap[frame_number // 8] |= (1 << (frame_number % 8))
+                    await self._send_request_ack()
+                    await self._frame_collector.add_frame(frame_number, raw[2:20])
+
     async def _on_request_reassembled(self, sender, data: bytes) -> None:
         """FrameCollector.TransactionCompleteFC handler — fires once every
         expected frame (FIRST + all CONS) of one request has arrived. `data`
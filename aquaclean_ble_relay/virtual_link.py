@@ -0,0 +1,318 @@
+"""In-process virtual GATT link between the bridge and the Mera / Alba mocks.
+
+mera_mock.py and alba_mock.py carry the full device logic, but normally they
+are only reachable through bluez_peripheral, a D-Bus system bus and a real
+adapter.  The two connectors here replace the air interface with in-memory
+pipes, so the bridge's own clients (AquaCleanClient, AlbaClient) talk to the
+unmodified mock request handlers on any Linux box — no adapter, no BlueZ, no
+D-Bus daemon.  bluez_peripheral must still be importable, because both mock
+modules import it at module level.
+
+Both connectors implement the surface the clients use from
+BluetoothLeConnector (IBluetoothLeConnector plus the attributes read by
+main.py): connect_async, disconnect, send_message, send_message_cons,
+data_received_handlers, connection_status_changed_handlers, device_name,
+device_address, is_variant_a, arendi_handshake_done.
+
+  VirtualMeraLink — writes go straight to MeraService._handle_request (the
+                    same coroutine the WRITE_0..3 characteristic setters
+                    schedule); A5..A8 notifications come back through
+                    in-memory notify channels.  connect_async runs the mock's
+                    own InfoFrame burst, so AquaCleanBaseClient.connect_async
+                    works unchanged.
+  VirtualAlbaLink — a fresh _AriendiServerSide + _Ble20AppLayer per
+                    connection, exactly as AlbaMock.run() does per session;
+                    the bridge side runs the real AriendiSecurity handshake
+                    and encryption.
+
+Link model (per direction, per ATT PDU):
+  latency_ms — fixed one-way delay
+  jitter_ms  — extra uniform random delay 0..jitter_ms (order is preserved,
+               like a real BLE link: a PDU is never delivered before the one
+               written ahead of it)
+  loss       — drop probability 0.0..1.0
+  seed       — seeds the loss/jitter RNG for reproducible runs
+
+Usage:
+    link = VirtualMeraLink(state_dir=tmpdir, latency_ms=7.5)
+    client = AquaCleanClient(link)
+    await client.connect_ble_only(VIRTUAL_ADDRESS)
+    ...
+    await link.disconnect()
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from aquaclean_ble_relay import mock_logging
+from aquaclean_ble_relay import mock_persistence
+from aquaclean_ble_relay.mera_mock import MeraMock, MeraService
+from aquaclean_ble_relay.alba_mock import _AriendiServerSide, _Ble20AppLayer
+from aquaclean_console_app.bluetooth_le.LE.AriendiSecurity import AriendiSecurity
+from aquaclean_console_app.myEvent import myEvent
+
+logger = logging.getLogger(__name__)
+
+VIRTUAL_ADDRESS = "00:00:00:00:00:00"
+
+
+class _Pipe:
+    """One direction of the virtual link: FIFO delivery with latency, jitter and loss."""
+
+    def __init__(self, name: str, deliver, latency_ms: float, jitter_ms: float,
+                 loss: float, rng: random.Random):
+        self.name = name
+        self._deliver = deliver            # async callable(bytes)
+        self._latency = latency_ms / 1000.0
+        self._jitter = jitter_ms / 1000.0
+        self._loss = loss
+        self._rng = rng
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.sent = 0
+        self.dropped = 0
+        self.bytes = 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._queue = None
+
+    def put(self, data: bytes) -> None:
+        """Queue one PDU.  Sync, so it can be called from notify .changed() hooks."""
+        if self._queue is None:
+            return  # link down — same as writing to a closed connection
+        if self._loss and self._rng.random() < self._loss:
+            self.dropped += 1
+            return
+        self.sent += 1
+        self.bytes += len(data)
+        due = time.perf_counter() + self._latency
+        if self._jitter:
+            due += self._rng.random() * self._jitter
+        self._queue.put_nowait((due, bytes(data)))
+
+    async def _run(self) -> None:
+        while True:
+            due, data = await self._queue.get()
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self._deliver(data)
+            except Exception as e:
+                logger.warning(f"virtual link {self.name}: delivery failed: {type(e).__name__}: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {"pdus": self.sent, "dropped": self.dropped, "bytes": self.bytes}
+
+
+class _NotifyChannel:
+    """Stands in for a bluez_peripheral notify characteristic (A5..A8).
+
+    MeraService pushes through `.changed(frame)` and gates its InfoFrame burst
+    on `._notify` (the CCCD state), so those two are all that is needed.
+    """
+
+    def __init__(self, pipe: _Pipe):
+        self._pipe = pipe
+        self._notify = False
+
+    def changed(self, frame: bytes) -> None:
+        if self._notify:
+            self._pipe.put(frame)
+
+
+class _VirtualLinkBase:
+    """Connector attributes shared by both virtual links."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, loss: float, seed):
+        self.data_received_handlers = myEvent.EventHandler()
+        self.connection_status_changed_handlers = myEvent.EventHandler()
+        self.device_address = 'Unknown'
+        self.device_name = 'Unknown'
+        self.is_variant_a = False
+        self.rssi: int | None = None
+        self.last_ble_ms: int | None = None
+        self.last_esphome_api_ms: int | None = None   # None = not via ESP32 proxy
+        self.esphome_proxy_connected = False
+        self.ble_dis_info: dict | None = None
+        rng = random.Random(seed)
+        self._to_device = _Pipe("bridge→device", self._write_to_device, latency_ms, jitter_ms, loss, rng)
+        self._to_bridge = _Pipe("device→bridge", self._deliver_to_bridge, latency_ms, jitter_ms, loss, rng)
+
+    @property
+    def arendi_handshake_done(self) -> bool:
+        return False
+
+    async def _write_to_device(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    async def _deliver_to_bridge(self, data: bytes) -> None:
+        await self.data_received_handlers.invoke_async(data)
+
+    def _open_pipes(self) -> None:
+        self._to_device.start()
+        self._to_bridge.start()
+
+    async def _close_pipes(self) -> None:
+        await self._to_device.stop()
+        await self._to_bridge.stop()
+
+    def link_stats(self) -> dict:
+        """PDU / byte counters per direction since the link object was created."""
+        return {pipe.name: pipe.stats() for pipe in (self._to_device, self._to_bridge)}
+
+
+class VirtualMeraLink(_VirtualLinkBase):
+    """In-memory connector to a MeraMock.  See module docstring."""
+
+    def __init__(self, state_dir=None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 loss: float = 0.0, seed=None, adapter: str = "virtual"):
+        super().__init__(latency_ms, jitter_ms, loss, seed)
+        self.mock = MeraMock(adapter=adapter, web_port=0, state_dir=state_dir)
+        self.service = MeraService(self.mock)
+        self.logger = self.mock.logger
+        self.device_name = self.mock._DEVICE_NAME
+        self._channels: list[_NotifyChannel] = []
+        self._burst_task: asyncio.Future | None = None
+        self._write_tasks: set = set()
+
+    async def connect_async(self, device_id):
+        t0 = time.perf_counter()
+        self.device_address = device_id
+        self._open_pipes()
+        self._channels = [_NotifyChannel(self._to_bridge) for _ in range(4)]
+        self.service.wire_notify(self._channels[0])
+        self.service.wire_notify_a6(self._channels[1])
+        self.service.wire_notify_a7(self._channels[2])
+        self.service.wire_notify_a8(self._channels[3])
+        for channel in self._channels:
+            channel._notify = True      # CCCDs written by the central
+        mock = self.mock
+        mock._connected = True
+        mock._connection_gen += 1
+        mock._log("·", f"BLE client connected: {device_id} (virtual link)")
+        self._burst_task = asyncio.ensure_future(
+            mock._send_info_frame_burst(self.service, mock._connection_gen))
+        self.last_ble_ms = int((time.perf_counter() - t0) * 1000)
+        self.connection_status_changed_handlers(self, True, self.device_address, self.device_name)
+
+    async def _write_to_device(self, raw: bytes) -> None:
+        # Same as the WRITE_0..3 setters: log, then hand to _handle_request as
+        # its own task — the service's request lock keeps the frames in order.
+        self.service._log_write(0, raw)
+        task = asyncio.ensure_future(self.service._handle_request(raw))
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def send_message(self, data):
+        self._to_device.put(data)
+
+    async def send_message_cons(self, data):
+        self._to_device.put(data)
+
+    async def disconnect(self):
+        mock = self.mock
+        if not mock._connected:
+            return
+        mock._connected = False
+        mock._log("·", "BLE client disconnected (virtual link)")
+        for channel in self._channels:
+            channel._notify = False
+        for task in [self._burst_task, *self._write_tasks]:
+            if task is not None and not task.done():
+                task.cancel()
+        await asyncio.gather(*[t for t in [self._burst_task, *self._write_tasks] if t is not None],
+                             return_exceptions=True)
+        self.service._a6_burst_done.set()
+        await self._close_pipes()
+        self.connection_status_changed_handlers(self, False)
+
+
+class VirtualAlbaLink(_VirtualLinkBase):
+    """In-memory connector to the Alba mock's Arendi server + Ble20 app layer.  See module docstring."""
+
+    def __init__(self, state_dir=None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 loss: float = 0.0, seed=None, adapter: str = "virtual"):
+        super().__init__(latency_ms, jitter_ms, loss, seed)
+        if state_dir is not None:
+            # Same process-wide switch AlbaMock.__init__ makes for --state-dir.
+            mock_persistence.set_state_dir(state_dir)
+            mock_logging.set_log_dir(state_dir)
+        self._device_key = adapter
+        self.logger = mock_logging.get_device_logger("alba", adapter)
+        self.device_name = "Geberit AC ALBA"
+        self.is_variant_a = True
+        self.app: _Ble20AppLayer | None = None
+        self._server: _AriendiServerSide | None = None
+        self._server_task: asyncio.Task | None = None
+        self._arendi_security: AriendiSecurity | None = None
+
+    @property
+    def arendi_handshake_done(self) -> bool:
+        return self._arendi_security is not None and self._arendi_security.handshake_done
+
+    async def connect_async(self, device_id):
+        t0 = time.perf_counter()
+        self.device_address = device_id
+        # Fresh server + data-point store per connection, as AlbaMock.run() does per session.
+        self._server = _AriendiServerSide(logger=self.logger)
+        self.app = _Ble20AppLayer(device_key=self._device_key, logger=self.logger)
+        self._arendi_security = AriendiSecurity()
+        self._open_pipes()
+        self._server_task = asyncio.ensure_future(
+            self._server.run(self._notify, app_handler=self.app.dispatch))
+        await self._arendi_security.perform_handshake(self._raw_write)
+        self._arendi_security._ack_send_fn = self._raw_write
+        self.last_ble_ms = int((time.perf_counter() - t0) * 1000)
+        self.connection_status_changed_handlers(self, True, self.device_address, self.device_name)
+
+    async def _write_to_device(self, att_bytes: bytes) -> None:
+        self._server.feed(att_bytes)
+
+    async def _notify(self, att_bytes: bytes) -> None:
+        self._to_bridge.put(att_bytes)
+
+    async def _raw_write(self, att_bytes: bytes) -> None:
+        self._to_device.put(att_bytes)
+
+    async def _deliver_to_bridge(self, data: bytes) -> None:
+        # Same path as BluetoothLeConnector._on_data_received for Variant A.
+        for payload in self._arendi_security.feed_att_bytes(bytes(data)):
+            await self.data_received_handlers.invoke_async(payload)
+
+    async def send_message(self, data):
+        if self.arendi_handshake_done:
+            await self._arendi_security.send_data(data, self._raw_write)
+        else:
+            await self._raw_write(data)
+
+    async def send_message_cons(self, data):
+        await self.send_message(data)
+
+    async def disconnect(self):
+        if self._server is None:
+            return
+        self._server._rx_queue.put_nowait(('DISCONNECT', 0, b''))
+        if self._server_task is not None:
+            try:
+                await asyncio.wait_for(self._server_task, timeout=1.0)
+            except (asyncio.TimeoutError, Exception):
+                pass
+        self._server = None
+        self._server_task = None
+        self._arendi_security = None
+        await self._close_pipes()
+        self.connection_status_changed_handlers(self, False)
@@ -0,0 +1,217 @@
+"""
+Per-procedure response timeouts learned from observed latency.
+
+send_request() used to wait a fixed 5 s for every Mera call and Ble20Client
+30 s for every Alba read / write, so a device that stopped answering was only
+noticed after 5–30 s per call.  AdaptiveTimeouts keeps a latency histogram
+per (transport, call) — transport "bleak" or "esp32", call the CallStats key
+("0x01/0x0D", "dp 564 read") — and derives the timeout from it:
+
+    timeout = clamp(p99 × MULTIPLIER, FLOOR_S, default)
+
+p99 comes from the rolling 24 h window (the lifetime histogram when the
+window is still thin); until a key has MIN_SAMPLES samples the fixed default
+is used unchanged, so the ceiling is never worse than before.  Latency is
+request written → complete response.  A timeout does not feed the histogram
+(the true latency is unknown); instead the key's timeout is doubled, up to
+the default, until the next successful call — a proxy that suddenly slows
+down costs one fast failure, not a series of false ones.
+
+Timeouts raised with an adaptive value are tagged (CallTimeoutError or
+BLEPeripheralTimeoutError with adaptive=True) so the on-demand poll loop can
+tell "device stopped answering on an open link" from connect failures.
+
+Process-wide singleton ADAPTIVE_TIMEOUTS (clients are re-created for every
+on-demand session).  Pass persist_path to configure() to keep the learned
+histograms across restarts.  Never raises from record() / timeout_for().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from aquaclean_console_app.PollStats import _MetricStats
+
+logger = logging.getLogger(__name__)
+
+
+class CallTimeoutError(asyncio.TimeoutError):
+    """A single API call got no response within its (possibly learned) timeout."""
+
+    def __init__(self, message: str, key: str = "", timeout_s: Optional[float] = None, adaptive: bool = False):
+        super().__init__(message)
+        self.key = key
+        self.timeout_s = timeout_s
+        self.adaptive = adaptive
+
+
+def transport_of(connector) -> str:
+    """ "esp32" when the connector goes through an ESPHome proxy, else "bleak"."""
+    return "esp32" if getattr(connector, "esphome_host", None) else "bleak"
+
+
+def is_call_timeout(exc: Optional[BaseException]) -> bool:
+    """True for a tagged per-call timeout (see module docstring)."""
+    return exc is not None and getattr(exc, "adaptive", False) is True
+
+
+class _KeyState:
+    __slots__ = ("latency", "penalty", "cached_s", "cached_at")
+
+    def __init__(self):
+        self.latency = _MetricStats(histogram=True)
+        self.penalty = 1.0          # doubled per timeout, reset by a success
+        self.cached_s: Optional[float] = None
+        self.cached_at = 0.0
+
+
+class AdaptiveTimeouts:
+    """Learned per-(transport, call) timeouts.  See module docstring."""
+
+    MULTIPLIER = 3.0
+    FLOOR_S = 0.75
+    MIN_SAMPLES = 20
+    MAX_KEYS = 128
+    RECOMPUTE_S = 30.0
+    SAVE_INTERVAL = 300.0
+    _STATE_VERSION = 1
+
+    def __init__(self):
+        self.enabled = True
+        self._keys: dict[str, _KeyState] = {}
+        self._persist_path: Optional[str] = None
+        self._last_save = time.monotonic()
+
+    def configure(self, enabled: bool = True, persist_path: Optional[str] = None) -> None:
+        self.enabled = enabled
+        self._persist_path = persist_path or None
+        if self._persist_path:
+            self._load()
+
+    @staticmethod
+    def key(transport: str, call_key: str) -> str:
+        return f"{transport} {call_key}"
+
+    def _state(self, key: str) -> Optional[_KeyState]:
+        state = self._keys.get(key)
+        if state is None and len(self._keys) < self.MAX_KEYS:
+            state = self._keys[key] = _KeyState()
+        return state
+
+    def _learned_s(self, state: _KeyState, now: float) -> Optional[float]:
+        """p99 × MULTIPLIER in seconds (not yet clamped), or None while too few samples."""
+        if state.cached_s is not None and now - state.cached_at < self.RECOMPUTE_S:
+            return state.cached_s
+        window = state.latency.window("24h")
+        if window["count"] >= self.MIN_SAMPLES:
+            p99 = window["p99_ms"]
+        elif state.latency.count >= self.MIN_SAMPLES:
+            p99 = state.latency.percentiles()["p99_ms"]
+        else:
+            return None
+        state.cached_s = p99 / 1000 * self.MULTIPLIER
+        state.cached_at = now
+        return state.cached_s
+
+    def timeout_for(self, key: str, default_s: float) -> tuple[float, bool]:
+        """Return (timeout_s, adaptive) for the next call under key."""
+        try:
+            if not self.enabled:
+                return default_s, False
+            state = self._keys.get(key)
+            if state is None:
+                return default_s, False
+            learned = self._learned_s(state, time.monotonic())
+            if learned is None:
+                return default_s, False
+            timeout = min(max(learned, self.FLOOR_S) * state.penalty, default_s)
+            return timeout, timeout < default_s
+        except Exception:
+            return default_s, False
+
+    def record(self, key: str, latency_ms: Optional[float] = None, timeout: bool = False) -> None:
+        """Feed one completed call (latency_ms) or one timeout into key's state."""
+        try:
+            state = self._state(key)
+            if state is None:
+                return
+            if timeout:
+                state.penalty = min(state.penalty * 2, 64.0)
+            elif latency_ms is not None:
+                state.latency.record(latency_ms)
+                state.penalty = 1.0
+            if self._persist_path and time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+                self.save()
+        except Exception:
+            pass
+
+    def reset(self) -> None:
+        self._keys.clear()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self) -> None:
+        """Write the learned histograms to persist_path (atomic replace).  Never raises."""
+        if not self._persist_path:
+            return
+        self._last_save = time.monotonic()
+        try:
+            state = {
+                "version": self._STATE_VERSION,
+                "saved_at": time.time(),
+                "keys": {key: s.latency.to_state() for key, s in self._keys.items()},
+            }
+            tmp = f"{self._persist_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self._persist_path)
+        except Exception as e:
+            logger.warning(f"AdaptiveTimeouts: could not save {self._persist_path}: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self._persist_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"AdaptiveTimeouts: could not read {self._persist_path}: {e} — starting fresh")
+            return
+        if state.get("version") != self._STATE_VERSION:
+            logger.info(f"AdaptiveTimeouts: {self._persist_path} has an unknown version — starting fresh")
+            return
+        try:
+            for key, k_state in state.get("keys", {}).items():
+                entry = self._state(key)
+                if entry is not None:
+                    entry.latency.load_state(k_state)
+            logger.info(f"AdaptiveTimeouts: restored {len(self._keys)} call(s) from {self._persist_path}")
+        except Exception as e:
+            logger.warning(f"AdaptiveTimeouts: corrupt state in {self._persist_path}: {e} — starting fresh")
+            self._keys.clear()
+
+    # ── Views ────────────────────────────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        """Per key: samples, p99_ms, timeout_ms (before the per-call default caps it; None until learned), penalty."""
+        now = time.monotonic()
+        result = {}
+        for key in sorted(self._keys):
+            state = self._keys[key]
+            learned = self._learned_s(state, now)
+            result[key] = {
+                "samples":    state.latency.count,
+                "p99_ms":     state.latency.percentiles()["p99_ms"],
+                "timeout_ms": int(max(learned, self.FLOOR_S) * state.penalty * 1000) if learned is not None else None,
+                "penalty":    state.penalty,
+            }
+        return {"enabled": self.enabled, "multiplier": self.MULTIPLIER,
+                "floor_ms": int(self.FLOOR_S * 1000), "calls": result}
+
+
+ADAPTIVE_TIMEOUTS = AdaptiveTimeouts()
@@ -0,0 +1,264 @@
+"""
+BLE airtime budget: token buckets per priority class across every caller.
+
+The device stops answering when it gets too many calls in a short time (see
+the init-sequence notes in AquaCleanBaseClient.subscribe_notifications_async),
+and on-demand mode is credited with keeping it alive for longer because it
+leaves the link idle between polls.  Until now nothing limited the calls
+REST, MQTT, background polls and the settings refresh issued together.
+AirtimeGovernor (one per device, ServiceMode.airtime) does:
+
+  - Every BLE call (Mera request, Alba DpId read / write) is charged to the
+    priority class of the work that makes it — BleScheduler.CURRENT_PRIORITY:
+    COMMAND, READ or POLL; READ when unknown.  The client's call_budget_hook
+    awaits spend() before each call.
+  - [SERVICE] call_budget gives each class a token bucket: calls per minute,
+    at most one minute's worth saved up.  A call without a token waits for
+    one, at most MAX_DELAY_S, then it goes anyway and the debt is paid back
+    by later calls.
+  - Background polls are shed rather than delayed: admit(POLL, calls)
+    refuses a poll before its session opens while the POLL bucket holds
+    fewer than its planned calls (at most a full bucket) or less than
+    POLL_RESERVE of its size, or while the link was connected for more than
+    [SERVICE] airtime_budget_s seconds in the last WINDOW_S.  The poll loop
+    skips that cycle.  An admitted on-demand poll therefore does not wait
+    for tokens while its session holds the link and a proxy slot.  If it
+    makes more calls than planned, each extra call waits at most
+    MAX_DELAY_S, and the debt sheds the polls after it.
+  - Calls per class (last minute / hour), connected seconds (last hour),
+    delays and shed polls: GET /info/airtime and the aquaclean_airtime_*
+    metrics.
+
+With the defaults (command:120, read:120, poll:60 — an on-demand poll makes
+2-3 calls, the first one of a session about 40) normal operation never
+waits; the budget only bites when several callers pile up.
+
+Single event loop only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Optional
+
+from aquaclean_console_app import BridgeMetrics
+from aquaclean_console_app.BleScheduler import CURRENT_PRIORITY, Priority
+from aquaclean_console_app.BridgeConfig import DEFAULT_CALL_BUDGET, parse_call_budget as _parse_call_budget
+from aquaclean_console_app.PollStats import _MetricStats
+
+logger = logging.getLogger(__name__)
+
+
+def parse_call_budget(raw: str) -> dict[Priority, Optional[float]]:
+    """[SERVICE] call_budget → calls per minute per Priority (None = unlimited).
+
+    See BridgeConfig.parse_call_budget; raises ValueError like it."""
+    return {Priority[name.upper()]: per_min for name, per_min in _parse_call_budget(raw).items()}
+
+
+class _TokenBucket:
+    """per_min tokens per minute, at most per_min saved up.  Taking from an empty bucket goes into debt."""
+
+    __slots__ = ("per_min", "tokens", "_updated")
+
+    def __init__(self, per_min: float, now: float):
+        self.per_min = per_min
+        self.tokens = per_min
+        self._updated = now
+
+    def level(self, now: float) -> float:
+        self.tokens = min(self.per_min, self.tokens + (now - self._updated) * self.per_min / 60)
+        self._updated = now
+        return self.tokens
+
+    def take(self, now: float) -> float:
+        """Take one token; return the seconds until it is covered (0 = available now)."""
+        tokens = self.level(now)
+        self.tokens = tokens - 1
+        return 0.0 if tokens >= 1 else (1 - tokens) * 60 / self.per_min
+
+
+class _Rolling:
+    """Event counts in SLOT_S slots over the last hour."""
+
+    SLOT_S = 10
+    __slots__ = ("_slots",)
+
+    def __init__(self):
+        self._slots: collections.deque = collections.deque()   # [slot, count]
+
+    def add(self, now: float) -> None:
+        slot = int(now // self.SLOT_S)
+        if self._slots and self._slots[-1][0] == slot:
+            self._slots[-1][1] += 1
+        else:
+            self._slots.append([slot, 1])
+            while self._slots[0][0] <= slot - 3600 // self.SLOT_S:
+                self._slots.popleft()
+
+    def total(self, now: float, window_s: float) -> int:
+        first = int((now - window_s) // self.SLOT_S) + 1
+        return sum(n for slot, n in self._slots if slot >= first)
+
+
+class _ClassBudget:
+    __slots__ = ("bucket", "calls", "calls_total", "delayed", "delay", "shed")
+
+    def __init__(self):
+        self.bucket: Optional[_TokenBucket] = None
+        self.calls = _Rolling()
+        self.calls_total = 0
+        self.delayed = 0
+        self.delay = _MetricStats()
+        self.shed = 0
+
+
+class AirtimeGovernor:
+    """Call and connection budget of one device.  See module docstring."""
+
+    MAX_DELAY_S = 2.0        # longest a call waits for a token
+    POLL_RESERVE = 0.25      # polls are shed while the POLL bucket is below this fraction
+    WINDOW_S = 3600.0        # window of the connected-seconds budget
+
+    def __init__(self, device: str = "", clock=time.monotonic, sleep=asyncio.sleep):
+        self.device = device
+        self._clock = clock
+        self._sleep = sleep
+        self._classes = {p: _ClassBudget() for p in Priority}
+        self.airtime_budget_s = 0.0
+        self._links: collections.deque = collections.deque()   # (opened, closed) in the last WINDOW_S
+        self._open_since: Optional[float] = None
+        self._shedding = False
+        self.configure(parse_call_budget(DEFAULT_CALL_BUDGET))
+
+    def configure(self, call_budget: dict, airtime_budget_s: float = 0.0) -> None:
+        now = self._clock()
+        for priority, per_min in call_budget.items():
+            self._classes[priority].bucket = _TokenBucket(per_min, now) if per_min else None
+        self.airtime_budget_s = airtime_budget_s
+
+    # ── Calls ────────────────────────────────────────────────────────────────
+
+    async def spend(self, priority: Optional[Priority] = None) -> None:
+        """Charge one BLE call; wait for a token if the class is over budget.  Await before each call."""
+        if priority is None:
+            priority = CURRENT_PRIORITY.get()
+        priority = Priority.READ if priority is None else Priority(priority)
+        stats = self._classes[priority]
+        now = self._clock()
+        stats.calls.add(now)
+        stats.calls_total += 1
+        label = priority.name.lower()
+        BridgeMetrics.AIRTIME_CALLS.inc(self.device, label)
+        if stats.bucket is None:
+            return
+        wait = stats.bucket.take(now)
+        BridgeMetrics.AIRTIME_BUDGET_USED.set(self._used(stats, now), self.device, label)
+        if wait <= 0:
+            return
+        wait = min(wait, self.MAX_DELAY_S)
+        stats.delayed += 1
+        stats.delay.record(wait * 1000)
+        BridgeMetrics.AIRTIME_DELAYED.inc(self.device, label)
+        logger.debug(f"AirtimeGovernor{f' [{self.device}]' if self.device else ''}: {label} call "
+                     f"over budget — waiting {wait:.2f}s")
+        await self._sleep(wait)
+
+    @staticmethod
+    def _used(stats: _ClassBudget, now: float) -> Optional[float]:
+        bucket = stats.bucket
+        if bucket is None:
+            return None
+        return round(min(1.0, max(0.0, 1 - bucket.level(now) / bucket.per_min)), 3)
+
+    def admit(self, priority: Priority = Priority.POLL, calls: int = 1) -> bool:
+        """Whether background work of this class, making about `calls` BLE calls, may start now.
+        Only POLL is ever refused."""
+        if priority != Priority.POLL:
+            return True
+        now = self._clock()
+        stats = self._classes[Priority.POLL]
+        reason = None
+        bucket = stats.bucket
+        if bucket is not None and bucket.level(now) < max(bucket.per_min * self.POLL_RESERVE,
+                                                          min(calls, bucket.per_min)):
+            reason = (f"poll call budget low ({bucket.tokens:.1f} of {bucket.per_min:g} calls left, "
+                      f"{calls} planned)")
+        elif self.airtime_budget_s and self.connected_s(now) >= self.airtime_budget_s:
+            reason = (f"connected {self.connected_s(now):.0f}s in the last {self.WINDOW_S / 60:.0f} min "
+                      f"(airtime_budget_s={self.airtime_budget_s:g})")
+        if reason is None:
+            if self._shedding:
+                logger.info(f"AirtimeGovernor{f' [{self.device}]' if self.device else ''}: polling resumes")
+            self._shedding = False
+            return True
+        stats.shed += 1
+        BridgeMetrics.AIRTIME_SHED.inc(self.device, "poll")
+        if not self._shedding:
+            logger.info(f"AirtimeGovernor{f' [{self.device}]' if self.device else ''}: skipping polls — {reason}")
+        self._shedding = True
+        return False
+
+    # ── Connected seconds ────────────────────────────────────────────────────
+
+    def link_opened(self) -> None:
+        if self._open_since is None:
+            self._open_since = self._clock()
+
+    def link_closed(self) -> None:
+        if self._open_since is None:
+            return
+        now = self._clock()
+        self._links.append((self._open_since, now))
+        self._open_since = None
+        BridgeMetrics.AIRTIME_CONNECTED_SECONDS.set(self.connected_s(now), self.device)
+
+    def connected_s(self, now: Optional[float] = None) -> float:
+        """Seconds the link was connected in the last WINDOW_S."""
+        now = self._clock() if now is None else now
+        start = now - self.WINDOW_S
+        while self._links and self._links[0][1] <= start:
+            self._links.popleft()
+        total = sum(closed - max(opened, start) for opened, closed in self._links)
+        if self._open_since is not None:
+            total += now - max(self._open_since, start)
+        return total
+
+    # ── Views ────────────────────────────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        """Per class: budget, tokens left, share used, calls in the last minute / hour, delays, shed
+        polls; connected seconds in the last hour against airtime_budget_s."""
+        now = self._clock()
+        classes = {}
+        for priority, stats in self._classes.items():
+            label = priority.name.lower()
+            used = self._used(stats, now)
+            BridgeMetrics.AIRTIME_BUDGET_USED.set(used, self.device, label)
+            classes[label] = {
+                "per_min":  stats.bucket.per_min if stats.bucket else None,
+                "tokens":   round(stats.bucket.tokens, 1) if stats.bucket else None,
+                "used":     used,
+                "calls_1m": stats.calls.total(now, 60),
+                "calls_1h": stats.calls.total(now, 3600),
+                "calls":    stats.calls_total,
+                "delayed":  stats.delayed,
+                "delay_ms": stats.delay.to_dict(),
+                "shed":     stats.shed,
+            }
+        connected = self.connected_s(now)
+        BridgeMetrics.AIRTIME_CONNECTED_SECONDS.set(connected, self.device)
+        return {
+            "classes": classes,
+            "airtime": {
+                "connected":    self._open_since is not None,
+                "connected_s":  round(connected, 1),
+                "window_s":     self.WINDOW_S,
+                "budget_s":     self.airtime_budget_s or None,
+                "used":         round(connected / self.airtime_budget_s, 3) if self.airtime_budget_s else None,
+            },
+            "shedding": self._shedding,
+        }
@@ -0,0 +1,200 @@
+"""
+Priority scheduling of on-demand BLE sessions.
+
+In on-demand mode every REST call, MQTT command and background poll opens its
+own BLE session (connect → API calls → disconnect), and only one session can
+be open at a time.  A plain FIFO lock makes a "toggle lid" that arrives during
+the first poll (_fetch_state_and_info, ~25 calls) wait for the whole session
+plus its own connect.  BleScheduler replaces that lock:
+
+  - Waiting sessions are started in priority order — COMMAND, then READ, then
+    POLL — and FIFO within a class.
+  - While a session is open, a waiting request of a *higher* class does not
+    wait for it to finish: the running session calls serve_pending() at its
+    preemption points — between two complete steps of its work, never inside
+    a sequence of calls that must stay together (ApiMode._preemption_point) —
+    which runs the waiting request on the already-open link and hands the
+    result back to its caller.  The lower-priority session then carries on
+    where it was.
+
+Queue wait (submit → start of execution, on its own session or on a borrowed
+link) is kept per class; see to_dict().
+
+While a request runs, CURRENT_PRIORITY holds its class, so the BLE calls it
+makes are charged to that class's budget (AirtimeGovernor).
+
+Single event loop only; no locking beyond asyncio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+
+from aquaclean_console_app.PollStats import _MetricStats
+from aquaclean_console_app import BridgeMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    COMMAND = 0   # interactive: commands, setting writes
+    READ    = 1   # explicit REST / MQTT reads
+    POLL    = 2   # background polls and slow-tier refreshes
+
+
+# Class of the BLE work running in the current task (None = not set by anybody).
+CURRENT_PRIORITY: contextvars.ContextVar = contextvars.ContextVar("ble_priority", default=None)
+
+_GRANTED = object()
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "action", "future", "submitted")
+
+    def __init__(self, priority: Priority, seq: int, action):
+        self.priority = priority
+        self.seq = seq
+        self.action = action
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.submitted = time.perf_counter()
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ClassStats:
+    __slots__ = ("sessions", "piggybacked", "queue_wait")
+
+    def __init__(self):
+        self.sessions = 0
+        self.piggybacked = 0
+        self.queue_wait = _MetricStats(histogram=True)
+
+
+class BleScheduler:
+    """Grants the single on-demand BLE session by priority.  See module docstring."""
+
+    def __init__(self):
+        self._waiting: list[_Ticket] = []      # heap
+        self._seq = itertools.count()
+        self._holder: _Ticket | None = None
+        self._serving = False
+        self._stats = {p: _ClassStats() for p in Priority}
+
+    @property
+    def busy(self) -> bool:
+        return self._holder is not None
+
+    def waiting(self, priority: Priority | None = None) -> int:
+        return sum(1 for t in self._waiting
+                   if not t.future.done() and (priority is None or t.priority == priority))
+
+    def _record_wait(self, ticket: _Ticket, piggybacked: bool) -> None:
+        wait_ms = (time.perf_counter() - ticket.submitted) * 1000
+        stats = self._stats[ticket.priority]
+        if piggybacked:
+            stats.piggybacked += 1
+        else:
+            stats.sessions += 1
+        stats.queue_wait.record(wait_ms)
+        BridgeMetrics.BLE_QUEUE_WAIT_SECONDS.observe(wait_ms / 1000, ticket.priority.name.lower())
+
+    def _grant_next(self) -> None:
+        while self._waiting:
+            ticket = heapq.heappop(self._waiting)
+            if ticket.future.done():
+                continue   # cancelled while waiting, or already served on a borrowed link
+            self._holder = ticket
+            ticket.future.set_result(_GRANTED)
+            return
+
+    async def run(self, priority: Priority, session, action):
+        """Run session(action) exclusively, in priority order, and return its result.
+
+        session — coroutine function that opens the link, runs action(client)
+                  and closes the link (ApiMode._on_demand_inner).
+        action  — the work itself, action(client).  Passed separately so a
+                  running lower-priority session can execute it on its open
+                  link via serve_pending(); then session is never called and
+                  the result of that run is returned instead.
+        """
+        ticket = _Ticket(Priority(priority), next(self._seq), action)
+        if self._holder is None and not self.waiting():
+            self._holder = ticket
+        else:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                outcome = await ticket.future
+            except asyncio.CancelledError:
+                if ticket.future.done() and not ticket.future.cancelled() \
+                        and ticket.future.exception() is None and ticket.future.result() is _GRANTED:
+                    # Granted and cancelled in the same loop iteration — pass the session on.
+                    self._holder = None
+                    self._grant_next()
+                raise
+            if outcome is not _GRANTED:
+                return outcome[0]
+        self._record_wait(ticket, piggybacked=False)
+        token = CURRENT_PRIORITY.set(ticket.priority)
+        try:
+            return await session(action)
+        finally:
+            CURRENT_PRIORITY.reset(token)
+            if self._holder is ticket:
+                self._holder = None
+            self._grant_next()
+
+    async def serve_pending(self, runner) -> None:
+        """Run every waiting request of higher priority than the open session on its link.
+
+        runner — coroutine function runner(action) that runs one action on the
+                 open client and returns its result.  Called from the running
+                 session at its preemption points; re-entrant calls (from the
+                 served action itself) return immediately.
+        """
+        holder = self._holder
+        if holder is None or self._serving:
+            return
+        self._serving = True
+        try:
+            while self._waiting and self._waiting[0].priority < holder.priority:
+                ticket = heapq.heappop(self._waiting)
+                if ticket.future.done():
+                    continue
+                self._record_wait(ticket, piggybacked=True)
+                logger.debug(f"BleScheduler: {ticket.priority.name} request runs on the open "
+                             f"{holder.priority.name} session")
+                token = CURRENT_PRIORITY.set(ticket.priority)
+                try:
+                    result = await runner(ticket.action)
+                except asyncio.CancelledError:
+                    ticket.future.cancel()
+                    raise
+                except Exception as e:
+                    if not ticket.future.done():
+                        ticket.future.set_exception(e)
+                    continue
+                finally:
+                    CURRENT_PRIORITY.reset(token)
+                if not ticket.future.done():
+                    ticket.future.set_result((result,))
+        finally:
+            self._serving = False
+
+    def to_dict(self) -> dict:
+        """Per priority class: sessions started, requests served on a borrowed link, queue wait."""
+        return {
+            p.name.lower(): {
+                "waiting":       self.waiting(p),
+                "sessions":      s.sessions,
+                "piggybacked":   s.piggybacked,
+                "queue_wait_ms": s.queue_wait.to_dict(),
+            }
+            for p, s in self._stats.items()
+        }
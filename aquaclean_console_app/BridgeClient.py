@@ -0,0 +1,125 @@
+"""
+--mode cli through a running bridge.
+
+A one-shot CLI command used to open its own BLE connection — ESP32 API
+connect, scan, connect, subscribe sequence, query, disconnect — even when a
+--mode api bridge was running and already connected (or already holding the
+device's only BLE link).  run_cli() now first probes the bridge's REST API on
+this machine ([API] port, GET /version with a short timeout).  If a bridge
+answers, the command is sent to the matching REST route and goes through the
+bridge's own BLE scheduler: the persistent connection or the next on-demand
+session, cached identification and state, commands batched with everything
+else.  Only when no bridge answers does the CLI connect directly.
+
+ROUTES lists the CLI commands that have a REST equivalent.  Commands without
+one (check-config, esp32-*, HA discovery, ...) never need the device and stay
+local; --direct, or an --address other than [BLE] device_id, skips the bridge.
+
+Stdlib only (urllib), so the CLI start-up does not pay for an HTTP client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import urllib.error
+import urllib.parse
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT_S = 0.3       # a local bridge answers /version in a few ms
+REQUEST_TIMEOUT_S = 120.0   # on-demand: queueing behind a poll + a full BLE session
+
+_COMMANDS = (
+    "toggle-lid", "toggle-anal", "toggle-lady", "toggle-dryer", "toggle-orientation-light",
+    "reset-filter-counter", "trigger-flush-manually",
+    "prepare-descaling", "confirm-descaling", "cancel-descaling", "postpone-descaling",
+    "start-cleaning-device", "execute-next-cleaning-step",
+    "start-lid-calibration", "lid-offset-save", "lid-offset-increment", "lid-offset-decrement",
+)
+
+_DATA = (
+    "system-parameters", "user-sitting-state", "anal-shower-state", "lady-shower-state",
+    "dryer-state", "identification", "initial-operation-date", "node-list", "soc-versions",
+    "firmware-version-list", "statistics-descale", "filter-status", "profile-settings", "batch",
+)
+
+# CLI command → (HTTP method, path)
+ROUTES = {
+    "status":            ("GET", "/status"),
+    "info":              ("GET", "/info"),
+    "performance-stats": ("GET", "/info/performance"),
+    **{name: ("GET", f"/data/{name}") for name in _DATA},
+    **{name: ("POST", f"/command/{name}") for name in _COMMANDS},
+}
+
+# CLI commands whose direct-BLE result is a subset of the bridge's response.
+_STATUS_KEYS = ("is_user_sitting", "is_anal_shower_running", "is_lady_shower_running", "is_dryer_running")
+
+
+class BridgeError(Exception):
+    """The bridge answered with an error.  code = ErrorCodes code (E....) or None."""
+
+    def __init__(self, status: int, code: str | None, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def bridge_url(host: str, port: int) -> str:
+    """[API] host/port → base URL on this machine (a wildcard bind is reached via loopback)."""
+    if host in ("", "0.0.0.0", "::"):
+        host = "127.0.0.1"
+    if ":" in host:
+        host = f"[{host}]"
+    return f"http://{host}:{port}"
+
+
+def _request(url: str, method: str, timeout: float):
+    req = urllib.request.Request(url, method=method, headers={"Accept": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+async def probe(base_url: str, timeout: float = PROBE_TIMEOUT_S) -> str | None:
+    """Version string of the bridge at base_url, or None if none answers."""
+    try:
+        status, body = await asyncio.to_thread(_request, f"{base_url}/version", "GET", timeout)
+        if status == 200:
+            return json.loads(body).get("version")
+    except (OSError, ValueError) as e:
+        logger.debug(f"BridgeClient: no bridge at {base_url}: {e}")
+    return None
+
+
+async def run(base_url: str, command: str, items: str = "", fmt: str = "json",
+              timeout: float = REQUEST_TIMEOUT_S):
+    """Execute command on the bridge → the data the direct CLI path would return.
+
+    Raises BridgeError for an error response and OSError if the bridge went away."""
+    method, path = ROUTES[command]
+    query = {}
+    if command == "batch":
+        query["items"] = items
+    elif command == "performance-stats":
+        query["format"] = fmt
+    url = f"{base_url}{path}" + (f"?{urllib.parse.urlencode(query)}" if query else "")
+    status, body = await asyncio.to_thread(_request, url, method, timeout)
+    text = body.decode("utf-8", errors="replace")
+    if status >= 400:
+        try:
+            error = json.loads(text)["detail"]["error"]
+            raise BridgeError(status, error.get("code"), error.get("message") or text)
+        except (ValueError, KeyError, TypeError):
+            raise BridgeError(status, None, f"Bridge returned HTTP {status}: {text}") from None
+    data = text if command == "performance-stats" and fmt == "markdown" else json.loads(text)
+    if command == "status":
+        data = {k: data.get(k) for k in _STATUS_KEYS}
+    elif method == "POST":
+        data = {k: v for k, v in data.items() if k not in ("status", "command")}
+    return data
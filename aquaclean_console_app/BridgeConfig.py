@@ -0,0 +1,278 @@
+"""
+config.ini — loaded once, shared by every mode.
+
+main.py used to read config.ini itself, so anything that needed a setting
+(check-config, get-config, the CLI's --version) had to import main.py and with
+it bleak, the clients and the MQTT service.  The ConfigParser lives here, next
+to the validation run by check-config and at service/api start-up; main.py
+imports the same object, so settings changed at runtime (--ha-discovery) are
+seen everywhere.
+
+Several devices in one process: [DEVICES] names lists them and each gets a
+[DEVICE <name>] section; device_config() builds the config one device's
+ServiceMode / ApiMode reads (see TransportScheduler.py for the shared BLE
+transport).
+
+[SERVICE] call_budget is parsed here (parse_call_budget) rather than in
+AirtimeGovernor, so check-config does not pull in asyncio.
+
+Stdlib only; FieldCatalog is imported when [POLL] fields are validated.
+"""
+
+import configparser
+import os
+import re
+
+iniFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+config = configparser.ConfigParser(allow_no_value=False, inline_comment_prefixes=('#',))
+config.read(iniFile)
+
+_MAC_RE = r'^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$'
+_DEVICE_NAME_RE = r'^[a-z0-9_-]+$'
+
+# [DEVICE <name>] key → (section, key) it overrides in that device's config
+DEVICE_KEYS = {
+    "device_id": ("BLE",  "device_id"),
+    "topic":     ("MQTT", "topic"),
+    "interval":  ("POLL", "interval"),
+    "fields":    ("POLL", "fields"),
+}
+
+# [SERVICE] call_budget: BLE calls per minute per priority class (BleScheduler.Priority names)
+CALL_BUDGET_CLASSES = ("command", "read", "poll")
+DEFAULT_CALL_BUDGET = "command:120, read:120, poll:60"
+
+
+def parse_call_budget(raw: str) -> dict:
+    """[SERVICE] call_budget → {class: calls per minute, None = unlimited} for CALL_BUDGET_CLASSES.
+
+    "command:120, read:120, poll:60"; a class left out or set to 0 is not limited.
+    Raises ValueError for an unknown class or a value that is not a number >= 0."""
+    budget = dict.fromkeys(CALL_BUDGET_CLASSES)
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, value = entry.partition(":")
+        name = name.strip().lower()
+        if name not in budget:
+            raise ValueError(f"unknown priority class {name!r} ({', '.join(CALL_BUDGET_CLASSES)})")
+        per_min = float(value) if sep else -1.0
+        if per_min < 0:
+            raise ValueError(f"{entry!r} — expected {name}:<calls per minute >= 0>")
+        budget[name] = per_min or None
+    return budget
+
+
+def device_names(cfg=None) -> list[str]:
+    """[DEVICES] names — empty when a single device is configured in [BLE] (the default)."""
+    cfg = config if cfg is None else cfg
+    raw = cfg.get("DEVICES", "names", fallback="")
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def device_section(name: str) -> str:
+    return f"DEVICE {name}"
+
+
+def device_config(name: str = "", cfg=None) -> configparser.ConfigParser:
+    """The config one device's ServiceMode / ApiMode reads.
+
+    name "" (single device) → the shared config itself.  Otherwise a copy in
+    which the keys of [DEVICE <name>] replace their DEVICE_KEYS counterparts;
+    the MQTT topic defaults to <[MQTT] topic>/<name>, and the MQTT client id,
+    [POLL] stats_file, usage_file and history_dir get a -<name> suffix so devices
+    never share them."""
+    cfg = config if cfg is None else cfg
+    if not name:
+        return cfg
+    copy = configparser.ConfigParser(allow_no_value=False, inline_comment_prefixes=('#',))
+    copy.read_dict({section: dict(cfg.items(section, raw=True)) for section in cfg.sections()})
+    for section in ("BLE", "MQTT", "POLL"):
+        if not copy.has_section(section):
+            copy.add_section(section)
+    copy.set("MQTT", "topic", f"{cfg.get('MQTT', 'topic', fallback='Geberit/AquaClean')}/{name}")
+    if copy.has_option("MQTT", "client"):
+        copy.set("MQTT", "client", f"{copy.get('MQTT', 'client', raw=True)}-{name}")
+    for option in ("stats_file", "usage_file"):
+        path = copy.get("POLL", option, fallback="").strip()
+        if path:
+            stem, ext = os.path.splitext(path)
+            copy.set("POLL", option, f"{stem}-{name}{ext}")
+    history_dir = copy.get("POLL", "history_dir", fallback="").strip()
+    if history_dir:
+        copy.set("POLL", "history_dir", f"{history_dir.rstrip('/')}-{name}")
+    overrides = cfg[device_section(name)] if cfg.has_section(device_section(name)) else {}
+    for key, (section, option) in DEVICE_KEYS.items():
+        if key in overrides:
+            copy.set(section, option, overrides.get(key))
+    return copy
+
+
+def _check_device_errors(names: list[str], cfg=None) -> list[str]:
+    cfg = config if cfg is None else cfg
+    errors = []
+    seen = {}
+    for name in names:
+        section = device_section(name)
+        if not re.match(_DEVICE_NAME_RE, name):
+            errors.append(f"[DEVICES] names — {name!r}: use lower-case letters, digits, '-' and '_'")
+        if not cfg.has_section(section):
+            errors.append(f"[{section}] is missing (listed in [DEVICES] names)")
+            continue
+        device_id = cfg.get(section, "device_id", fallback="")
+        if not re.match(_MAC_RE, device_id):
+            errors.append(f"[{section}] device_id={device_id!r} — expected MAC address XX:XX:XX:XX:XX:XX")
+        elif device_id.upper() in seen:
+            errors.append(f"[{section}] device_id={device_id!r} — already used by [{device_section(seen[device_id.upper()])}]")
+        else:
+            seen[device_id.upper()] = name
+    if len(set(names)) != len(names):
+        errors.append("[DEVICES] names — duplicate device name")
+    try:
+        slots = int(cfg.get("DEVICES", "max_connections", fallback="1"))
+        if slots < 1:
+            errors.append(f"[DEVICES] max_connections={slots} — must be >= 1")
+        elif (len(names) > slots
+              and cfg.get("SERVICE", "ble_connection", fallback="persistent") == "persistent"):
+            errors.append(
+                f"[DEVICES] {len(names)} devices with ble_connection = persistent need "
+                f"max_connections >= {len(names)} (is {slots}); or use ble_connection = on-demand"
+            )
+    except ValueError:
+        errors.append(f"[DEVICES] max_connections={cfg.get('DEVICES', 'max_connections', fallback='')!r} — must be an integer")
+    return errors
+
+
+def check_config_errors() -> list[str]:
+    """Return a list of configuration error strings. Empty list means config is valid."""
+    errors = []
+
+    # [BLE] device_id — required, MAC address format; [DEVICE <name>] device_id per device instead
+    names = device_names()
+    if names:
+        errors += _check_device_errors(names)
+    else:
+        try:
+            device_id = config.get("BLE", "device_id")
+            if not re.match(_MAC_RE, device_id):
+                errors.append(
+                    f"[BLE] device_id={device_id!r} — expected MAC address XX:XX:XX:XX:XX:XX"
+                )
+        except Exception:
+            errors.append("[BLE] device_id is missing (required)")
+
+    # [SERVICE] ble_connection — enum
+    ble_connection = config.get("SERVICE", "ble_connection", fallback="persistent")
+    if ble_connection not in ("persistent", "on-demand"):
+        errors.append(
+            f"[SERVICE] ble_connection={ble_connection!r} — must be 'persistent' or 'on-demand'"
+        )
+
+    # [ESPHOME] esphome_api_connection — enum
+    esphome_api_conn = config.get("ESPHOME", "esphome_api_connection", fallback="on-demand")
+    if esphome_api_conn not in ("persistent", "on-demand"):
+        errors.append(
+            f"[ESPHOME] esphome_api_connection={esphome_api_conn!r} — must be 'persistent' or 'on-demand'"
+        )
+
+    # [ESPHOME] port — integer
+    try:
+        port = int(config.get("ESPHOME", "port", fallback="6053"))
+        if not (1 <= port <= 65535):
+            errors.append(f"[ESPHOME] port={port} — must be 1–65535")
+    except ValueError:
+        errors.append(f"[ESPHOME] port={config.get('ESPHOME', 'port', fallback='')!r} — must be an integer")
+
+    # [API] port — integer
+    try:
+        api_port = int(config.get("API", "port", fallback="8080"))
+        if not (1 <= api_port <= 65535):
+            errors.append(f"[API] port={api_port} — must be 1–65535")
+    except ValueError:
+        errors.append(f"[API] port={config.get('API', 'port', fallback='')!r} — must be an integer")
+
+    # [POLL] interval — non-negative float
+    try:
+        interval = float(config.get("POLL", "interval", fallback="0"))
+        if interval < 0:
+            errors.append(f"[POLL] interval={interval} — must be >= 0")
+    except ValueError:
+        errors.append(f"[POLL] interval={config.get('POLL', 'interval', fallback='')!r} — must be a number")
+
+    # [POLL] fields — field / group names known to FieldCatalog
+    from aquaclean_console_app import FieldCatalog
+    try:
+        FieldCatalog.plan(config.get("POLL", "fields", fallback=""))
+    except ValueError as e:
+        errors.append(f"[POLL] fields — {e}")
+
+    # [POLL] settings_per_poll — non-negative integer
+    try:
+        per_poll = int(config.get("POLL", "settings_per_poll", fallback="1"))
+        if per_poll < 0:
+            errors.append(f"[POLL] settings_per_poll={per_poll} — must be >= 0")
+    except ValueError:
+        errors.append(f"[POLL] settings_per_poll={config.get('POLL', 'settings_per_poll', fallback='')!r} — must be an integer")
+
+    # [POLL] history_raw_days — positive number
+    try:
+        raw_days = float(config.get("POLL", "history_raw_days", fallback="7"))
+        if raw_days <= 0:
+            errors.append(f"[POLL] history_raw_days={raw_days} — must be > 0")
+    except ValueError:
+        errors.append(f"[POLL] history_raw_days={config.get('POLL', 'history_raw_days', fallback='')!r} — must be a number")
+
+    # [SERVICE] command_batch_window_ms — non-negative integer
+    try:
+        batch_window = int(config.get("SERVICE", "command_batch_window_ms", fallback="150"))
+        if batch_window < 0:
+            errors.append(f"[SERVICE] command_batch_window_ms={batch_window} — must be >= 0")
+    except ValueError:
+        errors.append(
+            f"[SERVICE] command_batch_window_ms={config.get('SERVICE', 'command_batch_window_ms', fallback='')!r}"
+            " — must be an integer"
+        )
+
+    # [SERVICE] loop_stall_threshold_ms — positive number
+    try:
+        stall_threshold = float(config.get("SERVICE", "loop_stall_threshold_ms", fallback="250"))
+        if stall_threshold <= 0:
+            errors.append(f"[SERVICE] loop_stall_threshold_ms={stall_threshold} — must be > 0")
+    except ValueError:
+        errors.append(
+            f"[SERVICE] loop_stall_threshold_ms={config.get('SERVICE', 'loop_stall_threshold_ms', fallback='')!r}"
+            " — must be a number"
+        )
+
+    # [SERVICE] call_budget — class:calls-per-minute list; airtime_budget_s — number >= 0
+    try:
+        parse_call_budget(config.get("SERVICE", "call_budget", fallback=DEFAULT_CALL_BUDGET))
+    except ValueError as e:
+        errors.append(f"[SERVICE] call_budget: {e}")
+    try:
+        airtime_budget = float(config.get("SERVICE", "airtime_budget_s", fallback="0"))
+        if airtime_budget < 0:
+            errors.append(f"[SERVICE] airtime_budget_s={airtime_budget} — must be >= 0")
+    except ValueError:
+        errors.append(
+            f"[SERVICE] airtime_budget_s={config.get('SERVICE', 'airtime_budget_s', fallback='')!r}"
+            " — must be a number"
+        )
+
+    # [LOGGING] log_level — known level
+    valid_levels = {"SILLY", "TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+    log_level = config.get("LOGGING", "log_level", fallback="DEBUG").upper()
+    if log_level not in valid_levels:
+        errors.append(
+            f"[LOGGING] log_level={log_level!r} — must be one of {sorted(valid_levels)}"
+        )
+
+    # [ESPHOME] log_level — known level
+    esphome_log_level = config.get("ESPHOME", "log_level", fallback="INFO").upper()
+    if esphome_log_level not in valid_levels:
+        errors.append(
+            f"[ESPHOME] log_level={esphome_log_level!r} — must be one of {sorted(valid_levels)}"
+        )
+
+    return errors
@@ -0,0 +1,310 @@
+"""
+OpenMetrics (Prometheus) exposition of bridge internals — served at GET /metrics.
+
+Metric families are module-level singletons updated incrementally where the
+event happens (BLE request sent, MQTT publish, poll finished, SSE client
+attached, …).  A scrape only formats the current values; the one exception is
+aquaclean_asyncio_tasks, a callback gauge that counts the event loop's tasks
+at scrape time (len(asyncio.all_tasks()) — no cheaper source exists).
+
+No prometheus_client dependency: the text format is small enough to emit
+directly, and this keeps the bridge's dependency set unchanged.
+
+Updates are guarded by a lock so MQTT's network thread and the asyncio loop
+can both record safely.  Never raises into the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from typing import Callable, Optional
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Latency buckets in seconds — BLE connects run 0.5–15 s, GATT queries 0.1–3 s.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Family:
+    TYPE = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# TYPE {self.name} {self.TYPE}", f"# HELP {self.name} {self.help}"]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Family):
+    """Monotonic counter; exposed with the OpenMetrics ``_total`` suffix."""
+
+    TYPE = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(tuple(str(v) for v in labelvalues), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}_total{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Family):
+    """Settable gauge.  set(None) removes the series (value unknown)."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: Optional[float], *labelvalues) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            if value is None:
+                self._values.pop(key, None)
+            else:
+                self._values[key] = float(value)
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def value(self, *labelvalues) -> Optional[float]:
+        return self._values.get(tuple(str(v) for v in labelvalues))
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class CallbackGauge(_Family):
+    """Unlabelled gauge whose value is read from *fn* at scrape time."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name, help_text, fn: Callable[[], Optional[float]]):
+        super().__init__(name, help_text)
+        self._fn = fn
+
+    def samples(self) -> list[str]:
+        try:
+            value = self._fn()
+        except Exception:
+            value = None
+        return [] if value is None else [f"{self.name} {_fmt(value)}"]
+
+
+class Histogram(_Family):
+    """Cumulative-bucket histogram with fixed upper bounds."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple, list] = {}   # key → [bucket counts…, sum]
+
+    def observe(self, value: Optional[float], *labelvalues) -> None:
+        if value is None:
+            return
+        v = float(value)
+        key = tuple(str(x) for x in labelvalues)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if v <= bound:
+                    series[i] += 1
+                    break
+            series[-1] += v
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(tuple(str(x) for x in labelvalues))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: list[_Family] = []
+
+    def register(self, family: _Family) -> _Family:
+        self._families.append(family)
+        return family
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def callback_gauge(self, name, help_text, fn) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, fn))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Return the full exposition in OpenMetrics text format."""
+        lines: list[str] = []
+        for family in self._families:
+            lines.extend(family._header())
+            lines.extend(family.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _asyncio_task_count() -> Optional[int]:
+    try:
+        return len(asyncio.all_tasks())
+    except RuntimeError:
+        return None   # no running loop (e.g. rendered from a test thread)
+
+
+REGISTRY = MetricsRegistry()
+
+CONNECT_SECONDS = REGISTRY.histogram(
+    "aquaclean_connect_seconds",
+    "Connect time per poll (ESP32 API + BLE) when a new connection was established",
+    ("transport", "mode"))
+POLL_SECONDS = REGISTRY.histogram(
+    "aquaclean_poll_seconds",
+    "Duration of the GATT state query per poll",
+    ("transport", "mode"))
+BLE_REQUESTS = REGISTRY.counter(
+    "aquaclean_ble_requests",
+    "BLE API calls sent, by context and procedure",
+    ("context", "procedure"))
+BLE_REQUEST_TIMEOUTS = REGISTRY.counter(
+    "aquaclean_ble_request_timeouts",
+    "BLE API calls that received no response in time, by context and procedure",
+    ("context", "procedure"))
+BLE_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "aquaclean_ble_queue_wait_seconds",
+    "On-demand mode: time a request waited for the BLE link, by priority class",
+    ("priority",))
+AIRTIME_CALLS = REGISTRY.counter(
+    "aquaclean_airtime_calls",
+    "BLE calls charged to each priority class's call budget",
+    ("device", "priority"))
+AIRTIME_DELAYED = REGISTRY.counter(
+    "aquaclean_airtime_delayed",
+    "BLE calls that waited for their class's call budget",
+    ("device", "priority"))
+AIRTIME_SHED = REGISTRY.counter(
+    "aquaclean_airtime_shed",
+    "Background polls skipped because the poll call budget or the airtime budget ran low",
+    ("device", "priority"))
+AIRTIME_BUDGET_USED = REGISTRY.gauge(
+    "aquaclean_airtime_budget_used_ratio",
+    "Share of a priority class's call budget (token bucket) in use, 0-1",
+    ("device", "priority"))
+AIRTIME_CONNECTED_SECONDS = REGISTRY.gauge(
+    "aquaclean_airtime_connected_seconds",
+    "Seconds the BLE link was connected in the last hour",
+    ("device",))
+POLL_CONSECUTIVE_FAILURES = REGISTRY.gauge(
+    "aquaclean_poll_consecutive_failures",
+    "Consecutive failed background polls (resets to 0 on success)")
+CIRCUIT_BREAKER_OPEN = REGISTRY.gauge(
+    "aquaclean_circuit_breaker_open",
+    "1 while the poll-loop circuit breaker is open (probing at the slow interval), else 0")
+TRANSPORT_HEALTH = REGISTRY.gauge(
+    "aquaclean_transport_health_score",
+    "0-100 health score per transport from failure / timeout rate, connect latency and RSSI",
+    ("transport",))
+HDLC_EVENTS = REGISTRY.counter(
+    "aquaclean_hdlc_events",
+    "Alba HDLC link flow control: ack_sent, ack_saved, window_stall, retransmit, reject",
+    ("event",))
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "aquaclean_loop_lag_seconds",
+    "Event-loop scheduling delay of a 100 ms heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+LOOP_STALLS = REGISTRY.counter(
+    "aquaclean_loop_stalls",
+    "Event-loop stalls above the configured threshold (details: GET /info/runtime)")
+SSE_SUBSCRIBERS = REGISTRY.gauge(
+    "aquaclean_sse_subscribers",
+    "Connected Server-Sent Events clients")
+MQTT_PUBLISHES = REGISTRY.counter(
+    "aquaclean_mqtt_publishes",
+    "MQTT publish calls, by result",
+    ("result",))
+ESP32_FREE_HEAP = REGISTRY.gauge(
+    "aquaclean_esp32_free_heap_bytes",
+    "ESP32 proxy free heap")
+ESP32_MAX_FREE_BLOCK = REGISTRY.gauge(
+    "aquaclean_esp32_max_free_block_bytes",
+    "ESP32 proxy largest contiguous free heap block")
+ESP32_WIFI_RSSI = REGISTRY.gauge(
+    "aquaclean_esp32_wifi_rssi_dbm",
+    "ESP32 proxy WiFi signal strength")
+ASYNCIO_TASKS = REGISTRY.callback_gauge(
+    "aquaclean_asyncio_tasks",
+    "Tasks alive on the bridge event loop",
+    _asyncio_task_count)
+
+for _gauge in (POLL_CONSECUTIVE_FAILURES, CIRCUIT_BREAKER_OPEN, SSE_SUBSCRIBERS):
+    _gauge.set(0)
+
+
+def render() -> str:
+    """Render the process-wide registry (GET /metrics)."""
+    return REGISTRY.render()
@@ -0,0 +1,162 @@
+"""
+Per-API-call timing statistics for the AquaClean bridge.
+
+PollStats times whole poll cycles; CallStats breaks a session down into the
+individual BLE API calls so a single slow procedure (e.g. 0x59
+GetFilterStatus) stands out.  Keys:
+  - Mera / Tuma : "0xCC/0xPP"       — ApiCallAttribute context / procedure
+  - Alba        : "dp <id> read|write" — Ble20 DpId and operation
+
+Per key:
+  - queue_wait_ms      : time send_request() waited for the previous call to finish
+  - first_frame_ms     : request written → first response frame received (wire time)
+  - reassembly_ms      : first response frame → complete message (multi-frame responses)
+  - frames_received    : response frames received (sum over all calls)
+  - control_frames_sent: flow-control (ACK bitmap) frames sent by the bridge
+  - frames_retransmitted: request frames sent again because the device's ack
+                         bitmask missed them (segmented requests only)
+  - timeouts / errors  : calls that got no response in time / an error response
+
+Fixed-size: at most MAX_KEYS keys (further keys are folded into "other"),
+each holding only running min / avg / max — memory does not grow with uptime.
+Process-wide singleton CALL_STATS, because clients are re-created for every
+on-demand session.  Safe for single-threaded asyncio use.  Never raises.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from aquaclean_console_app.PollStats import _MetricStats
+
+
+class _CallStats:
+    """Aggregate for one call key."""
+
+    __slots__ = ("name", "calls", "timeouts", "errors", "frames_received",
+                 "control_frames_sent", "frames_retransmitted", "queue_wait", "first_frame", "reassembly")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.frames_received = 0
+        self.control_frames_sent = 0
+        self.frames_retransmitted = 0
+        self.queue_wait = _MetricStats()
+        self.first_frame = _MetricStats()
+        self.reassembly = _MetricStats()
+
+    def to_dict(self) -> dict:
+        return {
+            "name":                self.name,
+            "calls":               self.calls,
+            "timeouts":            self.timeouts,
+            "errors":              self.errors,
+            "frames_received":     self.frames_received,
+            "control_frames_sent": self.control_frames_sent,
+            "frames_retransmitted": self.frames_retransmitted,
+            "queue_wait_ms":       self.queue_wait.to_dict(),
+            "first_frame_ms":      self.first_frame.to_dict(),
+            "reassembly_ms":       self.reassembly.to_dict(),
+        }
+
+
+class CallStats:
+    """Fixed-size per-call aggregate.  See module docstring."""
+
+    MAX_KEYS = 64
+    OVERFLOW_KEY = "other"
+
+    def __init__(self):
+        self._calls: dict[str, _CallStats] = {}
+
+    @staticmethod
+    def mera_key(context: int, procedure: int) -> str:
+        return f"0x{context:02X}/0x{procedure:02X}"
+
+    @staticmethod
+    def dp_key(dp_id: int, op: str) -> str:
+        return f"dp {dp_id} {op}"
+
+    def _entry(self, key: str, name: str) -> _CallStats:
+        entry = self._calls.get(key)
+        if entry is None:
+            if len(self._calls) >= self.MAX_KEYS:
+                key, name = self.OVERFLOW_KEY, self.OVERFLOW_KEY
+                entry = self._calls.get(key)
+            if entry is None:
+                entry = self._calls[key] = _CallStats(name)
+        return entry
+
+    def record(
+        self,
+        key: str,
+        name: str = "",
+        queue_wait_ms: Optional[float] = None,
+        first_frame_ms: Optional[float] = None,
+        reassembly_ms: Optional[float] = None,
+        frames_received: int = 0,
+        control_frames_sent: int = 0,
+        frames_retransmitted: int = 0,
+        timeout: bool = False,
+        error: bool = False,
+    ) -> None:
+        """Record one completed (or timed-out) API call."""
+        try:
+            entry = self._entry(key, name or key)
+            entry.calls += 1
+            entry.frames_received += frames_received
+            entry.control_frames_sent += control_frames_sent
+            entry.frames_retransmitted += frames_retransmitted
+            if timeout:
+                entry.timeouts += 1
+            if error:
+                entry.errors += 1
+            entry.queue_wait.record(queue_wait_ms)
+            entry.first_frame.record(first_frame_ms)
+            entry.reassembly.record(reassembly_ms)
+        except Exception:
+            pass
+
+    def reset(self) -> None:
+        self._calls.clear()
+
+    def to_dict(self) -> dict:
+        """Return {key: stats} sorted by key."""
+        return {key: self._calls[key].to_dict() for key in sorted(self._calls)}
+
+    def to_markdown(self) -> str:
+        def _f(v):
+            return f"{v} ms" if v is not None else "—"
+
+        lines = [
+            "## AquaClean API Call Statistics",
+            "",
+            "> Wire = request written → first response frame.  Reassembly = first → last response frame.",
+            "> Queue = wait for the previous call on the same client to finish.",
+            "",
+        ]
+        if not self._calls:
+            lines.append("*No data collected yet.*")
+            return "\n".join(lines)
+        lines.append(
+            f"| {'Call':<18} | {'Name':<30} | {'Calls':>6} | {'T/O':>4} | {'Err':>4} "
+            f"| {'Wire avg':>10} | {'Wire max':>10} | {'Reasm avg':>10} | {'Queue avg':>10} | {'Frames':>6} | {'Ctl':>4} |"
+        )
+        lines.append(
+            f"|{'-'*20}|{'-'*32}|{'-'*8}|{'-'*6}|{'-'*6}|{'-'*12}|{'-'*12}|{'-'*12}|{'-'*12}|{'-'*8}|{'-'*6}|"
+        )
+        for key in sorted(self._calls):
+            c = self._calls[key]
+            lines.append(
+                f"| {key:<18} | {c.name[:30]:<30} | {c.calls:>6} | {c.timeouts:>4} | {c.errors:>4} "
+                f"| {_f(c.first_frame.avg_ms):>10} | {_f(c.first_frame.max_ms):>10} "
+                f"| {_f(c.reassembly.avg_ms):>10} | {_f(c.queue_wait.avg_ms):>10} "
+                f"| {c.frames_received:>6} | {c.control_frames_sent:>4} |"
+            )
+        return "\n".join(lines)
+
+
+CALL_STATS = CallStats()
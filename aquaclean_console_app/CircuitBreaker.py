@@ -0,0 +1,273 @@
+"""
+Circuit breaker with exponential backoff and per-transport health scores.
+
+Shared by the on-demand poll loop (ApiMode), the persistent reconnect loop
+(ServiceMode) and the Home Assistant coordinator, which used to carry their
+own failure counters, thresholds and fixed 30 / 60 s sleeps.
+
+CircuitBreaker — closed → open after `threshold` consecutive failures.  While
+open, the next attempt is due after base_delay × 2^(failed probes), capped at
+max_delay, randomised by ±jitter and stretched by up to 2× for a transport
+with a poor health score — a flaky proxy is tried less and less often
+instead of every minute.  When the delay has passed the breaker is half-open:
+the next attempt is the probe; success closes it, failure re-opens it with
+the next longer delay.  wait() can also poll a cheap probe (e.g. "is the
+device advertising?") while open, so recovery is noticed in seconds rather
+than at the end of a long backoff.  Only a change from not seen to seen
+counts, and at most once per open period (see record_probe()).  A device
+that keeps advertising while its GATT link is stuck therefore gets the
+exponential backoff, not a connect on every probe.
+
+TransportHealth — 0–100 score per transport ("bleak", "esp32-wifi",
+"esp32-eth") from exponentially weighted failure and timeout rates, connect
+latency and BLE RSSI.  Process-wide; see transport_health().
+
+Stdlib only (imported by the Home Assistant integration as well).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransportHealth:
+    """Exponentially weighted health of one transport.  score is None until the first sample."""
+
+    ALPHA = 0.2          # weight of the newest sample
+
+    __slots__ = ("name", "samples", "_failure", "_timeout", "_connect_ms", "_rssi")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples = 0
+        self._failure = 0.0
+        self._timeout = 0.0
+        self._connect_ms: Optional[float] = None
+        self._rssi: Optional[float] = None
+
+    @classmethod
+    def _ewma(cls, old: Optional[float], new: float) -> float:
+        return new if old is None else old + cls.ALPHA * (new - old)
+
+    def record(self, ok: bool, timeout: bool = False, connect_ms: Optional[float] = None,
+               rssi: Optional[float] = None) -> None:
+        self._failure = self._ewma(self._failure if self.samples else None, 0.0 if ok else 1.0)
+        self._timeout = self._ewma(self._timeout if self.samples else None, 1.0 if timeout else 0.0)
+        if connect_ms is not None and connect_ms > 0:
+            self._connect_ms = self._ewma(self._connect_ms, float(connect_ms))
+        if rssi is not None:
+            self._rssi = self._ewma(self._rssi, float(rssi))
+        self.samples += 1
+
+    @property
+    def score(self) -> Optional[int]:
+        """0 (unusable) … 100 (healthy).  Components without data are left out."""
+        if not self.samples:
+            return None
+        parts = [(0.5, 1.0 - (self._failure + self._timeout) / 2)]
+        if self._connect_ms is not None:
+            # 1 s or faster → 1.0, each doubling costs 0.25 (16 s → 0)
+            parts.append((0.25, min(1.0, max(0.0, 1.0 - math.log2(max(self._connect_ms, 1000) / 1000) / 4))))
+        if self._rssi is not None:
+            # -95 dBm → 0, -50 dBm → 1
+            parts.append((0.25, min(1.0, max(0.0, (self._rssi + 95) / 45))))
+        total = sum(w for w, _ in parts)
+        return round(100 * sum(w * v for w, v in parts) / total)
+
+    def to_dict(self) -> dict:
+        return {
+            "score":        self.score,
+            "samples":      self.samples,
+            "failure_rate": round(self._failure, 3),
+            "timeout_rate": round(self._timeout, 3),
+            "connect_ms":   round(self._connect_ms) if self._connect_ms is not None else None,
+            "ble_rssi":     round(self._rssi, 1) if self._rssi is not None else None,
+        }
+
+
+_HEALTH: dict[str, TransportHealth] = {}
+
+
+def transport_health(transport: str) -> TransportHealth:
+    """Process-wide TransportHealth for transport (created on first use)."""
+    health = _HEALTH.get(transport)
+    if health is None:
+        health = _HEALTH[transport] = TransportHealth(transport)
+    return health
+
+
+def health_snapshot() -> dict:
+    return {name: h.to_dict() for name, h in sorted(_HEALTH.items())}
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with exponential backoff.  See module docstring."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = 3,
+        base_delay: float = 30.0,
+        max_delay: float = 600.0,
+        jitter: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._clock = clock
+        self._rng = rng
+        self.transport: Optional[str] = None   # health used to stretch the delay
+        self.failures = 0
+        self.opened = 0              # times the circuit opened (lifetime)
+        self._failed_probes = 0
+        self._retry_at: Optional[float] = None
+        self._delay = 0.0
+        self._probe_seen: Optional[bool] = None   # last probe result this open period
+        self._probe_retried = False                # a probe already cut this open period short
+
+    # ── State ────────────────────────────────────────────────────────────────
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold:
+            return self.CLOSED
+        return self.HALF_OPEN if self.retry_in() == 0 else self.OPEN
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    def retry_in(self) -> float:
+        """Seconds until the next attempt is due (0 when closed or half-open)."""
+        if self._retry_at is None:
+            return 0.0
+        return max(0.0, self._retry_at - self._clock())
+
+    def allow(self) -> bool:
+        """True if an attempt may be made now (closed, or half-open probe due)."""
+        return self.retry_in() == 0
+
+    def _next_delay(self) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** self._failed_probes))
+        if self.transport is not None:
+            score = transport_health(self.transport).score
+            if score is not None:
+                delay *= 2 - score / 100
+        delay *= 1 + self.jitter * (2 * self._rng() - 1)
+        return min(self.max_delay, delay)
+
+    # ── Outcomes ─────────────────────────────────────────────────────────────
+
+    def record_failure(self, timeout: bool = False, transport: Optional[str] = None) -> bool:
+        """Count a failed attempt.  Returns True when this failure opened the circuit."""
+        if transport is not None:
+            self.transport = transport
+            transport_health(transport).record(False, timeout=timeout)
+        was_open = self.is_open
+        self.failures += 1
+        if not self.is_open:
+            return False
+        if was_open:
+            self._failed_probes += 1
+        else:
+            self.opened += 1
+        self._delay = self._next_delay()
+        self._retry_at = self._clock() + self._delay
+        if not was_open:
+            logger.warning(f"{self.name}: circuit open after {self.failures} consecutive failure(s) — "
+                           f"next attempt in {self._delay:.0f}s")
+        else:
+            logger.info(f"{self.name}: probe failed (failure #{self.failures}) — next attempt in {self._delay:.0f}s")
+        return not was_open
+
+    def record_success(self, connect_ms: Optional[float] = None, rssi: Optional[float] = None,
+                       transport: Optional[str] = None) -> int:
+        """Close the circuit.  Returns the number of consecutive failures that preceded it."""
+        if transport is not None:
+            self.transport = transport
+            transport_health(transport).record(True, connect_ms=connect_ms, rssi=rssi)
+        failures = self.failures
+        self.failures = 0
+        self._failed_probes = 0
+        self._retry_at = None
+        self._delay = 0.0
+        self._probe_seen = None
+        self._probe_retried = False
+        return failures
+
+    def record_probe(self, seen: bool) -> bool:
+        """Record a cheap probe result while the backoff runs.  Returns True when it
+        made the breaker half-open: the device is seen after an earlier probe of
+        this open period did not see it, and no probe has cut the period short yet."""
+        reappeared = seen and self._probe_seen is False
+        self._probe_seen = seen
+        if not reappeared or self._probe_retried or self.retry_in() == 0:
+            return False
+        self._probe_retried = True
+        self._retry_at = self._clock()
+        logger.info(f"{self.name}: probe sees the device again — retrying now")
+        return True
+
+    # ── Waiting ──────────────────────────────────────────────────────────────
+
+    async def wait(
+        self,
+        probe: Optional[Callable[[], Awaitable[bool]]] = None,
+        probe_interval: float = 10.0,
+        stop_event: Optional[asyncio.Event] = None,
+    ) -> bool:
+        """Sleep until the next attempt is due.  Returns False if stop_event was set.
+
+        probe — optional cheap check polled every probe_interval while open
+                and passed to record_probe(), which may make the breaker
+                half-open early.  A failing or raising probe does not count
+                as a failure; a raising one is ignored.
+        """
+        while True:
+            remaining = self.retry_in()
+            if remaining <= 0:
+                return True
+            step = min(remaining, probe_interval) if probe is not None else remaining
+            if stop_event is not None:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=step)
+                    return False
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(step)
+            if probe is not None and self.retry_in() > 0:
+                try:
+                    seen = await probe()
+                except Exception as e:
+                    logger.debug(f"{self.name}: probe raised {e!r}")
+                    continue
+                if self.record_probe(bool(seen)):
+                    return True
+
+    def to_dict(self) -> dict:
+        return {
+            "state":         self.state,
+            "failures":      self.failures,
+            "threshold":     self.threshold,
+            "opened":        self.opened,
+            "retry_in_s":    round(self.retry_in(), 1),
+            "last_delay_s":  round(self._delay, 1),
+            "transport":     self.transport,
+            "health":        transport_health(self.transport).score if self.transport else None,
+        }
@@ -0,0 +1,204 @@
+"""
+Command line of aquaclean-bridge — parser and the commands answered locally.
+
+The parser used to be built twice (main.py and __main__.py), both after
+importing main.py.  build_parser() is the one definition; local_command()
+answers the CLI commands that only read config.ini or the environment
+(check-config, get-config, system-info) without importing main.py, aiorun,
+bleak or the MQTT/REST services.  __main__.py therefore imports main.py only
+for the modes and commands that use it, and --version never does.
+
+Stdlib only.  tests/test_startup_imports.py keeps it that way.
+"""
+
+import argparse
+import json
+import sys
+
+from aquaclean_console_app.BridgeConfig import config, check_config_errors
+from aquaclean_console_app.SystemInfo import BRIDGE_VERSION, get_system_info
+
+# --command values answered by local_command()
+LOCAL_COMMANDS = ("check-config", "get-config", "system-info")
+
+
+class JsonArgumentParser(argparse.ArgumentParser):
+    """Custom parser that outputs argument errors as JSON; help uses standard text."""
+
+    def error(self, message):
+        """Called on invalid choices, missing arguments, or bad types."""
+        result = {
+            "status": "error",
+            "command": "invalid",
+            "message": f"Argument Error: {message}",
+            "data": {}
+        }
+        print(json.dumps(result, indent=2))
+        sys.exit(0)
+
+    def exit(self, status=0, message=None):
+        if message:
+            self.error(message)
+        sys.exit(status)
+
+
+def build_parser(prog: str) -> JsonArgumentParser:
+    """The aquaclean-bridge argument parser; prog is the name shown in --help."""
+    parser = JsonArgumentParser(
+        prog=prog,
+        description="Geberit AquaClean Controller",
+        epilog=(
+            "device state queries (require BLE):\n"
+            "  %(prog)s --mode cli --command status\n"
+            "  %(prog)s --mode cli --command system-parameters\n"
+            "  %(prog)s --mode cli --command user-sitting-state\n"
+            "  %(prog)s --mode cli --command anal-shower-state\n"
+            "  %(prog)s --mode cli --command lady-shower-state\n"
+            "  %(prog)s --mode cli --command dryer-state\n"
+            "\n"
+            "device info queries (require BLE):\n"
+            "  %(prog)s --mode cli --command info\n"
+            "  %(prog)s --mode cli --command identification\n"
+            "  %(prog)s --mode cli --command initial-operation-date\n"
+            "  %(prog)s --mode cli --command soc-versions\n"
+            "  %(prog)s --mode cli --command statistics-descale\n"
+            "  %(prog)s --mode cli --command filter-status\n"
+            "  %(prog)s --mode cli --command firmware-version-list\n"
+            "  %(prog)s --mode cli --command batch --items system-parameters,filter-status,statistics-descale\n"
+            "\n"
+            "device commands (require BLE):\n"
+            "  %(prog)s --mode cli --command toggle-lid\n"
+            "  %(prog)s --mode cli --command toggle-anal\n"
+            "  %(prog)s --mode cli --command toggle-lady\n"
+            "  %(prog)s --mode cli --command toggle-dryer\n"
+            "  %(prog)s --mode cli --command toggle-orientation-light\n"
+            "  %(prog)s --mode cli --command reset-filter-counter\n"
+            "  %(prog)s --mode cli --command trigger-flush-manually\n"
+            "  %(prog)s --mode cli --command prepare-descaling\n"
+            "  %(prog)s --mode cli --command confirm-descaling\n"
+            "  %(prog)s --mode cli --command cancel-descaling\n"
+            "  %(prog)s --mode cli --command postpone-descaling\n"
+            "  %(prog)s --mode cli --command start-cleaning-device\n"
+            "  %(prog)s --mode cli --command execute-next-cleaning-step\n"
+            "  %(prog)s --mode cli --command start-lid-calibration\n"
+            "  %(prog)s --mode cli --command lid-offset-save\n"
+            "  %(prog)s --mode cli --command lid-offset-increment\n"
+            "  %(prog)s --mode cli --command lid-offset-decrement\n"
+            "\n"
+            "app config / home assistant (no BLE required):\n"
+            "  %(prog)s --mode cli --command check-config\n"
+            "  %(prog)s --mode cli --command get-config\n"
+            "  %(prog)s --mode cli --command publish-ha-discovery\n"
+            "  %(prog)s --mode cli --command remove-ha-discovery\n"
+            "  %(prog)s --mode cli --command system-info\n"
+            "  %(prog)s --mode cli --command performance-stats\n"
+            "  %(prog)s --mode cli --command performance-stats --format markdown\n"
+            "\n"
+            "ESPHome proxy (no BLE required):\n"
+            "  %(prog)s --mode cli --command esp32-connect\n"
+            "  %(prog)s --mode cli --command esp32-disconnect\n"
+            "\n"
+            "options:\n"
+            "  --address 38:AB:XX:XX:ZZ:67   override BLE device address from config.ini\n"
+            "  --device NAME                  device of a multi-device config ([DEVICES] names)\n"
+            "  --format json|markdown         output format for performance-stats (default: json)\n"
+            "  --items a,b,...                items for batch, read in one BLE session (see docs/cli.md)\n"
+            "  --direct                       connect directly even if a bridge (--mode api) is running\n"
+            "\n"
+            "Device commands go through a running --mode api bridge on this machine ([API] port)\n"
+            "when one answers, and connect directly otherwise.\n"
+            "\n"
+            "CLI results and errors are written to stdout as JSON.\n"
+            "Log output goes to stderr (redirect with 2>logfile)."
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--mode', choices=['service', 'cli', 'api'], default='service')
+    parser.add_argument('--command', choices=[
+        # device state queries
+        'status', 'system-parameters',
+        'user-sitting-state', 'anal-shower-state', 'lady-shower-state', 'dryer-state',
+        # device info queries
+        'info', 'identification', 'initial-operation-date', 'soc-versions', 'node-list',
+        'statistics-descale', 'filter-status', 'firmware-version-list', 'profile-settings',
+        'batch',
+        # device commands
+        'toggle-lid', 'toggle-anal', 'toggle-lady', 'toggle-dryer', 'toggle-orientation-light',
+        'reset-filter-counter', 'trigger-flush-manually',
+        'prepare-descaling', 'confirm-descaling', 'cancel-descaling', 'postpone-descaling',
+        'start-cleaning-device', 'execute-next-cleaning-step',
+        'start-lid-calibration', 'lid-offset-save', 'lid-offset-increment', 'lid-offset-decrement',
+        # app config / home assistant (no BLE required)
+        'check-config', 'get-config', 'publish-ha-discovery', 'remove-ha-discovery',
+        # system info + performance stats (no BLE required)
+        'system-info', 'performance-stats',
+        # ESPHome proxy (no BLE required)
+        'esp32-connect', 'esp32-disconnect',
+    ])
+    parser.add_argument('--address')
+    parser.add_argument('--device',
+                        help='cli mode: one of [DEVICES] names on a multi-device bridge (default: the first)')
+    parser.add_argument('--items', default='',
+                        help='comma-separated items for --command batch')
+    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format for performance-stats (default: json)')
+    parser.add_argument('--direct', action='store_true',
+                        help='cli mode: connect to the device directly even if a bridge is running')
+    parser.add_argument('--ha-discovery', default=None,
+                        action=argparse.BooleanOptionalAction,
+                        dest='ha_discovery',
+                        help='Publish HA MQTT discovery on startup (overrides config ha_discovery_on_startup)')
+    parser.add_argument('--version', action='version',
+                        version=f'aquaclean-bridge {BRIDGE_VERSION}')
+    return parser
+
+
+def cli_result(command) -> dict:
+    """The JSON envelope every --mode cli command prints (status error until set)."""
+    return {
+        "status": "error",
+        "command": command,
+        "device": None,
+        "serial_number": None,
+        "data": {},
+        "error_code": None,
+        "message": "Unknown error"
+    }
+
+
+def local_command(args) -> dict | None:
+    """Result of a LOCAL_COMMANDS command, None for every other command."""
+    if args.command not in LOCAL_COMMANDS:
+        return None
+    result = cli_result(args.command)
+
+    if args.command == 'check-config':
+        errors = check_config_errors()
+        if errors:
+            result["status"] = "error"
+            result["message"] = f"{len(errors)} configuration error(s) found"
+            result["data"] = {"errors": errors}
+        else:
+            result["status"] = "success"
+            result["message"] = "Configuration is valid"
+            result["data"] = {"errors": []}
+        return result
+
+    if args.command == 'get-config':
+        result["data"] = {
+            "ble_connection":  config.get("SERVICE", "ble_connection", fallback="persistent"),
+            "poll_interval":   float(config.get("POLL", "interval", fallback="0")),
+            "mqtt_enabled":    config.getboolean("SERVICE", "mqtt_enabled", fallback=True),
+            "device_id":       config.get("BLE", "device_id"),
+            "api_host":        config.get("API", "host", fallback="0.0.0.0"),
+            "api_port":        int(config.get("API", "port", fallback="8080")),
+        }
+        result["status"] = "success"
+        result["message"] = "Config read from config.ini"
+        return result
+
+    if args.command == 'system-info':
+        result["status"] = "success"
+        result["message"] = "System info collected"
+        result["data"] = get_system_info()
+        return result
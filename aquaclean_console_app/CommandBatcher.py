@@ -0,0 +1,158 @@
+"""
+Coalescing of on-demand commands into one BLE session.
+
+In on-demand mode a single command costs a whole session — ESP32 scan,
+connect, subscribe sequence, one SetCommand, disconnect — and automation
+scenes often fire two to four commands within a second.  CommandBatcher
+collects the commands that arrive within a short window (and any that arrive
+while that batch's session is still connecting) and executes them in one
+session, in arrival order:
+
+  - every caller still gets its own result or its own exception;
+  - a command repeated within the batch (e.g. two toggle-lid) is executed as
+    requested but flagged as a duplicate in its result and in the log — for
+    a toggle it means the second one undoes the first;
+  - the session timing is shared by the batch; each result carries
+    _batch_size / _batch_position so callers can see the amortised cost.
+
+A command that fails with a non-fatal error (is_fatal(exc) False, e.g. a
+validation error) only fails its own caller.  A fatal error (BLE timeout,
+lost link) ends the batch: the commands not yet run get the session's error.
+
+Single event loop only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Item:
+    __slots__ = ("key", "action", "future", "position", "duplicate", "done", "result", "error")
+
+    def __init__(self, key: str, action, position: int, duplicate: bool):
+        self.key = key
+        self.action = action
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.position = position
+        self.duplicate = duplicate
+        self.done = False
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class _Batch:
+    __slots__ = ("items", "closed")
+
+    def __init__(self):
+        self.items: list[_Item] = []
+        self.closed = False     # True once the session has run its last item
+
+
+class CommandBatcher:
+    """Runs commands submitted within window_s in one session.  See module docstring.
+
+    run_session — coroutine function run_session(body) that opens one BLE
+                  session, awaits body(client) and returns the session's
+                  timing dict (ApiMode._on_demand).
+    is_fatal    — exception → True if the link is unusable for the rest of
+                  the batch.
+    """
+
+    def __init__(self, window_s: float, run_session, is_fatal=lambda exc: True):
+        self.window_s = max(0.0, float(window_s))
+        self._run_session = run_session
+        self._is_fatal = is_fatal
+        self._batch: _Batch | None = None
+        self._tasks: set[asyncio.Task] = set()    # strong refs: the loop only keeps weak ones
+        self.batches = 0
+        self.commands = 0
+        self.duplicates = 0
+
+    async def submit(self, key: str, action):
+        """Queue action(client) under command key; return its result once the batch's session ends."""
+        batch = self._batch
+        if batch is None or batch.closed:
+            batch = self._batch = _Batch()
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        duplicate = any(item.key == key for item in batch.items)
+        item = _Item(key, action, len(batch.items), duplicate)
+        batch.items.append(item)
+        self.commands += 1
+        if duplicate:
+            self.duplicates += 1
+            logger.warning(f"CommandBatcher: {key!r} sent twice within one batch — executing both"
+                           + (" (the second toggle undoes the first)" if "toggle" in key else ""))
+        return await item.future
+
+    async def _run(self, batch: _Batch) -> None:
+        if self.window_s:
+            await asyncio.sleep(self.window_s)
+        self.batches += 1
+
+        async def body(client):
+            i = 0
+            while i < len(batch.items):     # items may still be appended while we run
+                item = batch.items[i]
+                i += 1
+                try:
+                    result = item.action(client)
+                    item.result = await result if asyncio.iscoroutine(result) else result
+                except Exception as e:
+                    item.error = e
+                    item.done = True
+                    if self._is_fatal(e):
+                        raise
+                    continue
+                item.done = True
+            batch.closed = True
+
+        session_error: BaseException | None = None
+        timing = None
+        try:
+            timing = await self._run_session(body)
+        except BaseException as e:
+            session_error = e
+        finally:
+            batch.closed = True
+            if self._batch is batch:
+                self._batch = None
+        size = len(batch.items)
+        if size > 1:
+            logger.info(f"CommandBatcher: {size} commands in one session: "
+                        + ", ".join(item.key for item in batch.items))
+        for item in batch.items:
+            if item.future.done():
+                continue
+            if not item.done:
+                item.future.set_exception(session_error or RuntimeError("batch session ended early"))
+            elif item.error is not None:
+                # A fatal error raised inside the session comes back mapped by run_session.
+                item.future.set_exception(session_error if session_error is not None
+                                          and self._is_fatal(item.error) else item.error)
+            else:
+                item.future.set_result(self._result(item, size, timing))
+
+    @staticmethod
+    def _result(item: _Item, size: int, timing) -> dict:
+        result = dict(item.result) if isinstance(item.result, dict) else {}
+        if isinstance(timing, dict):
+            result.update(timing)
+        result["_batch_size"] = size
+        result["_batch_position"] = item.position + 1
+        if item.duplicate:
+            result["_duplicate"] = True
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "window_ms":  int(self.window_s * 1000),
+            "batches":    self.batches,
+            "commands":   self.commands,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,132 @@
+"""
+Several /data/* reads in one BLE session — GET /data/batch, --command batch,
+MQTT centralDevice/control/dataBatch.
+
+A dashboard that shows system parameters, filter status, descale statistics
+and profile settings used to call four endpoints; in on-demand mode each one
+is a full ESP32 scan / connect / subscribe / query / disconnect cycle.
+plan() turns the requested item names into one ordered list and run()
+executes it on a single connected client:
+
+  - the order is fixed by ORDER, not by the request, so that the documented
+    device constraints hold whatever the caller asks for — GetFilterStatus
+    (0x59) before GetSystemParameterList (0x0D), identification first, the
+    settings reads last (see docs/developer/getfilterstatus-getspl-ordering.md
+    and ApiMode._fetch_state_and_info, which uses the same order);
+  - every item gets its own timing ("ms") and its own result or error.  An
+    error for which is_fatal(exc) is False (e.g. one proc timing out) only
+    fails that item; any other error ends the session like a single /data/*
+    call would.
+
+The fetchers are coroutine functions fetch(client) -> result.  FETCHERS holds
+client-only versions (CLI); ApiMode overrides the ones that also update
+device_state.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import time
+
+from aquaclean_console_app import FieldCatalog
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanClient import SPL_PARAMS_MERA_COMFORT
+
+logger = logging.getLogger(__name__)
+
+# Device-safe execution order.
+ORDER = (
+    "identification",           # 0x82 — first, as in the app's own start-up sequence
+    "filter-status",            # 0x59 — before GetSPL (0x0D), see module docstring
+    "system-parameters",        # 0x0D
+    "initial-operation-date",   # 0x86
+    "firmware-version-list",    # 0x0E
+    "soc-versions",             # 0x81
+    "node-list",                # 0x05
+    "statistics-descale",       # 0x45
+    "profile-settings",         # 0x53
+    "common-settings",          # 0x51
+)
+
+
+def system_parameters_to_dict(data_array) -> dict:
+    """State fields of a GetSystemParameterList(SPL_PARAMS_MERA_COMFORT) response."""
+    # data_array is position-based: data_array[i] answers SPL_PARAMS_MERA_COMFORT[i].
+    return FieldCatalog.spl_fields(dict(zip(SPL_PARAMS_MERA_COMFORT, data_array)))
+
+
+async def _system_parameters(client):
+    result = await client.base_client.get_system_parameter_list_async(SPL_PARAMS_MERA_COMFORT)
+    return system_parameters_to_dict(result.data_array)
+
+
+async def _identification(client):
+    ident = await client.base_client.get_device_identification_async(0)
+    return {
+        "sap_number":      ident.sap_number,
+        "serial_number":   ident.serial_number,
+        "production_date": ident.production_date,
+        "description":     ident.description,
+    }
+
+
+async def _initial_operation_date(client):
+    return {"initial_operation_date": str(await client.base_client.get_device_initial_operation_date())}
+
+
+async def _soc_versions(client):
+    return {"soc_versions": str(await client.base_client.get_soc_application_versions_async())}
+
+
+async def _statistics_descale(client):
+    return dataclasses.asdict(await client.base_client.get_statistics_descale_async())
+
+
+FETCHERS = {
+    "identification":         _identification,
+    "filter-status":          lambda client: client.base_client.get_filter_status_async(),
+    "system-parameters":      _system_parameters,
+    "initial-operation-date": _initial_operation_date,
+    "firmware-version-list":  lambda client: client.base_client.get_firmware_version_list_async(),
+    "soc-versions":           _soc_versions,
+    "node-list":              lambda client: client.base_client.get_node_list_async(),
+    "statistics-descale":     _statistics_descale,
+    "profile-settings":       lambda client: client.base_client.get_stored_profile_settings_async(),
+    "common-settings":        lambda client: client.base_client.get_stored_common_settings_async(),
+}
+
+
+def plan(items) -> list[str]:
+    """Item names (comma-separated string or iterable) → de-duplicated list in ORDER.
+
+    Raises ValueError for an empty request or an unknown item."""
+    if isinstance(items, str):
+        items = items.split(",")
+    names = {name.strip() for name in items if name and name.strip()}
+    if not names:
+        raise ValueError(f"No items requested. Valid items: {', '.join(ORDER)}")
+    unknown = sorted(names.difference(ORDER))
+    if unknown:
+        raise ValueError(f"Unknown item(s): {', '.join(unknown)}. Valid items: {', '.join(ORDER)}")
+    return [name for name in ORDER if name in names]
+
+
+async def run(client, names: list[str], fetchers: dict | None = None, is_fatal=lambda exc: True) -> dict:
+    """Execute the planned names on client, in order.
+
+    Returns {"order": names, "items": {name: {"data": ... | "error": str, "ms": int}}}.
+    A fatal error is raised after being recorded; items not reached are absent."""
+    fetchers = fetchers or FETCHERS
+    items: dict[str, dict] = {}
+    for name in names:
+        t = time.perf_counter()
+        try:
+            data = await fetchers[name](client)
+        except Exception as e:
+            items[name] = {"error": str(e) or type(e).__name__, "ms": int((time.perf_counter() - t) * 1000)}
+            if is_fatal(e):
+                raise
+            logger.warning(f"DataBatch: {name} failed, continuing with the rest of the batch: {e}")
+            continue
+        items[name] = {"data": data, "ms": int((time.perf_counter() - t) * 1000)}
+    return {"order": list(names), "items": items}
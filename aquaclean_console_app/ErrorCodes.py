@@ -266,6 +266,11 @@ E4004 = ErrorCode(
     hint="The webapp's event stream timed out and was closed. "
          "Reload the page — the browser will reconnect automatically.",
 )
+E4005 = ErrorCode(
+    "E4005", "History not available", "API", "ERROR",
+    hint="The history store is off or the field is unknown. "
+         "Set [POLL] history_dir in config.ini and use a field listed by GET /history.",
+)
 
 # ============================================================================
 # E5xxx - MQTT Errors
@@ -0,0 +1,188 @@
+"""
+Field catalogue and query planner for Mera Comfort polls.
+
+Every state field the bridge exposes comes from one of a handful of
+procedures.  The SPL index lists used to be hand-curated in three places
+(SPL_PARAMS_MERA_COMFORT, the HACS coordinator and tools/spl-monitor.py),
+and every poll read every source whether anybody used the result or not.
+
+FIELDS maps each field to its source:
+
+    spl      GetSystemParameterList (0x0D) — key = SPL index
+    filter   GetFilterStatus        (0x59) — key = record ID
+    profile  GetStoredProfileSetting(0x53) — key = setting ID, one call per ID
+    common   GetStoredCommonSetting (0x51) — key = setting ID, one call per ID
+    descale  GetStatisticsDescale   (0x45) — one call for all fields
+
+plan(fields) turns the fields (or groups) the consumers actually read into a
+QueryPlan with the fewest BLE calls: SPL indices packed into batches of at
+most MAX_SPL_IDS (each GetSPL is sent FIRST+CONS by the base client), one
+filter / descale call only if one of their fields is wanted, and only the
+wanted 0x53 / 0x51 setting IDs.  Sources nobody reads are not queried.
+
+Only SPL indices valid for Mera Comfort are catalogued — an unsupported index
+wedges GetFilterStatus until the device is power-cycled (see the comment on
+SPL_PARAMS_MERA_COMFORT).  Alba devices go through AlbaBaseClient, which maps
+the same SPL positions and profile setting IDs onto DpIds, so a plan applies
+to both.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+# GetSystemParameterList payload: 1 count byte + at most 12 IDs.
+MAX_SPL_IDS = 12
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    source: str                                 # spl | filter | profile | common | descale
+    key: Optional[int] = None                   # SPL index, 0x59 record ID or 0x51/0x53 setting ID
+    decode: Optional[Callable[[int], Any]] = None   # SPL only: raw value → field value
+
+
+def _flag(value: int) -> bool:
+    return value != 0
+
+
+# Catalogue order is the read order: profile and common settings as the
+# iPhone app reads them (see _IPHONE_PROFILE_SETTING_IDS).
+FIELDS: tuple[Field, ...] = (
+    Field("is_user_sitting",                  "spl", 0, _flag),
+    Field("is_dryer_running",                 "spl", 1, _flag),    # dryer state unknown
+    Field("is_lady_shower_running",           "spl", 2, _flag),
+    Field("is_anal_shower_running",           "spl", 3, _flag),    # param 3 confirmed = anal shower
+    Field("descaling_state",                  "spl", 4),           # 0=idle 1=preparing 2=waiting 3=running
+    Field("descaling_duration_min",           "spl", 5),           # countdown minutes
+    Field("last_error_code",                  "spl", 6),
+    Field("lid_offset_position",              "spl", 12),          # firmware >= RS25
+    Field("shower_arm_offset_position",       "spl", 13),
+
+    Field("days_until_filter_change",         "filter", 7),
+    Field("last_filter_reset",                "filter", 8),
+    Field("next_filter_change",               "filter", 9),
+    Field("filter_reset_count",               "filter", 10),
+
+    Field("ps_anal_shower_pressure",          "profile", 2),
+    Field("ps_oscillator_state",              "profile", 1),
+    Field("ps_lady_shower_pressure",          "profile", 3),
+    Field("ps_anal_shower_position",          "profile", 4),
+    Field("ps_water_temperature",             "profile", 6),
+    Field("ps_wc_seat_heat",                  "profile", 7),
+    Field("ps_lady_shower_position",          "profile", 5),
+    Field("ps_dryer_temperature",             "profile", 8),
+    Field("ps_odour_extraction",              "profile", 0),
+    Field("ps_dryer_state",                   "profile", 9),
+    Field("ps_dryer_spray_intensity",         "profile", 13),
+
+    Field("cs_orientation_light_color",       "common", 2),
+    Field("cs_orientation_light_brightness",  "common", 1),
+    Field("cs_orientation_light_activation",  "common", 3),
+    Field("cs_odour_extraction_run_on",       "common", 0),
+    Field("cs_wc_lid_sensor_sensitivity",     "common", 4),
+    Field("cs_wc_lid_open_automatically",     "common", 6),
+    Field("cs_wc_lid_close_automatically",    "common", 7),
+
+    Field("unposted_shower_cycles",           "descale"),
+    Field("days_until_next_descale",          "descale"),
+    Field("days_until_shower_restricted",     "descale"),
+    Field("shower_cycles_until_confirmation", "descale"),
+    Field("date_time_at_last_descale",        "descale"),
+    Field("number_of_descale_cycles",         "descale"),
+)
+
+BY_NAME = {f.name: f for f in FIELDS}
+
+# Group names accepted by plan() besides field names.
+GROUPS = {
+    "all":     tuple(FIELDS),
+    "state":   tuple(f for f in FIELDS if f.source == "spl"),
+    "filter":  tuple(f for f in FIELDS if f.source == "filter"),
+    "profile": tuple(f for f in FIELDS if f.source == "profile"),
+    "common":  tuple(f for f in FIELDS if f.source == "common"),
+    "descale": tuple(f for f in FIELDS if f.source == "descale"),
+}
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    fields: tuple[str, ...]                     # requested fields, catalogue order
+    spl_batches: tuple[tuple[int, ...], ...]    # one GetSystemParameterList call each
+    filter_status: bool                         # one GetFilterStatus call
+    profile_ids: tuple[int, ...]                # one GetStoredProfileSetting call each
+    common_ids: tuple[int, ...]                 # one GetStoredCommonSetting call each
+    descale: bool                               # one GetStatisticsDescale call
+
+    @property
+    def spl_params(self) -> list[int]:
+        return [index for batch in self.spl_batches for index in batch]
+
+    @property
+    def calls(self) -> int:
+        """BLE request/response round trips this plan costs."""
+        return (len(self.spl_batches) + self.filter_status + len(self.profile_ids)
+                + len(self.common_ids) + self.descale)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+
+def _batches(ids: list[int], size: int = MAX_SPL_IDS) -> tuple[tuple[int, ...], ...]:
+    return tuple(tuple(ids[i:i + size]) for i in range(0, len(ids), size))
+
+
+def plan(fields: Optional[Iterable[str] | str] = None) -> QueryPlan:
+    """Field and group names (comma-separated string or iterable) → QueryPlan.
+
+    None, "" and "all" plan every field.  Raises ValueError for an unknown name."""
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = {name.strip() for name in (fields or ()) if name and name.strip()} or {"all"}
+    unknown = sorted(n for n in names if n not in BY_NAME and n not in GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. "
+                         f"Valid groups: {', '.join(GROUPS)}; fields: see FieldCatalog.FIELDS")
+    wanted = set()
+    for name in names:
+        if name in GROUPS:
+            wanted.update(f.name for f in GROUPS[name])
+        else:
+            wanted.add(name)
+    selected = [f for f in FIELDS if f.name in wanted]
+
+    def keys(source: str) -> list[int]:
+        return [f.key for f in selected if f.source == source]
+
+    return QueryPlan(
+        fields=tuple(f.name for f in selected),
+        spl_batches=_batches(sorted(keys("spl"))),
+        filter_status=bool(keys("filter")),
+        profile_ids=tuple(keys("profile")),
+        common_ids=tuple(keys("common")),
+        descale=any(f.source == "descale" for f in selected),
+    )
+
+
+async def read_system_parameters(base_client, query: QueryPlan) -> dict[int, int]:
+    """Execute the plan's GetSPL batches → {SPL index: raw value}.
+
+    The response data_array is position-based (data_array[i] answers the i-th
+    requested index), so each batch is zipped with its own index list."""
+    values: dict[int, int] = {}
+    for batch in query.spl_batches:
+        result = await base_client.get_system_parameter_list_async(list(batch))
+        values.update(zip(batch, result.data_array))
+    return values
+
+
+def spl_fields(values: dict[int, int]) -> dict[str, Any]:
+    """{SPL index: raw value} → {field name: value} for the catalogued indices present."""
+    state = {}
+    for f in GROUPS["state"]:
+        if f.key in values:
+            raw = values[f.key]
+            state[f.name] = f.decode(raw) if f.decode else raw
+    return state
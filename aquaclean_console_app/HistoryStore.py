@@ -0,0 +1,341 @@
+"""
+Compact on-disk history of device state: GET /history.
+
+The bridge only kept the latest device_state, so every chart depended on
+Home Assistant's recorder, which stores a full row per retained MQTT
+publish.  HistoryStore keeps a few fields on disk itself, one file per field
+and tier, each an 8-byte header followed by fixed-width little-endian
+records sorted by time (uint32 epoch seconds first):
+
+  <field>.runs    booleans (SPL flags) — run-length encoded: a record
+                  (t, value) is written only when the value changes; value
+                  0 / 1 / 2 = false / true / unknown.  5 bytes per change.
+  <field>.raw     numbers (RSSI, poll timings, descaling state, descale
+                  counters) — (t, value) float32 per sample.  8 bytes per
+                  sample.
+  <field>.hourly  numbers older than raw_days — (t, min, mean, max, count)
+                  per hour, written by compact().  18 bytes per hour.
+
+Files are only appended to; compact() (at most hourly) moves raw samples
+older than raw_days into hourly buckets and rewrites the raw file with what
+is left (write to .tmp, os.replace).  Reads memory-map the file and bisect
+the timestamps, so a query touches only the records in its range.  Queries
+may run in a worker thread (RestApiService); a lock keeps them from seeing a
+file replaced by compact() with the old record count.
+
+Size: a year of 10 s polls with five timing / RSSI fields is the last
+raw_days (7: 5 × 60 480 × 8 B ≈ 2.4 MB) plus the hourly tier
+(5 × 8 760 × 18 B ≈ 0.8 MB) plus a few kB of boolean runs.
+
+One HistoryStore per device (ApiMode), fed from device_state change sets
+and the descale statistics.  Stdlib only.  record() never raises.  Appends
+happen on the event loop only.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AQH1"
+_HEADER = struct.Struct("<4sHH")          # magic, format version, record size
+
+BOOL_FIELDS = ("is_user_sitting", "is_anal_shower_running", "is_lady_shower_running", "is_dryer_running")
+# device_state["last_poll"] key → field; 0 connect times (connection reused) are skipped like in PollStats
+POLL_FIELDS = {
+    "ble_rssi":       "ble_rssi",
+    "wifi_rssi":      "wifi_rssi",
+    "poll_ms":        "poll_ms",
+    "ble_ms":         "ble_ms",
+    "esphome_api_ms": "esphome_api_ms",
+}
+# device_state keys recorded as numbers when they change (descaling_state: 0 idle … 3 running)
+STATE_FIELDS = ("descaling_state",)
+DESCALE_FIELDS = ("days_until_next_descale", "days_until_shower_restricted", "unposted_shower_cycles",
+                  "shower_cycles_until_confirmation", "number_of_descale_cycles")
+NUMBER_FIELDS = tuple(POLL_FIELDS.values()) + STATE_FIELDS + DESCALE_FIELDS
+
+_RUN = struct.Struct("<IB")
+_SAMPLE = struct.Struct("<If")
+_BUCKET = struct.Struct("<IfffH")
+_UNKNOWN = 2
+
+
+class _Timestamps:
+    """The leading uint32 of every record in a mapped column, as a sequence for bisect."""
+
+    def __init__(self, mm, count: int, size: int):
+        self._mm, self._count, self._size = mm, count, size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        return struct.unpack_from("<I", self._mm, _HEADER.size + i * self._size)[0]
+
+
+class _Column:
+    """One append-only file of fixed-width records sorted by their leading uint32 timestamp."""
+
+    def __init__(self, path: str, record: struct.Struct):
+        self.path = path
+        self.record = record
+        self._count = 0
+        self._last: Optional[tuple] = None
+        self._open()
+
+    def _open(self) -> None:
+        size = self.record.size
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size or _HEADER.unpack(header) != (MAGIC, 1, size):
+                    raise ValueError("unknown header")
+            total = os.path.getsize(self.path) - _HEADER.size
+            if total % size:
+                with open(self.path, "r+b") as f:      # torn last record (crash mid-write)
+                    f.truncate(_HEADER.size + total - total % size)
+            self._count = total // size
+        except FileNotFoundError:
+            self.rewrite([])
+        except (OSError, ValueError) as e:
+            logger.warning(f"HistoryStore: {self.path} unreadable ({e}) — starting fresh")
+            self.rewrite([])
+        self._last = self.read(self._count - 1, self._count)[0] if self._count else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last(self) -> Optional[tuple]:
+        return self._last
+
+    def append(self, *values) -> None:
+        with open(self.path, "ab") as f:
+            f.write(self.record.pack(*values))
+        self._count += 1
+        self._last = values
+
+    def rewrite(self, records: list) -> None:
+        """Replace the file's records (atomic: .tmp + os.replace)."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, 1, self.record.size))
+            f.write(b"".join(self.record.pack(*r) for r in records))
+        os.replace(tmp, self.path)
+        self._count = len(records)
+        self._last = tuple(records[-1]) if records else None
+
+    def _map(self):
+        f = open(self.path, "rb")
+        try:
+            return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+
+    def bisect(self, t: float) -> int:
+        """Index of the first record with timestamp >= t."""
+        if not self._count:
+            return 0
+        f, mm = self._map()
+        try:
+            return bisect.bisect_left(_Timestamps(mm, self._count, self.record.size), t)
+        finally:
+            mm.close()
+            f.close()
+
+    def read(self, lo: int, hi: int) -> list[tuple]:
+        lo, hi = max(0, lo), min(hi, self._count)
+        if lo >= hi:
+            return []
+        f, mm = self._map()
+        try:
+            size = self.record.size
+            start = _HEADER.size + lo * size
+            return list(self.record.iter_unpack(mm[start:start + (hi - lo) * size]))
+        finally:
+            mm.close()
+            f.close()
+
+    @property
+    def bytes(self) -> int:
+        return _HEADER.size + self._count * self.record.size
+
+
+def parse_time(value, default: float) -> float:
+    """Epoch seconds or ISO 8601 (naive = local time) → epoch seconds; None / "" → default."""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    return datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+class HistoryStore:
+    """Per-field time series on disk.  See module docstring."""
+
+    BUCKET_S = 3600
+    COMPACT_INTERVAL_S = 3600.0
+    MAX_POINTS = 5000         # raw samples returned per query before they are averaged
+
+    def __init__(self, directory: str, raw_days: float = 7.0, clock=time.time):
+        self.directory = directory
+        self.raw_days = raw_days
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._runs = {f: _Column(os.path.join(directory, f"{f}.runs"), _RUN) for f in BOOL_FIELDS}
+        self._raw = {f: _Column(os.path.join(directory, f"{f}.raw"), _SAMPLE) for f in NUMBER_FIELDS}
+        self._hourly = {f: _Column(os.path.join(directory, f"{f}.hourly"), _BUCKET) for f in NUMBER_FIELDS}
+        self._last_compact = 0.0
+        self._lock = threading.Lock()      # compact()'s rewrites vs. queries from a worker thread
+        self.compact()
+
+    # ── Recording ────────────────────────────────────────────────────────────
+
+    def _t(self, column: _Column, now: float) -> int:
+        """now as uint32 seconds, never before the column's last record (clock stepped back)."""
+        t = int(now)
+        return max(t, column.last[0]) if column.last else t
+
+    def record_bool(self, field: str, value, now: Optional[float] = None) -> None:
+        column = self._runs[field]
+        v = _UNKNOWN if value is None else int(bool(value))
+        if column.last is not None and column.last[1] == v:
+            return
+        column.append(self._t(column, self._clock() if now is None else now), v)
+
+    def record_number(self, field: str, value, now: Optional[float] = None) -> None:
+        if value is None:
+            return
+        column = self._raw[field]
+        column.append(self._t(column, self._clock() if now is None else now), float(value))
+
+    def record(self, values: dict, now: Optional[float] = None) -> None:
+        """Record the known fields in values (device_state keys / last_poll / descale statistics)."""
+        now = self._clock() if now is None else now
+        try:
+            for field in BOOL_FIELDS:
+                if field in values:
+                    self.record_bool(field, values[field], now)
+            poll = values.get("last_poll")
+            if isinstance(poll, dict):
+                for key, field in POLL_FIELDS.items():
+                    value = poll.get(key)
+                    if key in ("ble_ms", "esphome_api_ms") and not value:
+                        continue
+                    self.record_number(field, value, now)
+            for field in STATE_FIELDS + DESCALE_FIELDS:
+                if field in values:
+                    self.record_number(field, values[field], now)
+            if now - self._last_compact >= self.COMPACT_INTERVAL_S:
+                self.compact(now)
+        except Exception as e:
+            logger.warning(f"HistoryStore: could not record: {e}")
+
+    # ── Downsampling ─────────────────────────────────────────────────────────
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Move raw samples older than raw_days (whole hours) into the hourly tier."""
+        now = self._clock() if now is None else now
+        self._last_compact = now
+        cutoff = int(now - self.raw_days * 86400) // self.BUCKET_S * self.BUCKET_S
+        for field, raw in self._raw.items():
+            try:
+                split = raw.bisect(cutoff)
+                if not split:
+                    continue
+                hourly = self._hourly[field]
+                buckets: dict[int, list] = {}
+                for t, v in raw.read(0, split):
+                    if not math.isnan(v):
+                        buckets.setdefault(t // self.BUCKET_S * self.BUCKET_S, []).append(v)
+                after = hourly.last[0] if hourly.last else -1
+                with self._lock:
+                    for start, vs in sorted(buckets.items()):
+                        if start > after:
+                            hourly.append(start, min(vs), sum(vs) / len(vs), max(vs), min(len(vs), 0xFFFF))
+                    raw.rewrite(raw.read(split, len(raw)))
+                logger.debug(f"HistoryStore: {field}: {split} sample(s) older than {self.raw_days:g} days → "
+                             f"{len(buckets)} hourly bucket(s)")
+            except Exception as e:
+                logger.warning(f"HistoryStore: could not compact {field}: {e}")
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def query(self, field: str, start: float, end: float, max_points: int = MAX_POINTS) -> dict:
+        """One field between start and end (epoch seconds).  Raises KeyError for an unknown field.
+
+        Booleans: "runs" [[t, value]] — the run in effect at start (t clamped to start), then each change.
+        Numbers:  "hourly" [[t, min, mean, max, count]] for the downsampled past and "raw" [[t, value]];
+                  more than max_points raw samples are averaged into max_points equal time slices
+                  ("raw_step_s" > 0).  Safe to call from a worker thread."""
+        with self._lock:
+            return self._query(field, start, end, max_points)
+
+    def _query(self, field: str, start: float, end: float, max_points: int) -> dict:
+        result = {"field": field, "from": start, "to": end}
+        if field in self._runs:
+            column = self._runs[field]
+            lo, hi = column.bisect(start), column.bisect(math.floor(end) + 1)
+            runs = column.read(lo - 1 if lo else 0, hi)
+            values = {0: False, 1: True, _UNKNOWN: None}
+            points = [[max(t, int(start)), values[v]] for t, v in runs]
+            return {**result, "type": "bool", "runs": points}
+        if field not in self._raw:
+            raise KeyError(field)
+        hourly, raw = self._hourly[field], self._raw[field]
+        end_i = math.floor(end) + 1
+        buckets = hourly.read(hourly.bisect(start - self.BUCKET_S + 1), hourly.bisect(end_i))
+        samples = raw.read(raw.bisect(start), raw.bisect(end_i))
+        step = 0.0
+        if len(samples) > max_points > 0:
+            step = (end - start) / max_points
+            slices: dict[int, list] = {}
+            for t, v in samples:
+                slices.setdefault(int((t - start) // step), []).append(v)
+            samples = [(start + i * step, sum(vs) / len(vs)) for i, vs in sorted(slices.items())]
+        return {
+            **result,
+            "type": "number",
+            "hourly": [[t, round(lo, 2), round(mean, 2), round(hi, 2), n] for t, lo, mean, hi, n in buckets],
+            "raw": [[round(t, 1) if step else t, round(v, 2)] for t, v in samples],
+            "raw_step_s": round(step, 1),
+        }
+
+    def fields(self) -> dict:
+        """Every field with its type, record count, first / last timestamp and bytes on disk."""
+        with self._lock:
+            return self._fields()
+
+    def _fields(self) -> dict:
+        out = {}
+        for field, column in self._runs.items():
+            first = column.read(0, 1)
+            out[field] = {"type": "bool", "records": len(column), "first": first[0][0] if first else None,
+                          "last": column.last[0] if column.last else None, "bytes": column.bytes}
+        for field in NUMBER_FIELDS:
+            raw, hourly = self._raw[field], self._hourly[field]
+            first = hourly.read(0, 1) or raw.read(0, 1)
+            out[field] = {"type": "number", "records": len(raw), "hourly_records": len(hourly),
+                          "first": first[0][0] if first else None,
+                          "last": raw.last[0] if raw.last else (hourly.last[0] if hourly.last else None),
+                          "bytes": raw.bytes + hourly.bytes}
+        return out
+
+    def to_dict(self) -> dict:
+        fields = self.fields()
+        return {"directory": self.directory, "raw_days": self.raw_days,
+                "bytes": sum(f["bytes"] for f in fields.values()), "fields": fields}
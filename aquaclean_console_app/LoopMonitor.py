@@ -0,0 +1,261 @@
+"""
+Event-loop stall detector and task / thread inventory — GET /info/runtime.
+
+Everything in the bridge shares one asyncio loop: BLE notifications, the poll
+loop, MQTT handlers and REST requests.  A blocking call on it — a
+threading.Lock a BLE callback waits on (see FrameCollector), synchronous
+sqlite in mock_persistence, a slow file write — freezes all of them at once
+and in Home Assistant trips the watchdog.  LoopMonitor makes that visible:
+
+    lag     — a heartbeat task sleeps INTERVAL_S and records how late it woke
+              up (scheduling delay): _MetricStats with histogram, and the
+              aquaclean_loop_lag_seconds metric.
+    stalls  — a daemon watchdog thread checks the heartbeat every INTERVAL_S.
+              Once the loop has not run for threshold_ms it captures the loop
+              thread's stack via sys._current_frames() — the code that is
+              blocking, not whoever notices afterwards — and the task that was
+              running.  The duration is filled in when the loop recovers.  The
+              last MAX_STALLS are kept; aquaclean_loop_stalls counts them all.
+    tasks   — a task factory stamps each task with its creation time and
+              creation site (first frame outside asyncio), so snapshot() lists
+              task age and origin without asyncio debug mode.
+
+Cost: one wake-up per INTERVAL_S on the loop and in the thread, and a short
+frame walk per created task — safe to leave on in production.
+
+Process-wide singleton LOOP_MONITOR.  Never raises into the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from aquaclean_console_app import BridgeMetrics
+from aquaclean_console_app.PollStats import _MetricStats
+
+logger = logging.getLogger(__name__)
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short_path(filename: str) -> str:
+    """Repo-relative path, or the part after site-packages/."""
+    if filename.startswith(_ROOT_DIR + os.sep):
+        return filename[len(_ROOT_DIR) + 1:]
+    idx = filename.find("site-packages" + os.sep)
+    return filename[idx + 14:] if idx != -1 else filename
+
+
+def _creation_site() -> Optional[tuple]:
+    """(filename, lineno, function) of the first caller outside asyncio and this module."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_ASYNCIO_DIR) and filename != __file__:
+            return filename, frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+def _format_site(site: Optional[tuple]) -> Optional[str]:
+    if site is None:
+        return None
+    filename, lineno, name = site
+    return f"{_short_path(filename)}:{lineno} ({name})"
+
+
+def _coro_name(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or type(coro).__name__
+
+
+class LoopMonitor:
+    """Loop lag, stalls and task inventory for one event loop.  See module docstring."""
+
+    INTERVAL_S = 0.1
+    MAX_STALLS = 20
+    STACK_LIMIT = 20       # innermost frames kept per stall
+
+    def __init__(self):
+        self.enabled = True
+        self.threshold_ms = 250.0
+        self.lag = _MetricStats(histogram=True)
+        self.stalls_total = 0
+        self._stalls: deque = deque(maxlen=self.MAX_STALLS)
+        self._current_stall: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0          # time.monotonic() of the loop's last heartbeat
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._prev_factory = None
+        self._task_info: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def configure(self, enabled: bool = True, threshold_ms: float = 250.0) -> None:
+        self.enabled = enabled
+        self.threshold_ms = max(float(threshold_ms), self.INTERVAL_S * 1000)
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Start monitoring loop (default: the running loop).  Call from the loop's thread."""
+        if not self.enabled or self.running:
+            return
+        loop = loop or asyncio.get_running_loop()
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._prev_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+        self._task = loop.create_task(self._heartbeat_loop(), name="loop-monitor")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.debug(f"LoopMonitor: started (stall threshold {self.threshold_ms:.0f} ms)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._loop is not None and self._loop.get_task_factory() == self._task_factory:
+            self._loop.set_task_factory(self._prev_factory)
+        self._thread = None
+        self._current_stall = None
+
+    # ── Task factory ─────────────────────────────────────────────────────────
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._prev_factory is not None:
+            task = self._prev_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        try:
+            self._task_info[task] = (time.monotonic(), _creation_site())
+        except Exception:
+            pass
+        return task
+
+    # ── Lag and stalls ───────────────────────────────────────────────────────
+
+    async def _heartbeat_loop(self) -> None:
+        interval = self.INTERVAL_S
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag_ms = max(0.0, (now - expected) * 1000)
+            self.lag.record(lag_ms)
+            BridgeMetrics.LOOP_LAG_SECONDS.observe(lag_ms / 1000)
+            with self._lock:
+                stall = self._current_stall
+                self._current_stall = None
+                if stall is None and lag_ms >= self.threshold_ms:
+                    # Shorter than one watchdog period: no stack, but still a stall.
+                    stall = self._new_stall(lag_ms, stack=None, task=None)
+            if stall is not None:
+                stall["duration_ms"] = round(lag_ms)
+                where = stall["stack"][-1] if stall["stack"] else "unknown code"
+                logger.warning(f"LoopMonitor: event loop blocked for {lag_ms:.0f} ms in {where}"
+                               + (f" (task {stall['task']})" if stall["task"] else ""))
+
+    def _watchdog(self) -> None:
+        while not self._stop.wait(self.INTERVAL_S):
+            blocked_ms = (time.monotonic() - self._heartbeat - self.INTERVAL_S) * 1000
+            if blocked_ms < self.threshold_ms:
+                continue
+            with self._lock:
+                if self._current_stall is not None or self._task is None:
+                    continue
+                try:
+                    frame = sys._current_frames().get(self._loop_thread_id)
+                    stack = [f"{_short_path(fs.filename)}:{fs.lineno} ({fs.name})"
+                             for fs in traceback.extract_stack(frame)[-self.STACK_LIMIT:]] if frame else None
+                    del frame
+                    current = asyncio.current_task(self._loop)
+                    task = f"{current.get_name()} {_coro_name(current)}" if current else None
+                except Exception as e:
+                    stack, task = [f"<stack unavailable: {e!r}>"], None
+                self._current_stall = self._new_stall(blocked_ms, stack=stack, task=task)
+
+    def _new_stall(self, blocked_ms: float, stack: Optional[list], task: Optional[str]) -> dict:
+        """Record a stall (caller holds _lock)."""
+        stall = {
+            "at":          datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "detected_ms": round(blocked_ms),
+            "duration_ms": None,
+            "task":        task,
+            "stack":       stack,
+        }
+        self._stalls.append(stall)
+        self.stalls_total += 1
+        BridgeMetrics.LOOP_STALLS.inc()
+        return stall
+
+    # ── Inventory ────────────────────────────────────────────────────────────
+
+    def tasks(self) -> list[dict]:
+        """Pending tasks of the monitored (or running) loop, oldest first."""
+        now = time.monotonic()
+        try:
+            all_tasks = asyncio.all_tasks(self._loop) if self._loop is not None else asyncio.all_tasks()
+        except RuntimeError:
+            return []
+        result = []
+        for task in all_tasks:
+            created, site = self._task_info.get(task, (None, None))
+            frames = task.get_stack(limit=1)
+            result.append({
+                "name":       task.get_name(),
+                "coro":       _coro_name(task),
+                "age_s":      round(now - created, 1) if created is not None else None,
+                "created_at": _format_site(site),
+                "waiting_at": f"{_short_path(frames[0].f_code.co_filename)}:{frames[0].f_lineno}" if frames else None,
+            })
+        result.sort(key=lambda t: -1 if t["age_s"] is None else t["age_s"], reverse=True)
+        return result
+
+    @staticmethod
+    def threads() -> list[dict]:
+        return [{"name": t.name, "ident": t.ident, "daemon": t.daemon, "alive": t.is_alive()}
+                for t in threading.enumerate()]
+
+    def snapshot(self) -> dict:
+        tasks = self.tasks()
+        threads = self.threads()
+        with self._lock:
+            stalls = list(reversed(self._stalls))
+        return {
+            "loop": {
+                "monitoring":   self.running,
+                "threshold_ms": self.threshold_ms,
+                "lag":          self.lag.to_dict(),
+                "stalls_total": self.stalls_total,
+                "stalls":       stalls,
+            },
+            "num_tasks":   len(tasks),
+            "tasks":       tasks,
+            "num_threads": len(threads),
+            "threads":     threads,
+        }
+
+
+LOOP_MONITOR = LoopMonitor()
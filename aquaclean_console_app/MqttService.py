@@ -4,17 +4,47 @@ import logging
 
 import paho.mqtt.client as mqtt_client
 # sudo apt install python3-paho-mqtt
+import hashlib
 import inspect
+import threading
 import time
 
 from aquaclean_console_app.myEvent import myEvent   
+from aquaclean_console_app import BridgeMetrics
 
 logger = logging.getLogger(__name__)
 
+# Retained Home Assistant discovery configs published by this bridge.  Subscribed
+# on connect so the broker's retained copies can be compared against the local
+# discovery set — only topics whose payload changed are republished.
+HA_DISCOVERY_TOPIC_FILTER = "homeassistant/+/geberit_aquaclean/+/config"
+
+
+def ha_discovery_topic_filters(device: str = "", device_id: str = "") -> tuple:
+    """Subscription filters for the retained discovery configs of one bridge device.
+
+    The node ID is geberit_aquaclean, or geberit_aquaclean_<device> for a named
+    device of a multi-device bridge (main._ha_discovery_for_device); the ESPHome
+    proxy entities use aquaclean_<device_id> (BLE address without colons)."""
+    filters = [HA_DISCOVERY_TOPIC_FILTER.replace("geberit_aquaclean", f"geberit_aquaclean_{device}")
+               if device else HA_DISCOVERY_TOPIC_FILTER]
+    if device_id:
+        filters.append(f"homeassistant/+/aquaclean_{device_id}/+/config")
+    return tuple(filters)
+
+
+def discovery_payload_hash(payload) -> str:
+    """SHA-256 hex digest of a discovery payload (str or bytes)."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
 class MqttService:
-    def __init__(self, mqttConfig):
+    def __init__(self, mqttConfig, discovery_filters: tuple = (HA_DISCOVERY_TOPIC_FILTER,)):
         logger.trace(f"mqttConfig: {mqttConfig}")
         self.mqttConfig = mqttConfig
+        self.discovery_filters = tuple(discovery_filters)   # see ha_discovery_topic_filters()
         self.aquaclean_loop = None
         logger.trace(f"self.mqttConfig['topic']: {self.mqttConfig['topic']}")
 
@@ -54,6 +84,16 @@ class MqttService:
         self.ResetFilterCounter      = myEvent.EventHandler()
         self.SetProfileSetting       = myEvent.EventHandler()
         self.SetCommonSetting        = myEvent.EventHandler()
+        self.DataBatch               = myEvent.EventHandler()
+        self.Reconnected             = myEvent.EventHandler()
+
+        # topic → payload hash of the retained discovery configs held by the broker
+        self._discovery_hashes: dict[str, str] = {}
+        self._discovery_lock = threading.Lock()
+        self._discovery_sub_mid = None
+        self._discovery_subscribed = False
+        self._discovery_last_rx = 0.0
+        self._connect_count = 0
 
 
     async def start_async(self, aquaclean_loop, mqtt_initialized_wait_queue):
@@ -94,6 +134,11 @@ class MqttService:
             logging.error(f"### CONNECTING FAILED ### {ex}")
 
     def on_subscribe(self, client, userdata, mid, reason_code_list, properties):
+        if mid == self._discovery_sub_mid:
+            # Retained configs follow the SUBACK — see get_discovery_hashes_async()
+            self._discovery_subscribed = True
+            self._discovery_last_rx = time.monotonic()
+            return
         # Since we subscribed only for a single channel, reason_code_list contains
         # a single entry
         if reason_code_list[0].is_failure:
@@ -138,6 +183,7 @@ class MqttService:
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/centralDevice/control/disconnect")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/centralDevice/config/bleConnection")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/centralDevice/config/pollInterval")
+        self.mqttc.subscribe(f"{self.mqttConfig['topic']}/centralDevice/control/dataBatch")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/esphomeProxy/config/apiConnection")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/esphomeProxy/control/connect")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/esphomeProxy/control/disconnect")
@@ -165,9 +211,51 @@ class MqttService:
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/peripheralDevice/control/resetFilterCounter")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/peripheralDevice/config/profileSetting")
         self.mqttc.subscribe(f"{self.mqttConfig['topic']}/peripheralDevice/config/commonSetting")
+        with self._discovery_lock:
+            self._discovery_hashes.clear()
+        self._discovery_subscribed = False
+        _, self._discovery_sub_mid = self.mqttc.subscribe([(f, 0) for f in self.discovery_filters])
         logger.info("### SUBSCRIBED ###")
 
+        self._connect_count += 1
+        if self._connect_count > 1 and self.aquaclean_loop and self.aquaclean_loop.is_running():
+            # Not awaited: handlers may wait for retained messages, which are
+            # delivered on this (paho network) thread.
+            for handler in self.Reconnected.get_handlers():
+                asyncio.run_coroutine_threadsafe(handler(), self.aquaclean_loop)
+
+    def is_discovery_topic(self, topic: str) -> bool:
+        return any(mqtt_client.topic_matches_sub(f, topic) for f in self.discovery_filters)
+
+    def _on_discovery_config_message(self, msg):
+        """Record the hash of a retained discovery config (empty payload = removed)."""
+        with self._discovery_lock:
+            if msg.payload:
+                self._discovery_hashes[msg.topic] = discovery_payload_hash(msg.payload)
+            else:
+                self._discovery_hashes.pop(msg.topic, None)
+        self._discovery_last_rx = time.monotonic()
+
+    async def get_discovery_hashes_async(self, settle: float = 0.5, timeout: float = 3.0) -> dict:
+        """Return {topic: payload_hash} for the discovery configs retained on the broker.
+
+        The broker sends retained messages right after the SUBACK, with no
+        end-of-retained marker, so wait until the subscription is acknowledged
+        and no discovery message has arrived for *settle* seconds (capped at
+        *timeout*).  Topics the broker does not hold are simply absent.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._discovery_subscribed and time.monotonic() - self._discovery_last_rx >= settle:
+                break
+            await asyncio.sleep(0.05)
+        with self._discovery_lock:
+            return dict(self._discovery_hashes)
+
     def on_message(self, client, userdata, msg):
+        if self.is_discovery_topic(msg.topic):
+            self._on_discovery_config_message(msg)
+            return
         logger.info("### RECEIVED APPLICATION MESSAGE ###")
         logger.trace(f"+ Topic = {msg.topic}")
         logger.trace(f"+ Payload = {msg.payload.decode()}")
@@ -226,6 +314,8 @@ class MqttService:
             self.handle_set_ble_connection_message(msg.payload.decode().strip())
         elif msg.topic == f"{self.mqttConfig['topic']}/centralDevice/config/pollInterval":
             self.handle_set_poll_interval_message(msg.payload.decode().strip())
+        elif msg.topic == f"{self.mqttConfig['topic']}/centralDevice/control/dataBatch":
+            self.handle_data_batch_message(msg.payload.decode().strip())
         elif msg.topic == f"{self.mqttConfig['topic']}/esphomeProxy/config/apiConnection":
             self.handle_set_esphome_api_connection_message(msg.payload.decode().strip())
         elif msg.topic == f"{self.mqttConfig['topic']}/esphomeProxy/control/connect":
@@ -424,6 +514,15 @@ class MqttService:
             future = asyncio.run_coroutine_threadsafe(handler(setting_id, value), self.aquaclean_loop)
             _ = future.result()
 
+    def handle_data_batch_message(self, items: str):
+        """Payload: comma-separated item names, e.g. "system-parameters,filter-status"."""
+        logger.trace(f"in handle_data_batch_message: {items!r}")
+        if not items:
+            return   # empty retained payload (topic cleared)
+        for handler in self.DataBatch.get_handlers():
+            future = asyncio.run_coroutine_threadsafe(handler(items), self.aquaclean_loop)
+            _ = future.result()
+
     def handle_set_poll_interval_message(self, value: str):
         logger.trace(f"in handle_set_poll_interval_message: {value!r}")
         try:
@@ -450,8 +549,10 @@ class MqttService:
         logger.trace(f"topic: {topic}, value: {value}")
 
         try:
-            self.mqttc.publish( topic, value, retain=True)
+            info = self.mqttc.publish( topic, value, retain=True)
+            BridgeMetrics.MQTT_PUBLISHES.inc("ok" if info.rc == mqtt_client.MQTT_ERR_SUCCESS else "error")
         except Exception as ex:
+            BridgeMetrics.MQTT_PUBLISHES.inc("error")
             logging.error(f"### SENDING DATA FAILED ### {ex}")
 
     def on_publish(self, client, userdata, mid, reason_code, properties):
@@ -6,7 +6,14 @@ Tracks min / max / average for three timing dimensions per BLE connection mode:
   - ble_ms         : BLE connect time (on-demand: every cycle; persistent: reconnects only)
   - esphome_api_ms : ESP32 TCP connect time (same pattern as ble_ms; None for local-BLE path)
 
-Stats are accumulated for the lifetime of the process. No persistence across restarts.
+Timing metrics additionally keep a log-bucketed (HDR-style) latency histogram:
+p50 / p90 / p99 for the process lifetime and for rolling 1 h / 24 h windows.
+Windows are fixed-size rings of time slots, so memory use is constant no
+matter how long the process runs.  RSSI metrics (negative dBm) keep only
+min / avg / max.
+
+Stats are accumulated for the lifetime of the process.  Pass persist_path to
+PollStats to save them periodically and restore them on the next start.
 Stats per mode are kept independently — switching modes at runtime never resets either side.
 
 Connect times (ble_ms / esphome_api_ms) are only counted when > 0, so persistent-mode
@@ -14,21 +21,203 @@ samples from polls that reuse an existing connection don't drag the average to z
 """
 
 from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import time
+from array import array
 from typing import Optional
 
+logger = logging.getLogger(__name__)
 
-class _MetricStats:
-    """Running min / max / sum / count for one timing metric."""
 
-    __slots__ = ("count", "_total", "_min", "_max")
+# ---------------------------------------------------------------------------
+# Log-bucketed latency histogram
+# ---------------------------------------------------------------------------
+
+# 8 sub-buckets per power of two (≤ 12.5 % relative error) from 1 ms up to
+# 2^17 ms (~131 s).  Bucket 0 holds everything below 1 ms; values above the
+# top are clamped into the last bucket.
+_SUB_BUCKETS = 8
+_OCTAVES     = 17
+_NUM_BUCKETS = 1 + _OCTAVES * _SUB_BUCKETS
+
+PERCENTILES = (50, 90, 99)
+
+
+def _bucket_index(value_ms: float) -> int:
+    if value_ms < 1.0:
+        return 0
+    exp = int(math.log2(value_ms))
+    if exp >= _OCTAVES:
+        return _NUM_BUCKETS - 1
+    sub = int((value_ms / (1 << exp) - 1.0) * _SUB_BUCKETS)
+    return 1 + exp * _SUB_BUCKETS + min(sub, _SUB_BUCKETS - 1)
+
+
+def _bucket_upper(index: int) -> float:
+    """Highest value that maps into bucket *index* (HDR "highest equivalent value")."""
+    if index == 0:
+        return 1.0
+    exp, sub = divmod(index - 1, _SUB_BUCKETS)
+    return (1 << exp) * (1.0 + (sub + 1) / _SUB_BUCKETS)
+
+
+def _new_buckets() -> array:
+    return array("I", bytes(4 * _NUM_BUCKETS))
+
+
+def _percentiles(buckets, count: int, max_value: Optional[float] = None) -> dict:
+    """p50/p90/p99 from bucket counts, clamped to the observed maximum."""
+    result = {f"p{p}_ms": None for p in PERCENTILES}
+    if count == 0:
+        return result
+    targets = [(p, max(1, math.ceil(count * p / 100))) for p in PERCENTILES]
+    seen = 0
+    t = 0
+    for index, n in enumerate(buckets):
+        if not n:
+            continue
+        seen += n
+        while t < len(targets) and seen >= targets[t][1]:
+            v = _bucket_upper(index)
+            if max_value is not None:
+                v = min(v, max_value)
+            result[f"p{targets[t][0]}_ms"] = round(v, 1)
+            t += 1
+        if t == len(targets):
+            break
+    return result
+
+
+def _sparse(buckets) -> dict:
+    return {str(i): n for i, n in enumerate(buckets) if n}
+
+
+def _dense(sparse: dict) -> array:
+    buckets = _new_buckets()
+    for i, n in sparse.items():
+        i = int(i)
+        if 0 <= i < _NUM_BUCKETS:
+            buckets[i] = int(n)
+    return buckets
+
+
+class _RollingHistogram:
+    """Histogram over the last slots × slot_seconds, kept in a ring of time slots.
+
+    Each slot remembers the absolute slot number it holds; a slot that has
+    fallen out of the window is zeroed when it is reused, and ignored when
+    reading.  No timers, no per-sample allocation.
+    """
+
+    __slots__ = ("slot_seconds", "_slot_ids", "_slots")
+
+    def __init__(self, slot_seconds: int, slots: int):
+        self.slot_seconds = slot_seconds
+        self._slot_ids = [-1] * slots
+        self._slots = [_new_buckets() for _ in range(slots)]
+
+    def record(self, index: int, now: float) -> None:
+        slot_id = int(now // self.slot_seconds)
+        pos = slot_id % len(self._slots)
+        if self._slot_ids[pos] != slot_id:
+            self._slots[pos] = _new_buckets()
+            self._slot_ids[pos] = slot_id
+        self._slots[pos][index] += 1
+
+    def merged(self, now: float) -> tuple[array, int]:
+        oldest = int(now // self.slot_seconds) - len(self._slots) + 1
+        merged = _new_buckets()
+        count = 0
+        for slot_id, buckets in zip(self._slot_ids, self._slots):
+            if slot_id < oldest:
+                continue
+            for i, n in enumerate(buckets):
+                if n:
+                    merged[i] += n
+                    count += n
+        return merged, count
+
+    def to_state(self) -> dict:
+        return {
+            "slot_ids": list(self._slot_ids),
+            "slots": [_sparse(b) for b in self._slots],
+        }
+
+    def load_state(self, state: dict) -> None:
+        ids = state.get("slot_ids", [])
+        slots = state.get("slots", [])
+        if len(ids) != len(self._slot_ids) or len(slots) != len(self._slots):
+            return  # window geometry changed — start the window fresh
+        self._slot_ids = [int(i) for i in ids]
+        self._slots = [_dense(b) for b in slots]
+
+
+class _LatencyHistogram:
+    """Lifetime + rolling 1 h / 24 h log-bucketed histograms for one timing metric."""
+
+    # window name → (slot_seconds, slots)
+    WINDOWS = {
+        "1h":  (300, 12),    # 12 × 5 min
+        "24h": (3600, 24),   # 24 × 1 h
+    }
+
+    __slots__ = ("_lifetime", "_windows")
 
     def __init__(self):
+        self._lifetime = _new_buckets()
+        self._windows = {name: _RollingHistogram(*geom) for name, geom in self.WINDOWS.items()}
+
+    def record(self, value_ms: float, now: float) -> None:
+        index = _bucket_index(value_ms)
+        self._lifetime[index] += 1
+        for window in self._windows.values():
+            window.record(index, now)
+
+    def lifetime_percentiles(self, count: int, max_value: Optional[float]) -> dict:
+        return _percentiles(self._lifetime, count, max_value)
+
+    def window_stats(self, name: str, now: float) -> dict:
+        buckets, count = self._windows[name].merged(now)
+        return {"count": count, **_percentiles(buckets, count)}
+
+    def to_state(self) -> dict:
+        return {
+            "lifetime": _sparse(self._lifetime),
+            "windows": {name: w.to_state() for name, w in self._windows.items()},
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._lifetime = _dense(state.get("lifetime", {}))
+        for name, w_state in state.get("windows", {}).items():
+            if name in self._windows:
+                self._windows[name].load_state(w_state)
+
+
+# ---------------------------------------------------------------------------
+# Per-metric / per-mode stats
+# ---------------------------------------------------------------------------
+
+class _MetricStats:
+    """Running min / max / sum / count for one timing metric.
+
+    With histogram=True a _LatencyHistogram is kept as well and to_dict()
+    adds lifetime p50/p90/p99 plus the rolling 1 h / 24 h windows.
+    """
+
+    __slots__ = ("count", "_total", "_min", "_max", "_hist")
+
+    def __init__(self, histogram: bool = False):
         self.count: int = 0
         self._total: float = 0.0
         self._min: Optional[float] = None
         self._max: Optional[float] = None
+        self._hist: Optional[_LatencyHistogram] = _LatencyHistogram() if histogram else None
 
-    def record(self, value_ms) -> None:
+    def record(self, value_ms, now: Optional[float] = None) -> None:
         if value_ms is None:
             return
         v = float(value_ms)
@@ -38,6 +227,8 @@ class _MetricStats:
             self._min = v
         if self._max is None or v > self._max:
             self._max = v
+        if self._hist is not None:
+            self._hist.record(v, time.time() if now is None else now)
 
     @property
     def avg_ms(self) -> Optional[float]:
@@ -51,13 +242,44 @@ class _MetricStats:
     def max_ms(self) -> Optional[float]:
         return round(self._max, 1) if self._max is not None else None
 
+    def percentiles(self) -> dict:
+        """Lifetime {p50_ms, p90_ms, p99_ms} (all None without a histogram)."""
+        if self._hist is None:
+            return {f"p{p}_ms": None for p in PERCENTILES}
+        return self._hist.lifetime_percentiles(self.count, self._max)
+
+    def window(self, name: str, now: Optional[float] = None) -> dict:
+        """{count, p50_ms, p90_ms, p99_ms} for a rolling window ("1h" | "24h")."""
+        if self._hist is None:
+            return {"count": 0, **{f"p{p}_ms": None for p in PERCENTILES}}
+        return self._hist.window_stats(name, time.time() if now is None else now)
+
     def to_dict(self) -> dict:
-        return {
+        d = {
             "count":  self.count,
             "min_ms": self.min_ms,
             "avg_ms": self.avg_ms,
             "max_ms": self.max_ms,
         }
+        if self._hist is not None:
+            now = time.time()
+            d.update(self.percentiles())
+            d["windows"] = {name: self.window(name, now) for name in _LatencyHistogram.WINDOWS}
+        return d
+
+    def to_state(self) -> dict:
+        state = {"count": self.count, "total": self._total, "min": self._min, "max": self._max}
+        if self._hist is not None:
+            state["histogram"] = self._hist.to_state()
+        return state
+
+    def load_state(self, state: dict) -> None:
+        self.count = int(state.get("count", 0))
+        self._total = float(state.get("total", 0.0))
+        self._min = state.get("min")
+        self._max = state.get("max")
+        if self._hist is not None and "histogram" in state:
+            self._hist.load_state(state["histogram"])
 
 
 class _ModeStats:
@@ -66,24 +288,36 @@ class _ModeStats:
     TRANSPORTS = ("bleak", "esp32-wifi", "esp32-eth")
 
     def __init__(self):
-        self.poll:        _MetricStats = _MetricStats()
-        self.ble:         _MetricStats = _MetricStats()
-        self.esphome_api: _MetricStats = _MetricStats()
+        self.poll:        _MetricStats = _MetricStats(histogram=True)
+        self.ble:         _MetricStats = _MetricStats(histogram=True)
+        self.esphome_api: _MetricStats = _MetricStats(histogram=True)
         self.ble_rssi:    _MetricStats = _MetricStats()   # BLE signal: ESP32 ↔ toilet (dBm)
         self.wifi_rssi:   _MetricStats = _MetricStats()   # WiFi signal: ESP32 ↔ router (dBm)
         self._transport_counts: dict[str, int] = {t: 0 for t in self.TRANSPORTS}
+        self._proxy_counts: dict[str, int] = {}   # ESP32 proxy host → polls ([ESPHOME] host list)
+
+    def _metrics(self) -> dict[str, _MetricStats]:
+        return {
+            "poll_ms":        self.poll,
+            "ble_ms":         self.ble,
+            "esphome_api_ms": self.esphome_api,
+            "ble_rssi_dbm":   self.ble_rssi,
+            "wifi_rssi_dbm":  self.wifi_rssi,
+        }
 
     @property
     def sample_count(self) -> int:
         return self.poll.count
 
-    def record(self, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None) -> None:
-        self.poll.record(poll_ms)
+    def record(self, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None,
+               proxy=None) -> None:
+        now = time.time()
+        self.poll.record(poll_ms, now)
         # Only count connect times when a real connection was established (value > 0)
         if ble_ms is not None and float(ble_ms) > 0:
-            self.ble.record(ble_ms)
+            self.ble.record(ble_ms, now)
         if esphome_api_ms is not None and float(esphome_api_ms) > 0:
-            self.esphome_api.record(esphome_api_ms)
+            self.esphome_api.record(esphome_api_ms, now)
         # RSSI: record every sample (instantaneous signal strength per poll)
         if ble_rssi is not None:
             self.ble_rssi.record(ble_rssi)
@@ -91,18 +325,35 @@ class _ModeStats:
             self.wifi_rssi.record(wifi_rssi)
         if transport in self._transport_counts:
             self._transport_counts[transport] += 1
+        if proxy:
+            self._proxy_counts[proxy] = self._proxy_counts.get(proxy, 0) + 1
 
     def to_dict(self) -> dict:
-        return {
+        d = {
             "sample_count":    self.sample_count,
             "transport":       self._transport_counts,
-            "poll_ms":         self.poll.to_dict(),
-            "ble_ms":          self.ble.to_dict(),
-            "esphome_api_ms":  self.esphome_api.to_dict(),
-            "ble_rssi_dbm":    self.ble_rssi.to_dict(),
-            "wifi_rssi_dbm":   self.wifi_rssi.to_dict(),
+            "proxy":           self._proxy_counts,
+        }
+        d.update({key: m.to_dict() for key, m in self._metrics().items()})
+        return d
+
+    def to_state(self) -> dict:
+        return {
+            "transport": dict(self._transport_counts),
+            "proxy": dict(self._proxy_counts),
+            "metrics": {key: m.to_state() for key, m in self._metrics().items()},
         }
 
+    def load_state(self, state: dict) -> None:
+        for t, n in state.get("transport", {}).items():
+            if t in self._transport_counts:
+                self._transport_counts[t] = int(n)
+        self._proxy_counts = {p: int(n) for p, n in state.get("proxy", {}).items()}
+        metrics = self._metrics()
+        for key, m_state in state.get("metrics", {}).items():
+            if key in metrics:
+                metrics[key].load_state(m_state)
+
     def to_markdown_rows(self) -> list[str]:
         def _f(v):
             return f"{v} ms" if v is not None else "—"
@@ -123,33 +374,111 @@ class _ModeStats:
             )
         return rows
 
+    def to_markdown_percentile_rows(self) -> list[str]:
+        def _f(v):
+            return f"{v} ms" if v is not None else "—"
+
+        now = time.time()
+        rows = []
+        for label, m in [
+            ("Poll (query)",  self.poll),
+            ("BLE connect",   self.ble),
+            ("ESP32 connect", self.esphome_api),
+        ]:
+            views = [("lifetime", {"count": m.count, **m.percentiles()})]
+            views += [(name, m.window(name, now)) for name in _LatencyHistogram.WINDOWS]
+            for window, v in views:
+                rows.append(
+                    f"| {label:<16} | {window:<8} | {_f(v['p50_ms']):>12} | {_f(v['p90_ms']):>12} "
+                    f"| {_f(v['p99_ms']):>12} | {v['count']:>7} |"
+                )
+        return rows
+
 
 class PollStats:
     """
     In-memory performance statistics accumulated per BLE connection mode.
     Safe for single-threaded asyncio use. Never raises.
+
+    persist_path: optional JSON file.  Existing stats are restored from it on
+    construction and written back at most every SAVE_INTERVAL seconds from
+    record(), and on save().
     """
 
     MODES = ("persistent", "on-demand")
+    SAVE_INTERVAL = 300.0
+    _STATE_VERSION = 1
 
-    def __init__(self):
+    def __init__(self, persist_path: Optional[str] = None):
         self._modes: dict[str, _ModeStats] = {m: _ModeStats() for m in self.MODES}
+        self._persist_path = persist_path or None
+        self._last_save = time.monotonic()
+        if self._persist_path:
+            self._load()
 
-    def record(self, mode: str, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None) -> None:
+    def record(self, mode: str, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None,
+               proxy=None) -> None:
         """Record one completed poll cycle's timings and signal strengths for the given connection mode.
 
         transport: "bleak" | "esp32-wifi" | "esp32-eth"
           bleak     — local BLE adapter on the bridge host
           esp32-wifi — ESP32 proxy reachable via WiFi (wifi_rssi present)
           esp32-eth  — ESP32 proxy reachable via Ethernet (no wifi_rssi)
+        proxy: host of the ESP32 proxy the poll went through (None = local adapter)
         """
         try:
             stats = self._modes.get(mode)
             if stats:
-                stats.record(esphome_api_ms, ble_ms, poll_ms, ble_rssi=ble_rssi, wifi_rssi=wifi_rssi, transport=transport)
+                stats.record(esphome_api_ms, ble_ms, poll_ms, ble_rssi=ble_rssi, wifi_rssi=wifi_rssi,
+                             transport=transport, proxy=proxy)
+            if self._persist_path and time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+                self.save()
         except Exception:
             pass
 
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self) -> None:
+        """Write stats to persist_path (atomic replace).  No-op without a path.  Never raises."""
+        if not self._persist_path:
+            return
+        self._last_save = time.monotonic()
+        try:
+            state = {
+                "version": self._STATE_VERSION,
+                "saved_at": time.time(),
+                "modes": {mode: stats.to_state() for mode, stats in self._modes.items()},
+            }
+            tmp = f"{self._persist_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self._persist_path)
+        except Exception as e:
+            logger.warning(f"PollStats: could not save {self._persist_path}: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self._persist_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"PollStats: could not read {self._persist_path}: {e} — starting fresh")
+            return
+        if state.get("version") != self._STATE_VERSION:
+            logger.info(f"PollStats: {self._persist_path} has an unknown version — starting fresh")
+            return
+        try:
+            for mode, m_state in state.get("modes", {}).items():
+                if mode in self._modes:
+                    self._modes[mode].load_state(m_state)
+            logger.info(f"PollStats: restored stats from {self._persist_path}")
+        except Exception as e:
+            logger.warning(f"PollStats: corrupt stats in {self._persist_path}: {e} — starting fresh")
+            self._modes = {m: _ModeStats() for m in self.MODES}
+
+    # ── Views ────────────────────────────────────────────────────────────────
+
     def to_dict(self) -> dict:
         """Return full stats as a JSON-serialisable dict."""
         return {mode: stats.to_dict() for mode, stats in self._modes.items()}
@@ -164,6 +493,7 @@ class PollStats:
             "> In **on-demand** mode every poll cycle includes a full connect.",
             "> RSSI values are recorded every poll (instantaneous signal strength at scan time).",
             "> Transport: bleak = local BLE adapter; esp32-wifi = ESP32 via WiFi; esp32-eth = ESP32 via Ethernet.",
+            "> Percentiles come from log-bucketed histograms (≤ 12.5 % bucket width); 1h / 24h are rolling windows.",
             "",
         ]
         for mode, stats in self._modes.items():
@@ -180,8 +510,17 @@ class PollStats:
             if transport_str:
                 lines.append(f"Transport: {transport_str}")
                 lines.append("")
+            if len(stats._proxy_counts) > 1:
+                lines.append("Proxy: " + "  ".join(f"{p}: {n}" for p, n in sorted(stats._proxy_counts.items())))
+                lines.append("")
             lines.append(f"| {'Metric':<16} | {'Min':>12} | {'Avg':>12} | {'Max':>12} | {'Samples':>7} |")
             lines.append(f"|{'-'*18}|{'-'*14}|{'-'*14}|{'-'*14}|{'-'*9}|")
             lines.extend(stats.to_markdown_rows())
             lines.append("")
+            lines.append(
+                f"| {'Metric':<16} | {'Window':<8} | {'p50':>12} | {'p90':>12} | {'p99':>12} | {'Samples':>7} |"
+            )
+            lines.append(f"|{'-'*18}|{'-'*10}|{'-'*14}|{'-'*14}|{'-'*14}|{'-'*9}|")
+            lines.extend(stats.to_markdown_percentile_rows())
+            lines.append("")
         return "\n".join(lines)
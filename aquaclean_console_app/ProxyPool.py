@@ -0,0 +1,157 @@
+"""
+Several ESP32 proxies for one bridge: pick the best, fail over within a session.
+
+[ESPHOME] host used to name exactly one proxy, and when that proxy's TCP
+connection or BLE scan failed the bridge kept retrying it until the circuit
+breaker opened and _trigger_esphome_restart() rebooted it.  host may now
+list several proxies that can all see the toilet:
+
+    host = 192.168.0.154, bathroom-proxy.local:6054
+
+ProxyPool keeps a TransportHealth per proxy (failure and timeout rate,
+connect latency, BLE RSSI of the toilet as that proxy hears it — see
+CircuitBreaker.py) and orders the proxies for each connect:
+
+  - The proxy of the last successful session stays first unless another
+    proxy's score beats it by more than SWITCH_MARGIN points, so the bridge
+    does not flap between two proxies of similar quality.
+  - A proxy that was never used ranks as healthy (score 100) — each proxy is
+    tried once and gets a real score.
+  - A proxy whose connect failed less than FAILED_HOLD_S seconds ago goes
+    last.
+
+BluetoothLeConnector.connect_async() walks that order: when the TCP
+connection to a proxy or its scan for the toilet fails, it records the
+failure and tries the next proxy in the same session — failover costs one
+connect attempt, not three failed polls and an ESP32 reboot.  Other failures
+(GATT connect, calls) are recorded against the proxy but not retried there.
+
+Process-wide singleton PROXIES, configured from config.ini by main.py.  With
+one proxy the order is always that proxy and nothing changes.  Stdlib only.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable, Optional
+
+from aquaclean_console_app.CircuitBreaker import TransportHealth
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6053
+
+
+def parse_hosts(raw: str, default_port: int = DEFAULT_PORT) -> list[tuple[str, int]]:
+    """[ESPHOME] host → [(host, port)].  Entries are comma-separated, each host or host:port."""
+    proxies = []
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, sep, port = entry.rpartition(":")
+        if sep and port.isdigit() and host and ":" not in host:
+            proxies.append((host, int(port)))
+        else:
+            proxies.append((entry, default_port))
+    return proxies
+
+
+class Proxy:
+    """One ESP32 proxy and its link quality."""
+
+    __slots__ = ("host", "port", "name", "health", "sessions", "failures", "failovers",
+                 "last_error", "failed_at")
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.name: Optional[str] = None          # ESPHome device name, once connected
+        self.health = TransportHealth(f"esp32:{host}")
+        self.sessions = 0                        # successful connects
+        self.failures = 0
+        self.failovers = 0                       # times a session moved on from this proxy
+        self.last_error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return self.host if self.port == DEFAULT_PORT else f"{self.host}:{self.port}"
+
+    def to_dict(self) -> dict:
+        return {
+            "host":       self.host,
+            "port":       self.port,
+            "name":       self.name,
+            "sessions":   self.sessions,
+            "failures":   self.failures,
+            "failovers":  self.failovers,
+            "last_error": self.last_error,
+            **self.health.to_dict(),
+        }
+
+
+class ProxyPool:
+    """The configured ESP32 proxies, best first.  See module docstring."""
+
+    SWITCH_MARGIN = 10       # score points another proxy must be ahead by to take over
+    FAILED_HOLD_S = 60.0     # a proxy that just failed is tried last for this long
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.proxies: list[Proxy] = []
+        self.current: Optional[Proxy] = None     # proxy of the last successful connect
+
+    def configure(self, hosts: list[tuple[str, int]]) -> None:
+        known = {(p.host, p.port): p for p in self.proxies}
+        self.proxies = [known.get((h, port)) or Proxy(h, port) for h, port in hosts]
+        if self.current not in self.proxies:
+            self.current = None
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def _score(self, proxy: Proxy) -> int:
+        score = proxy.health.score
+        return 100 if score is None else score
+
+    def _recently_failed(self, proxy: Proxy) -> bool:
+        return proxy.failed_at is not None and self._clock() - proxy.failed_at < self.FAILED_HOLD_S
+
+    def candidates(self) -> list[Proxy]:
+        """The proxies in the order a connect should try them."""
+        def rank(item):
+            index, proxy = item
+            score = self._score(proxy)
+            if proxy is self.current:
+                score += self.SWITCH_MARGIN
+            return (self._recently_failed(proxy), -score, index)
+        return [p for _, p in sorted(enumerate(self.proxies), key=rank)]
+
+    def record_success(self, proxy: Proxy, connect_ms: Optional[float] = None,
+                       rssi: Optional[float] = None, name: Optional[str] = None) -> None:
+        proxy.health.record(True, connect_ms=connect_ms, rssi=rssi)
+        proxy.sessions += 1
+        proxy.failed_at = None
+        if name:
+            proxy.name = name
+        if self.current is not proxy:
+            if self.current is not None:
+                logger.info(f"ESP32 proxy: switching from {self.current.label} to {proxy.label}")
+            self.current = proxy
+
+    def record_failure(self, proxy: Proxy, error: str, timeout: bool = False,
+                       failover: bool = False) -> None:
+        proxy.health.record(False, timeout=timeout)
+        proxy.failures += 1
+        proxy.failed_at = self._clock()
+        proxy.last_error = error
+        if failover:
+            proxy.failovers += 1
+
+    def to_dict(self) -> list[dict]:
+        return [{**p.to_dict(), "selected": p is self.current} for p in self.proxies]
+
+
+PROXIES = ProxyPool()
@@ -7,10 +7,12 @@ import signal
 import sys
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
+from aquaclean_console_app import BridgeMetrics
+
 
 class BleConnectionUpdate(BaseModel):
     value: str
@@ -53,10 +55,33 @@ class RestApiService:
     def set_api_mode(self, api_mode):
         self._api_mode = api_mode
 
-    async def broadcast_state(self, state: dict):
-        data = {"type": "state", **state}
+    def mount(self, prefix: str, other: "RestApiService") -> None:
+        """Serve another device's routes (and web UI) under prefix — multi-device bridge."""
+        self.app.mount(prefix, other.app)
+
+    @staticmethod
+    def _sse_state_event(state, version=None, changed=()) -> str:
+        return "data: " + json.dumps({"type": "state", "version": version, "changed": sorted(changed), **state}) + "\n\n"
+
+    async def on_state_changed(self, change):
+        """StateStore subscriber: push the new state to every SSE client.
+
+        The event carries the full snapshot (the web UI redraws every card from
+        it) plus version and the changed keys; it is serialised once and the
+        same string is queued for all clients."""
+        if not self._sse_queues:
+            return
+        event = self._sse_state_event(change.snapshot, change.version, change.changes)
+        for q in list(self._sse_queues):
+            await q.put(event)
+
+    async def send_event(self, payload: dict):
+        """Push one event other than a state change (payload["type"], e.g. "session") to every SSE client."""
+        if not self._sse_queues:
+            return
+        event = "data: " + json.dumps(payload) + "\n\n"
         for q in list(self._sse_queues):
-            await q.put(data)
+            await q.put(event)
 
     def _close_sse_connections(self):
         for q in list(self._sse_queues):
@@ -76,9 +101,10 @@ class RestApiService:
         async def sse():
             queue: asyncio.Queue = asyncio.Queue()
             self._sse_queues.append(queue)
+            BridgeMetrics.SSE_SUBSCRIBERS.inc()
             try:
                 initial = self._api_mode.get_current_state()
-                await queue.put({"type": "state", **initial})
+                await queue.put(self._sse_state_event(initial, self._api_mode.service.device_state.version))
             except Exception:
                 pass
 
@@ -86,10 +112,10 @@ class RestApiService:
                 try:
                     while True:
                         try:
-                            data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                            if data is None:  # shutdown sentinel
+                            event = await asyncio.wait_for(queue.get(), timeout=30.0)
+                            if event is None:  # shutdown sentinel
                                 return
-                            yield f"data: {json.dumps(data)}\n\n"
+                            yield event
                         except asyncio.TimeoutError:
                             yield ": heartbeat\n\n"
                 except (asyncio.CancelledError, GeneratorExit):
@@ -97,6 +123,7 @@ class RestApiService:
                 finally:
                     if queue in self._sse_queues:
                         self._sse_queues.remove(queue)
+                        BridgeMetrics.SSE_SUBSCRIBERS.dec()
 
             return StreamingResponse(
                 generate(),
@@ -139,6 +166,56 @@ class RestApiService:
                 return PlainTextResponse(data)
             return data
 
+        @app.get("/info/calls")
+        async def get_call_stats(format: str = "json"):
+            from fastapi.responses import PlainTextResponse
+            data = self._api_mode.get_call_stats(format)
+            if format == "markdown":
+                return PlainTextResponse(data)
+            return data
+
+        @app.get("/info/health")
+        async def get_health_stats():
+            return self._api_mode.get_health_stats()
+
+        @app.get("/info/timeouts")
+        async def get_timeout_stats():
+            return self._api_mode.get_timeout_stats()
+
+        @app.get("/info/runtime")
+        async def get_runtime_info():
+            return self._api_mode.get_runtime_info()
+
+        @app.get("/info/settings")
+        async def get_settings_refresh_info():
+            return self._api_mode.get_settings_refresh_info()
+
+        @app.get("/info/airtime")
+        async def get_airtime_stats():
+            return self._api_mode.get_airtime_stats()
+
+        @app.get("/info/usage")
+        async def get_usage_stats(days: int = 7):
+            return self._api_mode.get_usage_stats(days)
+
+        @app.get("/info/scheduler")
+        async def get_scheduler_stats():
+            return self._api_mode.get_scheduler_stats()
+
+        @app.get("/history")
+        async def get_history(field: str = "", to: str = "", max_points: int = 0,
+                              from_: str = Query("", alias="from")):
+            """Recorded fields, or ?field=ble_rssi&from=...&to=... (epoch seconds or ISO 8601)."""
+            return await asyncio.to_thread(self._api_mode.get_history, field, from_, to, max_points)
+
+        @app.get("/devices")
+        async def get_devices():
+            return self._api_mode.get_devices()
+
+        @app.get("/metrics")
+        async def get_metrics():
+            return Response(BridgeMetrics.render(), media_type=BridgeMetrics.CONTENT_TYPE)
+
         @app.get("/status")
         async def get_status():
             return await self._api_mode.get_status()
@@ -236,6 +313,11 @@ class RestApiService:
         async def get_system_parameters():
             return await self._api_mode.get_system_parameters()
 
+        @app.get("/data/batch")
+        async def get_data_batch(items: str = ""):
+            """Several /data/* items in one BLE session, e.g. ?items=system-parameters,filter-status."""
+            return await self._api_mode.get_data_batch(items)
+
         @app.get("/data/node-list")
         async def get_node_list():
             return await self._api_mode.get_node_list()
@@ -0,0 +1,130 @@
+"""
+Trickle refresh of the stored profile (0x53) and common (0x51) settings.
+
+Reading every setting costs one BLE call per ID — 11 profile + 7 common
+settings, ~2.2 s and more — so the bridge reads them once and then served the
+cache forever: a change made in the Geberit app or on the remote control was
+never picked up.  SettingsRefresher re-reads a few settings per poll instead:
+
+  - round-robin over the settings of the poll plan (FieldCatalog), per_poll
+    at a time, so the whole set is refreshed every
+    ceil(len(settings) / per_poll) polls without a latency spike in any one;
+  - a setting written through the bridge (set_profile_setting /
+    set_common_setting) is queued with written() and re-read alone on the
+    next poll, ahead of the round-robin, to confirm what the device stored;
+  - every read — trickle or full (record()) — stamps the setting, and ages()
+    reports how old each cached value is (GET /info/settings).
+
+refresh() writes changed values into device_state as a new dict (device_state
+is a copy-on-write StateStore, nested dicts are never mutated) and returns
+the changes so the caller can publish them.  per_poll = 0 disables the
+round-robin; written settings are still re-read.
+
+Single event loop only.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanBaseClient import BLEPeripheralTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# kind → device_state key
+STATE_KEYS = {
+    "profile": "profile_settings",
+    "common":  "common_settings",
+}
+
+
+class SettingsRefresher:
+    """Round-robin re-read of stored settings, a few per poll.  See module docstring."""
+
+    def __init__(self, profile_ids=(), common_ids=(), per_poll: int = 1, clock=time.monotonic):
+        self.per_poll = per_poll
+        self._clock = clock
+        self._order = [("profile", sid) for sid in profile_ids] + [("common", sid) for sid in common_ids]
+        self._next = 0                                  # round-robin position in _order
+        self._written: list[tuple[str, int]] = []       # re-read first, in write order
+        self._read_at: dict[tuple[str, int], float] = {}
+        self.reads = 0
+        self.changes = 0
+        self.timeouts = 0
+
+    def due(self) -> list[tuple[str, int]]:
+        """The (kind, setting ID) pairs to re-read on this poll.
+
+        Written settings first; the round-robin fills the remaining per_poll
+        slots and only advances by what it contributed."""
+        items = list(self._written)
+        for _ in range(min(self.per_poll - len(items), len(self._order))):
+            item = self._order[self._next]
+            self._next = (self._next + 1) % len(self._order)
+            if item not in items:
+                items.append(item)
+        return items
+
+    def written(self, kind: str, setting_id: int) -> None:
+        """A write went to the device — re-read this setting on the next poll."""
+        item = (kind, setting_id)
+        if item not in self._written:
+            self._written.append(item)
+
+    def record(self, kind: str, values: dict) -> None:
+        """A read of these settings (full or partial) has just completed."""
+        now = self._clock()
+        for sid in values:
+            self._read_at[(kind, sid)] = now
+            if (kind, sid) in self._written:
+                self._written.remove((kind, sid))
+
+    async def refresh(self, base_client, device_state) -> list[tuple[str, int, int]]:
+        """Re-read the due settings.  Returns [(kind, setting ID, new value)] for the changed ones.
+
+        Settings whose cache was never filled (device_state value None) are
+        left to the full read.  A timed-out read is logged and retried on its
+        next turn; any other error propagates like a failed poll."""
+        changed = []
+        for kind, sid in self.due():
+            current = device_state.get(STATE_KEYS[kind])
+            if current is None:
+                continue
+            read = (base_client.get_stored_profile_settings_async if kind == "profile"
+                    else base_client.get_stored_common_settings_async)
+            try:
+                values = await read(ids=[sid])
+            except BLEPeripheralTimeoutError as e:
+                self.timeouts += 1
+                logger.warning(f"SettingsRefresher: {kind} setting {sid} timed out, retrying on its next turn: {e}")
+                continue
+            self.reads += 1
+            self.record(kind, values)
+            if sid in values and current.get(sid) != values[sid]:
+                logger.info(f"SettingsRefresher: {kind} setting {sid} changed on the device: {current.get(sid)} → {values[sid]}")
+                device_state[STATE_KEYS[kind]] = {**current, sid: values[sid]}
+                changed.append((kind, sid, values[sid]))
+                self.changes += 1
+        return changed
+
+    def ages(self) -> dict:
+        """{kind: {setting ID: seconds since the last read, None = never read}}."""
+        now = self._clock()
+        ages: dict = {kind: {} for kind in STATE_KEYS}
+        for kind, sid in self._order:
+            read_at = self._read_at.get((kind, sid))
+            ages[kind][sid] = None if read_at is None else round(now - read_at, 1)
+        return ages
+
+    def to_dict(self) -> dict:
+        return {
+            "per_poll":    self.per_poll,
+            "cycle_polls": math.ceil(len(self._order) / self.per_poll) if self.per_poll > 0 else None,
+            "pending":     [f"{kind}:{sid}" for kind, sid in self._written],
+            "reads":       self.reads,
+            "changes":     self.changes,
+            "timeouts":    self.timeouts,
+            "age_s":       self.ages(),
+        }
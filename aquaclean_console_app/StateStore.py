@@ -0,0 +1,144 @@
+"""
+Versioned state store behind ServiceMode.device_state.
+
+device_state used to be a plain dict.  Many code paths write into it, and
+after each change the whole dict was copied for the SSE broadcast, while the
+MQTT monitor topics were republished whether or not their value had changed.
+StateStore keeps the mapping interface, so device_state[k] = v still works,
+and adds:
+
+    version   — incremented by every write that changes a value.  Writing a
+                value equal to the current one is not a change.
+    snapshot  — snapshot() returns a read-only view (MappingProxyType) of the
+                current state and is cached until the next change.  Snapshots
+                are immutable: the first change after one was handed out
+                copies the top-level dict (copy on write) and later changes go
+                into that copy.  Values are shared between snapshots, not
+                copied, so nested dicts (profile_settings, filter_status, ...)
+                must be replaced, never mutated in place.
+    changes   — the keys changed since the last publish() are collected.
+                publish() hands subscribers one StateChange(version, changes,
+                snapshot) through the Changed event and returns it; it does
+                nothing if no key changed.
+
+Subscribers (SSE, the MQTT monitor topics and PollStats — see main.py) read
+change.changes instead of diffing or copying the state.
+
+Single event loop only.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from aquaclean_console_app.myEvent import myEvent
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class StateChange:
+    version: int                    # store version this change set brings subscribers to
+    changes: frozenset              # keys whose value changed since the previous publish()
+    snapshot: Mapping[str, Any]     # immutable state at `version`
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.changes
+
+
+class StateStore(MutableMapping):
+    """Copy-on-write mapping with a version and change sets.  See module docstring."""
+
+    def __init__(self, initial: Optional[Mapping[str, Any]] = None):
+        self._data: dict = dict(initial or {})
+        self._snapshot: Optional[MappingProxyType] = None   # view of _data; set = _data is frozen
+        self._pending: set = set()
+        self.version = 0
+        self.published_version = 0
+        self.Changed = myEvent.EventHandler()   # async handler(change: StateChange)
+
+    # ── Mapping interface ────────────────────────────────────────────────────
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        old = self._data.get(key, _MISSING)
+        if old is value or (old is not _MISSING and _equal(old, value)):
+            return
+        self._writable()[key] = value
+        self._changed(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._data:
+            raise KeyError(key)
+        del self._writable()[key]
+        self._changed(key)
+
+    def __repr__(self) -> str:
+        return f"StateStore(version={self.version}, {self._data!r})"
+
+    # ── Snapshots and change sets ────────────────────────────────────────────
+
+    def snapshot(self) -> Mapping[str, Any]:
+        """Immutable view of the current state (no copy)."""
+        if self._snapshot is None:
+            self._snapshot = MappingProxyType(self._data)
+        return self._snapshot
+
+    @property
+    def pending(self) -> frozenset:
+        """Keys changed since the last publish()."""
+        return frozenset(self._pending)
+
+    async def publish(self) -> Optional[StateChange]:
+        """Hand the change set since the last publish() to the Changed subscribers."""
+        if not self._pending:
+            return None
+        change = StateChange(self.version, frozenset(self._pending), self.snapshot())
+        self._pending.clear()
+        self.published_version = self.version
+        for handler in list(self.Changed.get_handlers()):
+            try:
+                await handler(change)
+            except Exception as e:
+                logger.warning(f"StateStore: subscriber {getattr(handler, '__qualname__', handler)} failed: {e}")
+        return change
+
+    def _writable(self) -> dict:
+        if self._snapshot is not None:
+            self._data = dict(self._data)
+            self._snapshot = None
+        return self._data
+
+    def _changed(self, key: str) -> None:
+        self.version += 1
+        self._pending.add(key)
+
+
+def _equal(a: Any, b: Any) -> bool:
+    # bool vs int: True == 1, but a flag turning into a counter is still a change.
+    if type(a) is not type(b):
+        return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
@@ -0,0 +1,227 @@
+"""
+Bridge version and runtime environment (--version, system-info, start-up log).
+
+Stdlib only: --version and --command system-info are answered without
+importing main.py (see CliArgs.py).
+"""
+
+import importlib.metadata
+import json
+import os
+import re
+
+from aquaclean_console_app.BridgeConfig import config
+
+
+def _get_version() -> str:
+    """Return version string.
+
+    When installed from a tagged release (e.g. v2.4.12) returns the plain
+    version ("2.4.12").  When installed from a commit SHA or branch name
+    (e.g. pip install git+...@e09f1e7 or @main) appends the short commit SHA
+    so the exact code revision is identifiable: "2.4.12+e09f1e7".
+
+    Uses pip's PEP 610 direct_url.json metadata — no extra dependencies.
+    """
+    base = "unknown"
+    try:
+        base = importlib.metadata.version("geberit-aquaclean")
+        dist = importlib.metadata.distribution("geberit-aquaclean")
+        text = dist.read_text("direct_url.json")
+        if text:
+            vcs = json.loads(text).get("vcs_info", {})
+            requested = vcs.get("requested_revision", "")
+            commit_id = vcs.get("commit_id", "")
+            # A version tag looks like "v2.4.12" or "2.4.12" — always contains
+            # a dot.  Commit SHAs (hex, no dots) and branch names never do.
+            is_tag = "." in requested
+            if commit_id and not is_tag:
+                return f"{base}+{commit_id[:7]}"
+    except Exception:
+        pass
+    return base
+
+BRIDGE_VERSION = _get_version()   # module-level so argparse --version can use it
+
+
+def _safe_run(args: list, timeout: int = 5) -> str:
+    """Run a subprocess and return stripped stdout. Returns '' on any error. Never raises."""
+    import subprocess as _sp
+    try:
+        r = _sp.run(args, capture_output=True, text=True, timeout=timeout)
+        return r.stdout.strip()
+    except FileNotFoundError:
+        return ""
+    except _sp.TimeoutExpired:
+        return ""
+    except (PermissionError, OSError):
+        return ""
+    except Exception:
+        return ""
+
+
+def get_system_info() -> dict:
+    """
+    Return a structured dict describing the runtime environment.
+    All fields are best-effort — missing/unavailable fields are None.
+    Never raises.
+    """
+    import platform as _pl
+    import sys as _sys
+
+    # --- App / Python / OS ---
+    _pv = _sys.version_info
+    python_version = f"{_pv.major}.{_pv.minor}.{_pv.micro}"
+    os_name    = _pl.system()    # "Linux", "Darwin", "Windows"
+    os_release = _pl.release()   # e.g. "6.1.0-rpi7-rpi-v8"
+    machine    = _pl.machine()   # "aarch64", "x86_64", …
+
+    # Read PRETTY_NAME and VERSION from /etc/os-release (Linux/macOS)
+    os_pretty_name = None
+    os_version     = None
+    try:
+        with open("/etc/os-release") as _f:
+            for _line in _f:
+                _k, _, _v = _line.strip().partition("=")
+                _v = _v.strip('"\'')
+                if _k == "PRETTY_NAME":
+                    os_pretty_name = _v
+                elif _k == "VERSION":
+                    os_version = _v
+    except OSError:
+        pass
+
+    # --- Environment detection ---
+    # HA add-on: HASSIO_TOKEN or /data/options.json (supervisor volume)
+    if os.environ.get("HASSIO_TOKEN") or os.path.exists("/data/options.json"):
+        environment = "homeassistant_addon"
+        docker = True
+    else:
+        try:
+            import homeassistant as _ha  # noqa: F401
+            environment = "homeassistant_custom_component"
+            docker = os.path.exists("/.dockerenv")
+        except ImportError:
+            environment = "docker_standalone" if os.path.exists("/.dockerenv") else "standalone"
+            docker = os.path.exists("/.dockerenv")
+
+    # --- Config (reads module-level config object) ---
+    def _cfg(section, key, fallback=None):
+        try:
+            return config.get(section, key, fallback=fallback)
+        except Exception:
+            return fallback
+
+    config_info = {
+        "geberit_address":  _cfg("BLE",     "device_id"),
+        "esphome_host":     _cfg("ESPHOME", "host") or None,
+        "esphome_port":     _cfg("ESPHOME", "port", fallback="6053"),
+        "poll_interval":    _cfg("POLL",    "interval", fallback="0"),
+        "ble_connection":   _cfg("SERVICE", "ble_connection", fallback="persistent"),
+        "log_level":        _cfg("LOGGING", "log_level", fallback="DEBUG"),
+    }
+
+    # --- Library versions ---
+    def _pkg(name: str):
+        try:
+            return importlib.metadata.version(name)
+        except Exception:
+            return None
+
+    libraries = {
+        "bleak":         _pkg("bleak"),
+        "aioesphomeapi": _pkg("aioesphomeapi"),
+        "fastapi":       _pkg("fastapi"),
+        "uvicorn":       _pkg("uvicorn"),
+        "paho-mqtt":     _pkg("paho-mqtt"),
+        "aiorun":        _pkg("aiorun"),
+    }
+
+    # --- Bluetooth adapter info (Linux/BlueZ only) ---
+    bluetooth = {
+        "bluez_version":   None,
+        "adapter_name":    None,
+        "adapter_address": None,
+        "connection_type": None,   # "internal" or "USB dongle"
+        "bus":             None,   # "UART" or "USB"
+        "manufacturer":    None,
+        "hci_version":     None,
+        "chip":            None,
+        "firmware_file":   None,
+        "firmware_version": None,
+        "note":            None,
+    }
+
+    if os_name == "Linux":
+        # BlueZ version
+        bv = _safe_run(["bluetoothd", "--version"])
+        if bv:
+            bluetooth["bluez_version"] = bv
+
+        # Adapter info via hciconfig
+        hci = _safe_run(["hciconfig", "-a"])
+        if hci:
+            for line in hci.splitlines():
+                s = line.strip()
+                if not s:
+                    continue
+                if s.startswith("hci0:"):
+                    bluetooth["adapter_name"] = "hci0"
+                    if "Bus: UART" in s:
+                        bluetooth["bus"] = "UART"
+                        bluetooth["connection_type"] = "internal"
+                    elif "Bus: USB" in s:
+                        bluetooth["bus"] = "USB"
+                        bluetooth["connection_type"] = "USB dongle"
+                elif "BD Address:" in s:
+                    # "BD Address: DC:A6:32:XX:XX:XX  ACL MTU: ..."
+                    try:
+                        bluetooth["adapter_address"] = s.split()[2]
+                    except IndexError:
+                        pass
+                elif "Manufacturer:" in s:
+                    bluetooth["manufacturer"] = s.split("Manufacturer:", 1)[1].strip()
+                elif "HCI Version:" in s:
+                    bluetooth["hci_version"] = s.split("HCI Version:", 1)[1].split("(")[0].strip()
+        else:
+            bluetooth["note"] = "hciconfig not available or no adapter found"
+
+        # Firmware info from dmesg
+        dmesg = _safe_run(["dmesg"], timeout=5)
+        if dmesg:
+            for line in dmesg.splitlines():
+                ll = line.lower()
+                if "bluetooth" in ll and ".hcd" in ll:
+                    # "Bluetooth: hci0: BCM4345C0 'brcm/BCM4345C0.hcd' Patch"
+                    m = re.search(r"'([^']+\.hcd)'", line)
+                    if m:
+                        bluetooth["firmware_file"] = m.group(1)
+                    m2 = re.search(r"(BCM\w+)", line)
+                    if m2:
+                        bluetooth["chip"] = m2.group(1)
+                elif "bluetooth" in ll and "firmware" in ll and "version" in ll:
+                    # "Bluetooth: hci0: BCM: firmware Patch file version 0190"
+                    parts = line.split()
+                    if parts:
+                        bluetooth["firmware_version"] = parts[-1]
+        bluetooth["geberit_firmware"] = "not yet available"
+
+    elif os_name == "Darwin":
+        bluetooth["note"] = "macOS — CoreBluetooth; no hciconfig/BlueZ info available"
+    else:
+        bluetooth["note"] = f"{os_name} — Bluetooth stack info not collected"
+
+    return {
+        "app_version":    BRIDGE_VERSION,
+        "python_version": python_version,
+        "os":             os_name,
+        "os_release":     os_release,
+        "os_pretty_name": os_pretty_name,
+        "os_version":     os_version,
+        "machine":        machine,
+        "environment":    environment,
+        "docker":         docker,
+        "config":         config_info,
+        "libraries":      libraries,
+        "bluetooth":      bluetooth,
+    }
@@ -0,0 +1,214 @@
+"""
+Fair sharing of the BLE transport between the devices of one bridge process.
+
+With several devices configured ([DEVICES] names, see BridgeConfig.py) every
+device has its own ServiceMode / ApiMode, state store, MQTT topic and
+BleScheduler, but they all talk through the same local adapter or ESP32
+proxy, and that can only hold a few BLE connections at once — ESPHome's
+bluetooth_proxy has 3 connection slots, and two devices scanning and
+connecting at the same time through one adapter slow each other down.
+TransportScheduler hands out those slots:
+
+  - slots ([DEVICES] max_connections, default 1) connections may be open at
+    a time, across all devices.  An on-demand session holds a slot from
+    connect to disconnect (ApiMode._on_demand, advertisement probes); a
+    persistent connection holds one for as long as it stays connected
+    (ServiceMode.run).
+  - When a slot frees up, the waiting request of the highest priority class
+    (BleScheduler.Priority) gets it — a command on one toilet still goes
+    before a poll on the other.  Within a class the devices take turns
+    (round-robin), so one device polling at 2 s cannot starve another.
+  - Connect phases — scan, advertisement subscription, GATT connect — run
+    one at a time (the connecting lock) even with several slots: an ESP32
+    proxy allows only one advertisement subscription at a time.
+  - Per device the scheduler reports sessions, airtime (slot-seconds held),
+    share of the total airtime, queue wait, and the poll budget: the
+    configured poll interval against the interval actually achieved
+    (GET /devices).
+
+Each device's BleScheduler still orders and merges that device's own
+sessions; TransportScheduler only decides which device's session may open a
+connection next.  With a single device and one slot it never makes anybody
+wait that BleScheduler would not have made wait already.
+
+Process-wide singleton TRANSPORT, configured from config.ini by main.py.
+Single event loop only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+
+from aquaclean_console_app.BleScheduler import Priority
+from aquaclean_console_app.PollStats import _MetricStats
+
+logger = logging.getLogger(__name__)
+
+POLL_EWMA_ALPHA = 0.2     # weight of the newest poll gap in the achieved poll interval
+BUDGET_SLACK = 1.5        # budget_met while achieved interval <= configured interval × this
+
+
+class _Slot:
+    __slots__ = ("device", "priority", "seq", "future", "submitted", "granted")
+
+    def __init__(self, device: str, priority: Priority, seq: int):
+        self.device = device
+        self.priority = priority
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.submitted = time.perf_counter()
+        self.granted: float | None = None
+
+
+class _DeviceStats:
+    __slots__ = ("sessions", "held_s", "queue_wait", "polls", "poll_budget_s", "last_poll", "poll_interval_s")
+
+    def __init__(self):
+        self.sessions = 0
+        self.held_s = 0.0
+        self.queue_wait = _MetricStats(histogram=True)
+        self.polls = 0
+        self.poll_budget_s: float | None = None   # configured poll interval, None / 0 = not polling
+        self.last_poll: float | None = None
+        self.poll_interval_s: float | None = None # achieved: EWMA of the time between completed polls
+
+
+class TransportScheduler:
+    """Connection slots on the shared adapter / proxy, fair across devices.  See module docstring."""
+
+    def __init__(self, slots: int = 1, clock=time.monotonic):
+        self.slots = max(1, slots)
+        self._clock = clock
+        self._seq = itertools.count()
+        self._waiting: list[_Slot] = []
+        self._held: list[_Slot] = []
+        self._devices: dict[str, _DeviceStats] = {}
+        self._last_device: str | None = None       # round-robin position
+        self.connecting = asyncio.Lock()            # one connect phase (scan + connect) at a time
+
+    def configure(self, slots: int) -> None:
+        self.slots = max(1, slots)
+        self._grant()
+
+    def register(self, device: str, poll_interval: float | None = None) -> None:
+        """Add a device (in round-robin order) and set its poll budget."""
+        stats = self._devices.setdefault(device, _DeviceStats())
+        stats.poll_budget_s = poll_interval or None
+
+    def _stats(self, device: str) -> _DeviceStats:
+        if device not in self._devices:
+            self.register(device)
+        return self._devices[device]
+
+    def in_use(self) -> int:
+        return len(self._held)
+
+    def waiting(self, device: str | None = None) -> int:
+        return sum(1 for s in self._waiting if device is None or s.device == device)
+
+    def _next(self) -> _Slot | None:
+        """Highest priority class first; within it the next device after the last one served."""
+        if not self._waiting:
+            return None
+        best = min(s.priority for s in self._waiting)
+        candidates = [s for s in self._waiting if s.priority == best]
+        order = list(self._devices)
+        start = order.index(self._last_device) + 1 if self._last_device in order else 0
+        rank = {d: (i - start) % len(order) for i, d in enumerate(order)}
+        return min(candidates, key=lambda s: (rank[s.device], s.seq))
+
+    def _grant(self) -> None:
+        while len(self._held) < self.slots:
+            slot = self._next()
+            if slot is None:
+                return
+            self._waiting.remove(slot)
+            self._take(slot)
+            slot.future.set_result(None)
+
+    def _take(self, slot: _Slot) -> None:
+        slot.granted = self._clock()
+        self._held.append(slot)
+        self._last_device = slot.device
+        stats = self._stats(slot.device)
+        stats.sessions += 1
+        stats.queue_wait.record((time.perf_counter() - slot.submitted) * 1000)
+
+    async def acquire(self, device: str, priority: Priority = Priority.POLL) -> _Slot:
+        """Wait for a free connection slot; release() it when the connection is closed."""
+        slot = _Slot(device, Priority(priority), next(self._seq))
+        self._stats(device)
+        if len(self._held) < self.slots and not self._waiting:
+            self._take(slot)
+            return slot
+        self._waiting.append(slot)
+        if len(self._held) >= self.slots:
+            logger.debug(f"TransportScheduler: {device or 'device'} waits for a connection slot "
+                         f"({len(self._held)}/{self.slots} in use by {', '.join(s.device or '-' for s in self._held)})")
+        try:
+            await slot.future
+        except asyncio.CancelledError:
+            if slot in self._waiting:
+                self._waiting.remove(slot)
+            elif slot in self._held:
+                self.release(slot)          # granted and cancelled in the same loop iteration
+            raise
+        return slot
+
+    def release(self, slot: _Slot) -> None:
+        if slot not in self._held:
+            return
+        self._held.remove(slot)
+        self._stats(slot.device).held_s += self._clock() - slot.granted
+        self._grant()
+
+    async def run(self, device: str, priority: Priority, session, action):
+        """session(action) while holding a connection slot — wraps a BleScheduler session."""
+        slot = await self.acquire(device, priority)
+        try:
+            return await session(action)
+        finally:
+            self.release(slot)
+
+    def record_poll(self, device: str) -> None:
+        """A poll of device completed (persistent or on-demand)."""
+        stats = self._stats(device)
+        now = self._clock()
+        if stats.last_poll is not None:
+            gap = now - stats.last_poll
+            stats.poll_interval_s = gap if stats.poll_interval_s is None else \
+                stats.poll_interval_s + POLL_EWMA_ALPHA * (gap - stats.poll_interval_s)
+        stats.last_poll = now
+        stats.polls += 1
+
+    def to_dict(self) -> dict:
+        """Slots in use, and per device: sessions, airtime and its share, queue wait, poll budget."""
+        now = self._clock()
+        held = {d: s.held_s for d, s in self._devices.items()}
+        for slot in self._held:
+            held[slot.device] += now - slot.granted
+        total = sum(held.values())
+        devices = {}
+        for device, s in self._devices.items():
+            achieved = round(s.poll_interval_s, 1) if s.poll_interval_s is not None else None
+            devices[device] = {
+                "sessions":       s.sessions,
+                "connected":      sum(1 for slot in self._held if slot.device == device),
+                "waiting":        self.waiting(device),
+                "airtime_s":      round(held[device], 1),
+                "airtime_share":  round(held[device] / total, 3) if total else None,
+                "queue_wait_ms":  s.queue_wait.to_dict(),
+                "polls":          s.polls,
+                "poll_budget_s":  s.poll_budget_s,
+                "poll_interval_s": achieved,
+                "budget_met":     (achieved <= s.poll_budget_s * BUDGET_SLACK
+                                   if achieved is not None and s.poll_budget_s else None),
+            }
+        return {"slots": self.slots, "in_use": len(self._held), "waiting": len(self._waiting),
+                "devices": devices}
+
+
+TRANSPORT = TransportScheduler()
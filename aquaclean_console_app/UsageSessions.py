@@ -0,0 +1,249 @@
+"""
+Usage sessions derived from the SPL flags: GET /info/usage.
+
+Sessions per day, time seated, shower and dryer time used to be computed in
+Home Assistant templates over the recorder history of the four monitor
+flags — slow, and a shower that started and stopped between two recorder
+rows was lost.  UsageSessions derives them incrementally from the
+device_state change sets (ApiMode._on_state_changed), one transition at a
+time, with a small state machine:
+
+    idle ──any flag true──► sitting ⇄ shower ⇄ dryer ──all flags false──► leaving
+      ▲                                                                     │
+      └───────────── LEAVE_GRACE_S without a flag coming back ──────────────┘
+
+  - A session starts with the first flag that turns true — normally
+    is_user_sitting, but a shower seen without the sitting flag (missed
+    between two polls) opens one too.
+  - Time seated, anal / lady shower time and dryer time are summed from
+    each flag's true → false transitions; showers and dryer runs are
+    counted, so a run shorter than a poll interval still counts once.
+  - When every flag is false the session is leaving.  It completes
+    LEAVE_GRACE_S later (checked on the next change set — every poll is
+    one), so briefly shifting on the seat does not split a session.  Its
+    end is the moment the last flag went false.
+  - None (state unknown, e.g. while disconnected) changes nothing.  A
+    session still open after MAX_SESSION_S is dropped as stale.
+
+observe() returns the sessions it completed; ApiMode publishes each as one
+compact event (MQTT <topic>/peripheralDevice/usage/lastSession, SSE
+{"type": "session"}) and adds it to per-day counters, keyed by the local
+date the session started.  The counters of the last KEEP_DAYS days are kept
+in memory; with persist_path they are restored on construction and written
+back at most every SAVE_INTERVAL seconds, and on save() — like PollStats.
+
+Single event loop only.  Never raises from observe().
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# device_state key → activity name used in the session and day counters
+ACTIVITIES = {
+    "is_user_sitting":        "sitting",
+    "is_anal_shower_running": "anal_shower",
+    "is_lady_shower_running": "lady_shower",
+    "is_dryer_running":       "dryer",
+}
+FLAGS = frozenset(ACTIVITIES)
+
+_COUNTERS = ("sessions", "duration_s", "sitting_s", "anal_shower_s", "lady_shower_s", "dryer_s",
+             "showers", "dryer_runs")
+
+
+def _empty_day() -> dict:
+    return dict.fromkeys(_COUNTERS, 0)
+
+
+class _Session:
+    __slots__ = ("start", "left_at", "since", "seconds", "showers", "dryer_runs")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.left_at: Optional[float] = None           # every flag false since then
+        self.since: dict[str, float] = {}              # activity → when its flag turned true
+        self.seconds = dict.fromkeys(ACTIVITIES.values(), 0.0)
+        self.showers = 0
+        self.dryer_runs = 0
+
+    def to_dict(self, end: float) -> dict:
+        seconds = dict(self.seconds)
+        for activity, since in self.since.items():     # still running (current session view)
+            seconds[activity] += end - since
+        return {
+            "start":         int(self.start),
+            "end":           int(end),
+            "duration_s":    round(end - self.start, 1),
+            **{f"{activity}_s": round(s, 1) for activity, s in seconds.items()},
+            "showers":       self.showers,
+            "dryer_runs":    self.dryer_runs,
+        }
+
+
+class UsageSessions:
+    """Usage sessions and per-day counters from SPL flag transitions.  See module docstring."""
+
+    LEAVE_GRACE_S = 30.0
+    MAX_SESSION_S = 3 * 3600.0
+    KEEP_DAYS = 400
+    SAVE_INTERVAL = 300.0
+    _STATE_VERSION = 1
+
+    def __init__(self, persist_path: Optional[str] = None, clock=time.time):
+        self._clock = clock
+        self._persist_path = persist_path or None
+        self._flags: dict[str, bool] = {}
+        self._session: Optional[_Session] = None
+        self.last_session: Optional[dict] = None
+        self._days: dict[str, dict] = {}
+        self._last_save = time.monotonic()
+        if self._persist_path:
+            self._load()
+
+    # ── State machine ────────────────────────────────────────────────────────
+
+    @property
+    def phase(self) -> str:
+        """idle | sitting | shower | dryer | leaving"""
+        if self._session is None:
+            return "idle"
+        if self._flags.get("is_dryer_running"):
+            return "dryer"
+        if self._flags.get("is_anal_shower_running") or self._flags.get("is_lady_shower_running"):
+            return "shower"
+        if self._flags.get("is_user_sitting"):
+            return "sitting"
+        return "leaving"
+
+    def observe(self, values: Mapping, now: Optional[float] = None) -> list[dict]:
+        """Feed one change set (device_state keys → new values); return the sessions it completed."""
+        now = self._clock() if now is None else now
+        completed = []
+        try:
+            self._expire(now, completed)
+            for key in ACTIVITIES.keys() & values.keys():
+                value = values[key]
+                if value is None or bool(value) == self._flags.get(key, False):
+                    continue
+                self._transition(key, bool(value), now)
+            if self._session is not None and self._session.left_at is None and not any(self._flags.values()):
+                self._session.left_at = now
+        except Exception as e:
+            logger.warning(f"UsageSessions: could not process state change: {e}")
+        for session in completed:
+            self._add(session)
+        return completed
+
+    def _transition(self, key: str, value: bool, now: float) -> None:
+        self._flags[key] = value
+        activity = ACTIVITIES[key]
+        session = self._session
+        if value:
+            if session is None:
+                session = self._session = _Session(now)
+                logger.debug(f"UsageSessions: session started ({activity})")
+            session.left_at = None
+            session.since[activity] = now
+            if activity in ("anal_shower", "lady_shower"):
+                session.showers += 1
+            elif activity == "dryer":
+                session.dryer_runs += 1
+        elif session is not None and activity in session.since:
+            session.seconds[activity] += now - session.since.pop(activity)
+
+    def _expire(self, now: float, completed: list) -> None:
+        session = self._session
+        if session is None:
+            return
+        if session.left_at is not None and now - session.left_at >= self.LEAVE_GRACE_S:
+            completed.append(session.to_dict(session.left_at))
+            self._session = None
+        elif now - session.start >= self.MAX_SESSION_S:
+            logger.info(f"UsageSessions: dropping session open since {session.start:.0f} "
+                        f"(longer than {self.MAX_SESSION_S:.0f} s — flags stuck or missed)")
+            self._session = None
+            self._flags.clear()
+
+    # ── Day counters ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def day_of(t: float) -> str:
+        return datetime.date.fromtimestamp(t).isoformat()
+
+    def _add(self, session: dict) -> None:
+        self.last_session = session
+        day = self._days.setdefault(self.day_of(session["start"]), _empty_day())
+        day["sessions"] += 1
+        for key in _COUNTERS[1:]:
+            day[key] = round(day[key] + session[key], 1)
+        for old in sorted(self._days)[:-self.KEEP_DAYS]:
+            del self._days[old]
+        if self._persist_path and time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    def today(self) -> dict:
+        """Counters of the current local day (zeros before the first session)."""
+        day = self.day_of(self._clock())
+        return {"date": day, **self._days.get(day, _empty_day())}
+
+    def to_dict(self, days: int = 7) -> dict:
+        """Phase, the open session so far, the last session, today and the last days (newest first)."""
+        now = self._clock()
+        session = self._session
+        return {
+            "phase":        self.phase,
+            "current":      session.to_dict(session.left_at or now) if session else None,
+            "last_session": self.last_session,
+            "today":        self.today(),
+            "days":         {d: dict(self._days[d]) for d in sorted(self._days, reverse=True)[:max(days, 0)]},
+        }
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self) -> None:
+        """Write the day counters to persist_path (atomic replace).  No-op without a path.  Never raises."""
+        if not self._persist_path:
+            return
+        self._last_save = time.monotonic()
+        try:
+            state = {
+                "version":      self._STATE_VERSION,
+                "saved_at":     time.time(),
+                "last_session": self.last_session,
+                "days":         self._days,
+            }
+            tmp = f"{self._persist_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self._persist_path)
+        except Exception as e:
+            logger.warning(f"UsageSessions: could not save {self._persist_path}: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self._persist_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"UsageSessions: could not read {self._persist_path}: {e} — starting fresh")
+            return
+        if state.get("version") != self._STATE_VERSION:
+            logger.info(f"UsageSessions: {self._persist_path} has an unknown version — starting fresh")
+            return
+        try:
+            self._days = {day: {**_empty_day(), **{k: v for k, v in counters.items() if k in _COUNTERS}}
+                          for day, counters in state.get("days", {}).items()}
+            self.last_session = state.get("last_session")
+            logger.info(f"UsageSessions: restored {len(self._days)} day(s) from {self._persist_path}")
+        except Exception as e:
+            logger.warning(f"UsageSessions: corrupt counters in {self._persist_path}: {e} — starting fresh")
+            self._days = {}
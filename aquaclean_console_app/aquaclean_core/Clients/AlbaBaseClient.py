@@ -60,6 +60,14 @@ class AlbaBaseClient:
         self._ble20 = ble20
         self._inv: dict = {}   # set by AlbaClient.post_connect() after inventory
 
+    @property
+    def call_budget_hook(self):
+        return self._ble20.call_budget_hook
+
+    @call_budget_hook.setter
+    def call_budget_hook(self, hook) -> None:
+        self._ble20.call_budget_hook = hook
+
     async def disconnect(self):
         await self.bluetooth_le_connector.disconnect()
 
@@ -135,9 +143,11 @@ class AlbaBaseClient:
         except Exception:
             return None
 
-    async def get_stored_profile_settings_async(self) -> dict:
+    async def get_stored_profile_settings_async(self, ids=None) -> dict:
         ps = {}
         for sid, dp_id in _PROFILE_SETTING_DPID.items():
+            if ids is not None and sid not in ids:
+                continue
             try:
                 raw = await self._ble20.read(int(dp_id))
                 ps[sid] = struct.unpack_from('<I', raw)[0] if len(raw) >= 4 else (raw[0] if raw else 0)
@@ -151,7 +161,7 @@ class AlbaBaseClient:
             raise BLEPeripheralTimeoutError(f"Profile setting ID {setting_id} not supported on Alba")
         await self._ble20.write(int(dp_id), bytes([value & 0xFF]))
 
-    async def get_stored_common_settings_async(self) -> dict:
+    async def get_stored_common_settings_async(self, ids=None) -> dict:
         return {}
 
     async def get_node_list_async(self):
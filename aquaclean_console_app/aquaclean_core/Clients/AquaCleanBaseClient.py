@@ -1,15 +1,15 @@
 import asyncio
-import threading
+import time
 
 import inspect
 
-from binascii import hexlify
 
 import logging
 
 from aquaclean_console_app.aquaclean_core.Message.MessageService                         import MessageService         
+from aquaclean_console_app.aquaclean_core.Message.CrcMessage                             import CrcMessage
 from aquaclean_console_app.aquaclean_core.IBluetoothLeConnector                          import IBluetoothLeConnector  
-from aquaclean_console_app.aquaclean_core.Frames.FrameService                            import FrameService                           
+from aquaclean_console_app.aquaclean_core.Frames.FrameService                            import FrameService, SegmentedTxError
 from aquaclean_console_app.aquaclean_core.Frames.FrameFactory                            import FrameFactory                           
 from aquaclean_console_app.aquaclean_core.Frames.FrameValidation                         import FrameValidation as frame_validation                          
 from aquaclean_console_app.aquaclean_core.Frames.FrameCollector                          import FrameCollector as frame_collector                                                   
@@ -32,6 +32,9 @@ from aquaclean_console_app.aquaclean_core.Api.CallClasses.SetStoredCommonSetting
 from aquaclean_console_app.aquaclean_core.Api.CallClasses.SetActiveCommonSetting         import SetActiveCommonSetting
 
 from aquaclean_console_app.aquaclean_utils                                               import utils
+from aquaclean_console_app                                                               import BridgeMetrics
+from aquaclean_console_app.CallStats                                                     import CALL_STATS
+from aquaclean_console_app.AdaptiveTimeouts                                              import ADAPTIVE_TIMEOUTS, transport_of
 
 
 class _GetStoredProfileCall53:
@@ -64,19 +67,27 @@ class _GetStoredProfileCall53:
 _IPHONE_PROFILE_SETTING_IDS = [2, 1, 3, 4, 6, 7, 5, 8, 0, 9, 13]
 
 from threading import Lock
-import re
-import pprint
 
 
 logger = logging.getLogger(__name__)
 
 
 class BLEPeripheralTimeoutError(Exception):
-    """Raised when the BLE peripheral stops responding to requests."""
-    pass
+    """Raised when the BLE peripheral stops responding to requests.
+
+    adaptive is True when the timeout was learned from the call's latency
+    history (AdaptiveTimeouts) rather than the fixed default.
+    """
+
+    def __init__(self, message: str, timeout_s: float | None = None, adaptive: bool = False):
+        super().__init__(message)
+        self.timeout_s = timeout_s
+        self.adaptive = adaptive
 
 
 class AquaCleanBaseClient:
+    RESPONSE_TIMEOUT = 5.0   # seconds; default and ceiling for send_request()
+
     def __init__(self, bluetooth_le_connector: IBluetoothLeConnector):  # type: ignore
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
 
@@ -93,13 +104,15 @@ class AquaCleanBaseClient:
         logger.trace(f"self.context_lookup: {self.context_lookup}")
 
         self._transaction_event = asyncio.Event()
+        self._transaction_completed_at: float | None = None   # time.perf_counter(), for CallStats
+        # Awaited before every request while no request is in flight; the bridge
+        # charges each call to its call budget here (AirtimeGovernor).
+        self.call_budget_hook = None
 
         self.message_context = None
         self.call_count = 0
         self.profile_settings: dict = {}  # populated by subscribe_notifications_async()
 
-        self._cleaner_task_str_re = re.compile(r"\S*site-packages/")
-
         # Process received data from Bluetooth
         self.bluetooth_le_connector.data_received_handlers += self.frame_service.process_data
 
@@ -108,6 +121,7 @@ class AquaCleanBaseClient:
 
         # Send Frame over Bluetooth
         self.frame_service.SendData += self.send_data_async
+        self.frame_service.SendDataCons += self.send_data_cons_async
 
         # Process complete transaction
         self.frame_service.TransactionCompleteFS += self.on_transaction_completeForBaseClient
@@ -132,6 +146,12 @@ class AquaCleanBaseClient:
         logger.trace(f" send_data_async after sleep")  
 
 
+    async def send_data_cons_async(self, sender, data):
+        """Frames 2..n of a segmented request go to WRITE_1, like the device's own app."""
+        logger.debug(f"Sending CONS frame: {data.hex()}")
+        await self.bluetooth_le_connector.send_message_cons(data)
+
+
     def on_transaction_completeForBaseClient(self, sender, data):
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
         logger.trace(f"on_transaction_completeForBaseClient, sender: {sender}, data: {data}")
@@ -145,6 +165,7 @@ class AquaCleanBaseClient:
             logger.trace(f"self.context_lookup not found")
 
         logger.trace("self._transaction_event.set()")
+        self._transaction_completed_at = time.perf_counter()
         self._transaction_event.set()
         logger.trace("###################### Transaction: set finished...")
 
@@ -193,8 +214,8 @@ class AquaCleanBaseClient:
             api_call = SubscribeNotifications(payload, proc=0x13)
             await self.send_request(api_call)
 
-    async def get_stored_profile_settings_async(self) -> dict:
-        """Read all user profile settings via proc 0x53 (C# GetStoredProfileSetting).
+    async def get_stored_profile_settings_async(self, ids=None) -> dict:
+        """Read user profile settings via proc 0x53 (C# GetStoredProfileSetting).
 
         Returns a dict mapping setting_id → value (little-endian 2-byte int).
         These match the Geberit iPhone app slider values — confirmed by BLE sniff
@@ -205,12 +226,19 @@ class AquaCleanBaseClient:
         Called from _fetch_state (every poll) so profile settings stay current.
         Not called in subscribe_notifications_async — adding 10 extra calls there
         caused GetSystemParameterList to time out after the 18-call init sequence.
+
+        ids: the setting IDs to read (one call each, default all) — see FieldCatalog.
+        A partial read is merged into self.profile_settings; the return value
+        holds only the IDs read.
         """
         ps = {}
-        for sid in _IPHONE_PROFILE_SETTING_IDS:
+        for sid in _IPHONE_PROFILE_SETTING_IDS if ids is None else ids:
             await self.send_request(_GetStoredProfileCall53(sid))
             ps[sid] = int.from_bytes(bytes(self.message_context.result_bytes[:2]), 'little')
-        self.profile_settings = ps
+        if ids is None:
+            self.profile_settings = ps
+        else:
+            self.profile_settings.update(ps)
         return ps
 
 
@@ -295,7 +323,7 @@ class AquaCleanBaseClient:
         api_call = SetStoredProfileSetting(profile_setting, setting_value)
         await self.send_request(api_call)
 
-    async def get_stored_common_settings_async(self) -> dict:
+    async def get_stored_common_settings_async(self, ids=None) -> dict:
         """Read common (device-wide) settings via proc 0x51.
 
         Returns a dict mapping setting_id → value.
@@ -307,9 +335,11 @@ class AquaCleanBaseClient:
           4: WC Lid sensor sensitivity    (0-4)
           6: WC Lid open automatically   (0=off, 1=on)
           7: WC Lid close automatically  (0=off, 1=on)
+
+        ids: the setting IDs to read (one call each, default all) — see FieldCatalog.
         """
         cs = {}
-        for sid in [2, 1, 3, 0, 4, 6, 7]:  # iPhone read order from BLE log (extended)
+        for sid in [2, 1, 3, 0, 4, 6, 7] if ids is None else ids:  # iPhone read order from BLE log (extended)
             api_call = GetStoredCommonSetting(sid)
             await self.send_request(api_call)
             cs[sid] = api_call.result(self.message_context.result_bytes)
@@ -386,36 +416,14 @@ class AquaCleanBaseClient:
         return result
     
 
-    def _cleaner_task_str(self, task):
-        s = str(task)
-        return self._cleaner_task_str_re.sub("", s)
-
-
-    # https://github.com/simonw/datasette/issues/1733
-    def _threads(self):
-        threads = list(threading.enumerate())
-        d = {
-            "num_threads": len(threads),
-            "threads": [
-                {"name": t.name, "ident": t.ident, "daemon": t.daemon} for t in threads
-            ],
-        }
-        # Only available in Python 3.7+
-        if hasattr(asyncio, "all_tasks"):
-            tasks = asyncio.all_tasks()
-            d.update(
-                {
-                    "num_tasks": len(tasks),
-                    "tasks": [self._cleaner_task_str( t) for t in tasks],
-                }
-            )
-        return d
-    
-
     async def send_request(self, api_call, send_as_first_cons=False):
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
         logger.debug(f"Sending {api_call.__class__.__name__}{'as FIRST+CONS' if send_as_first_cons else ''}")
 
+        if self.call_budget_hook is not None and self.call_count <= 0:
+            await self.call_budget_hook()
+
+        _t_enter = time.perf_counter()
         while self.call_count > 0:
             logger.trace(f"self.call_count: {self.call_count} > 0")
             await asyncio.sleep(0.1)
@@ -429,55 +437,58 @@ class AquaCleanBaseClient:
         data = self.build_payload(api_call)
         logger.trace(f"After build_payload: data: {data.hex()}")
 
+        _attr = api_call.get_api_call_attribute()
+        _metric_labels = (f"0x{_attr.context:02X}", f"0x{_attr.procedure:02X}") if _attr else ("?", "?")
+        BridgeMetrics.BLE_REQUESTS.inc(*_metric_labels)
+        _call_key = CALL_STATS.mera_key(_attr.context, _attr.procedure) if _attr else "?"
+
         message = self.message_service.build_message(data)
         logger.trace(f"message: {message}")
         logger.trace(f"message.serialize(): {message.serialize().hex()}")
 
-        frame = self.frame_factory.BuildSingleFrame(message.serialize())
-        if send_as_first_cons:
-            # Signal to the device that a CONS frame follows (SubFrameCountOrIndex=1,
-            # IsSubFrameCount=True) so it returns a multi-frame response instead of
-            # a 5-byte error body.  Type byte: SINGLE|HasMsgType|SubCount=1|IsCount → 0x13.
-            frame.SubFrameCountOrIndex = 1
-        logger.trace(f"frame: {frame}")
-        logger.trace(f"type(frame): {type(frame)}")
+        # CrcMessage header + body, without the serializer's zero padding.  Messages
+        # longer than one frame are segmented by FrameService.send_message_async.
+        message_bytes = bytes(message.serialize()[:CrcMessage.size_of_header() + len(data)])
+        # send_as_first_cons: always at least two frames.  The first signals that a
+        # CONS frame follows (SINGLE|HasMsgType|SubCount=1|IsCount → 0x13) so the
+        # device returns a multi-frame response instead of a 5-byte error body; the
+        # CONS (0x12) carries message bytes [19:38] — zero padding for ≤8 params,
+        # the remaining param IDs for 9-12.
+        min_frames = 2 if send_as_first_cons else 1
 
-        logger.trace(f"hexlify(frame.Payload): {hexlify(frame.Payload)}")
-
-        serializedFrame = frame.serialize()
-        logger.trace(f"serializedFrame.hex(): {serializedFrame.hex()}")
-        logger.trace(f"frame.serialize().hex(): {frame.serialize().hex()}")
-
-        logger.trace(f"vor await self.frame_service.send_frame_async(frame)")
+        logger.trace(f"vor await self.frame_service.send_message_async(message_bytes)")
 
         # Clear the event before sending so we don't pick up a stale signal from
         # a previous transaction that fired while the event loop was busy.
         self._transaction_event.clear()
+        self._transaction_completed_at = None
+        self.frame_service.reset_call_counters()
+        _t_sent = time.perf_counter()
 
-        await self.frame_service.send_frame_async(frame)
-
-        if send_as_first_cons:
-            # CONS frame on WRITE_1: type byte 0x12 followed by CrcMessage bytes [19:38].
-            # The FIRST frame carries CrcMessage[0:19]; the CONS must carry [19:38] so
-            # that param IDs beyond position 8 in the request list reach the device.
-            # For ≤8 params these bytes are zero padding (no behaviour change).
-            # For 9-12 params they contain the actual remaining param IDs.
-            cons_frame = bytes([0x12]) + message.serialize()[19:38]
-            logger.debug(f"Sending CONS frame: {cons_frame.hex()}")
-            await self.bluetooth_le_connector.send_message_cons(cons_frame)
+        try:
+            await self.frame_service.send_message_async(message_bytes, min_frames=min_frames)
+        except SegmentedTxError as e:
+            with self.lock:
+                self.call_count -= 1
+            BridgeMetrics.BLE_REQUEST_TIMEOUTS.inc(*_metric_labels)
+            self._record_call_stats(_call_key, api_call, _t_enter, _t_sent, timeout=True)
+            error_msg = f"BLE peripheral did not accept {api_call.__class__.__name__}: {e}"
+            logger.error(error_msg)
+            raise BLEPeripheralTimeoutError(error_msg) from e
 
         await asyncio.sleep(0.01)
 
-        logger.trace(f"self._threads(): \n{pprint.pformat(self._threads())}\n")
-
         # Wait for on_transaction_completeForBaseClient to set _transaction_event.
         # Using asyncio.Event + asyncio.wait_for instead of threading.Queue.get():
         #   - does NOT block the event loop between iterations
         #   - BLE notification callbacks can fire immediately during the await
         #   - asyncio.timeout() in the caller can cancel cleanly at await points
         #
-        # Normal request/response cycle is ~600 ms; 5 s is a generous safety margin.
-        timeout_seconds = 5.0
+        # Normal request/response cycle is ~600 ms; 5 s is a generous safety margin
+        # and the ceiling — once the call has a latency history the timeout is
+        # learned per transport and procedure (AdaptiveTimeouts).
+        _timeout_key = ADAPTIVE_TIMEOUTS.key(transport_of(self.bluetooth_le_connector), _call_key)
+        timeout_seconds, _adaptive = ADAPTIVE_TIMEOUTS.timeout_for(_timeout_key, self.RESPONSE_TIMEOUT)
         try:
             logger.trace(f"awaiting _transaction_event (timeout={timeout_seconds}s)...")
             await asyncio.wait_for(self._transaction_event.wait(), timeout=timeout_seconds)
@@ -485,6 +496,9 @@ class AquaCleanBaseClient:
         except asyncio.TimeoutError:
             with self.lock:
                 self.call_count -= 1
+            BridgeMetrics.BLE_REQUEST_TIMEOUTS.inc(*_metric_labels)
+            self._record_call_stats(_call_key, api_call, _t_enter, _t_sent, timeout=True)
+            ADAPTIVE_TIMEOUTS.record(_timeout_key, timeout=True)
             _name = self.bluetooth_le_connector.device_name
             _addr = self.bluetooth_le_connector.device_address
             _label = (
@@ -493,18 +507,40 @@ class AquaCleanBaseClient:
                 else _addr
             )
             error_msg = (
-                f"No response from BLE peripheral {_label}. "
+                f"No response from BLE peripheral {_label} "
+                f"within {timeout_seconds:.2f} s ({api_call.__class__.__name__}"
+                f"{', learned timeout' if _adaptive else ''}). "
                 f"Usually a restart of the BLE peripheral is required."
             )
             logger.error(error_msg)
-            raise BLEPeripheralTimeoutError(error_msg)
+            raise BLEPeripheralTimeoutError(error_msg, timeout_s=timeout_seconds, adaptive=_adaptive)
 
-        logger.trace(f"nach await self.frame_service.send_frame_async(frame)")
+        logger.trace(f"nach await self.frame_service.send_message_async(message_bytes)")
 
         with self.lock:
             self.call_count -= 1
 
+        _done = self._transaction_completed_at or time.perf_counter()
+        ADAPTIVE_TIMEOUTS.record(_timeout_key, (_done - _t_sent) * 1000)
+        self._record_call_stats(_call_key, api_call, _t_enter, _t_sent)
         return api_call
+
+    def _record_call_stats(self, key: str, api_call, t_enter: float, t_sent: float, timeout: bool = False) -> None:
+        """Feed one send_request() round-trip into CallStats (see CallStats.py)."""
+        fs = self.frame_service
+        first = fs.call_first_frame_at
+        done = self._transaction_completed_at
+        CALL_STATS.record(
+            key,
+            name=api_call.__class__.__name__,
+            queue_wait_ms=(t_sent - t_enter) * 1000,
+            first_frame_ms=(first - t_sent) * 1000 if first is not None else None,
+            reassembly_ms=(done - first) * 1000 if first is not None and done is not None else None,
+            frames_received=fs.call_frames_received,
+            control_frames_sent=fs.call_control_frames_sent,
+            frames_retransmitted=fs.call_frames_retransmitted,
+            timeout=timeout,
+        )
     
 
     def build_payload(self, api_call: IApiCall ) -> bytes: # type: ignore
@@ -10,6 +10,7 @@ from aquaclean_console_app.aquaclean_core.Clients.Commands import Commands
 from aquaclean_console_app.aquaclean_core.Clients.ProfileSettings import ProfileSettings
 from aquaclean_console_app.aquaclean_utils import utils   
 from aquaclean_console_app.myEvent import myEvent   
+from aquaclean_console_app import FieldCatalog
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,8 @@ logger = logging.getLogger(__name__)
 # NOTE: if support for other device models (AcSela, AcCama, …) is added, a
 # per-model parameter list will be needed here — do not simply extend this list.
 # data_array indexing is POSITION-BASED (not SPL-index-based): data_array[8]=param12, data_array[9]=param13
+# FieldCatalog maps these indices to state fields; polls read only the indices
+# their QueryPlan needs, always a subset of this list.
 SPL_PARAMS_MERA_COMFORT = [0, 1, 2, 3, 4, 5, 6, 7, 12, 13]
 
 class AquaCleanClient(IAquaCleanClient):
@@ -36,6 +39,7 @@ class AquaCleanClient(IAquaCleanClient):
         self.DeviceStateChanged = myEvent.EventHandler()
         self.base_client = AquaCleanBaseClient.AquaCleanBaseClient(bluetooth_connector)
         self.last_device_state_changed_event_args = None
+        self.poll_plan = None   # FieldCatalog.QueryPlan; None = every SPL field
 
         self.SapNumber = ""
         self.SerialNumber = ""
@@ -98,15 +102,18 @@ class AquaCleanClient(IAquaCleanClient):
             await asyncio.sleep(interval)
 
     async def _state_changed_timer_elapsed(self):
-        """Poll live device state via GetSystemParameterList (proc 0x0D)."""
-        result = await self.base_client.get_system_parameter_list_async(SPL_PARAMS_MERA_COMFORT)
+        """Poll live device state via GetSystemParameterList (proc 0x0D).
+
+        Only the SPL indices of poll_plan are read; fields outside the plan stay None."""
+        plan = self.poll_plan or FieldCatalog.plan("state")
+        state = FieldCatalog.spl_fields(await FieldCatalog.read_system_parameters(self.base_client, plan))
         device_state_changed_event_args = DeviceStateChangedEventArgs(
-            IsUserSitting=result.data_array[0] != 0,
-            IsAnalShowerRunning=result.data_array[3] != 0,  # param 3 confirmed = anal shower
-            IsLadyShowerRunning=result.data_array[2] != 0,
-            IsDryerRunning=result.data_array[1] != 0,  # param 1, dryer state unknown
-            LidOffsetPosition=result.data_array[8],       # SPL index 12, position 8
-            ShowerArmOffsetPosition=result.data_array[9], # SPL index 13, position 9
+            IsUserSitting=state.get("is_user_sitting"),
+            IsAnalShowerRunning=state.get("is_anal_shower_running"),
+            IsLadyShowerRunning=state.get("is_lady_shower_running"),
+            IsDryerRunning=state.get("is_dryer_running"),
+            LidOffsetPosition=state.get("lid_offset_position"),
+            ShowerArmOffsetPosition=state.get("shower_arm_offset_position"),
         )
 
         if self.last_device_state_changed_event_args is None:
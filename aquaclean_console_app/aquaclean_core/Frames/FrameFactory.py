@@ -55,6 +55,7 @@ class InfoFrame(frame):
 
 class FrameFactory:
     BLE_PAYLOAD_LEN = 20
+    MAX_SUB_FRAMES = 4      # SINGLE sub-frame count / index is a 2-bit field
 
     @staticmethod
     def getFrameTypeFromHeaderByte(headerByte: int) -> frame_type: # type: ignore
@@ -116,6 +117,54 @@ class FrameFactory:
         singleFrm.IsSubFrameCount = True
         singleFrm.SubFrameCountOrIndex = 0
         singleFrm.Payload = bytearray(19)
-        singleFrm.Payload[:19] = data[:19]
+        singleFrm.Payload[:19] = bytes(data[:19]).ljust(19, b"\x00")
         return singleFrm
 
+    @staticmethod
+    def BuildFirstConsFrame(frame_type_: frame_type, count_or_number: int, data: bytes) -> FirstConsFrame: # type: ignore
+        firstConsFrm = first_cons_frame()
+        firstConsFrm.FrameType = frame_type_
+        firstConsFrm.HasMessageTypeByte_b4 = True
+        firstConsFrm.IsSubFrameCount = False
+        firstConsFrm.SubFrameCountOrIndex = 0
+        firstConsFrm.frame_count_or_number = count_or_number
+        firstConsFrm.payload = bytearray(bytes(data[:first_cons_frame.PAYLOAD_LENGTH]).ljust(first_cons_frame.PAYLOAD_LENGTH, b"\x00"))
+        return firstConsFrm
+
+    @staticmethod
+    def BuildSegmentFrames(data: bytes, min_frames: int = 1) -> list:
+        """Split one message into the frames of one TX transaction.
+
+        Up to MAX_SUB_FRAMES frames: SINGLE sub-frames, 19 bytes each — the
+        first carries the number of frames that follow (0x11, 0x13, ...), the
+        others their index (0x12, 0x14, ...).  This is the framing the device
+        accepts for its short multi-frame requests (GetSystemParameterList,
+        GetFirmwareVersionList).  Longer messages: one FIRST frame (byte 1 =
+        frame count) and CONS frames (byte 1 = frame number), 18 bytes each —
+        the framing the device uses for its own long responses.
+
+        min_frames pads the message with zero frames (send_as_first_cons).
+        """
+        single_len = single_frame.PAYLOAD_LENGTH
+        count = max(min_frames, 1, -(-len(data) // single_len))
+        if count <= FrameFactory.MAX_SUB_FRAMES:
+            frames = []
+            for i in range(count):
+                frm = FrameFactory.BuildSingleFrame(data[i * single_len:(i + 1) * single_len])
+                if i == 0:
+                    frm.SubFrameCountOrIndex = count - 1
+                else:
+                    frm.IsSubFrameCount = False
+                    frm.SubFrameCountOrIndex = i
+                frames.append(frm)
+            return frames
+
+        cons_len = first_cons_frame.PAYLOAD_LENGTH
+        count = -(-len(data) // cons_len)
+        if count > 8 * flow_control_frame.BITMASK_LENGTH:
+            raise ValueError(f"Message of {len(data)} bytes needs {count} frames — more than one ack bitmask covers")
+        frames = [FrameFactory.BuildFirstConsFrame(frame_type.FIRST, count, data[:cons_len])]
+        for i in range(1, count):
+            frames.append(FrameFactory.BuildFirstConsFrame(frame_type.CONS, i, data[i * cons_len:(i + 1) * cons_len]))
+        return frames
+
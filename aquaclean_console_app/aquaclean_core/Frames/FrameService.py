@@ -1,4 +1,5 @@
 import asyncio
+import time
 
 from aquaclean_console_app.aquaclean_core.Frames.FrameFactory                  import FrameFactory       
 from aquaclean_console_app.aquaclean_core.Frames.Frames.FrameType              import FrameType   
@@ -9,7 +10,6 @@ from aquaclean_console_app.aquaclean_core.Frames.FrameValidation
 from aquaclean_console_app.aquaclean_core.Frames.FrameCollector                import FrameCollector
 
 from aquaclean_console_app.bluetooth_le.LE.BluetoothLeConnector                import BluetoothLeConnector                   
-from aquaclean_console_app.aquaclean_core.Frames.Frames.FlowControlFrame       import FlowControlFrame   
 
 from aquaclean_console_app.aquaclean_utils                                     import utils   
 from aquaclean_console_app.myEvent                                             import myEvent   
@@ -20,7 +20,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class SegmentedTxError(Exception):
+    """The peer did not acknowledge every frame of a segmented request."""
+
+
 class FrameService:
+    # Segmented TX (send_message_async): how long to wait for the peer's CONTROL
+    # ack on top of its TransactionLatency, and how many retransmit rounds.
+    TX_ACK_TIMEOUT = 0.5
+    TX_MAX_RETRANSMITS = 3
 
     def __init__(self):
         self.frame_factory = FrameFactory()
@@ -36,9 +44,27 @@ class FrameService:
         self.frame_collector.TransactionCompleteFC += self.on_transaction_complete
 
         self.SendData = myEvent.EventHandler()
+        self.SendDataCons = myEvent.EventHandler()     # frames 1..n of a segmented request (WRITE_1)
+        self._tx_ack_event = asyncio.Event()
+        self._tx_response_seen = False
+        self._peer_unackd_limit = 0                    # UnackdFrameLimit from the peer's last ack, 0 = not stated yet
         
         self.frame_collector.SendControlFrame += self.on_send_control_frame
 
+        # Per-call counters for CallStats — reset by the client before each request
+        self.call_frames_received = 0
+        self.call_control_frames_sent = 0
+        self.call_first_frame_at: float | None = None   # time.perf_counter()
+        self.call_frames_sent = 0
+        self.call_frames_retransmitted = 0
+
+    def reset_call_counters(self):
+        self.call_frames_received = 0
+        self.call_control_frames_sent = 0
+        self.call_first_frame_at = None
+        self.call_frames_sent = 0
+        self.call_frames_retransmitted = 0
+
 
     def increment_info_frame_count(self, sender, arg):
         logger.trace(f"in increment_info_frame_count")
@@ -49,6 +75,9 @@ class FrameService:
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
         logger.trace(f"len(self.TransactionCompleteFS.get_handlers(): {len(self.TransactionCompleteFS.get_handlers())} for on_transaction_complete")
 
+        # The response implies the peer has the whole request — stop a segmented TX still waiting for its ack.
+        self._tx_response_seen = True
+        self._tx_ack_event.set()
         self.TransactionCompleteFS(sender, data)
 
 
@@ -56,6 +85,7 @@ class FrameService:
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
         logger.debug(f"Send control frame: {''.join(f'{b:02X}' for b in data)}")
         control_frame_data = self.frame_factory.BuildControlFrame(data).serialize()
+        self.call_control_frames_sent += 1
 
         await self.SendData.invoke_async(self, control_frame_data)
 
@@ -72,6 +102,10 @@ class FrameService:
             raise Exception("Frame type was not recognized")
 
         logger.debug(f"Processing new Frame: {frame}");
+        if frame.FrameType != FrameType.INFO:
+            self.call_frames_received += 1
+            if self.call_first_frame_at is None:
+                self.call_first_frame_at = time.perf_counter()
         logger.trace(f"frame.FrameType: {frame.FrameType}");
 
         if frame.FrameType == FrameType.SINGLE:
@@ -106,10 +140,9 @@ class FrameService:
         elif frame.FrameType == FrameType.CONTROL:
             logger.trace(f"Handling frame type CONTROL")
             if self._handle_control_frame(self.tl_msg_out_ctl, frame) > 0:
-                logger.trace(f"self._handle_control_frame(self.tl_msg_out_ctl, frame) > 0, {self._handle_control_frame(self.tl_msg_out_ctl, frame)}")
                 logger.trace(f"Message complete")
             else:
-                logger.trace(f"self._handle_control_frame(self.tl_msg_out_ctl, frame) >= 0")
+                logger.trace(f"self._handle_control_frame(self.tl_msg_out_ctl, frame) == 0")
                
         elif frame.FrameType == FrameType.INFO:
             logger.trace(f"Handling frame type INFO")
@@ -151,27 +184,126 @@ class FrameService:
         await self.SendData.invoke_async(self, frame.serialize())
 
 
+    async def send_message_async(self, message: bytes, min_frames: int = 1):
+        """Send one CrcMessage (header + body), segmented when it does not fit one frame.
+
+        A single frame, and the SINGLE sub-frames of a short request (up to
+        FrameFactory.MAX_SUB_FRAMES — GetSystemParameterList,
+        GetFirmwareVersionList), are sent back-to-back without waiting for an
+        ack, as before.  FIRST / CONS frames of a long request go out under the
+        peer's flow control: at most UnackdFrameLimit unacknowledged frames,
+        as stated in the peer's CONTROL frames — all of them while the peer has
+        not stated a limit yet.  Frames missing from the ack bitmask below the
+        highest acked one — or all unacked frames when no ack arrives within
+        TX_ACK_TIMEOUT plus the peer's TransactionLatency — are retransmitted
+        after TransactionLatency, up to TX_MAX_RETRANSMITS rounds
+        (SegmentedTxError).  A peer that never acks gets no retransmits.
+
+        Returns once every frame is acked or the response has already arrived.
+        """
+        frames = self.frame_factory.BuildSegmentFrames(message, min_frames)
+        if frames[0].FrameType == FrameType.SINGLE:
+            for i in range(len(frames)):
+                await self._send_tx_frame(frames, i)
+            return
+
+        tl = self.tl_msg_out_ctl
+        tl.nTxFrameCnt = len(frames)
+        tl.nDataLen = len(message)
+        tl.bTxHasMsgTypeByte = True
+        tl.vTxBackLogCtr = bytearray(255)          # per frame: times sent, 255 = acked
+        tl.vTxAckdFrameBitmask = bytearray(255)
+        tl.nTxUnackdFrameLimit = self._peer_unackd_limit or len(frames)
+        tl.nTxLatencyMs = 0
+        tl.nTxState = 1
+        self._tx_response_seen = False
+        peer_acks = False
+        next_new = 0
+        rounds = 0
+        logger.debug(f"Segmented TX: {len(frames)} frames, {len(message)} bytes")
+        try:
+            while True:
+                self._tx_ack_event.clear()
+                unacked = [i for i in range(next_new) if tl.vTxBackLogCtr[i] != 255]
+                window = max(1, tl.nTxUnackdFrameLimit)
+                while next_new < len(frames) and len(unacked) < window:
+                    await self._send_tx_frame(frames, next_new)
+                    unacked.append(next_new)
+                    next_new += 1
+                if not unacked:
+                    return
+
+                try:
+                    await asyncio.wait_for(self._tx_ack_event.wait(),
+                                           timeout=self.TX_ACK_TIMEOUT + tl.nTxLatencyMs / 1000)
+                except asyncio.TimeoutError:
+                    if not peer_acks:
+                        logger.debug("Segmented TX: peer does not ack — sending the remaining frames unpaced")
+                        for i in range(next_new, len(frames)):
+                            await self._send_tx_frame(frames, i)
+                        return
+                    missing = [i for i in range(next_new) if tl.vTxBackLogCtr[i] != 255]
+                else:
+                    if tl.nTxState == 0 or self._tx_response_seen:
+                        return
+                    peer_acks = True
+                    acked = [i for i in range(next_new) if tl.vTxBackLogCtr[i] == 255]
+                    missing = [i for i in range(max(acked, default=-1)) if tl.vTxBackLogCtr[i] != 255]
+                if not missing:
+                    continue
+
+                rounds += 1
+                if rounds > self.TX_MAX_RETRANSMITS:
+                    raise SegmentedTxError(
+                        f"Frame(s) {missing} of {len(frames)} not acknowledged after "
+                        f"{self.TX_MAX_RETRANSMITS} retransmit(s)")
+                logger.debug(f"Segmented TX: retransmit #{rounds} of frame(s) {missing}")
+                await asyncio.sleep(tl.nTxLatencyMs / 1000)
+                for i in missing:
+                    if tl.vTxBackLogCtr[i] != 255:
+                        self.call_frames_retransmitted += 1
+                        await self._send_tx_frame(frames, i)
+        finally:
+            tl.nTxState = 0
+
+    async def _send_tx_frame(self, frames: list, index: int):
+        tl = self.tl_msg_out_ctl
+        tl.vTxBackLogCtr[index] = min(tl.vTxBackLogCtr[index] + 1, 254)
+        self.call_frames_sent += 1
+        data = frames[index].serialize()
+        logger.trace(f"TX frame {index + 1}/{len(frames)}: {hexlify(data)}")
+        if index == 0:
+            await self.SendData.invoke_async(self, data)
+        else:
+            await self.SendDataCons.invoke_async(self, data)
+
+
     def _handle_control_frame(self, tl_msg_out_ctl: TlMsgOutCtl, frame: FlowControlFrame) -> int:  # type: ignore
         logger.trace(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
 
-        if frame.ErrorCode != 0 or tl_msg_out_ctl.nTxState != 0:
+        # The peer also acks single-frame requests: those acks state its limit but carry no work.
+        if frame.ErrorCode != 0:
+            return 0
+        if frame.UnackdFrameLimit > 0:
+            self._peer_unackd_limit = frame.UnackdFrameLimit
+        if tl_msg_out_ctl.nTxState == 0:
             return 0
 
         tl_msg_out_ctl.vTxAckdFrameBitmask[:] = frame.AckdFrameBitmask[:]
         self.frame_validator.MarkTransactionOkPackets(tl_msg_out_ctl)
+        tl_msg_out_ctl.nTxLatencyMs = max(frame.TransactionLatency, 10)
+        tl_msg_out_ctl.nTxUnackdFrameLimit = frame.UnackdFrameLimit
 
         highest_ok_frame_count = self._get_highest_ok_frame_cnt(tl_msg_out_ctl.nTxFrameCnt, tl_msg_out_ctl.vTxBackLogCtr)
         logger.debug(f"Highest OK Frame Count {highest_ok_frame_count}")
+        self._tx_ack_event.set()
         if highest_ok_frame_count == tl_msg_out_ctl.nTxFrameCnt:
-            tl_msg_out_ctl.n_tx_frame_cnt = 0
-            tl_msg_out_ctl.n_tx_state = 0
+            tl_msg_out_ctl.nTxState = 0
             logger.debug(">>--------TX MSG SUCCESS----------<<")
             return 1
         else:
-            tl_msg_out_ctl.n_tx_latency_ms = max(frame.TransactionLatency, 10)
-            tl_msg_out_ctl.n_tx_unackd_frame_limit = frame.UnackdFrameLimit
-            tl_msg_out_ctl.n_tx_state = 2
-            logger.debug(f"Waiting for {highest_ok_frame_count} of {tl_msg_out_ctl.n_tx_frame_cnt}")
+            tl_msg_out_ctl.nTxState = 2
+            logger.debug(f"Waiting for {highest_ok_frame_count} of {tl_msg_out_ctl.nTxFrameCnt}")
             return 0
 
     @staticmethod
@@ -27,7 +27,10 @@ class FirstConsFrame(Frame):
         return frame
 
     def serialize(self):
-        raise NotImplementedError()
+        var1 = self.serialize_hdr()
+        var1[1] = self.frame_count_or_number
+        var1[2:2+self.PAYLOAD_LENGTH] = self.payload
+        return var1
 
     def __str__(self):
         return f"FirstConsFrame: IsSubFrameCount={self.is_sub_frame_count}, SubFrameCountOrIndex={self.sub_frame_count_or_index}, HasMessageTypeByte_b4={self.has_message_type_byte_b4}, FrameCountOrNuber={self.frame_count_or_number}"
@@ -6,9 +6,28 @@ Wire format per frame:
 
 HDLC frame types:
     I-frame: ctrl = (N(R)<<5) | (N(S)<<1)           bit 0 = 0
-    S-frame: ctrl = (N(R)<<5) | (type<<2) | 0x01     bits 1-0 = 01  (RR: type=0)
+    S-frame: ctrl = (N(R)<<5) | (type<<2) | 0x01     bits 1-0 = 01  (RR: type=0, RNR: 1, REJ: 2)
     U-frame: ctrl = ((type<<3)&0xE0) | ((type<<2)&0x0C) | 0x03
 
+HDLC flow control after the handshake (modulo 8):
+    RX — acknowledgements are cumulative: one RR carrying the current N(R) is
+         sent after ACK_EVERY unacknowledged I-frames or ACK_DELAY seconds
+         after the first of them, whichever comes first.  An outgoing I-frame
+         carries the same N(R) and cancels the pending RR.  Out-of-sequence
+         I-frames are dropped (the AES-CTR stream must not skip or repeat) and
+         answered with one REJ.
+    TX — send_data() keeps at most TX_WINDOW I-frames unacknowledged and waits
+         (a window stall) when the window is full.  N(R) from any incoming I- or
+         S-frame releases frames.  With RETRANSMIT ([BLE] alba_retransmit), REJ,
+         or RETX_TIMEOUT without N(R) moving, resends the unacknowledged frames
+         unchanged (go-back-N); after MAX_RETX timeouts in a row the peer is
+         assumed not to acknowledge and the window is released, as before flow
+         control existed.  Without it (the default) nothing is resent and the
+         window is released at the first timeout: a resent frame is only safe
+         if the peer discards duplicate I-frames, which is not yet confirmed
+         for the real device — one it decrypts twice throws its AES-CTR stream
+         out of step.
+
 Security frame types above HDLC:
     0x00  Version Request   (app→device: 1 byte)
     0x01  Version Response  (device→app: 7 bytes)
@@ -33,6 +52,7 @@ AES-CTR: manual ECB-based counter mode matching aj.cs.
 
 import asyncio
 import logging
+from collections import deque
 
 from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
@@ -41,6 +61,8 @@ from cryptography.hazmat.primitives.hashes import SHA256
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 
+from aquaclean_console_app import BridgeMetrics
+
 logger = logging.getLogger(__name__)
 
 # Application bridge identifier used for session authentication (HKDF + CMAC).
@@ -62,6 +84,10 @@ _SEC_ENCRYPTED    = 0x20
 _HDLC_SABM_TYPE = 7   # U-frame ctrl = 0x2F
 _HDLC_UA_TYPE   = 12  # U-frame ctrl = 0x63
 
+_HDLC_S_RR  = 0
+_HDLC_S_RNR = 1
+_HDLC_S_REJ = 2
+
 
 def _crc16_kermit(data: bytes) -> int:
     """CRC-16/Kermit: poly=0x8408 (reflected 0x1021), init=0, xorout=0, refin=True, refout=True."""
@@ -202,10 +228,18 @@ class AriendiSecurity:
         sec = AriendiSecurity()
         # Wire ATT bytes into sec.feed_att_bytes() via _on_data_received override
         await sec.perform_handshake(send_fn)   # at connect time
-        # Use sec.wrap_for_send() / feed_att_bytes() for data exchange
+        sec._ack_send_fn = send_fn             # enables RR / REJ / retransmit
+        # Use sec.send_data() / feed_att_bytes() for data exchange
         sec.reset()   # before each new connection attempt
     """
 
+    TX_WINDOW    = 7      # modulo 8: at most 7 unacknowledged I-frames
+    ACK_EVERY    = 4      # RR once this many received I-frames are unacknowledged ...
+    ACK_DELAY    = 0.02   # ... or this many seconds after the first of them
+    RETX_TIMEOUT = 3.0    # resend unacknowledged I-frames when N(R) has not moved (s)
+    MAX_RETX     = 2      # timeouts in a row before the window is released
+    RETRANSMIT   = False  # [BLE] alba_retransmit: go-back-N on REJ / timeout (see module docstring)
+
     def __init__(self):
         self._rx_buf = bytearray()
         self._rx_queue: asyncio.Queue = asyncio.Queue()
@@ -214,10 +248,19 @@ class AriendiSecurity:
         self._rx_cipher: _AesCtrState | None = None
         self._tx_cipher: _AesCtrState | None = None
         self._inner_cobs_buf: bytearray = bytearray()
-        self._ack_send_fn = None   # set by caller after handshake for auto-RR
+        self._ack_send_fn = None   # set by caller after handshake for RR / REJ / retransmit
         self.handshake_done = False
+        # Lifetime counters (see link_stats())
+        self.acks_sent = 0
+        self.acks_saved = 0        # received I-frames acknowledged without an RR of their own
+        self.window_stalls = 0
+        self.retransmits = 0
+        self.rejects_received = 0
+        self.out_of_sequence = 0
+        self._reset_flow()
 
     def reset(self) -> None:
+        self._cancel_timers()
         self._rx_buf = bytearray()
         self._rx_queue = asyncio.Queue()
         self._tx_seq = 0
@@ -227,6 +270,35 @@ class AriendiSecurity:
         self._inner_cobs_buf = bytearray()
         self._ack_send_fn = None
         self.handshake_done = False
+        self._reset_flow()
+
+    def _reset_flow(self) -> None:
+        self._rx_unacked = 0       # received I-frames not yet covered by an outgoing N(R)
+        self._rej_sent = False     # one REJ per out-of-sequence condition
+        self._ack_timer: asyncio.TimerHandle | None = None
+        self._ack_task: asyncio.Task | None = None
+        self._tx_unacked: deque = deque()   # (N(S), att_bytes), oldest first
+        self._tx_space = asyncio.Event()
+        self._tx_space.set()
+        self._peer_busy = False    # RNR received
+        self._retx_timer: asyncio.TimerHandle | None = None
+        self._retx_count = 0
+
+    def _cancel_timers(self) -> None:
+        for handle in (getattr(self, "_ack_timer", None), getattr(self, "_retx_timer", None)):
+            if handle is not None:
+                handle.cancel()
+
+    def link_stats(self) -> dict:
+        return {
+            "acks_sent":        self.acks_sent,
+            "acks_saved":       self.acks_saved,
+            "window_stalls":    self.window_stalls,
+            "retransmits":      self.retransmits,
+            "rejects_received": self.rejects_received,
+            "out_of_sequence":  self.out_of_sequence,
+            "tx_unacked":       len(self._tx_unacked),
+        }
 
     # -------------------------------------------------------------------------
     # HDLC ctrl byte helpers
@@ -242,6 +314,9 @@ class AriendiSecurity:
     def _s_ctrl_rr(self) -> int:
         return ((self._rx_ack << 5) & 0xE0) | 0x01
 
+    def _s_ctrl_rej(self) -> int:
+        return ((self._rx_ack << 5) & 0xE0) | (_HDLC_S_REJ << 2) | 0x01
+
     # -------------------------------------------------------------------------
     # Build ATT bytes for a single frame
     # -------------------------------------------------------------------------
@@ -256,14 +331,167 @@ class AriendiSecurity:
         return self._build_att(self._u_ctrl(hdlc_type), b'')
 
     def _att_i(self, sec_payload: bytes) -> bytes:
-        """Build I-frame ATT bytes and increment our N(S)."""
+        """Build I-frame ATT bytes and increment our N(S).  Carries N(R), so it
+        acknowledges everything received so far."""
         att = self._build_att(self._i_ctrl(), sec_payload)
         self._tx_seq = (self._tx_seq + 1) % 8
+        if self._rx_unacked:
+            self.acks_saved += self._rx_unacked
+            BridgeMetrics.HDLC_EVENTS.inc("ack_saved", amount=self._rx_unacked)
+            self._rx_unacked = 0
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
         return att
 
     def _att_s_rr(self) -> bytes:
         return self._build_att(self._s_ctrl_rr(), b'')
 
+    def _att_s_rej(self) -> bytes:
+        return self._build_att(self._s_ctrl_rej(), b'')
+
+    # -------------------------------------------------------------------------
+    # RX flow control: delayed cumulative RR, REJ on a sequence gap
+    # -------------------------------------------------------------------------
+
+    def _on_i_frame_in_sequence(self) -> None:
+        if self._ack_send_fn is None:
+            return
+        self._rx_unacked += 1
+        if self._rx_unacked >= self.ACK_EVERY:
+            self._flush_ack()
+        elif self._ack_timer is None:
+            try:
+                self._ack_timer = asyncio.get_running_loop().call_later(self.ACK_DELAY, self._flush_ack)
+            except RuntimeError:
+                pass
+
+    def _flush_ack(self) -> None:
+        """Send one RR covering every unacknowledged received I-frame."""
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
+        if not self._rx_unacked or self._ack_send_fn is None:
+            return
+        if self._ack_task is not None and not self._ack_task.done():
+            # An RR write is in flight; it re-checks when it finishes, so this
+            # ack is folded into the next one instead of queuing another write.
+            return
+        try:
+            self._ack_task = asyncio.get_running_loop().create_task(self._send_acks())
+        except RuntimeError:
+            pass
+
+    async def _send_acks(self) -> None:
+        while self._rx_unacked and self._ack_send_fn is not None:
+            saved = self._rx_unacked - 1
+            self._rx_unacked = 0
+            self.acks_sent += 1
+            self.acks_saved += saved
+            BridgeMetrics.HDLC_EVENTS.inc("ack_sent")
+            if saved:
+                BridgeMetrics.HDLC_EVENTS.inc("ack_saved", amount=saved)
+            try:
+                await self._ack_send_fn(self._att_s_rr())
+            except Exception as e:
+                logger.debug(f"AriendiSecurity: RR write failed: {e}")
+                return
+
+    def _send_rej(self) -> None:
+        if self._rej_sent or self._ack_send_fn is None:
+            return
+        self._rej_sent = True
+        try:
+            asyncio.get_running_loop().create_task(self._ack_send_fn(self._att_s_rej()))
+        except RuntimeError:
+            pass
+
+    # -------------------------------------------------------------------------
+    # TX flow control: N(R) tracking, send window, retransmission
+    # -------------------------------------------------------------------------
+
+    def _on_peer_nr(self, nr: int) -> None:
+        """Release the unacknowledged I-frames covered by the peer's N(R)."""
+        if not self._tx_unacked:
+            return
+        acked = (nr - self._tx_unacked[0][0]) % 8
+        if acked > len(self._tx_unacked):
+            return   # stale N(R) (before our oldest outstanding frame)
+        if acked:
+            for _ in range(acked):
+                self._tx_unacked.popleft()
+            self._retx_count = 0
+            self._arm_retx()
+        self._update_tx_space()
+
+    def _update_tx_space(self) -> None:
+        if len(self._tx_unacked) < self.TX_WINDOW and not self._peer_busy:
+            self._tx_space.set()
+        else:
+            self._tx_space.clear()
+
+    def _arm_retx(self) -> None:
+        if self._retx_timer is not None:
+            self._retx_timer.cancel()
+            self._retx_timer = None
+        if self._tx_unacked and self._ack_send_fn is not None:
+            try:
+                self._retx_timer = asyncio.get_running_loop().call_later(self.RETX_TIMEOUT, self._on_retx_timeout)
+            except RuntimeError:
+                pass
+
+    def _on_retx_timeout(self) -> None:
+        self._retx_timer = None
+        if not self._tx_unacked:
+            return
+        self._retx_count += 1
+        if not self.RETRANSMIT:
+            logger.debug(f"AriendiSecurity: no N(R) for {self.RETX_TIMEOUT}s — releasing the send window "
+                         f"({len(self._tx_unacked)} I-frame(s), retransmission disabled)")
+            self._tx_unacked.clear()
+            self._retx_count = 0
+            self._peer_busy = False
+            self._update_tx_space()
+            return
+        if self._retx_count > self.MAX_RETX:
+            logger.warning(f"AriendiSecurity: {len(self._tx_unacked)} I-frame(s) never acknowledged "
+                           f"after {self.MAX_RETX} retransmission(s) — releasing the send window")
+            self._tx_unacked.clear()
+            self._retx_count = 0
+            self._peer_busy = False
+            self._update_tx_space()
+            return
+        logger.debug(f"AriendiSecurity: no N(R) for {self.RETX_TIMEOUT}s — retransmitting "
+                     f"{len(self._tx_unacked)} I-frame(s)")
+        self._retransmit()
+
+    def _retransmit(self) -> None:
+        """Resend every unacknowledged I-frame, oldest first, byte-for-byte.
+
+        The stored bytes carry an older N(R), which is harmless (acks are
+        cumulative), and the ciphertext must not be re-encrypted: the peer's
+        AES-CTR stream is still positioned at the first lost frame.  Only with
+        RETRANSMIT: the peer must discard the duplicates it already has."""
+        frames = [att for _, att in self._tx_unacked]
+        send_fn = self._ack_send_fn
+        if not frames or send_fn is None or not self.RETRANSMIT:
+            return
+        self.retransmits += len(frames)
+        BridgeMetrics.HDLC_EVENTS.inc("retransmit", amount=len(frames))
+
+        async def _resend():
+            try:
+                for att in frames:
+                    await send_fn(att)
+            except Exception as e:
+                logger.debug(f"AriendiSecurity: retransmit failed: {e}")
+
+        try:
+            asyncio.get_running_loop().create_task(_resend())
+        except RuntimeError:
+            return
+        self._arm_retx()
+
     # -------------------------------------------------------------------------
     # Feed incoming ATT bytes (call from _on_data_received)
     # -------------------------------------------------------------------------
@@ -380,21 +608,36 @@ class AriendiSecurity:
 
             if (ctrl & 0x01) == 0:  # I-frame
                 peer_ns = (ctrl >> 1) & 0x07
+                if self.handshake_done:
+                    self._on_peer_nr((ctrl >> 5) & 0x07)
+                    if peer_ns != self._rx_ack:
+                        # Duplicate or gap: decrypting it would desynchronise the
+                        # AES-CTR stream.  Drop it and ask for a resend from N(R).
+                        self.out_of_sequence += 1
+                        logger.debug(f"AriendiSecurity: I-frame rx peer_ns={peer_ns} out of sequence "
+                                     f"(expected {self._rx_ack}) — dropped")
+                        self._send_rej()
+                        continue
+                    self._rej_sent = False
                 self._rx_ack = (peer_ns + 1) % 8
                 self._rx_queue.put_nowait(('I', ctrl, hdlc_payload))
                 sec_str = f"0x{hdlc_payload[0]:02X}" if hdlc_payload else "0x??"
                 logger.debug(f"AriendiSecurity: I-frame rx peer_ns={peer_ns} sec_type={sec_str}")
-                if self.handshake_done and self._ack_send_fn is not None:
-                    try:
-                        asyncio.get_running_loop().create_task(
-                            self._ack_send_fn(self._att_s_rr())
-                        )
-                    except RuntimeError:
-                        pass
+                if self.handshake_done:
+                    self._on_i_frame_in_sequence()
             elif (ctrl & 0x03) == 0x03:  # U-frame
                 self._rx_queue.put_nowait(('U', ctrl, hdlc_payload))
                 logger.debug(f"AriendiSecurity: U-frame rx ctrl=0x{ctrl:02X}")
-            # S-frames: update nothing, discard (sequence already updated via I-frame N(R))
+            elif self.handshake_done:  # S-frame
+                s_type = (ctrl >> 2) & 0x03
+                peer_nr = (ctrl >> 5) & 0x07
+                logger.debug(f"AriendiSecurity: S-frame rx type={s_type} N(R)={peer_nr}")
+                self._peer_busy = s_type == _HDLC_S_RNR
+                self._on_peer_nr(peer_nr)
+                if s_type == _HDLC_S_REJ:
+                    self.rejects_received += 1
+                    BridgeMetrics.HDLC_EVENTS.inc("reject")
+                    self._retransmit()
 
     # -------------------------------------------------------------------------
     # Await helpers for handshake
@@ -458,6 +701,8 @@ class AriendiSecurity:
         """
         self._tx_seq = 0
         self._rx_ack = 0
+        self._cancel_timers()
+        self._reset_flow()
 
         # 1. HDLC link setup: SABM → UA
         logger.debug("AriendiSecurity: SABM →")
@@ -545,6 +790,7 @@ class AriendiSecurity:
         """
         Inner-COBS-frame, encrypt, and wrap in Security(0x20) HDLC I-frame.
         Returns raw ATT bytes ready to write to the BLE characteristic.
+        Not flow-controlled — see send_data().
         """
         crc = _crc16_kermit(geberit_payload)
         inner_frame = (b'\x00'
@@ -552,3 +798,23 @@ class AriendiSecurity:
                        + b'\x00')
         ciphertext = self._tx_cipher.process(inner_frame)
         return self._att_i(bytes([_SEC_ENCRYPTED]) + ciphertext)
+
+    async def send_data(self, geberit_payload: bytes, send_fn) -> None:
+        """
+        wrap_for_send() + send_fn(), within the HDLC send window.
+
+        Waits while TX_WINDOW I-frames are unacknowledged (or the peer sent
+        RNR); the frame is kept for retransmission until N(R) covers it.
+        """
+        if not self._tx_space.is_set():
+            self.window_stalls += 1
+            BridgeMetrics.HDLC_EVENTS.inc("window_stall")
+            logger.debug(f"AriendiSecurity: send window full ({len(self._tx_unacked)} unacked) — waiting")
+            await self._tx_space.wait()
+        ns = self._tx_seq
+        att = self.wrap_for_send(geberit_payload)
+        self._tx_unacked.append((ns, att))
+        self._update_tx_space()
+        if len(self._tx_unacked) == 1:
+            self._arm_retx()
+        await send_fn(att)
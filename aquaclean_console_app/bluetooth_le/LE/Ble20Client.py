@@ -15,9 +15,13 @@ Usage:
 import asyncio
 import logging
 import struct
+import time
 from dataclasses import dataclass
 from typing import Optional
 
+from aquaclean_console_app.AdaptiveTimeouts import ADAPTIVE_TIMEOUTS, CallTimeoutError, transport_of
+from aquaclean_console_app.CallStats import CALL_STATS
+
 from .command_id import CommandId
 from .dp_type import DpType
 from .transmission_status import TransmissionStatus
@@ -102,7 +106,7 @@ class Ble20Client:
       poll_state()           — read the standard bridge state DpIds
     """
 
-    RECV_TIMEOUT = 30.0
+    RECV_TIMEOUT = 30.0   # default; read() / write() learn a shorter one per DpId (AdaptiveTimeouts)
 
     def __init__(self, connector):
         """
@@ -112,6 +116,7 @@ class Ble20Client:
         self._connector = connector
         self._rx_queue: asyncio.Queue[bytes] = asyncio.Queue()
         self._notify_queues: dict[int, asyncio.Queue] = {}
+        self.call_budget_hook = None   # awaited before each read / write (call budget, see AirtimeGovernor)
         connector.data_received_handlers += self._on_data
 
     # ── Internal plumbing ────────────────────────────────────────────────────
@@ -191,14 +196,13 @@ class Ble20Client:
 
     async def read(self, dp_id: int, instance: Optional[int] = None) -> bytes:
         """Read one DpId.  Returns raw value bytes.  Raises IOError on device error."""
+        if self.call_budget_hook is not None:
+            await self.call_budget_hook()
         addr = encode_address(dp_id, instance)
+        t_sent = time.perf_counter()
         await self._send(bytes([CommandId.ReadCmd]) + addr)
-        while True:
-            frame = await self._recv()
-            logger.debug(f"Ble20 ← {frame.hex()}")
-            if frame[0] in (CommandId.ReadAns, CommandId.ReadError):
-                break
-            logger.debug(f"Ble20: skipping frame cmd=0x{frame[0]:02X} (awaiting ReadAns)")
+        frame = await self._await_answer(
+            dp_id, "read", t_sent, CommandId.ReadAns, CommandId.ReadError)
         if frame[0] == CommandId.ReadError:
             _, _, off = decode_address(frame, 1)
             status = frame[off] if off < len(frame) else 0xFF
@@ -210,19 +214,55 @@ class Ble20Client:
 
     async def write(self, dp_id: int, value: bytes, instance: Optional[int] = None) -> None:
         """Write one DpId.  Raises IOError on device error."""
+        if self.call_budget_hook is not None:
+            await self.call_budget_hook()
         addr = encode_address(dp_id, instance)
+        t_sent = time.perf_counter()
         await self._send(bytes([CommandId.WriteCmd]) + addr + value)
-        while True:
-            frame = await self._recv()
-            logger.debug(f"Ble20 ← {frame.hex()}")
-            if frame[0] in (CommandId.WriteAck, CommandId.WriteError):
-                break
-            logger.debug(f"Ble20: skipping frame cmd=0x{frame[0]:02X} (awaiting WriteAck)")
+        frame = await self._await_answer(
+            dp_id, "write", t_sent, CommandId.WriteAck, CommandId.WriteError)
         if frame[0] == CommandId.WriteError:
             _, _, off = decode_address(frame, 1)
             status = frame[off] if off < len(frame) else 0xFF
             raise IOError(f"WriteError dp_id={dp_id}: {_tx_name(status)}")
 
+    async def _await_answer(self, dp_id: int, op: str, t_sent: float, ok_cmd: int, error_cmd: int) -> bytes:
+        """Receive until an ok_cmd / error_cmd frame arrives; record the call in CallStats.
+
+        Frames are already reassembled and decrypted by AriendiSecurity, so
+        reassembly time and flow-control counts do not apply on this path.
+        Raises CallTimeoutError when no answer arrives within the call's
+        (learned) timeout.
+        """
+        frames = 0
+        first_ms = None
+        key = CALL_STATS.dp_key(dp_id, op)
+        timeout_key = ADAPTIVE_TIMEOUTS.key(transport_of(self._connector), key)
+        timeout, adaptive = ADAPTIVE_TIMEOUTS.timeout_for(timeout_key, self.RECV_TIMEOUT)
+        deadline = t_sent + timeout
+        try:
+            while True:
+                frame = await self._recv(max(0.0, deadline - time.perf_counter()))
+                frames += 1
+                if first_ms is None:
+                    first_ms = (time.perf_counter() - t_sent) * 1000
+                logger.debug(f"Ble20 ← {frame.hex()}")
+                if frame[0] in (ok_cmd, error_cmd):
+                    break
+                logger.debug(f"Ble20: skipping frame cmd=0x{frame[0]:02X} (awaiting {CommandId(ok_cmd).name})")
+        except asyncio.TimeoutError:
+            CALL_STATS.record(key, name=_dp_name(dp_id), first_frame_ms=first_ms,
+                              frames_received=frames, timeout=True)
+            ADAPTIVE_TIMEOUTS.record(timeout_key, timeout=True)
+            raise CallTimeoutError(
+                f"Ble20 {op} dp_id={dp_id}: no answer within {timeout:.2f} s"
+                f"{' (learned timeout)' if adaptive else ''}",
+                key=timeout_key, timeout_s=timeout, adaptive=adaptive) from None
+        ADAPTIVE_TIMEOUTS.record(timeout_key, (time.perf_counter() - t_sent) * 1000)
+        CALL_STATS.record(key, name=_dp_name(dp_id), first_frame_ms=first_ms,
+                          frames_received=frames, error=frame[0] == error_cmd)
+        return frame
+
     # ── Notifications ────────────────────────────────────────────────────────
 
     async def enable_notification(self, dp_ids: list[int]) -> None:
@@ -540,6 +580,14 @@ class Ble20Client:
 # Internal helpers
 # ---------------------------------------------------------------------------
 
+def _dp_name(dp_id: int) -> str:
+    from .dp_ids import DpId
+    try:
+        return DpId(dp_id).name
+    except ValueError:
+        return f"DpId {dp_id}"
+
+
 def _tx_name(status: int) -> str:
     try:
         return TransmissionStatus(status).name
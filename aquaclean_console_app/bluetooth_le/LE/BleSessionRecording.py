@@ -0,0 +1,515 @@
+"""
+BLE session recording and replay.
+
+RecordingConnector wraps a BluetoothLeConnector and writes every outgoing
+write and every incoming notification, with timestamps, to a compact binary
+session file.  ReplayConnector is a connector that plays such a file back to
+the bridge — with the original timing or as fast as possible — so real field
+sessions (including slow or failing ones) can be re-run through newer bridge
+code without hardware.
+
+Both work at the level the clients see: send_message() payloads before Arendi
+encryption and data_received_handlers payloads after decryption.  Alba
+sessions therefore replay without keys and without a handshake, and a session
+recorded over an ESP32 proxy replays the same as one recorded over local BlueZ.
+
+File format (varints are unsigned LEB128):
+
+    header:  b"AQBS" | u8 version (1)
+    record:  u8 kind | varint dt_us | varint length | payload
+
+    dt_us is the time since the previous record in microseconds.
+
+    kind  payload
+    0x01  WRITE        send_message() data
+    0x02  WRITE_CONS   send_message_cons() data
+    0x03  NOTIFY       one data_received_handlers payload
+    0x04  LINK_DOWN    empty — connection_status_changed(False) not caused
+                       by disconnect(), i.e. the peripheral dropped the link
+    0x10  CONNECT      device_id (UTF-8) — connect_async() called
+    0x11  CONNECTED    JSON: device_name, device_address, is_variant_a,
+                       last_ble_ms, last_esphome_api_ms, rssi, wall_time
+    0x12  ERROR        "ExceptionType: message" (UTF-8) — connect_async() raised
+    0x13  DISCONNECT   empty — disconnect() / disconnect_ble_only() called
+
+One file may hold several connect/disconnect sessions.  Given a directory
+instead of a file, RecordingConnector starts a new file per connection
+(session-YYYYmmdd-HHMMSS-ffffff.aqbs).
+
+Usage:
+    connector = RecordingConnector(BluetoothLeConnector(...), "/var/tmp/aqbs")
+    ...
+    connector = ReplayConnector("session-20260101-120000-000000.aqbs", speed=None)
+    client = AquaCleanClientFactory(connector).create_client()
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from aquaclean_console_app.myEvent import myEvent
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AQBS"
+VERSION = 1
+
+WRITE      = 0x01
+WRITE_CONS = 0x02
+NOTIFY     = 0x03
+LINK_DOWN  = 0x04
+CONNECT    = 0x10
+CONNECTED  = 0x11
+ERROR      = 0x12
+DISCONNECT = 0x13
+
+KIND_NAMES = {
+    WRITE: "WRITE", WRITE_CONS: "WRITE_CONS", NOTIFY: "NOTIFY", LINK_DOWN: "LINK_DOWN",
+    CONNECT: "CONNECT", CONNECTED: "CONNECTED", ERROR: "ERROR", DISCONNECT: "DISCONNECT",
+}
+
+
+class SessionFormatError(ValueError):
+    """Raised when a file is not a (supported) BLE session recording."""
+
+
+class ReplayMismatchError(Exception):
+    """Raised by a strict ReplayConnector when the bridge writes something the recording did not."""
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _read_varint(buf: bytes, pos: int) -> tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise SessionFormatError("truncated varint")
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+
+class SessionWriter:
+    """Appends timestamped records to one session file.
+
+    append=True continues an existing recording (its header is kept).
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            self._fh = open(path, "ab")
+        else:
+            self._fh = open(path, "wb")
+            self._fh.write(MAGIC + bytes([VERSION]))
+        self._last = time.perf_counter()
+        self.records = 0
+
+    def write(self, kind: int, payload: bytes = b"") -> None:
+        if self._fh is None:
+            return
+        now = time.perf_counter()
+        dt_us = max(0, int((now - self._last) * 1_000_000))
+        self._last = now
+        self._fh.write(bytes([kind]) + _varint(dt_us) + _varint(len(payload)) + bytes(payload))
+        self.records += 1
+
+    def flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def read_session(path: str) -> list[tuple[int, int, bytes]]:
+    """Return every record of a session file as (kind, dt_us, payload).
+
+    A truncated final record (bridge killed mid-write) is dropped with a warning.
+    """
+    with open(path, "rb") as fh:
+        buf = fh.read()
+    if buf[:4] != MAGIC:
+        raise SessionFormatError(f"{path}: not a BLE session recording")
+    if len(buf) < 5 or buf[4] != VERSION:
+        raise SessionFormatError(f"{path}: unsupported session file version")
+    records = []
+    pos = 5
+    while pos < len(buf):
+        try:
+            kind = buf[pos]
+            dt_us, p = _read_varint(buf, pos + 1)
+            length, p = _read_varint(buf, p)
+        except SessionFormatError:
+            logger.warning(f"{path}: truncated record at offset {pos} — ignored")
+            break
+        if p + length > len(buf):
+            logger.warning(f"{path}: truncated record at offset {pos} — ignored")
+            break
+        records.append((kind, dt_us, buf[p:p + length]))
+        pos = p + length
+    return records
+
+
+class RecordingConnector:
+    """Transparent BluetoothLeConnector wrapper that records the session.
+
+    Every attribute not defined here — reads and writes — goes to the wrapped
+    connector, so clients and main.py use it exactly like the real one.
+
+    *target* is either a file (every connection appended to it) or an
+    existing directory (one new file per connection).
+    """
+
+    def __init__(self, inner, target: str):
+        self._rec_inner = inner
+        self._rec_target = target
+        self._rec_writer: SessionWriter | None = None
+        self._rec_disconnecting = False
+        inner.data_received_handlers += self._rec_on_data
+        inner.connection_status_changed_handlers += self._rec_on_status
+
+    def __getattr__(self, name):
+        return getattr(self._rec_inner, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_rec_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._rec_inner, name, value)
+
+    @property
+    def session_path(self) -> str | None:
+        """Path of the file currently being written, or None between connections."""
+        return self._rec_writer.path if self._rec_writer is not None else None
+
+    def _rec_open(self) -> None:
+        if self._rec_writer is not None:
+            return
+        path = self._rec_target
+        if os.path.isdir(path):
+            name = datetime.now().strftime("session-%Y%m%d-%H%M%S-%f.aqbs")
+            path = os.path.join(path, name)
+        self._rec_writer = SessionWriter(path, append=True)
+        logger.debug(f"[RecordingConnector] recording BLE session to {path}")
+
+    def _rec_close(self) -> None:
+        if self._rec_writer is not None:
+            logger.debug(f"[RecordingConnector] {self._rec_writer.records} record(s) written to {self._rec_writer.path}")
+            self._rec_writer.close()
+            self._rec_writer = None
+
+    def _rec(self, kind: int, payload: bytes = b"") -> None:
+        if self._rec_writer is None:
+            return
+        try:
+            self._rec_writer.write(kind, payload)
+        except OSError as e:
+            # Recording must never break the live session.
+            logger.warning(f"[RecordingConnector] write to {self._rec_writer.path} failed, recording stopped: {e}")
+            self._rec_writer.close()
+            self._rec_writer = None
+
+    async def _rec_on_data(self, data) -> None:
+        self._rec(NOTIFY, bytes(data))
+
+    def _rec_on_status(self, sender, connected, *args) -> None:
+        if not connected and not self._rec_disconnecting:
+            self._rec(LINK_DOWN)
+
+    async def connect_async(self, device_id):
+        self._rec_open()
+        self._rec_disconnecting = False
+        self._rec(CONNECT, str(device_id).encode())
+        inner = self._rec_inner
+        try:
+            await inner.connect_async(device_id)
+        except BaseException as e:
+            self._rec(ERROR, f"{type(e).__name__}: {e}".encode())
+            if os.path.isdir(self._rec_target):
+                self._rec_close()
+            raise
+        meta = {
+            "device_name":        inner.device_name,
+            "device_address":     inner.device_address,
+            "is_variant_a":       bool(getattr(inner, "is_variant_a", False)),
+            "last_ble_ms":        getattr(inner, "last_ble_ms", None),
+            "last_esphome_api_ms": getattr(inner, "last_esphome_api_ms", None),
+            "rssi":               getattr(inner, "rssi", None),
+            "wall_time":          time.time(),
+        }
+        self._rec(CONNECTED, json.dumps(meta).encode())
+
+    async def send_message(self, data):
+        self._rec(WRITE, bytes(data))
+        await self._rec_inner.send_message(data)
+
+    async def send_message_cons(self, data):
+        self._rec(WRITE_CONS, bytes(data))
+        await self._rec_inner.send_message_cons(data)
+
+    async def _rec_disconnect(self, method) -> None:
+        self._rec_disconnecting = True
+        self._rec(DISCONNECT)
+        try:
+            await method()
+        finally:
+            if os.path.isdir(self._rec_target):
+                self._rec_close()
+            elif self._rec_writer is not None:
+                self._rec_writer.flush()
+
+    async def disconnect(self):
+        await self._rec_disconnect(self._rec_inner.disconnect)
+
+    async def disconnect_ble_only(self):
+        await self._rec_disconnect(self._rec_inner.disconnect_ble_only)
+
+    def close(self) -> None:
+        """Close the session file (a later connect reopens / starts a new one)."""
+        self._rec_close()
+
+
+def _replay_exception(text: str) -> Exception:
+    """Rebuild a recorded connect error as the bridge-side exception type, where known."""
+    name, _, message = text.partition(": ")
+    from aquaclean_console_app.bluetooth_le.LE import BluetoothLeConnector as _blec
+    from aquaclean_console_app.aquaclean_core.Clients import AquaCleanBaseClient as _base
+    if name == "ESPHomeConnectionError":
+        return _blec.ESPHomeConnectionError(message, timeout="Timeout" in message)
+    known = {
+        "ESPHomeDeviceNotFoundError": _blec.ESPHomeDeviceNotFoundError,
+        "BLEPeripheralTimeoutError":  _base.BLEPeripheralTimeoutError,
+        "BleakError":                 _blec.BleakError,
+        "TimeoutError":               TimeoutError,
+        "ConnectionError":            ConnectionError,
+    }
+    cls = known.get(name)
+    if cls is None:
+        return RuntimeError(text)
+    return cls(message)
+
+
+class SessionCursor:
+    """Playback position in a recording, shareable between ReplayConnectors.
+
+    main.py builds a new connector (and client) per on-demand request; giving
+    each one the same cursor makes successive connectors play successive
+    recorded connections.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = read_session(path)
+        self.pos = 0
+        self.write_pos = 0      # strict mode: next recorded write the bridge has not sent yet
+        self.stats = {"connections": 0, "writes": 0, "matched": 0, "mismatches": 0,
+                      "notifications": 0, "unplayed": 0}
+
+    @property
+    def sessions_left(self) -> int:
+        return sum(1 for kind, _, _ in self.records[self.pos:] if kind == CONNECT)
+
+
+class ReplayConnector:
+    """Connector that plays a recorded session file back to the bridge.
+
+    speed — 1.0 replays with the recorded gaps between a write and the
+            notifications that followed it; 2.0 halves them; None replays
+            as fast as possible.
+    strict — raise ReplayMismatchError from send_message() when the bridge
+            writes something other than the recorded write.  Otherwise
+            mismatches are only counted (stats()["mismatches"]).
+
+    *source* is a session file path or a SessionCursor.  Each connect_async()
+    plays the next recorded connection.  Notifications
+    are delivered only once the bridge has issued the write the recording
+    shows before them, so a bridge that sends fewer or different requests
+    stalls at that point and times out, as it would against the device.  A
+    recorded connect error is re-raised as the same exception type where the
+    type is known to the bridge; a recorded link loss fires
+    connection_status_changed(False).
+    """
+
+    def __init__(self, source, speed: float | None = 1.0, strict: bool = False):
+        self._cursor = source if isinstance(source, SessionCursor) else SessionCursor(source)
+        self.path = self._cursor.path
+        self.speed = speed
+        self.strict = strict
+        self.data_received_handlers = myEvent.EventHandler()
+        self.connection_status_changed_handlers = myEvent.EventHandler()
+        self.device_address = 'Unknown'
+        self.device_name = 'Unknown'
+        self.is_variant_a = False
+        self.rssi: int | None = None
+        self.last_ble_ms: int | None = None
+        self.last_esphome_api_ms: int | None = None
+        self.esphome_proxy_connected = False
+        self.ble_dis_info: dict | None = None
+        self._handshake_done = False
+        self._writes: asyncio.Queue | None = None
+        self._playback: asyncio.Task | None = None
+
+    @property
+    def arendi_handshake_done(self) -> bool:
+        return self._handshake_done
+
+    @property
+    def sessions_left(self) -> int:
+        return self._cursor.sessions_left
+
+    def stats(self) -> dict:
+        """Replay counters of the (possibly shared) cursor."""
+        return dict(self._cursor.stats)
+
+    async def _sleep(self, dt_us: int) -> None:
+        if self.speed and dt_us:
+            await asyncio.sleep(dt_us / 1_000_000 / self.speed)
+        else:
+            await asyncio.sleep(0)
+
+    async def connect_async(self, device_id):
+        t0 = time.perf_counter()
+        await self._stop_playback()
+        while self._cursor.pos < len(self._cursor.records) and self._cursor.records[self._cursor.pos][0] != CONNECT:
+            self._cursor.pos += 1
+        if self._cursor.pos >= len(self._cursor.records):
+            raise ConnectionError(f"{self.path}: no recorded connection left to replay")
+        self._cursor.pos += 1
+        self._cursor.write_pos = self._cursor.pos
+        self._cursor.stats["connections"] += 1
+        self.device_address = device_id
+        self._writes = asyncio.Queue()
+        # Play up to CONNECTED (notifications may arrive while the real connect is still running).
+        while self._cursor.pos < len(self._cursor.records):
+            kind, dt_us, payload = self._cursor.records[self._cursor.pos]
+            if kind == ERROR:
+                self._cursor.pos += 1
+                await self._sleep(dt_us)
+                raise _replay_exception(payload.decode(errors="replace"))
+            if kind == CONNECTED:
+                self._cursor.pos += 1
+                await self._sleep(dt_us)
+                meta = json.loads(payload)
+                self.device_name = meta.get("device_name") or 'Unknown'
+                self.device_address = meta.get("device_address") or device_id
+                self.is_variant_a = bool(meta.get("is_variant_a"))
+                self.rssi = meta.get("rssi")
+                self.last_esphome_api_ms = meta.get("last_esphome_api_ms")
+                break
+            if kind in (CONNECT, DISCONNECT):
+                raise ConnectionError(f"{self.path}: recorded connection ended before it completed")
+            await self._play_one()
+        else:
+            raise ConnectionError(f"{self.path}: recording ends inside connect")
+        self._handshake_done = self.is_variant_a
+        self.last_ble_ms = int((time.perf_counter() - t0) * 1000)
+        self._playback = asyncio.ensure_future(self._play())
+        self.connection_status_changed_handlers(self, True, self.device_address, self.device_name)
+
+    async def _play_one(self) -> bool:
+        """Play the record at the cursor.  Returns False at the end of this connection."""
+        kind, dt_us, payload = self._cursor.records[self._cursor.pos]
+        if kind in (CONNECT, DISCONNECT):
+            return False
+        if kind in (WRITE, WRITE_CONS):
+            got_kind, data = await self._writes.get()
+            self._cursor.pos += 1
+            self._cursor.stats["writes"] += 1
+            if got_kind == kind and data == payload:
+                self._cursor.stats["matched"] += 1
+            else:
+                self._cursor.stats["mismatches"] += 1
+                logger.warning(f"[ReplayConnector] write {self._cursor.stats['writes']} differs from recording: "
+                               f"got {KIND_NAMES[got_kind]} {data.hex()}, "
+                               f"recorded {KIND_NAMES.get(kind, kind)} {payload.hex()}")
+        elif kind == NOTIFY:
+            await self._sleep(dt_us)
+            self._cursor.pos += 1
+            self._cursor.stats["notifications"] += 1
+            await self.data_received_handlers.invoke_async(bytearray(payload))
+        elif kind == LINK_DOWN:
+            await self._sleep(dt_us)
+            self._cursor.pos += 1
+            self._handshake_done = False
+            self.connection_status_changed_handlers(self, False)
+            return False
+        else:
+            self._cursor.pos += 1     # unknown kind from a newer recorder — skip
+        return True
+
+    async def _play(self) -> None:
+        try:
+            while self._cursor.pos < len(self._cursor.records) and await self._play_one():
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[ReplayConnector] playback stopped: {type(e).__name__}: {e}", exc_info=True)
+
+    async def _stop_playback(self) -> None:
+        if self._playback is not None:
+            if not self._playback.done():
+                self._playback.cancel()
+            try:
+                await self._playback
+            except asyncio.CancelledError:
+                pass
+            self._playback = None
+        # Skip whatever the bridge did not get to in the previous connection.
+        while self._cursor.pos < len(self._cursor.records) and self._cursor.records[self._cursor.pos][0] != CONNECT:
+            if self._cursor.records[self._cursor.pos][0] in (WRITE, WRITE_CONS, NOTIFY):
+                self._cursor.stats["unplayed"] += 1
+            self._cursor.pos += 1
+
+    async def _write(self, kind: int, data) -> None:
+        data = bytes(data)
+        if self._writes is None:
+            return  # not connected — same as writing to a closed link
+        if self.strict:
+            expected = None
+            while self._cursor.write_pos < len(self._cursor.records):
+                k, _, p = self._cursor.records[self._cursor.write_pos]
+                if k in (CONNECT, DISCONNECT, LINK_DOWN):
+                    break
+                self._cursor.write_pos += 1
+                if k in (WRITE, WRITE_CONS):
+                    expected = (k, p)
+                    break
+            if expected != (kind, data):
+                raise ReplayMismatchError(f"unexpected {KIND_NAMES[kind]} {data.hex()}")
+        self._writes.put_nowait((kind, data))
+
+    async def send_message(self, data):
+        await self._write(WRITE, data)
+
+    async def send_message_cons(self, data):
+        await self._write(WRITE_CONS, data)
+
+    async def disconnect(self):
+        await self._stop_playback()
+        self._writes = None
+        self._handshake_done = False
+        self.connection_status_changed_handlers(self, False)
+
+    async def disconnect_ble_only(self):
+        await self.disconnect()
@@ -66,7 +66,7 @@ class BluetoothLeConnector(IBluetoothLeConnector):
     # AriendiSecurity state corruption).
     _active_generation: dict = {}
 
-    def __init__(self, esphome_host=None, esphome_port=6053, esphome_noise_psk=None, hass=None):
+    def __init__(self, esphome_host=None, esphome_port=6053, esphome_noise_psk=None, hass=None, proxy_pool=None):
         self.client = None
         self.read_characteristics = {}
         self.data_received_handlers = myEvent.EventHandler()
@@ -92,6 +92,7 @@ class BluetoothLeConnector(IBluetoothLeConnector):
         self._esphome_free_heap_key: int | None = None       # aioesphomeapi entity key for free heap sensor
         self._esphome_max_free_block_key: int | None = None  # aioesphomeapi entity key for max free block sensor
         self._hass = hass  # Home Assistant instance (HACS integration only); None = standalone bridge
+        self._proxy_pool = proxy_pool  # ProxyPool: several ESP32 proxies, best first with failover; None = esphome_host only
         self._subscribed_characteristics: list = []  # BleakGATTCharacteristic objects registered via start_notify()
         self.ble_dis_info: dict | None = None  # BLE Device Information Service data (0x180a), read after connect
         self.is_variant_a: bool = False       # True when a non-standard Geberit GATT profile is detected
@@ -116,7 +117,7 @@ class BluetoothLeConnector(IBluetoothLeConnector):
         for _attempt in range(2):
             try:
                 if self.esphome_host:
-                    await self._connect_via_esphome(device_id)
+                    await self._connect_via_proxies(device_id)
                 else:
                     await self._connect_local(device_id)
                 return
@@ -441,6 +442,69 @@ class BluetoothLeConnector(IBluetoothLeConnector):
         except Exception as e:
             logger.debug(f"Failed to read ESP32 diagnostic sensors: {e}")
 
+    async def _use_proxy(self, host, port):
+        """Point the connector at another ESP32 proxy; drops the API connection to the old one."""
+        if (host, port) == (self.esphome_host, self.esphome_port):
+            return
+        await self._close_esphome_api()
+        self.esphome_host = host
+        self.esphome_port = port
+        self.esphome_proxy_name = None
+        self._esphome_feature_flags = 0
+        self.esphome_wifi_rssi = None
+        self.esphome_free_heap = None
+        self.esphome_max_free_block = None
+        # Entity keys belong to the old proxy's sensors
+        self._esphome_wifi_key = None
+        self._esphome_free_heap_key = None
+        self._esphome_max_free_block_key = None
+
+    async def _close_esphome_api(self):
+        """Close the ESP32 API connection while no BLE link is open (unsubscribe first, see disconnect())."""
+        if self._esphome_unsub_adv is not None:
+            try:
+                self._esphome_unsub_adv()
+            except Exception:
+                pass
+            self._esphome_unsub_adv = None
+        if self._esphome_api is not None:
+            try:
+                _disc = self._esphome_api.disconnect()  # sync in newer aioesphomeapi
+                if asyncio.iscoroutine(_disc):
+                    await _disc
+            except Exception as e:
+                logger.debug(f"[BluetoothLeConnector] ESP32 API TCP close: {e}")
+            self._esphome_api = None
+        self.esphome_proxy_connected = False
+
+    async def _connect_via_proxies(self, device_id):
+        """Connect through the best proxy of proxy_pool; on a TCP or scan failure try the next
+        one in the same connect (see ProxyPool.py).  Without a pool: esphome_host only."""
+        if not self._proxy_pool:
+            await self._connect_via_esphome(device_id)
+            return
+        candidates = self._proxy_pool.candidates()
+        for i, proxy in enumerate(candidates):
+            await self._use_proxy(proxy.host, proxy.port)
+            t0 = time.perf_counter()
+            try:
+                await self._connect_via_esphome(device_id)
+            except (ESPHomeConnectionError, ESPHomeDeviceNotFoundError) as e:
+                last = i == len(candidates) - 1
+                self._proxy_pool.record_failure(proxy, str(e), timeout=getattr(e, "timeout", False), failover=not last)
+                if last:
+                    raise
+                logger.warning(f"ESP32 proxy {proxy.label} failed — failing over to {candidates[i + 1].label}: {e}")
+                await self._close_esphome_api()
+                continue
+            except Exception as e:
+                self._proxy_pool.record_failure(proxy, str(e) or type(e).__name__,
+                                                timeout=isinstance(e, asyncio.TimeoutError))
+                raise
+            self._proxy_pool.record_success(proxy, connect_ms=(time.perf_counter() - t0) * 1000,
+                                            rssi=self.rssi, name=self.esphome_proxy_name)
+            return
+
     async def _connect_via_esphome(self, device_id):
         from aquaclean_console_app.bluetooth_le.LE.ESPHomeAPIClient import ESPHomeAPIClient
 
@@ -551,6 +615,44 @@ class BluetoothLeConnector(IBluetoothLeConnector):
         await self._post_connect()
 
 
+    async def advertisement_seen(self, device_id: str, timeout: float = 5.0) -> bool:
+        """Cheap reachability probe: is device_id advertising?  No GATT connection is made.
+
+        ESPHome path: listens to the proxy's raw advertisements (reusing the API
+        connection) and unsubscribes again before returning.  Local path:
+        BleakScanner.find_device_by_address().  Updates rssi when seen.
+        Raises ESPHomeConnectionError when the ESP32 itself is unreachable.
+        """
+        if not self.esphome_host:
+            device = await BleakScanner.find_device_by_address(device_id, timeout=timeout)
+            return device is not None
+        if self.client is not None or self._esphome_unsub_adv is not None:
+            return False   # a connection owns the advertisement subscription
+        if self._proxy_pool:
+            proxy = self._proxy_pool.candidates()[0]
+            await self._use_proxy(proxy.host, proxy.port)
+        api = await self._ensure_esphome_api_connected()
+        mac_int = int(device_id.replace(":", ""), 16)
+        found_event = asyncio.Event()
+
+        def on_raw_advertisements(resp):
+            for adv in resp.advertisements:
+                if adv.address == mac_int:
+                    self.rssi = getattr(adv, 'rssi', None)
+                    found_event.set()
+
+        unsub_adv = api.subscribe_bluetooth_le_raw_advertisements(on_raw_advertisements)
+        self._esphome_unsub_adv = unsub_adv
+        try:
+            await asyncio.wait_for(found_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            # Safe here: no BLE connect is in progress (see trap 7 in _connect_via_esphome).
+            unsub_adv()
+            self._esphome_unsub_adv = None
+
     def _parse_local_name(self, data: bytes) -> str:
         """Extract device name from raw BLE advertisement AD structures."""
         i = 0
@@ -790,8 +892,7 @@ class BluetoothLeConnector(IBluetoothLeConnector):
         logger.silly(f"in function {utils.currentClassName()}.{utils.currentFuncName()} called by {utils.currentClassName(1)}.{utils.currentFuncName(1)}")
         logger.silly(f"Sending data to characteristic {self.BULK_CHAR_BULK_WRITE_0_UUID} data: {''.join(f'{b:02X}' for b in data)}")
         if self._arendi_security is not None and self._arendi_security.handshake_done:
-            att_bytes = self._arendi_security.wrap_for_send(data)
-            await self._arendi_raw_write(att_bytes)
+            await self._arendi_security.send_data(data, self._arendi_raw_write)
         else:
             result = await self.client.write_gatt_char(self.BULK_CHAR_BULK_WRITE_0_UUID, data)
             logger.silly(f"result: {result}")
@@ -3,19 +3,16 @@ import asyncio
 import logging
 import os
 import re
-import configparser
-import argparse
 import traceback
 import sys
 import time
-import importlib.metadata
 from datetime import datetime, timezone
 from queue  import Queue, Empty
-from aiorun import run, shutdown_waits_for
+from aiorun import shutdown_waits_for
 
 from bleak import BleakScanner
 from bleak.exc import BleakError
-from aquaclean_console_app.aquaclean_core.Clients.AquaCleanClient                   import AquaCleanClient, SPL_PARAMS_MERA_COMFORT
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanClient                   import AquaCleanClient
 from aquaclean_console_app.aquaclean_core.Clients.AquaCleanBaseClient               import BLEPeripheralTimeoutError
 from aquaclean_console_app.aquaclean_core.IAquaCleanClient                          import IAquaCleanClient
 from aquaclean_console_app.aquaclean_core.AquaCleanClientFactory                    import AquaCleanClientFactory
@@ -24,233 +21,37 @@ from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.DeviceIdentificat
 from aquaclean_console_app.aquaclean_core.Message.MessageService                    import MessageService
 from aquaclean_console_app.aquaclean_core.IBluetoothLeConnector                     import IBluetoothLeConnector
 from aquaclean_console_app.bluetooth_le.LE.BluetoothLeConnector                     import BluetoothLeConnector, ESPHomeConnectionError, ESPHomeDeviceNotFoundError
-from aquaclean_console_app.MqttService                                              import MqttService as Mqtt
-from aquaclean_console_app.RestApiService                                           import RestApiService
+from aquaclean_console_app.bluetooth_le.LE.BleSessionRecording                      import RecordingConnector, ReplayConnector, SessionCursor
+from aquaclean_console_app.MqttService                                              import MqttService as Mqtt, discovery_payload_hash, ha_discovery_topic_filters
 from aquaclean_console_app.myEvent                                                  import myEvent
 from aquaclean_console_app.aquaclean_utils                                          import utils
 from aquaclean_console_app.ErrorCodes                                               import (
     ErrorCode, ErrorManager, E0000, E0001, E0002, E0003, E0010, E1001, E1002,
     E2001, E2002, E2003, E2004, E2005,
-    E3002, E3003, E4001, E4002, E4003, E7002, E7004
+    E3002, E3003, E4001, E4002, E4003, E4005, E7002, E7004
 )
 from aquaclean_console_app.PollStats                                                 import PollStats as _PollStats
+from aquaclean_console_app.HistoryStore                                              import HistoryStore, parse_time
+from aquaclean_console_app.UsageSessions                                             import UsageSessions, FLAGS as _USAGE_FLAGS
+from aquaclean_console_app.CallStats                                                 import CALL_STATS
+from aquaclean_console_app.AdaptiveTimeouts                                          import ADAPTIVE_TIMEOUTS, is_call_timeout
+from aquaclean_console_app.BleScheduler                                              import BleScheduler, Priority, CURRENT_PRIORITY
+from aquaclean_console_app.AirtimeGovernor                                           import AirtimeGovernor, parse_call_budget, DEFAULT_CALL_BUDGET
+from aquaclean_console_app.CommandBatcher                                            import CommandBatcher
+from aquaclean_console_app.CircuitBreaker                                            import CircuitBreaker, health_snapshot, transport_health
+from aquaclean_console_app.LoopMonitor                                               import LOOP_MONITOR
+from aquaclean_console_app.StateStore                                                import StateStore
+from aquaclean_console_app.TransportScheduler                                        import TRANSPORT
+from aquaclean_console_app.ProxyPool                                                 import PROXIES, parse_hosts
+from aquaclean_console_app                                                           import BridgeMetrics
+from aquaclean_console_app                                                           import DataBatch
+from aquaclean_console_app                                                           import FieldCatalog
+from aquaclean_console_app                                                           import BridgeClient
+from aquaclean_console_app.SettingsRefresher                                         import SettingsRefresher
 from aquaclean_console_app.FirmwareUpdateService                                     import check_firmware_update
-from fastapi import HTTPException
-
-# --- Package version (module-level so argparse --version can use it) ---
-def _get_version() -> str:
-    """Return version string.
-
-    When installed from a tagged release (e.g. v2.4.12) returns the plain
-    version ("2.4.12").  When installed from a commit SHA or branch name
-    (e.g. pip install git+...@e09f1e7 or @main) appends the short commit SHA
-    so the exact code revision is identifiable: "2.4.12+e09f1e7".
-
-    Uses pip's PEP 610 direct_url.json metadata — no extra dependencies.
-    """
-    base = "unknown"
-    try:
-        base = importlib.metadata.version("geberit-aquaclean")
-        dist = importlib.metadata.distribution("geberit-aquaclean")
-        text = dist.read_text("direct_url.json")
-        if text:
-            vcs = json.loads(text).get("vcs_info", {})
-            requested = vcs.get("requested_revision", "")
-            commit_id = vcs.get("commit_id", "")
-            # A version tag looks like "v2.4.12" or "2.4.12" — always contains
-            # a dot.  Commit SHAs (hex, no dots) and branch names never do.
-            is_tag = "." in requested
-            if commit_id and not is_tag:
-                return f"{base}+{commit_id[:7]}"
-    except Exception:
-        pass
-    return base
-
-_bridge_version = _get_version()
-
-
-def _safe_run(args: list, timeout: int = 5) -> str:
-    """Run a subprocess and return stripped stdout. Returns '' on any error. Never raises."""
-    import subprocess as _sp
-    try:
-        r = _sp.run(args, capture_output=True, text=True, timeout=timeout)
-        return r.stdout.strip()
-    except FileNotFoundError:
-        return ""
-    except _sp.TimeoutExpired:
-        return ""
-    except (PermissionError, OSError):
-        return ""
-    except Exception:
-        return ""
-
-
-def get_system_info() -> dict:
-    """
-    Return a structured dict describing the runtime environment.
-    All fields are best-effort — missing/unavailable fields are None.
-    Never raises.
-    """
-    import platform as _pl
-    import sys as _sys
-
-    # --- App / Python / OS ---
-    _pv = _sys.version_info
-    python_version = f"{_pv.major}.{_pv.minor}.{_pv.micro}"
-    os_name    = _pl.system()    # "Linux", "Darwin", "Windows"
-    os_release = _pl.release()   # e.g. "6.1.0-rpi7-rpi-v8"
-    machine    = _pl.machine()   # "aarch64", "x86_64", …
-
-    # Read PRETTY_NAME and VERSION from /etc/os-release (Linux/macOS)
-    os_pretty_name = None
-    os_version     = None
-    try:
-        with open("/etc/os-release") as _f:
-            for _line in _f:
-                _k, _, _v = _line.strip().partition("=")
-                _v = _v.strip('"\'')
-                if _k == "PRETTY_NAME":
-                    os_pretty_name = _v
-                elif _k == "VERSION":
-                    os_version = _v
-    except OSError:
-        pass
-
-    # --- Environment detection ---
-    # HA add-on: HASSIO_TOKEN or /data/options.json (supervisor volume)
-    if os.environ.get("HASSIO_TOKEN") or os.path.exists("/data/options.json"):
-        environment = "homeassistant_addon"
-        docker = True
-    else:
-        try:
-            import homeassistant as _ha  # noqa: F401
-            environment = "homeassistant_custom_component"
-            docker = os.path.exists("/.dockerenv")
-        except ImportError:
-            environment = "docker_standalone" if os.path.exists("/.dockerenv") else "standalone"
-            docker = os.path.exists("/.dockerenv")
-
-    # --- Config (reads module-level config object) ---
-    def _cfg(section, key, fallback=None):
-        try:
-            return config.get(section, key, fallback=fallback)
-        except Exception:
-            return fallback
-
-    config_info = {
-        "geberit_address":  _cfg("BLE",     "device_id"),
-        "esphome_host":     _cfg("ESPHOME", "host") or None,
-        "esphome_port":     _cfg("ESPHOME", "port", fallback="6053"),
-        "poll_interval":    _cfg("POLL",    "interval", fallback="0"),
-        "ble_connection":   _cfg("SERVICE", "ble_connection", fallback="persistent"),
-        "log_level":        _cfg("LOGGING", "log_level", fallback="DEBUG"),
-    }
-
-    # --- Library versions ---
-    def _pkg(name: str):
-        try:
-            return importlib.metadata.version(name)
-        except Exception:
-            return None
-
-    libraries = {
-        "bleak":         _pkg("bleak"),
-        "aioesphomeapi": _pkg("aioesphomeapi"),
-        "fastapi":       _pkg("fastapi"),
-        "uvicorn":       _pkg("uvicorn"),
-        "paho-mqtt":     _pkg("paho-mqtt"),
-        "aiorun":        _pkg("aiorun"),
-    }
-
-    # --- Bluetooth adapter info (Linux/BlueZ only) ---
-    bluetooth = {
-        "bluez_version":   None,
-        "adapter_name":    None,
-        "adapter_address": None,
-        "connection_type": None,   # "internal" or "USB dongle"
-        "bus":             None,   # "UART" or "USB"
-        "manufacturer":    None,
-        "hci_version":     None,
-        "chip":            None,
-        "firmware_file":   None,
-        "firmware_version": None,
-        "note":            None,
-    }
-
-    if os_name == "Linux":
-        # BlueZ version
-        bv = _safe_run(["bluetoothd", "--version"])
-        if bv:
-            bluetooth["bluez_version"] = bv
-
-        # Adapter info via hciconfig
-        hci = _safe_run(["hciconfig", "-a"])
-        if hci:
-            for line in hci.splitlines():
-                s = line.strip()
-                if not s:
-                    continue
-                if s.startswith("hci0:"):
-                    bluetooth["adapter_name"] = "hci0"
-                    if "Bus: UART" in s:
-                        bluetooth["bus"] = "UART"
-                        bluetooth["connection_type"] = "internal"
-                    elif "Bus: USB" in s:
-                        bluetooth["bus"] = "USB"
-                        bluetooth["connection_type"] = "USB dongle"
-                elif "BD Address:" in s:
-                    # "BD Address: DC:A6:32:XX:XX:XX  ACL MTU: ..."
-                    try:
-                        bluetooth["adapter_address"] = s.split()[2]
-                    except IndexError:
-                        pass
-                elif "Manufacturer:" in s:
-                    bluetooth["manufacturer"] = s.split("Manufacturer:", 1)[1].strip()
-                elif "HCI Version:" in s:
-                    bluetooth["hci_version"] = s.split("HCI Version:", 1)[1].split("(")[0].strip()
-        else:
-            bluetooth["note"] = "hciconfig not available or no adapter found"
-
-        # Firmware info from dmesg
-        dmesg = _safe_run(["dmesg"], timeout=5)
-        if dmesg:
-            for line in dmesg.splitlines():
-                ll = line.lower()
-                if "bluetooth" in ll and ".hcd" in ll:
-                    # "Bluetooth: hci0: BCM4345C0 'brcm/BCM4345C0.hcd' Patch"
-                    m = re.search(r"'([^']+\.hcd)'", line)
-                    if m:
-                        bluetooth["firmware_file"] = m.group(1)
-                    m2 = re.search(r"(BCM\w+)", line)
-                    if m2:
-                        bluetooth["chip"] = m2.group(1)
-                elif "bluetooth" in ll and "firmware" in ll and "version" in ll:
-                    # "Bluetooth: hci0: BCM: firmware Patch file version 0190"
-                    parts = line.split()
-                    if parts:
-                        bluetooth["firmware_version"] = parts[-1]
-        bluetooth["geberit_firmware"] = "not yet available"
-
-    elif os_name == "Darwin":
-        bluetooth["note"] = "macOS — CoreBluetooth; no hciconfig/BlueZ info available"
-    else:
-        bluetooth["note"] = f"{os_name} — Bluetooth stack info not collected"
-
-    return {
-        "app_version":    _bridge_version,
-        "python_version": python_version,
-        "os":             os_name,
-        "os_release":     os_release,
-        "os_pretty_name": os_pretty_name,
-        "os_version":     os_version,
-        "machine":        machine,
-        "environment":    environment,
-        "docker":         docker,
-        "config":         config_info,
-        "libraries":      libraries,
-        "bluetooth":      bluetooth,
-    }
-
+from aquaclean_console_app.BridgeConfig                                              import config, iniFile, check_config_errors, device_names, device_config
+from aquaclean_console_app.SystemInfo                                                import BRIDGE_VERSION, get_system_info
+from aquaclean_console_app                                                           import CliArgs
 
 def _add_logging_level(level_name: str, level_num: int) -> None:
     """Register a custom numeric log level with the logging module."""
@@ -271,16 +72,16 @@ def _add_logging_level(level_name: str, level_num: int) -> None:
 
 # --- Configuration & Logging Setup ---
 __location__ = os.path.dirname(os.path.abspath(__file__))
-iniFile = os.path.join(__location__, 'config.ini')
-config = configparser.ConfigParser(allow_no_value=False, inline_comment_prefixes=('#',))
-config.read(iniFile)
 
 _add_logging_level('TRACE', logging.DEBUG - 5)
 _add_logging_level('SILLY', logging.DEBUG - 7)
 
 log_level              = config.get("LOGGING",  "log_level",  fallback="DEBUG")
-esphome_host           = config.get("ESPHOME",  "host",       fallback=None) or None
-esphome_port           = int(config.get("ESPHOME", "port",    fallback="6053"))
+# [ESPHOME] host may list several proxies (ProxyPool.py); esphome_host / esphome_port are the first
+esphome_proxies        = parse_hosts(config.get("ESPHOME", "host", fallback=""),
+                                     int(config.get("ESPHOME", "port", fallback="6053")))
+esphome_host           = esphome_proxies[0][0] if esphome_proxies else None
+esphome_port           = esphome_proxies[0][1] if esphome_proxies else int(config.get("ESPHOME", "port", fallback="6053"))
 esphome_noise_psk      = config.get("ESPHOME",  "noise_psk",  fallback=None) or None
 esphome_log_streaming  = config.getboolean("ESPHOME", "log_streaming", fallback=False)
 esphome_log_level      = config.get("ESPHOME", "log_level", fallback="INFO")
@@ -298,6 +99,79 @@ if log_level not in ('TRACE', 'SILLY'):
 # raw protobuf payload at DEBUG level.
 _ansi_re = re.compile(r'(?:\x1b|\033)\[[0-9;]*m')
 
+_replay_cursor: "SessionCursor | None" = None
+
+
+def _new_bluetooth_connector():
+    """Return the connector for a new BLE connection.
+
+    [BLE] replay_session — play a recorded session file instead of talking to
+                           a device (one recorded connection per connect).
+    [BLE] record_sessions_dir — record every connection to this directory.
+    See BleSessionRecording.py.
+    """
+    global _replay_cursor
+    replay_session = config.get("BLE", "replay_session", fallback="").strip()
+    if replay_session:
+        if _replay_cursor is None:
+            if not os.path.isabs(replay_session):
+                replay_session = os.path.join(__location__, replay_session)
+            _replay_cursor = SessionCursor(replay_session)
+            logger.warning(f"Replaying recorded BLE sessions from {replay_session} — no device is contacted")
+        speed = float(config.get("BLE", "replay_speed", fallback="1.0"))
+        return ReplayConnector(_replay_cursor, speed=speed or None)
+    connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk, proxy_pool=PROXIES)
+    record_dir = config.get("BLE", "record_sessions_dir", fallback="").strip()
+    if record_dir:
+        if not os.path.isabs(record_dir):
+            record_dir = os.path.join(__location__, record_dir)
+        os.makedirs(record_dir, exist_ok=True)
+        connector = RecordingConnector(connector, record_dir)
+    return connector
+
+
+def _configure_adaptive_timeouts():
+    """Apply [BLE] adaptive_timeouts / timeouts_file to ADAPTIVE_TIMEOUTS (see AdaptiveTimeouts.py)."""
+    timeouts_file = config.get("BLE", "timeouts_file", fallback="").strip()
+    if timeouts_file and not os.path.isabs(timeouts_file):
+        timeouts_file = os.path.join(__location__, timeouts_file)
+    ADAPTIVE_TIMEOUTS.configure(
+        enabled=config.getboolean("BLE", "adaptive_timeouts", fallback=True),
+        persist_path=timeouts_file or None,
+    )
+
+
+def _configure_transport():
+    """Apply [DEVICES] max_connections to TRANSPORT (see TransportScheduler.py)."""
+    TRANSPORT.configure(int(config.get("DEVICES", "max_connections", fallback="1")))
+
+
+def _configure_alba_retransmit():
+    """Apply [BLE] alba_retransmit to AriendiSecurity (see its module docstring)."""
+    from aquaclean_console_app.bluetooth_le.LE.AriendiSecurity import AriendiSecurity
+    AriendiSecurity.RETRANSMIT = config.getboolean("BLE", "alba_retransmit", fallback=False)
+
+
+def _configure_proxies():
+    """Apply the [ESPHOME] host list to PROXIES (see ProxyPool.py)."""
+    PROXIES.configure(esphome_proxies)
+
+
+def _esphome_target() -> tuple:
+    """(host, port) of the proxy in use — the last one that worked, else the first configured."""
+    if PROXIES.current is not None:
+        return PROXIES.current.host, PROXIES.current.port
+    return esphome_host, esphome_port
+
+
+def _configure_loop_monitor():
+    """Apply [SERVICE] loop_monitor / loop_stall_threshold_ms to LOOP_MONITOR (see LoopMonitor.py)."""
+    LOOP_MONITOR.configure(
+        enabled=config.getboolean("SERVICE", "loop_monitor", fallback=True),
+        threshold_ms=float(config.get("SERVICE", "loop_stall_threshold_ms", fallback="250")),
+    )
+
+
 async def _dispatch_to_alba_if_needed(connector, old_client):
     """After connect_async(), swap to AlbaClient when the device is an Alba.
 
@@ -355,77 +229,6 @@ def _log_startup_config():
     logger.info('\n'.join(lines))
 
 
-def _check_config_errors() -> list[str]:
-    """Return a list of configuration error strings. Empty list means config is valid."""
-    import re
-    errors = []
-
-    # [BLE] device_id — required, MAC address format
-    try:
-        device_id = config.get("BLE", "device_id")
-        if not re.match(r'^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$', device_id):
-            errors.append(
-                f"[BLE] device_id={device_id!r} — expected MAC address XX:XX:XX:XX:XX:XX"
-            )
-    except Exception:
-        errors.append("[BLE] device_id is missing (required)")
-
-    # [SERVICE] ble_connection — enum
-    ble_connection = config.get("SERVICE", "ble_connection", fallback="persistent")
-    if ble_connection not in ("persistent", "on-demand"):
-        errors.append(
-            f"[SERVICE] ble_connection={ble_connection!r} — must be 'persistent' or 'on-demand'"
-        )
-
-    # [ESPHOME] esphome_api_connection — enum
-    esphome_api_conn = config.get("ESPHOME", "esphome_api_connection", fallback="on-demand")
-    if esphome_api_conn not in ("persistent", "on-demand"):
-        errors.append(
-            f"[ESPHOME] esphome_api_connection={esphome_api_conn!r} — must be 'persistent' or 'on-demand'"
-        )
-
-    # [ESPHOME] port — integer
-    try:
-        port = int(config.get("ESPHOME", "port", fallback="6053"))
-        if not (1 <= port <= 65535):
-            errors.append(f"[ESPHOME] port={port} — must be 1–65535")
-    except ValueError:
-        errors.append(f"[ESPHOME] port={config.get('ESPHOME', 'port', fallback='')!r} — must be an integer")
-
-    # [API] port — integer
-    try:
-        api_port = int(config.get("API", "port", fallback="8080"))
-        if not (1 <= api_port <= 65535):
-            errors.append(f"[API] port={api_port} — must be 1–65535")
-    except ValueError:
-        errors.append(f"[API] port={config.get('API', 'port', fallback='')!r} — must be an integer")
-
-    # [POLL] interval — non-negative float
-    try:
-        interval = float(config.get("POLL", "interval", fallback="0"))
-        if interval < 0:
-            errors.append(f"[POLL] interval={interval} — must be >= 0")
-    except ValueError:
-        errors.append(f"[POLL] interval={config.get('POLL', 'interval', fallback='')!r} — must be a number")
-
-    # [LOGGING] log_level — known level
-    valid_levels = {"SILLY", "TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
-    log_level = config.get("LOGGING", "log_level", fallback="DEBUG").upper()
-    if log_level not in valid_levels:
-        errors.append(
-            f"[LOGGING] log_level={log_level!r} — must be one of {sorted(valid_levels)}"
-        )
-
-    # [ESPHOME] log_level — known level
-    esphome_log_level = config.get("ESPHOME", "log_level", fallback="INFO").upper()
-    if esphome_log_level not in valid_levels:
-        errors.append(
-            f"[ESPHOME] log_level={esphome_log_level!r} — must be one of {sorted(valid_levels)}"
-        )
-
-    return errors
-
-
 def get_full_class_name(obj):
     module = obj.__class__.__module__
     if module is None or module == str.__class__.__module__:
@@ -492,6 +295,7 @@ class NullMqttService:
         self.ResetFilterCounter           = myEvent.EventHandler()
         self.SetProfileSetting            = myEvent.EventHandler()
         self.SetCommonSetting             = myEvent.EventHandler()
+        self.Reconnected                  = myEvent.EventHandler()
 
     async def start_async(self, loop, queue):
         queue.put("initialized")
@@ -499,6 +303,9 @@ class NullMqttService:
     async def send_data_async(self, topic, value):
         pass
 
+    async def get_discovery_hashes_async(self, settle: float = 0.5, timeout: float = 3.0) -> dict:
+        return {}
+
     def stop(self):
         pass
 
@@ -592,12 +399,51 @@ _COMMON_SETTING_RANGES = {
 }
 
 
+# device_state key → MQTT topic under peripheralDevice/monitor/
+_MONITOR_TOPICS = {
+    "is_user_sitting":        "isUserSitting",
+    "is_anal_shower_running": "isAnalShowerRunning",
+    "is_lady_shower_running": "isLadyShowerRunning",
+    "is_dryer_running":       "isDryerRunning",
+    "ble_rssi":               "bleRssi",
+}
+
+
+def _poll_plan_from_config(cfg=None) -> FieldCatalog.QueryPlan:
+    """[POLL] fields → the BLE calls a poll makes.  Empty = every field (the default)."""
+    fields = (config if cfg is None else cfg).get("POLL", "fields", fallback="")
+    try:
+        plan = FieldCatalog.plan(fields)
+    except ValueError as e:
+        logger.warning(f"[POLL] fields: {e} — polling every field")
+        plan = FieldCatalog.plan()
+    logger.debug(f"Poll plan: SPL {plan.spl_batches}, filter={plan.filter_status}, "
+                 f"profile {plan.profile_ids}, common {plan.common_ids} — {plan.calls} call(s)")
+    return plan
+
+
 class ServiceMode:
     def __init__(self, mqtt_enabled=True, shutdown_event: asyncio.Event | None = None,
-                 firmware_version_ready_event: asyncio.Event | None = None):
+                 firmware_version_ready_event: asyncio.Event | None = None, device: str = ""):
+        self.device = device                        # [DEVICES] name, "" = the single [BLE] device
+        self.config = device_config(device)         # this device's view of config.ini
         self.client = None
+        self.poll_plan = _poll_plan_from_config(self.config)   # fields consumers read → calls per poll
+        try:
+            settings_per_poll = max(0, int(self.config.get("POLL", "settings_per_poll", fallback="1")))
+        except ValueError:
+            settings_per_poll = 1
+        self.settings_refresher = SettingsRefresher(self.poll_plan.profile_ids, self.poll_plan.common_ids,
+                                                    per_poll=settings_per_poll)
+        self.airtime = AirtimeGovernor(device)      # BLE call budget per priority class, connected seconds
+        try:
+            self.airtime.configure(
+                parse_call_budget(self.config.get("SERVICE", "call_budget", fallback=DEFAULT_CALL_BUDGET)),
+                max(0.0, float(self.config.get("SERVICE", "airtime_budget_s", fallback="0"))))
+        except ValueError:
+            pass   # reported by check_config_errors; keep the defaults
         self.mqtt_initialized_wait_queue = Queue()
-        self.device_state = {
+        self.device_state = StateStore({
             "is_user_sitting": None,
             "is_anal_shower_running": None,
             "is_lady_shower_running": None,
@@ -627,7 +473,10 @@ class ServiceMode:
             "firmware_update": None,        # dict from FirmwareUpdateService.check_firmware_update()
             "ble_dis_info": None,           # BLE Device Information Service (0x180a) data; populated on every connect
             "device_type": None,            # "alba" | "mera" — set after dispatch; drives web UI capability hiding
-        }
+            "last_poll": None,              # dict per completed poll (timing, RSSI, transport) — feeds PollStats
+        })
+        # MQTT monitor topics follow device_state change sets (see StateStore.py).
+        self.device_state.Changed += self._publish_monitor_changes
         self.esphome_proxy_state = {
             "enabled": esphome_host is not None,
             "connected": False,
@@ -640,26 +489,28 @@ class ServiceMode:
             "wifi_rssi": None,               # ESP32 WiFi signal strength in dBm
             "free_heap": None,               # ESP32 free heap in bytes
             "max_free_block": None,          # ESP32 max contiguous free block in bytes
+            "proxies": [],                   # every [ESPHOME] host with its link quality (ProxyPool)
         }
         self._reconnect_requested = asyncio.Event()
+        self._reconnect_breaker = CircuitBreaker("BLE reconnect", threshold=1, base_delay=30, max_delay=600)
         self._poll_interval_event = asyncio.Event()  # set by set_poll_interval() in persistent mode
         self._connection_allowed = asyncio.Event()
         self._connection_allowed.set()  # auto-connect on startup
         self._shutdown_event = shutdown_event or asyncio.Event()
         self._firmware_version_ready_event = firmware_version_ready_event  # set when firmware_versions is first populated
-        self.on_state_updated = None    # Optional async callback(state_dict)
-        self.record_poll_stats = None  # Optional async callback(mode, esphome_api_ms, ble_ms, poll_ms)
         self._esphome_log_api = None  # Persistent API connection for log streaming
         self._esphome_log_unsub = None  # Log unsubscribe function
+        self._transport_slot = None     # TRANSPORT slot held by the persistent connection
 
         # MQTT is active only when explicitly enabled AND a server address is configured.
         # Gracefully handles: no [MQTT] section, missing server key, empty server value.
-        mqtt_server = config.get("MQTT", "server", fallback="").strip() if mqtt_enabled else ""
+        mqtt_server = self.config.get("MQTT", "server", fallback="").strip() if mqtt_enabled else ""
         if mqtt_server:
-            self.mqttConfig = dict(config.items('MQTT'))
-            self.mqtt_service = Mqtt(self.mqttConfig)
+            self.mqttConfig = dict(self.config.items('MQTT'))
+            device_id = self.config.get("BLE", "device_id", fallback="").replace(":", "").lower()
+            self.mqtt_service = Mqtt(self.mqttConfig, ha_discovery_topic_filters(self.device, device_id))
         else:
-            self.mqttConfig = {"topic": config.get("MQTT", "topic", fallback="Geberit/AquaClean")}
+            self.mqttConfig = {"topic": self.config.get("MQTT", "topic", fallback="Geberit/AquaClean")}
             self.mqtt_service = NullMqttService()
             if not mqtt_enabled:
                 logger.info("MQTT disabled (mqtt_enabled=false)")
@@ -667,6 +518,9 @@ class ServiceMode:
                 logger.info("MQTT disabled (no server configured in [MQTT] section)")
 
     async def run(self):
+        # Calls of the persistent connection itself (connect-time reads, polling loop,
+        # settings refresh) are background work for the call budget (AirtimeGovernor).
+        CURRENT_PRIORITY.set(Priority.POLL)
         # 1. Initialize MQTT with wait queue (once)
         await self.mqtt_service.start_async(asyncio.get_running_loop(), self.mqtt_initialized_wait_queue)
         count = 50
@@ -679,18 +533,21 @@ class ServiceMode:
             count -= 1
             await asyncio.sleep(0.1)
 
-        device_id = config.get("BLE", "device_id")
+        device_id = self.config.get("BLE", "device_id")
         try:
-            interval = float(config.get("POLL", "interval"))
+            interval = float(self.config.get("POLL", "interval"))
         except Exception:
             interval = 2.5
         self.device_state["poll_interval"] = interval
+        TRANSPORT.register(self.device, interval)
 
         # Subscribe MQTT handlers once — handlers reference self.client
         # which is updated each iteration of the recovery loop below
         self.mqtt_service.ToggleLidPosition += self.on_toggle_lid_message
         self.mqtt_service.ResetFilterCounter += self.on_reset_filter_counter_message
         self.mqtt_service.Connect += self.request_reconnect
+        self.mqtt_service.Reconnected += self._publish_ha_discovery
+        self.mqtt_service.Reconnected += self._publish_monitor_state
 
         # Clear stale retained messages and publish initial status
         await self._clear_stale_retained_topics()
@@ -731,9 +588,11 @@ class ServiceMode:
                 if self._shutdown_event.is_set():
                     break
 
-            bluetooth_connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk)
+            bluetooth_connector = _new_bluetooth_connector()
             factory = AquaCleanClientFactory(bluetooth_connector)
             self.client = factory.create_client()
+            self.client.poll_plan = self.poll_plan
+            self.client.base_client.call_budget_hook = self.airtime.spend   # charge every call to the budget
 
             self.client.DeviceStateChanged += self.on_device_state_changed
             self.client.SOCApplicationVersions += self.soc_application_versions
@@ -745,9 +604,14 @@ class ServiceMode:
             await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/connected", f"Connecting to {device_id} ...")
             await self._set_ble_status("connecting", device_address=device_id)
 
+            # The connection holds one of the shared transport's slots until it is closed
+            # (or until it fails — backing off before a reconnect frees the slot).
+            self._transport_slot = await TRANSPORT.acquire(self.device, Priority.POLL)
             try:
                 t0 = time.perf_counter()
-                await self.client.connect(device_id)
+                async with TRANSPORT.connecting:
+                    await self.client.connect(device_id)
+                self.airtime.link_opened()
                 self.device_state["last_connect_ms"] = int((time.perf_counter() - t0) * 1000)
                 self.device_state["last_esphome_api_ms"] = bluetooth_connector.last_esphome_api_ms
                 self.device_state["last_ble_ms"] = bluetooth_connector.last_ble_ms
@@ -774,6 +638,7 @@ class ServiceMode:
                 self.client, _swapped = await _dispatch_to_alba_if_needed(bluetooth_connector, self.client)
                 self.device_state["device_type"] = "alba" if _swapped else "mera"
                 if _swapped:
+                    self.client.base_client.call_budget_hook = self.airtime.spend
                     self.client.DeviceStateChanged += self.on_device_state_changed
                     self.client.SOCApplicationVersions += self.soc_application_versions
                     self.client.DeviceInitialOperationDate += self.device_initial_operation_date
@@ -783,6 +648,9 @@ class ServiceMode:
                     device_name=self.client.Description,
                     device_address=device_id,
                 )
+                self._reconnect_breaker.record_success(connect_ms=self.device_state["last_connect_ms"],
+                                                       rssi=bluetooth_connector.rssi,
+                                                       transport=self._transport_name())
                 await self.mqtt_service.send_data_async(
                     f"{self.mqttConfig['topic']}/centralDevice/timings",
                     json.dumps({
@@ -794,7 +662,10 @@ class ServiceMode:
 
                 # Fetch profile settings via proc 0x53 (actual user preferences).
                 try:
-                    self.device_state["profile_settings"] = await self.client.base_client.get_stored_profile_settings_async()
+                    if self.poll_plan.profile_ids:
+                        self.device_state["profile_settings"] = await self.client.base_client.get_stored_profile_settings_async(
+                            ids=self.poll_plan.profile_ids)
+                        self.settings_refresher.record("profile", self.device_state["profile_settings"])
                 except BLEPeripheralTimeoutError:
                     logger.warning("GetStoredProfileSettings timed out at connect — profile data will be unavailable")
                     self.device_state["profile_settings"] = {}
@@ -809,7 +680,10 @@ class ServiceMode:
 
                 # Common settings (orientation light, odour run-on) — fetch once at connect.
                 try:
-                    self.device_state["common_settings"] = await self.client.base_client.get_stored_common_settings_async()
+                    if self.poll_plan.common_ids:
+                        self.device_state["common_settings"] = await self.client.base_client.get_stored_common_settings_async(
+                            ids=self.poll_plan.common_ids)
+                        self.settings_refresher.record("common", self.device_state["common_settings"])
                 except BLEPeripheralTimeoutError:
                     logger.warning("GetStoredCommonSettings timed out at connect — common settings will be unavailable")
                     self.device_state["common_settings"] = {}
@@ -848,6 +722,8 @@ class ServiceMode:
                     await self._update_esphome_proxy_state(
                         connected=True,
                         name=bluetooth_connector.esphome_proxy_name,
+                        host=bluetooth_connector.esphome_host,
+                        port=bluetooth_connector.esphome_port,
                         error="No error",
                         wifi_rssi=bluetooth_connector.esphome_wifi_rssi,
                         free_heap=bluetooth_connector.esphome_free_heap,
@@ -927,6 +803,7 @@ class ServiceMode:
                 )
             except BLEPeripheralTimeoutError as e:
                 logger.warning("BLE Timeout — initiating recovery protocol.")
+                transport_health(self._transport_name()).record(False, timeout=True)
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/error", ErrorManager.to_json(E0003, str(e)))
                 try:
                     await self.client.disconnect()
@@ -936,15 +813,12 @@ class ServiceMode:
             except ESPHomeConnectionError as e:
                 # ESP32 TCP connection failed — Geberit was never reached.
                 error_code_obj = E1001 if e.timeout else E1002
-                msg = f"{e} — Check that the ESP32 is reachable at {esphome_host}:{esphome_port}"
+                msg = f"{e} — Check that the ESP32 is reachable at {bluetooth_connector.esphome_host}:{bluetooth_connector.esphome_port}"
                 logger.warning(msg)
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/connected", str(False))
                 await self._set_ble_status("error", error_msg=msg, error_code=error_code_obj.code, error_hint=error_code_obj.hint)
                 await self._update_esphome_proxy_state(connected=False, error=str(e), error_code=error_code_obj.code, error_hint=error_code_obj.hint)
-                try:
-                    await asyncio.wait_for(self._shutdown_event.wait(), timeout=30)
-                except asyncio.TimeoutError:
-                    pass
+                await self._wait_before_reconnect(device_id)
             except ESPHomeDeviceNotFoundError as e:
                 # ESP32 TCP connected fine, but Geberit not visible via BLE proxy.
                 msg = (
@@ -959,10 +833,7 @@ class ServiceMode:
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/connected", str(False))
                 await self._set_ble_status("error", error_msg=msg, error_code=E0002.code, error_hint=E0002.hint)
                 await self._update_esphome_proxy_state(connected=False, error=str(e), error_code=E0002.code, error_hint=E0002.hint)
-                try:
-                    await asyncio.wait_for(self._shutdown_event.wait(), timeout=30)
-                except asyncio.TimeoutError:
-                    pass
+                await self._wait_before_reconnect(device_id)
             except BleakError as e:
                 # Generic local BLE error (no ESPHome involved).
                 msg = (
@@ -976,10 +847,7 @@ class ServiceMode:
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/error", ErrorManager.to_json(E0003, msg))
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/connected", str(False))
                 await self._set_ble_status("error", error_msg=msg, error_code=E0003.code, error_hint=E0003.hint.replace("<BT-ADDRESS>", device_id))
-                try:
-                    await asyncio.wait_for(self._shutdown_event.wait(), timeout=30)
-                except asyncio.TimeoutError:
-                    pass
+                await self._wait_before_reconnect(device_id)
             except asyncio.TimeoutError as e:
                 # BleakClient.connect() timed out (e.g. after le-connection-abort-by-local
                 # retries exhausted). Not a BleakError subclass — must be caught explicitly
@@ -995,10 +863,7 @@ class ServiceMode:
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/error", ErrorManager.to_json(E0003, msg))
                 await self.mqtt_service.send_data_async(f"{self.mqttConfig['topic']}/centralDevice/connected", str(False))
                 await self._set_ble_status("error", error_msg=msg, error_code=E0003.code, error_hint=E0003.hint.replace("<BT-ADDRESS>", device_id))
-                try:
-                    await asyncio.wait_for(self._shutdown_event.wait(), timeout=30)
-                except asyncio.TimeoutError:
-                    pass
+                await self._wait_before_reconnect(device_id, timeout=True)
             except Exception as e:
                 await self.handle_exception(e)
             finally:
@@ -1011,6 +876,7 @@ class ServiceMode:
                     await self.client.disconnect()
                 except Exception:
                     pass
+                self._release_transport_slot()
                 await self._set_ble_status("disconnected")
                 # Update ESP32 proxy disconnected state
                 if esphome_host:
@@ -1020,6 +886,42 @@ class ServiceMode:
         await self._stop_esphome_log_streaming()
         self.mqtt_service.stop()
 
+    def _release_transport_slot(self) -> None:
+        """Give the persistent connection's TRANSPORT slot back (no-op if not holding one)."""
+        self.airtime.link_closed()
+        if self._transport_slot is not None:
+            TRANSPORT.release(self._transport_slot)
+            self._transport_slot = None
+
+    def _transport_name(self) -> str:
+        """"bleak" | "esp32-wifi" | "esp32-eth" — same labels as PollStats."""
+        if not esphome_host:
+            return "bleak"
+        return "esp32-wifi" if self.esphome_proxy_state.get("wifi_rssi") is not None else "esp32-eth"
+
+    async def _wait_before_reconnect(self, device_id, timeout: bool = False):
+        """Back off before the next connect attempt (exponential, see CircuitBreaker.py).
+        Meanwhile a cheap advertisement probe runs every 15 s; when the device
+        reappears after a probe that did not see it, the reconnect starts right
+        away (once per open period, see CircuitBreaker.record_probe)."""
+        self._release_transport_slot()
+        self._reconnect_breaker.record_failure(timeout=timeout, transport=self._transport_name())
+
+        async def _probe():
+            connector = _new_bluetooth_connector()
+            probe = getattr(connector, "advertisement_seen", None)
+            if probe is None:
+                return False
+            try:
+                return await probe(device_id, timeout=5.0)
+            finally:
+                try:
+                    await connector.disconnect()
+                except Exception:
+                    pass
+
+        await self._reconnect_breaker.wait(probe=_probe, probe_interval=15, stop_event=self._shutdown_event)
+
     async def _set_ble_status(self, status: str, device_name=None, device_address=None, error_msg=None, error_code=None, error_hint=None):
         self.device_state["ble_status"] = status
         if status == "connected":
@@ -1065,10 +967,10 @@ class ServiceMode:
             # Do NOT clear timing or poll_epoch here — the last completed
             # operation's values should remain visible in the webapp until
             # the next operation starts (clearing on "connecting" handles that).
-        if self.on_state_updated:
-            await self.on_state_updated(self.device_state.copy())
+        await self.device_state.publish()
 
     async def _on_poll_done(self, millis: int):
+        await self._refresh_settings(self.client.base_client)
         self.device_state["last_poll_ms"] = millis
         # Capture connect times before resetting (non-zero only on first poll after reconnect)
         _ble_ms         = self.device_state.get("last_ble_ms")
@@ -1077,20 +979,61 @@ class ServiceMode:
         self.device_state["last_connect_ms"] = 0
         self.device_state["last_esphome_api_ms"] = 0 if esphome_host else None
         self.device_state["last_ble_ms"] = 0 if esphome_host else None
-        if self.record_poll_stats:
-            _ble_rssi  = self.device_state.get("ble_rssi")
-            _wifi_rssi = self.esphome_proxy_state.get("wifi_rssi") if esphome_host else None
-            if esphome_host:
-                _transport = "esp32-wifi" if _wifi_rssi is not None else "esp32-eth"
-            else:
-                _transport = "bleak"
-            await self.record_poll_stats("persistent", _esphome_api_ms, _ble_ms, millis,
-                                         ble_rssi=_ble_rssi, wifi_rssi=_wifi_rssi, transport=_transport)
-        if self.on_state_updated:
-            await self.on_state_updated(self.device_state.copy())
-
-    async def _update_esphome_proxy_state(self, connected=None, name=None, error=None, error_code=None, error_hint=None, wifi_rssi=None, free_heap=None, max_free_block=None):
-        """Update ESPHome proxy state and publish to MQTT."""
+        self._record_last_poll("persistent", _esphome_api_ms, _ble_ms, millis)
+        await self.device_state.publish()
+
+    async def _refresh_settings(self, base_client) -> None:
+        """Re-read the few stored settings due on this poll (SettingsRefresher); publish the changed ones."""
+        topic = self.mqttConfig['topic']
+        for kind, sid, value in await self.settings_refresher.refresh(base_client, self.device_state):
+            keys, path = ((_PROFILE_SETTING_MQTT_KEYS, "profileSettings") if kind == "profile"
+                          else (_COMMON_SETTING_MQTT_KEYS, "commonSettings"))
+            if sid in keys:
+                await self.mqtt_service.send_data_async(
+                    f"{topic}/peripheralDevice/information/{path}/{keys[sid]}", str(value))
+
+    def _record_last_poll(self, mode: str, esphome_api_ms, ble_ms, poll_ms) -> None:
+        """Store one completed poll cycle as device_state["last_poll"] (a new dict every
+        time, so every poll is a change even when the timings repeat)."""
+        self.device_state["last_poll"] = {
+            "mode":           mode,
+            "esphome_api_ms": esphome_api_ms,
+            "ble_ms":         ble_ms,
+            "poll_ms":        poll_ms,
+            "ble_rssi":       self.device_state.get("ble_rssi"),
+            "wifi_rssi":      self.esphome_proxy_state.get("wifi_rssi") if esphome_host else None,
+            "transport":      self._transport_name(),
+            "proxy":          self.esphome_proxy_state["host"] if esphome_host else None,
+            "at":             time.time(),
+        }
+        TRANSPORT.record_poll(self.device)
+
+    async def _publish_monitor_changes(self, change) -> None:
+        """device_state subscriber: publish the MQTT monitor topics whose value changed.
+
+        The topics are retained, so unchanged values need no republish; after an
+        MQTT reconnect _publish_monitor_state() sends all of them once."""
+        for key in _MONITOR_TOPICS.keys() & change.changes:
+            await self._publish_monitor_topic(key, change.snapshot[key])
+
+    async def _publish_monitor_state(self) -> None:
+        """Publish every MQTT monitor topic from the current device_state."""
+        state = self.device_state.snapshot()
+        for key in _MONITOR_TOPICS:
+            await self._publish_monitor_topic(key, state.get(key))
+
+    async def _publish_monitor_topic(self, key: str, value) -> None:
+        if value is None and key == "ble_rssi":
+            return
+        await self.mqtt_service.send_data_async(
+            f"{self.mqttConfig['topic']}/peripheralDevice/monitor/{_MONITOR_TOPICS[key]}", str(value))
+
+    async def _update_esphome_proxy_state(self, connected=None, name=None, error=None, error_code=None, error_hint=None, wifi_rssi=None, free_heap=None, max_free_block=None, host=None, port=None):
+        """Update ESPHome proxy state and publish to MQTT.  host / port: the proxy the connection went through."""
+        if host is not None:
+            self.esphome_proxy_state["host"] = host
+            self.esphome_proxy_state["port"] = port if port is not None else esphome_port
+        self.esphome_proxy_state["proxies"] = PROXIES.to_dict()
         if connected is not None:
             self.esphome_proxy_state["connected"] = connected
         if name is not None:
@@ -1105,28 +1048,34 @@ class ServiceMode:
             self.esphome_proxy_state["error_hint"] = error_hint
         if wifi_rssi is not None:
             self.esphome_proxy_state["wifi_rssi"] = wifi_rssi
+            BridgeMetrics.ESP32_WIFI_RSSI.set(wifi_rssi)
         if free_heap is not None:
             self.esphome_proxy_state["free_heap"] = free_heap
+            BridgeMetrics.ESP32_FREE_HEAP.set(free_heap)
         if max_free_block is not None:
             self.esphome_proxy_state["max_free_block"] = max_free_block
+            BridgeMetrics.ESP32_MAX_FREE_BLOCK.set(max_free_block)
         await self._publish_esphome_proxy_status()
-        # Broadcast state change to SSE clients (webapp)
-        if self.on_state_updated:
-            state = dict(self.device_state)
-            state.update({
-                "esphome_proxy_enabled": self.esphome_proxy_state["enabled"],
-                "esphome_proxy_connected": self.esphome_proxy_state["connected"],
-                "esphome_proxy_name": self.esphome_proxy_state["name"],
-                "esphome_proxy_host": self.esphome_proxy_state["host"],
-                "esphome_proxy_port": self.esphome_proxy_state["port"],
-                "esphome_proxy_error": self.esphome_proxy_state["error"],
-                "esphome_proxy_error_code": self.esphome_proxy_state["error_code"],
-                "esphome_proxy_error_hint": self.esphome_proxy_state.get("error_hint", ""),
-                "esphome_proxy_wifi_rssi": self.esphome_proxy_state.get("wifi_rssi"),
-                "esphome_proxy_free_heap": self.esphome_proxy_state.get("free_heap"),
-                "esphome_proxy_max_free_block": self.esphome_proxy_state.get("max_free_block"),
-            })
-            await self.on_state_updated(state)
+        # Mirror into device_state so SSE clients (webapp) get the change
+        self.device_state.update(self.esphome_proxy_fields())
+        await self.device_state.publish()
+
+    def esphome_proxy_fields(self) -> dict:
+        """esphome_proxy_state as the flat esphome_proxy_* keys used by device_state and SSE."""
+        return {
+            "esphome_proxy_enabled": self.esphome_proxy_state["enabled"],
+            "esphome_proxy_connected": self.esphome_proxy_state["connected"],
+            "esphome_proxy_name": self.esphome_proxy_state["name"],
+            "esphome_proxy_host": self.esphome_proxy_state["host"],
+            "esphome_proxy_port": self.esphome_proxy_state["port"],
+            "esphome_proxy_error": self.esphome_proxy_state["error"],
+            "esphome_proxy_error_code": self.esphome_proxy_state["error_code"],
+            "esphome_proxy_error_hint": self.esphome_proxy_state.get("error_hint", ""),
+            "esphome_proxy_wifi_rssi": self.esphome_proxy_state.get("wifi_rssi"),
+            "esphome_proxy_free_heap": self.esphome_proxy_state.get("free_heap"),
+            "esphome_proxy_max_free_block": self.esphome_proxy_state.get("max_free_block"),
+            "esphome_proxy_proxies": self.esphome_proxy_state.get("proxies", []),
+        }
 
     async def _publish_esphome_proxy_status(self):
         """Publish ESPHome proxy status to MQTT."""
@@ -1193,10 +1142,16 @@ class ServiceMode:
             )
 
     async def _publish_esphome_proxy_discovery(self):
-        """Publish Home Assistant MQTT discovery for ESPHome proxy entities."""
+        """Publish Home Assistant MQTT discovery for ESPHome proxy entities (changed ones only)."""
         import json
         topic = self.mqttConfig['topic']
-        device_id = config.get("BLE", "device_id").replace(":", "").lower()
+        device_id = self.config.get("BLE", "device_id").replace(":", "").lower()
+        retained = await self.mqtt_service.get_discovery_hashes_async()
+
+        async def _publish(config_topic: str, config: dict):
+            payload = json.dumps(config)
+            if retained.get(config_topic) != discovery_payload_hash(payload):
+                await self.mqtt_service.send_data_async(config_topic, payload)
 
         # Device information shared across all entities
         device_config = {
@@ -1217,9 +1172,9 @@ class ServiceMode:
             "entity_category": "diagnostic",
             "device": device_config
         }
-        await self.mqtt_service.send_data_async(
+        await _publish(
             f"homeassistant/binary_sensor/aquaclean_{device_id}/esphome_proxy_enabled/config",
-            json.dumps(enabled_config)
+            enabled_config
         )
 
         # Binary sensor: ESPHome proxy connected
@@ -1232,9 +1187,9 @@ class ServiceMode:
             "entity_category": "diagnostic",
             "device": device_config
         }
-        await self.mqtt_service.send_data_async(
+        await _publish(
             f"homeassistant/binary_sensor/aquaclean_{device_id}/esphome_proxy_connected/config",
-            json.dumps(connected_config)
+            connected_config
         )
 
         # Sensor: ESPHome proxy connection string
@@ -1246,9 +1201,9 @@ class ServiceMode:
             "icon": "mdi:bluetooth-connect",
             "device": device_config
         }
-        await self.mqtt_service.send_data_async(
+        await _publish(
             f"homeassistant/sensor/aquaclean_{device_id}/esphome_proxy_connection/config",
-            json.dumps(connection_config)
+            connection_config
         )
 
         # Sensor: ESPHome proxy error
@@ -1260,9 +1215,9 @@ class ServiceMode:
             "icon": "mdi:alert-circle",
             "device": device_config
         }
-        await self.mqtt_service.send_data_async(
+        await _publish(
             f"homeassistant/sensor/aquaclean_{device_id}/esphome_proxy_error/config",
-            json.dumps(error_config)
+            error_config
         )
 
     async def _clear_stale_retained_topics(self):
@@ -1314,17 +1269,22 @@ class ServiceMode:
 
     async def _publish_ha_discovery(self):
         """Publish Home Assistant MQTT discovery messages for all AquaClean entities on startup."""
-        if not config.getboolean("SERVICE", "ha_discovery_on_startup", fallback=False):
+        if not self.config.getboolean("SERVICE", "ha_discovery_on_startup", fallback=False):
             logger.debug("HA discovery on startup disabled (ha_discovery_on_startup = false)")
             return
-        import json
         topic = self.mqttConfig['topic']
-        configs = get_ha_discovery_configs(topic)
+        messages = get_ha_discovery_messages(topic, self.device)
+        retained = await self.mqtt_service.get_discovery_hashes_async()
         published = 0
-        for cfg in configs:
-            await self.mqtt_service.send_data_async(cfg["topic"], json.dumps(cfg["payload"]))
+        for msg_topic, payload, payload_hash in messages:
+            if retained.get(msg_topic) == payload_hash:
+                continue
+            await self.mqtt_service.send_data_async(msg_topic, payload)
             published += 1
-        logger.info(f"Published {published} HA discovery entities on startup")
+        logger.info(
+            f"Published {published} HA discovery entities "
+            f"({len(messages) - published} unchanged on broker)"
+        )
 
     async def _start_esphome_log_streaming(self):
         """Subscribe to ESPHome device logs if log streaming is enabled."""
@@ -1435,6 +1395,7 @@ class ServiceMode:
 
     async def wait_for_device_restart(self, device_id, bluetooth_connector=None):
         """Passively scans until the device drops off BLE, then waits for it to reappear."""
+        self._release_transport_slot()
         topic = self.mqttConfig['topic']
 
         if esphome_host:
@@ -1450,7 +1411,8 @@ class ServiceMode:
         APIClient is only created when no live connection is available.  If even that
         fails, falls back to local BLE scanning and reports E2005 to MQTT and webapp.
         """
-        logger.info(f"Using ESP32 proxy at {esphome_host}:{esphome_port} for recovery protocol")
+        proxy_host, proxy_port = _esphome_target()
+        logger.info(f"Using ESP32 proxy at {proxy_host}:{proxy_port} for recovery protocol")
 
         # Try to reuse the existing persistent ESP32 API connection.
         api = None
@@ -1469,7 +1431,7 @@ class ServiceMode:
         if api is None:
             from aioesphomeapi import APIClient
             own_api = True
-            api = APIClient(address=esphome_host, port=esphome_port, password="", noise_psk=esphome_noise_psk)
+            api = APIClient(address=proxy_host, port=proxy_port, password="", noise_psk=esphome_noise_psk)
             try:
                 await asyncio.wait_for(api.connect(login=True), timeout=10.0)
                 device_info = await asyncio.wait_for(api.device_info(), timeout=10.0)
@@ -1589,21 +1551,16 @@ class ServiceMode:
 
     # --- Event Handlers ---
     async def on_device_state_changed(self, sender, args):
-        topic = self.mqttConfig['topic']
+        # MQTT monitor topics are published by _publish_monitor_changes.
         if "IsUserSitting" in args.__dict__ and args.IsUserSitting is not None:
             self.device_state["is_user_sitting"] = args.IsUserSitting
-            await self.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isUserSitting", str(args.IsUserSitting))
         if "IsAnalShowerRunning" in args.__dict__ and args.IsAnalShowerRunning is not None:
             self.device_state["is_anal_shower_running"] = args.IsAnalShowerRunning
-            await self.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isAnalShowerRunning", str(args.IsAnalShowerRunning))
         if "IsLadyShowerRunning" in args.__dict__ and args.IsLadyShowerRunning is not None:
             self.device_state["is_lady_shower_running"] = args.IsLadyShowerRunning
-            await self.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isLadyShowerRunning", str(args.IsLadyShowerRunning))
         if "IsDryerRunning" in args.__dict__ and args.IsDryerRunning is not None:
             self.device_state["is_dryer_running"] = args.IsDryerRunning
-            await self.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isDryerRunning", str(args.IsDryerRunning))
-        if self.on_state_updated:
-            await self.on_state_updated(self.device_state.copy())
+        await self.device_state.publish()
 
     async def on_device_identification(self, sender, args):
         topic = self.mqttConfig['topic']
@@ -1639,8 +1596,7 @@ class ServiceMode:
         await self.mqtt_service.send_data_async(
             f"{topic}/peripheralDevice/information/filterStatus/nextFilterChange",
             str(new_fs.get("next_filter_change") or 0))
-        if self.on_state_updated:
-            await self.on_state_updated(self.device_state.copy())
+        await self.device_state.publish()
 
     def on_connection_status_changed(self, sender, *args):
         values = ", ".join(str(arg) for arg in args)
@@ -1661,19 +1617,32 @@ class ServiceMode:
 class ApiMode:
     """REST API mode: persistent BLE + polling loop, or on-demand per-request connections."""
 
-    def __init__(self):
-        mqtt_enabled = config.getboolean("SERVICE", "mqtt_enabled", fallback=True)
-        self.ble_connection = config.get("SERVICE", "ble_connection", fallback="persistent")
-        api_host = config.get("API", "host", fallback="0.0.0.0")
-        api_port = int(config.get("API", "port", fallback="8080"))
+    def __init__(self, device: str = "", shutdown_event: asyncio.Event | None = None):
+        # fastapi/uvicorn are imported by api mode only — service mode and the CLI never load them.
+        from fastapi import HTTPException
+        from aquaclean_console_app.RestApiService import RestApiService
+        self.device = device                        # [DEVICES] name, "" = the single [BLE] device
+        self.config = device_config(device)
+        self.devices: list["ApiMode"] = [self]      # every device of this process (set by main())
+        mqtt_enabled = self.config.getboolean("SERVICE", "mqtt_enabled", fallback=True)
+        self.ble_connection = self.config.get("SERVICE", "ble_connection", fallback="persistent")
+        api_host = self.config.get("API", "host", fallback="0.0.0.0")
+        api_port = int(self.config.get("API", "port", fallback="8080"))
         try:
-            self._poll_interval = float(config.get("POLL", "interval"))
+            self._poll_interval = float(self.config.get("POLL", "interval"))
         except Exception:
             self._poll_interval = 0.0
 
-        self._shutdown_event        = asyncio.Event()
-        self._on_demand_lock        = asyncio.Lock()
+        self._shutdown_event        = shutdown_event or asyncio.Event()
+        self._ble_scheduler         = BleScheduler()   # on-demand sessions by priority (commands first)
+        self._open_link_runner      = None             # runs a served request on the open session's link
+        self._command_batcher       = CommandBatcher(  # on-demand commands arriving together share a session
+            int(self.config.get("SERVICE", "command_batch_window_ms", fallback="150")) / 1000,
+            lambda body: self._on_demand(body, Priority.COMMAND),
+            is_fatal=lambda exc: not isinstance(exc, HTTPException),
+        )
         self._poll_wakeup           = asyncio.Event()
+        self._poll_breaker          = CircuitBreaker("On-demand poll", threshold=3, base_delay=30, max_delay=600)
         self._firmware_version_ready = asyncio.Event()  # set once firmware_versions is populated
         self._esphome_connector: "BluetoothLeConnector | None" = None  # Persistent connector (esphome_api_connection=persistent)
         self._esphome_client = None  # Paired client — created once so data_received_handlers don't accumulate
@@ -1681,11 +1650,28 @@ class ApiMode:
         self.rest_api = RestApiService(api_host, api_port)
         self.rest_api.set_api_mode(self)
 
-        self._poll_stats = _PollStats()
+        _stats_file = self.config.get("POLL", "stats_file", fallback="").strip()
+        if _stats_file and not os.path.isabs(_stats_file):
+            _stats_file = os.path.join(__location__, _stats_file)
+        self._poll_stats = _PollStats(_stats_file or None)
+
+        # [POLL] history_dir: on-disk history of SPL flags, RSSI, poll timings and descale counters
+        _history_dir = self.config.get("POLL", "history_dir", fallback="").strip()
+        if _history_dir and not os.path.isabs(_history_dir):
+            _history_dir = os.path.join(__location__, _history_dir)
+        self._history = HistoryStore(_history_dir, raw_days=float(self.config.get(
+            "POLL", "history_raw_days", fallback="7"))) if _history_dir else None
+
+        # Usage sessions (sitting → shower → dryer → leave) and their day counters
+        _usage_file = self.config.get("POLL", "usage_file", fallback="").strip()
+        if _usage_file and not os.path.isabs(_usage_file):
+            _usage_file = os.path.join(__location__, _usage_file)
+        self._usage = UsageSessions(_usage_file or None)
+        self._usage_day = None                      # date of the last published usage/today
 
         # Always create ServiceMode so ble_connection can be toggled at runtime.
         self.service = ServiceMode(mqtt_enabled=mqtt_enabled, shutdown_event=self._shutdown_event,
-                                   firmware_version_ready_event=self._firmware_version_ready)
+                                   firmware_version_ready_event=self._firmware_version_ready, device=device)
         self.service.device_state["ble_connection"] = self.ble_connection
         self.service.device_state["esphome_api_connection"] = self.esphome_api_connection
         self.service.device_state["poll_interval"]  = self._poll_interval
@@ -1693,8 +1679,8 @@ class ApiMode:
             # Start in standby — loop waits on _connection_allowed until switched
             self.service._connection_allowed.clear()
 
-        mqtt_active = mqtt_enabled and bool(config.get("MQTT", "server", fallback="").strip())
-        logger.info(f"API mode: ble_connection={self.ble_connection}, esphome_api_connection={self.esphome_api_connection if esphome_host else 'N/A'}, mqtt={'enabled' if mqtt_active else 'disabled'}, {api_host}:{api_port}")
+        mqtt_active = mqtt_enabled and bool(self.config.get("MQTT", "server", fallback="").strip())
+        logger.info(f"API mode{f' [{device}]' if device else ''}: ble_connection={self.ble_connection}, esphome_api_connection={self.esphome_api_connection if esphome_host else 'N/A'}, mqtt={'enabled' if mqtt_active else 'disabled'}, {api_host}:{api_port}")
 
     @staticmethod
     def _http_error(status_code: int, error_code, details: str = None):
@@ -1716,6 +1702,7 @@ class ApiMode:
                 }
             }
         """
+        from fastapi import HTTPException
         error_dict = ErrorManager.to_dict(error_code, details)
         raise HTTPException(
             status_code=status_code,
@@ -1725,9 +1712,13 @@ class ApiMode:
             }
         )
 
-    async def run(self):
-        self.service.on_state_updated  = self.rest_api.broadcast_state
-        self.service.record_poll_stats = self._on_persistent_poll_complete
+    async def run(self, serve: bool = True):
+        """Run BLE, polling and MQTT for this device; serve=True also runs the REST API
+        (False for the further devices of a multi-device process, whose routes
+        the first device's server mounts under /devices/<name>)."""
+        TRANSPORT.register(self.device, self._poll_interval)
+        self.service.device_state.Changed += self.rest_api.on_state_changed
+        self.service.device_state.Changed += self._on_state_changed
         # Wire MQTT inbound control topics → ApiMode handlers
         self.service.mqtt_service.SetProfileSetting      += self._on_mqtt_set_profile_setting
         self.service.mqtt_service.SetCommonSetting       += self._on_mqtt_set_common_setting
@@ -1759,11 +1750,15 @@ class ApiMode:
         self.service.mqtt_service.ConnectESP32          += self._on_mqtt_esp32_connect
         self.service.mqtt_service.DisconnectESP32        += self._on_mqtt_esp32_disconnect
         self.service.mqtt_service.RestartESP32           += self._on_mqtt_esp32_restart
+        self.service.mqtt_service.DataBatch              += self._on_mqtt_data_batch
         service_task = asyncio.create_task(self.service.run())
         poll_task = asyncio.create_task(self._polling_loop())
         fw_check_task = asyncio.create_task(self._firmware_check_loop())
         try:
-            await self.rest_api.start(self._shutdown_event)
+            if serve:
+                await self.rest_api.start(self._shutdown_event)
+            else:
+                await self._shutdown_event.wait()
         finally:
             # Ensure the BLE loop also sees the shutdown event
             self._shutdown_event.set()
@@ -1778,6 +1773,8 @@ class ApiMode:
                     await t
                 except asyncio.CancelledError:
                     pass
+            self._poll_stats.save()
+            self._usage.save()
             # Explicitly close the persistent ESP32 API connection so the
             # UnsubscribeBluetoothLEAdvertisementsRequest is sent before the
             # process exits.  Without this the TCP socket is closed by the OS
@@ -1795,17 +1792,7 @@ class ApiMode:
 
     def get_current_state(self) -> dict:
         """In-memory state snapshot — sync, no BLE connection (safe for SSE initial push)."""
-        state = dict(self.service.device_state)
-        # Include ESPHome proxy state
-        state.update({
-            "esphome_proxy_enabled": self.service.esphome_proxy_state["enabled"],
-            "esphome_proxy_connected": self.service.esphome_proxy_state["connected"],
-            "esphome_proxy_name": self.service.esphome_proxy_state["name"],
-            "esphome_proxy_host": self.service.esphome_proxy_state["host"],
-            "esphome_proxy_port": self.service.esphome_proxy_state["port"],
-            "esphome_proxy_error": self.service.esphome_proxy_state["error"],
-        })
-        return state
+        return {**self.service.device_state.snapshot(), **self.service.esphome_proxy_fields()}
 
     def get_config(self) -> dict:
         return {
@@ -1818,11 +1805,47 @@ class ApiMode:
         """Return static system info dict. Thin wrapper for REST/CLI wiring consistency."""
         return get_system_info()
 
-    async def _on_persistent_poll_complete(self, mode: str, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None) -> None:
-        """Record a completed persistent-mode poll cycle and publish updated stats to MQTT."""
-        self._poll_stats.record(mode, esphome_api_ms, ble_ms, poll_ms, ble_rssi=ble_rssi, wifi_rssi=wifi_rssi, transport=transport)
+    async def _on_state_changed(self, change) -> None:
+        """device_state subscriber: record each completed poll (persistent or on-demand)
+        and publish updated stats to MQTT; changed SPL flags and poll timings go to the history
+        and drive the usage sessions."""
+        if self._history is not None:
+            self._history.record({key: change.snapshot[key] for key in change.changes})
+        await self._observe_usage(change)
+        if "last_poll" not in change or change.snapshot["last_poll"] is None:
+            return
+        p = change.snapshot["last_poll"]
+        self._record_poll(p["mode"], p["esphome_api_ms"], p["ble_ms"], p["poll_ms"],
+                          ble_rssi=p["ble_rssi"], wifi_rssi=p["wifi_rssi"], transport=p["transport"],
+                          proxy=p.get("proxy"))
         await self._publish_performance_stats_mqtt()
 
+    async def _observe_usage(self, change) -> None:
+        """Feed SPL flag transitions to UsageSessions; publish each completed session (MQTT, SSE)
+        and today's counters after a session or when the day changes."""
+        sessions = self._usage.observe({key: change.snapshot[key] for key in _USAGE_FLAGS & change.changes})
+        topic = self.service.mqttConfig.get("topic", "Geberit/AquaClean")
+        for session in sessions:
+            await self.service.mqtt_service.send_data_async(
+                f"{topic}/peripheralDevice/usage/lastSession", json.dumps(session))
+            await self.rest_api.send_event({"type": "session", **session})
+        today = self._usage.today()
+        if sessions or today["date"] != self._usage_day:
+            self._usage_day = today["date"]
+            await self.service.mqtt_service.send_data_async(
+                f"{topic}/peripheralDevice/usage/today", json.dumps(today))
+
+    def _record_poll(self, mode: str, esphome_api_ms, ble_ms, poll_ms, ble_rssi=None, wifi_rssi=None, transport=None,
+                     proxy=None) -> None:
+        """Feed one poll cycle into PollStats and the /metrics latency histograms."""
+        self._poll_stats.record(mode, esphome_api_ms, ble_ms, poll_ms, ble_rssi=ble_rssi, wifi_rssi=wifi_rssi,
+                                transport=transport, proxy=proxy)
+        _connect_ms = (esphome_api_ms or 0) + (ble_ms or 0)
+        if _connect_ms > 0:
+            BridgeMetrics.CONNECT_SECONDS.observe(_connect_ms / 1000, transport, mode)
+        if poll_ms is not None:
+            BridgeMetrics.POLL_SECONDS.observe(poll_ms / 1000, transport, mode)
+
     async def _publish_performance_stats_mqtt(self) -> None:
         """Publish current in-memory performance statistics to MQTT."""
         topic = self.service.mqttConfig.get("topic", "Geberit/AquaClean")
@@ -1837,6 +1860,84 @@ class ApiMode:
             return self._poll_stats.to_markdown()
         return self._poll_stats.to_dict()
 
+    def get_health_stats(self) -> dict:
+        """Return the circuit breakers, the per-transport health scores and the ESP32 proxies."""
+        return {
+            "breakers": {
+                "poll":      self._poll_breaker.to_dict(),
+                "reconnect": self.service._reconnect_breaker.to_dict(),
+            },
+            "transports": health_snapshot(),
+            "proxies":    PROXIES.to_dict(),
+        }
+
+    def get_timeout_stats(self) -> dict:
+        """Return the learned per-(transport, call) response timeouts."""
+        return ADAPTIVE_TIMEOUTS.to_dict()
+
+    def get_call_stats(self, fmt: str = "json"):
+        """Return per-API-call statistics. fmt='json' → dict, fmt='markdown' → str."""
+        if fmt == "markdown":
+            return CALL_STATS.to_markdown()
+        return CALL_STATS.to_dict()
+
+    def get_runtime_info(self) -> dict:
+        """Return event-loop lag and stalls plus the task and thread inventory."""
+        return LOOP_MONITOR.snapshot()
+
+    def get_airtime_stats(self) -> dict:
+        """Return the BLE call budget per priority class and the connected seconds of the last hour."""
+        return self.service.airtime.to_dict()
+
+    def get_usage_stats(self, days: int = 7) -> dict:
+        """Return the usage session phase, the open and last session, and the last days' counters."""
+        return self._usage.to_dict(days)
+
+    def get_settings_refresh_info(self) -> dict:
+        """Return the settings trickle refresh state, including the age of each cached setting."""
+        return self.service.settings_refresher.to_dict()
+
+    def set_devices(self, devices: list["ApiMode"]) -> None:
+        """Multi-device process: this ApiMode's REST server serves every device under /devices/<name>."""
+        self.devices = devices
+        for api in devices:
+            self.rest_api.mount(f"/devices/{api.device}", api.rest_api)
+
+    def get_history(self, field=None, start=None, end=None, max_points=None) -> dict:
+        """Without field: the recorded fields and their size on disk.  With field: its
+        history between start and end (epoch seconds or ISO 8601; default the last 24 h)."""
+        if self._history is None:
+            self._http_error(404, E4005, "[POLL] history_dir is not set")
+        if not field:
+            return self._history.to_dict()
+        try:
+            now = time.time()
+            end_s = parse_time(end, now)
+            start_s = parse_time(start, end_s - 86400)
+        except ValueError as e:
+            self._http_error(400, E4005, f"Invalid time: {e}")
+        try:
+            return self._history.query(field, start_s, end_s, max_points or HistoryStore.MAX_POINTS)
+        except KeyError:
+            self._http_error(404, E4005, f"Unknown field {field!r}")
+
+    def get_devices(self) -> dict:
+        """Return the devices of this process and the shared transport (slots, airtime, poll budgets)."""
+        return {
+            "devices": [{
+                "name":       api.device,
+                "device_id":  api.config.get("BLE", "device_id", fallback=None),
+                "topic":      api.service.mqttConfig.get("topic"),
+                "prefix":     f"/devices/{api.device}" if api.device else "",
+                "ble_status": api.service.device_state.get("ble_status"),
+            } for api in self.devices],
+            "transport": TRANSPORT.to_dict(),
+        }
+
+    def get_scheduler_stats(self) -> dict:
+        """Return on-demand BLE scheduler statistics (queue wait per priority class, command batching)."""
+        return {**self._ble_scheduler.to_dict(), "command_batching": self._command_batcher.to_dict()}
+
     async def set_ble_connection(self, value: str) -> dict:
         if value not in ("persistent", "on-demand"):
             self._http_error(400, E4001, f"Invalid value {value!r}. Use 'persistent' or 'on-demand'.")
@@ -1846,7 +1947,7 @@ class ApiMode:
             await self.service.request_reconnect()
         else:
             await self.service.request_disconnect()
-        await self.rest_api.broadcast_state(self.service.device_state.copy())
+        await self.service.device_state.publish()
         return {"status": "success", "ble_connection": value}
 
     async def set_esphome_api_connection(self, value: str) -> dict:
@@ -1866,7 +1967,7 @@ class ApiMode:
             await self.service._update_esphome_proxy_state(
                 connected=False, error="No error", error_code="E0000"
             )
-        await self.rest_api.broadcast_state(self.service.device_state.copy())
+        await self.service.device_state.publish()
         return {"status": "success", "esphome_api_connection": value}
 
     async def set_poll_interval(self, value: float) -> dict:
@@ -1883,7 +1984,7 @@ class ApiMode:
         await self.service._publish_poll_timing(interval=value)
         self._poll_wakeup.set()                    # wake on-demand _polling_loop
         self.service._poll_interval_event.set()    # wake persistent-mode inner loop
-        await self.rest_api.broadcast_state(self.service.device_state.copy())
+        await self.service.device_state.publish()
         return {"status": "success", "poll_interval": value}
 
     # --- MQTT inbound handlers ---
@@ -2053,16 +2154,10 @@ class ApiMode:
     # --- REST endpoint implementations ---
 
     async def get_status(self):
-        topic = self.service.mqttConfig['topic']
+        # MQTT monitor topics follow the device_state change set (ServiceMode._publish_monitor_changes).
         if self.ble_connection == "persistent":
-            result = self.service.device_state
-        else:
-            result = await self._on_demand(lambda client: self._fetch_state(client))
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isUserSitting",       str(result.get("is_user_sitting")))
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isAnalShowerRunning", str(result.get("is_anal_shower_running")))
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isLadyShowerRunning", str(result.get("is_lady_shower_running")))
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isDryerRunning",      str(result.get("is_dryer_running")))
-        return result
+            return self.service.device_state.snapshot()
+        return await self._on_demand(lambda client: self._fetch_state(client))
 
     async def get_info(self):
         topic = self.service.mqttConfig['topic']
@@ -2092,9 +2187,11 @@ class ApiMode:
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
-            return await self._persistent_query(lambda client: self._execute_command(client, command))
+            return await self._persistent_query(lambda client: self._execute_command(client, command),
+                                                Priority.COMMAND)
         else:
-            return await self._on_demand(lambda client: self._execute_command(client, command))
+            return await self._command_batcher.submit(
+                command, lambda client: self._execute_command(client, command))
 
     async def do_connect(self):
         if self.ble_connection == "persistent":
@@ -2122,7 +2219,7 @@ class ApiMode:
         """Trigger a software reboot of the ESP32 by pressing its restart button entity."""
         if not esphome_host:
             raise self._http_error(400, E1002, "No ESPHome host configured in [ESPHOME] host")
-        connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk)
+        connector = BluetoothLeConnector(*_esphome_target(), esphome_noise_psk)
         try:
             await connector.restart_esp32_async()
             return {"status": "success", "action": "restart_sent", "note": "ESP32 will reboot in a few seconds"}
@@ -2153,20 +2250,14 @@ class ApiMode:
     # --- Data query endpoints ---
 
     async def get_system_parameters(self):
-        topic = self.service.mqttConfig['topic']
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
             # fires DeviceStateChanged → on_device_state_changed → publishes to MQTT
             await self.service.client._state_changed_timer_elapsed()
-            return self.service.device_state
+            return self.service.device_state.snapshot()
         else:
-            result = await self._on_demand(lambda client: self._fetch_state(client))
-            await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isUserSitting",       str(result["is_user_sitting"]))
-            await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isAnalShowerRunning", str(result["is_anal_shower_running"]))
-            await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isLadyShowerRunning", str(result["is_lady_shower_running"]))
-            await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isDryerRunning",      str(result["is_dryer_running"]))
-            return result
+            return await self._on_demand(lambda client: self._fetch_state(client))
 
     async def get_soc_versions(self):
         topic = self.service.mqttConfig['topic']
@@ -2215,6 +2306,12 @@ class ApiMode:
             result = self._statistics_descale_to_dict(sd)
         else:
             result = await self._on_demand(self._fetch_statistics_descale)
+        await self._publish_statistics_descale_to_mqtt(result, topic)
+        return result
+
+    async def _publish_statistics_descale_to_mqtt(self, result: dict, topic: str):
+        if self._history is not None:
+            self._history.record(result)
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/unpostedShowerCycles",          str(result["unposted_shower_cycles"]))
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/daysUntilNextDescale",          str(result["days_until_next_descale"]))
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/daysUntilShowerRestricted",     str(result["days_until_shower_restricted"]))
@@ -2222,7 +2319,6 @@ class ApiMode:
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/dateTimeAtLastDescale",         str(result["date_time_at_last_descale"]))
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/dateTimeAtLastDescalePrompt",   str(result["date_time_at_last_descale_prompt"]))
         await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/information/descaleStatistics/numberOfDescaleCycles",         str(result["number_of_descale_cycles"]))
-        return result
 
     async def get_initial_operation_date(self):
         topic = self.service.mqttConfig['topic']
@@ -2270,48 +2366,109 @@ class ApiMode:
                 result = await self._on_demand(self._fetch_identification)
         return result
 
-    async def get_anal_shower_state(self):
+    async def get_data_batch(self, items) -> dict:
+        """Read several /data/* items in one BLE session (DataBatch.py).
+
+        Each item is published to MQTT and cached in device_state exactly as
+        its own /data/* endpoint would do."""
+        try:
+            names = DataBatch.plan(items)
+        except ValueError as e:
+            self._http_error(400, E4001, str(e))
+        fetchers = {**DataBatch.FETCHERS,
+                    "system-parameters": lambda client: self._fetch_state(client, _skip_profile=True)}
+
+        async def _batch(client):
+            return await DataBatch.run(client, names, fetchers,
+                                       is_fatal=lambda exc: not isinstance(exc, BLEPeripheralTimeoutError))
+
+        if self.ble_connection == "persistent":
+            if self.service.client is None:
+                self._http_error(503, E4003)
+            result = await self._persistent_query(_batch)
+        else:
+            result = await self._on_demand(_batch)
+        await self._publish_batch_results(result["items"])
+        return result
+
+    async def _publish_batch_results(self, items: dict) -> None:
         topic = self.service.mqttConfig['topic']
+        data = {name: item["data"] for name, item in items.items() if "data" in item}
+        if "filter-status" in data:
+            self.service.device_state["filter_status"] = data["filter-status"]
+            await self._publish_filter_status_to_mqtt(data["filter-status"], topic)
+        if "statistics-descale" in data:
+            await self._publish_statistics_descale_to_mqtt(data["statistics-descale"], topic)
+        if "profile-settings" in data:
+            self.service.device_state["profile_settings"] = data["profile-settings"]
+            await self._publish_profile_settings_to_mqtt(data["profile-settings"], topic)
+        if "common-settings" in data:
+            self.service.device_state["common_settings"] = data["common-settings"]
+            await self._publish_common_settings_to_mqtt(data["common-settings"], topic)
+        if "soc-versions" in data:
+            await self.service.mqtt_service.send_data_async(
+                f"{topic}/peripheralDevice/information/SocVersions", data["soc-versions"]["soc_versions"])
+        if "initial-operation-date" in data:
+            await self.service.mqtt_service.send_data_async(
+                f"{topic}/peripheralDevice/information/initialOperationDate",
+                data["initial-operation-date"]["initial_operation_date"])
+        if "node-list" in data:
+            await self.service.mqtt_service.send_data_async(
+                f"{topic}/peripheralDevice/information/nodeList", str(data["node-list"]))
+        await self.service.device_state.publish()   # SSE + MQTT monitor topics (system-parameters)
+
+    async def _on_mqtt_data_batch(self, items: str):
+        """MQTT centralDevice/control/dataBatch → result JSON on centralDevice/dataBatch."""
+        from fastapi import HTTPException
+        topic = self.service.mqttConfig['topic']
+        try:
+            result = await self.get_data_batch(items)
+        except HTTPException as e:
+            result = {"status": "error", **(e.detail if isinstance(e.detail, dict) else {"message": str(e.detail)})}
+        except Exception as e:
+            logger.warning(f"MQTT data batch failed: {e}")
+            result = {"status": "error", "message": str(e)}
+        await self.service.mqtt_service.send_data_async(
+            f"{topic}/centralDevice/dataBatch", json.dumps(result, default=str))
+
+    async def get_anal_shower_state(self):
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
             result = await self._persistent_query(self._fetch_anal_shower_state)
         else:
             result = await self._on_demand(self._fetch_anal_shower_state)
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isAnalShowerRunning", str(result["is_anal_shower_running"]))
+        await self.service.device_state.publish()   # SSE + MQTT monitor topic, if changed
         return result
 
     async def get_user_sitting_state(self):
-        topic = self.service.mqttConfig['topic']
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
             result = await self._persistent_query(self._fetch_user_sitting_state)
         else:
             result = await self._on_demand(self._fetch_user_sitting_state)
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isUserSitting", str(result["is_user_sitting"]))
+        await self.service.device_state.publish()   # SSE + MQTT monitor topic, if changed
         return result
 
     async def get_lady_shower_state(self):
-        topic = self.service.mqttConfig['topic']
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
             result = await self._persistent_query(self._fetch_lady_shower_state)
         else:
             result = await self._on_demand(self._fetch_lady_shower_state)
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isLadyShowerRunning", str(result["is_lady_shower_running"]))
+        await self.service.device_state.publish()   # SSE + MQTT monitor topic, if changed
         return result
 
     async def get_dryer_state(self):
-        topic = self.service.mqttConfig['topic']
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
             result = await self._persistent_query(self._fetch_dryer_state)
         else:
             result = await self._on_demand(self._fetch_dryer_state)
-        await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isDryerRunning", str(result["is_dryer_running"]))
+        await self.service.device_state.publish()   # SSE + MQTT monitor topic, if changed
         return result
 
     # --- Helpers ---
@@ -2399,6 +2556,7 @@ class ApiMode:
         else:
             result = await self._on_demand(self._fetch_profile_settings)
         self.service.device_state["profile_settings"] = result
+        self.service.settings_refresher.record("profile", result)
         await self._publish_profile_settings_to_mqtt(result, topic)
         return result
 
@@ -2417,15 +2575,16 @@ class ApiMode:
                 self._http_error(503, E4003)
             await self.service.client.set_stored_profile_setting(setting_id, value)
         else:
-            await self._on_demand(lambda client: client.set_stored_profile_setting(setting_id, value))
+            await self._on_demand(lambda client: client.set_stored_profile_setting(setting_id, value), Priority.COMMAND)
 
-        # Update cached state and broadcast
+        # Update cached state and broadcast; the next poll re-reads what the device stored.
+        self.service.settings_refresher.written("profile", setting_id)
         ps = dict(self.service.device_state.get("profile_settings") or {})
         ps[setting_id] = value
         self.service.device_state["profile_settings"] = ps
         topic = self.service.mqttConfig['topic']
         await self._publish_profile_settings_to_mqtt(ps, topic)
-        await self.rest_api.broadcast_state(self.service.device_state.copy())
+        await self.service.device_state.publish()
         return {"status": "success", "setting_id": setting_id, "value": value}
 
     async def _publish_profile_settings_to_mqtt(self, ps: dict, topic: str):
@@ -2448,15 +2607,16 @@ class ApiMode:
                 self._http_error(503, E4003)
             await self.service.client.set_stored_common_setting(setting_id, value)
         else:
-            await self._on_demand(lambda client: client.set_stored_common_setting(setting_id, value))
+            await self._on_demand(lambda client: client.set_stored_common_setting(setting_id, value), Priority.COMMAND)
 
-        # Update cached state and broadcast
+        # Update cached state and broadcast; the next poll re-reads what the device stored.
+        self.service.settings_refresher.written("common", setting_id)
         cs = dict(self.service.device_state.get("common_settings") or {})
         cs[setting_id] = value
         self.service.device_state["common_settings"] = cs
         topic = self.service.mqttConfig['topic']
         await self._publish_common_settings_to_mqtt(cs, topic)
-        await self.rest_api.broadcast_state(self.service.device_state.copy())
+        await self.service.device_state.publish()
         return {"status": "success", "setting_id": setting_id, "value": value}
 
     async def get_common_settings(self):
@@ -2465,6 +2625,7 @@ class ApiMode:
         else:
             result = await self._on_demand(lambda client: client.base_client.get_stored_common_settings_async())
         self.service.device_state["common_settings"] = result
+        self.service.settings_refresher.record("common", result)
         topic = self.service.mqttConfig['topic']
         await self._publish_common_settings_to_mqtt(result, topic)
         return result
@@ -2506,11 +2667,16 @@ class ApiMode:
             "description": ident.description,
         }
 
-    async def _persistent_query(self, action):
+    async def _persistent_query(self, action, priority: Priority = Priority.READ):
         """Execute a BLE action on the persistent client and return timing metadata.
-        Connect costs are 0 — the connection is already live."""
+        Connect costs are 0 — the connection is already live.  Its calls are charged
+        to priority's call budget."""
         t = time.perf_counter()
-        result = await action(self.service.client)
+        token = CURRENT_PRIORITY.set(priority)
+        try:
+            result = await action(self.service.client)
+        finally:
+            CURRENT_PRIORITY.reset(token)
         query_ms = int((time.perf_counter() - t) * 1000)
         timing = {
             "_connect_ms": 0,
@@ -2529,21 +2695,80 @@ class ApiMode:
         inside the connector is kept alive between BLE cycles via disconnect_ble_only().
         """
         if self._esphome_connector is None:
-            self._esphome_connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk)
+            self._esphome_connector = _new_bluetooth_connector()
             self._esphome_connector.connection_status_changed_handlers += self.service.on_connection_status_changed
             factory = AquaCleanClientFactory(self._esphome_connector)
             self._esphome_client = factory.create_client()
         return self._esphome_connector
 
-    async def _on_demand(self, action):
+    async def _on_demand(self, action, priority: Priority = Priority.READ):
         """Connect, execute action, disconnect — for on-demand connection mode.
         Publishes connecting/connected/disconnected to MQTT and SSE, mirroring
-        the persistent-mode behaviour."""
-        async with self._on_demand_lock:
-            return await self._on_demand_inner(action)
+        the persistent-mode behaviour.
+
+        Sessions run one at a time in priority order (BleScheduler).  While a
+        lower-priority session is open, action may instead run on that
+        session's link at one of its preemption points (_preemption_point)."""
+        return await self._ble_scheduler.run(
+            priority, lambda a: TRANSPORT.run(self.device, priority, self._on_demand_inner, a), action)
+
+    async def _preemption_point(self):
+        """Run waiting higher-priority requests on the open on-demand link, if any.
+
+        Called by session actions between two complete steps of their work —
+        never between calls that must stay together, such as GetFilterStatus
+        and the GetSPL that follows it in _fetch_state_and_info."""
+        runner = self._open_link_runner
+        if runner is not None:
+            await self._ble_scheduler.serve_pending(runner)
+
+    async def _run_on_open_link(self, client, action):
+        """Run a higher-priority action on the link of the session in progress.
+        Same result shape as _on_demand_inner; connect costs are 0.  The open
+        session has already published the connection; a BLE failure is
+        published as the BLE status, as _on_demand_inner does."""
+        from fastapi import HTTPException
+        t = time.perf_counter()
+        try:
+            result = action(client)
+            result = await result if asyncio.iscoroutine(result) else result
+        except HTTPException:
+            raise
+        except Exception as e:
+            _ec = self._ble_error_code(e)
+            _hint = _ec.hint.replace("<BT-ADDRESS>", self.config.get("BLE", "device_id"))
+            await self.service._set_ble_status("error", error_msg=str(e) or _ec.message, error_code=_ec.code, error_hint=_hint)
+            ApiMode._http_error(503, _ec, str(e))
+        timing = {
+            "_connect_ms": 0,
+            "_esphome_api_ms": None,
+            "_ble_ms": None,
+            "_query_ms": int((time.perf_counter() - t) * 1000),
+        }
+        if isinstance(result, dict):
+            return {**result, **timing}
+        return timing
+
+    @staticmethod
+    def _ble_error_code(exc: Exception) -> ErrorCode:
+        """Map a BLE / ESP32 exception to the error code shown in the webapp."""
+        if isinstance(exc, UnsupportedDeviceError):
+            return E0010
+        if isinstance(exc, BLEPeripheralTimeoutError):
+            return E0003
+        if isinstance(exc, ESPHomeConnectionError):
+            return E1001 if exc.timeout else E1002
+        if isinstance(exc, ESPHomeDeviceNotFoundError):
+            return E0002
+        if isinstance(exc, BleakError):
+            return E0003
+        if isinstance(exc, asyncio.TimeoutError):
+            return E0003
+        return E7002
 
     async def _on_demand_inner(self, action):
-        device_id = config.get("BLE", "device_id")
+        from fastapi import HTTPException
+        device_id = self.config.get("BLE", "device_id")
         topic = self.service.mqttConfig['topic']
 
         use_persistent = bool(esphome_host and self.esphome_api_connection == "persistent")
@@ -2552,7 +2777,7 @@ class ApiMode:
             connector = self._get_esphome_connector()
             client = self._esphome_client
         else:
-            connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk)
+            connector = _new_bluetooth_connector()
             connector.connection_status_changed_handlers += self.service.on_connection_status_changed
             factory = AquaCleanClientFactory(connector)
             client = factory.create_client()
@@ -2562,8 +2787,11 @@ class ApiMode:
             await self.service.mqtt_service.send_data_async(
                 f"{topic}/centralDevice/connected", f"Connecting to {device_id} ...")
             await self.service._set_ble_status("connecting", device_address=device_id)
+            client.base_client.call_budget_hook = self.service.airtime.spend
             t0 = time.perf_counter()
-            await client.connect_ble_only(device_id)
+            async with TRANSPORT.connecting:
+                await client.connect_ble_only(device_id)
+            self.service.airtime.link_opened()
             connect_ms = int((time.perf_counter() - t0) * 1000)
             self.service.device_state["last_connect_ms"] = connect_ms
             self.service.device_state["last_esphome_api_ms"] = connector.last_esphome_api_ms
@@ -2597,6 +2825,8 @@ class ApiMode:
                 await self.service._update_esphome_proxy_state(
                     connected=True,
                     name=connector.esphome_proxy_name,
+                    host=connector.esphome_host,
+                    port=connector.esphome_port,
                     error="No error",
                     error_code="E0000",
                     wifi_rssi=connector.esphome_wifi_rssi,
@@ -2612,6 +2842,7 @@ class ApiMode:
                 })
             )
             t1 = time.perf_counter()
+            self._open_link_runner = lambda pending: self._run_on_open_link(client, pending)
             result = action(client)
             result = await result if asyncio.iscoroutine(result) else result
             query_ms = int((time.perf_counter() - t1) * 1000)
@@ -2630,6 +2861,12 @@ class ApiMode:
         except Exception as e:
             _exc = e
         finally:
+            self._open_link_runner = None
+            self.service.airtime.link_closed()
+            try:
+                client.base_client.call_budget_hook = None
+            except AttributeError:
+                pass
             try:
                 if use_persistent:
                     await connector.disconnect_ble_only()  # Keep ESP32 API TCP alive for next request
@@ -2639,20 +2876,7 @@ class ApiMode:
                 pass
             if _exc is not None:
                 # Map exception to error code so webapp shows the right status.
-                if isinstance(_exc, UnsupportedDeviceError):
-                    _ec = E0010
-                elif isinstance(_exc, BLEPeripheralTimeoutError):
-                    _ec = E0003
-                elif isinstance(_exc, ESPHomeConnectionError):
-                    _ec = E1001 if _exc.timeout else E1002
-                elif isinstance(_exc, ESPHomeDeviceNotFoundError):
-                    _ec = E0002
-                elif isinstance(_exc, BleakError):
-                    _ec = E0003
-                elif isinstance(_exc, asyncio.TimeoutError):
-                    _ec = E0003
-                else:
-                    _ec = E7002
+                _ec = self._ble_error_code(_exc)
                 _hint = _exc.hint() if isinstance(_exc, UnsupportedDeviceError) else _ec.hint.replace("<BT-ADDRESS>", device_id)
                 await self.service._set_ble_status("error", error_msg=str(_exc) or _ec.message, error_code=_ec.code, error_hint=_hint)
             else:
@@ -2668,7 +2892,33 @@ class ApiMode:
                             connected=False, error="No error", error_code="E0000"
                         )
         if _exc is not None:
-            ApiMode._http_error(503, _ec, str(_exc))
+            try:
+                ApiMode._http_error(503, _ec, str(_exc))
+            except HTTPException as http_exc:
+                raise http_exc from _exc   # keeps the original for the poll loop's circuit breaker
+
+    async def _advertisement_probe(self) -> bool:
+        """Circuit-breaker probe: is the device advertising?  No GATT connection is
+        made; runs as a POLL-priority session so it never overlaps a real one."""
+        device_id = self.config.get("BLE", "device_id")
+
+        async def _probe(_action):
+            use_persistent = bool(esphome_host and self.esphome_api_connection == "persistent")
+            connector = self._get_esphome_connector() if use_persistent else _new_bluetooth_connector()
+            probe = getattr(connector, "advertisement_seen", None)
+            if probe is None:
+                return False
+            try:
+                return await probe(device_id, timeout=5.0)
+            finally:
+                if not use_persistent:
+                    try:
+                        await connector.disconnect()
+                    except Exception:
+                        pass
+
+        return await self._ble_scheduler.run(
+            Priority.POLL, lambda a: TRANSPORT.run(self.device, Priority.POLL, _probe, a), None)
 
     async def _trigger_esphome_restart(self, failure_count: int) -> bool:
         """Press the restart button on the ESP32 via aioesphomeapi.
@@ -2687,9 +2937,10 @@ class ApiMode:
             f"Triggering ESP32 restart — BLE scanner stuck "
             f"({failure_count} consecutive failures)"
         )
+        proxy_host, proxy_port = _esphome_target()
         api = APIClient(
-            address=esphome_host,
-            port=esphome_port,
+            address=proxy_host,
+            port=proxy_port,
             password="",
             noise_psk=esphome_noise_psk or None,
         )
@@ -2759,19 +3010,27 @@ class ApiMode:
         when running in on-demand mode. Skips silently in persistent mode.
         interval=0 pauses polling. _poll_wakeup lets the loop react immediately
         when the interval is changed at runtime via set_poll_interval()."""
+        from fastapi import HTTPException
         logger.info(f"Poll loop started (interval={self._poll_interval}s)")
         topic = self.service.mqttConfig['topic']
         _identification_fetched = False  # fetch identification on the first poll, then state-only
-        _consecutive_poll_failures = 0
-        _CIRCUIT_OPEN_THRESHOLD = 3    # failures before circuit opens (3 × 10s scan = 30s max lag)
-        _CIRCUIT_OPEN_SLEEP     = 60   # seconds between probe attempts when open
+        breaker = self._poll_breaker  # opens after 3 failures (3 × 10s scan = 30s max lag)
+        _CALL_TIMEOUT_RETRY     = 2    # seconds before re-polling after a learned call timeout
         _first_poll = True  # poll immediately on startup; then sleep between cycles
+        _retry_soon = False  # last poll hit a learned call timeout (AdaptiveTimeouts)
 
         while True:
             # Sleep for the current interval; _poll_wakeup interrupts early on change.
             # Skipped on the very first iteration (when polling is enabled) so data
             # appears in the webapp immediately at startup without waiting one full interval.
-            if not (_first_poll and self._poll_interval > 0):
+            # After a learned call timeout — the device stopped answering on an open
+            # link — re-poll after _CALL_TIMEOUT_RETRY instead, so a stuck device opens
+            # the circuit within seconds rather than after three poll intervals.
+            if _retry_soon and self._poll_interval > 0:
+                _retry_soon = False
+                logger.info(f"Poll: device stopped answering on an open link — re-polling in {_CALL_TIMEOUT_RETRY}s")
+                await asyncio.sleep(min(_CALL_TIMEOUT_RETRY, self._poll_interval))
+            elif not (_first_poll and self._poll_interval > 0):
                 try:
                     if self._poll_interval > 0:
                         await asyncio.wait_for(self._poll_wakeup.wait(), timeout=self._poll_interval)
@@ -2791,13 +3050,27 @@ class ApiMode:
             if self.ble_connection != "on-demand":
                 continue  # persistent mode handles its own polling
 
-            # Circuit breaker: after threshold failures, probe at a longer interval.
-            if _consecutive_poll_failures >= _CIRCUIT_OPEN_THRESHOLD:
+            # Circuit breaker: while open, wait out the exponential backoff.  A cheap
+            # advertisement probe runs meanwhile so a device that reappears is polled at once.
+            if breaker.is_open:
                 # On first opening, attempt to recover by restarting the ESP32.
-                # The subsequent _CIRCUIT_OPEN_SLEEP gives it time to reboot.
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD and esphome_host:
-                    await self._trigger_esphome_restart(_consecutive_poll_failures)
-                await asyncio.sleep(_CIRCUIT_OPEN_SLEEP)
+                # The backoff gives it time to reboot.
+                if breaker.failures == breaker.threshold and esphome_host:
+                    await self._trigger_esphome_restart(breaker.failures)
+                if not await breaker.wait(probe=self._advertisement_probe, probe_interval=15,
+                                          stop_event=self._shutdown_event):
+                    return
+
+            # Call or airtime budget running low (AirtimeGovernor): skip this cycle
+            # rather than queue behind commands and reads, or wait for tokens
+            # while the session holds the link.
+            plan = self.service.poll_plan
+            if _identification_fetched:
+                planned_calls = len(plan.spl_batches) + self.service.settings_refresher.per_poll
+            else:   # + identification, initial operation date, firmware list
+                planned_calls = plan.calls + 3
+            if not self.service.airtime.admit(Priority.POLL, planned_calls):
+                continue
 
             # Set poll_epoch before the poll so the web UI countdown does not
             # reset to 100% when results arrive — the epoch already lags by the
@@ -2806,7 +3079,7 @@ class ApiMode:
             await self.service._publish_poll_timing(epoch=self.service.device_state["poll_epoch"])
             try:
                 if not _identification_fetched:
-                    result = await self._on_demand(self._fetch_state_and_info)
+                    result = await self._on_demand(self._fetch_state_and_info, Priority.POLL)
                     _identification_fetched = True
                     # Cache identification in device_state for SSE and /info endpoint.
                     for k in ("sap_number", "serial_number", "production_date",
@@ -2819,48 +3092,30 @@ class ApiMode:
                         self._firmware_version_ready.set()
                     await self._publish_identification_to_mqtt(result)
                 else:
-                    result = await self._on_demand(self._fetch_state)
+                    result = await self._on_demand(self._fetch_state, Priority.POLL)
                 # Success — close circuit.
-                if _consecutive_poll_failures > 0:
-                    logger.info(f"Poll recovered after {_consecutive_poll_failures} consecutive failure(s)")
+                _failures = breaker.record_success(connect_ms=result.get("_connect_ms"),
+                                                   rssi=self.service.device_state.get("ble_rssi"),
+                                                   transport=self.service._transport_name())
+                if _failures > 0:
+                    logger.info(f"Poll recovered after {_failures} consecutive failure(s)")
                     _identification_fetched = False  # re-fetch in case device was power-cycled
-                _consecutive_poll_failures = 0
                 # _set_ble_status("disconnected") cleared timing and poll_epoch;
                 # restore them so the webapp gets accurate values.
                 self.service.device_state["last_connect_ms"]    = result.get("_connect_ms")
                 self.service.device_state["last_esphome_api_ms"] = result.get("_esphome_api_ms")
                 self.service.device_state["last_ble_ms"]         = result.get("_ble_ms")
                 self.service.device_state["last_poll_ms"]        = result.get("_query_ms")
-                await self.rest_api.broadcast_state(self.service.device_state.copy())
-                await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isUserSitting",       str(result.get("is_user_sitting")))
-                await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isAnalShowerRunning", str(result.get("is_anal_shower_running")))
-                await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isLadyShowerRunning", str(result.get("is_lady_shower_running")))
-                await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/isDryerRunning",      str(result.get("is_dryer_running")))
+                # One change set: SSE, MQTT monitor topics and PollStats (_on_state_changed).
+                self.service._record_last_poll("on-demand", result.get("_esphome_api_ms"),
+                                               result.get("_ble_ms"), result.get("_query_ms"))
+                await self.service.device_state.publish()
                 ps = result.get("profile_settings") or {}
                 if ps:
                     await self._publish_profile_settings_to_mqtt(ps, topic)
                 cs = result.get("common_settings") or {}
                 if cs:
                     await self._publish_common_settings_to_mqtt(cs, topic)
-                if self.service.device_state.get("ble_rssi") is not None:
-                    await self.service.mqtt_service.send_data_async(f"{topic}/peripheralDevice/monitor/bleRssi", str(self.service.device_state["ble_rssi"]))
-                # Record on-demand poll timing and signal stats
-                _od_ble_rssi  = self.service.device_state.get("ble_rssi")
-                _od_wifi_rssi = self.service.esphome_proxy_state.get("wifi_rssi") if esphome_host else None
-                if esphome_host:
-                    _od_transport = "esp32-wifi" if _od_wifi_rssi is not None else "esp32-eth"
-                else:
-                    _od_transport = "bleak"
-                self._poll_stats.record(
-                    "on-demand",
-                    result.get("_esphome_api_ms"),
-                    result.get("_ble_ms"),
-                    result.get("_query_ms"),
-                    ble_rssi=_od_ble_rssi,
-                    wifi_rssi=_od_wifi_rssi,
-                    transport=_od_transport,
-                )
-                await self._publish_performance_stats_mqtt()
             except UnsupportedDeviceError as e:
                 logger.warning(f"Unsupported device detected — stopping poll loop: {e}")
                 await self.service.mqtt_service.send_data_async(
@@ -2868,57 +3123,51 @@ class ApiMode:
                 return  # stop polling permanently; bridge stays alive for REST access
             except ESPHomeConnectionError as e:
                 error_code_obj = E1001 if e.timeout else E1002
-                _consecutive_poll_failures += 1
-                logger.warning(f"On-demand poll: ESP32 TCP error (failure #{_consecutive_poll_failures}): {e}")
+                breaker.record_failure(transport=self.service._transport_name())
+                logger.warning(f"On-demand poll: ESP32 TCP error (failure #{breaker.failures}): {e}")
                 await self.service.mqtt_service.send_data_async(
                     f"{topic}/esphomeProxy/error", ErrorManager.to_json(error_code_obj, str(e)))
                 await self.service._update_esphome_proxy_state(
                     connected=False, error=str(e), error_code=error_code_obj.code, error_hint=error_code_obj.hint)
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
             except ESPHomeDeviceNotFoundError as e:
-                _consecutive_poll_failures += 1
-                logger.warning(f"On-demand poll: Geberit not found via ESP32 (failure #{_consecutive_poll_failures}): {e}")
+                breaker.record_failure(transport=self.service._transport_name())
+                logger.warning(f"On-demand poll: Geberit not found via ESP32 (failure #{breaker.failures}): {e}")
                 await self.service.mqtt_service.send_data_async(
                     f"{topic}/centralDevice/error", ErrorManager.to_json(E0002, str(e)))
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
             except BleakError as e:
-                _consecutive_poll_failures += 1
-                logger.warning(f"On-demand poll: BLE error (failure #{_consecutive_poll_failures}): {e}")
+                breaker.record_failure(transport=self.service._transport_name())
+                logger.warning(f"On-demand poll: BLE error (failure #{breaker.failures}): {e}")
                 await self.service.mqtt_service.send_data_async(
                     f"{topic}/centralDevice/error", ErrorManager.to_json(E0003, str(e)))
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
             except asyncio.TimeoutError as e:
-                _consecutive_poll_failures += 1
-                logger.warning(f"On-demand poll: BLE connect timeout (failure #{_consecutive_poll_failures}): {e}")
+                breaker.record_failure(timeout=True, transport=self.service._transport_name())
+                logger.warning(f"On-demand poll: BLE connect timeout (failure #{breaker.failures}): {e}")
                 await self.service.mqtt_service.send_data_async(
                     f"{topic}/centralDevice/error", ErrorManager.to_json(E0003, str(e)))
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
             except HTTPException as e:
                 # _on_demand_inner catches all BLE/ESP32 exceptions and re-raises as
                 # HTTPException with the original error code embedded in e.detail.
                 # Extract it so MQTT gets E0003/E1001/etc. instead of E7002.
-                _consecutive_poll_failures += 1
+                _timed_out = is_call_timeout(e.__cause__) or isinstance(e.__cause__, BLEPeripheralTimeoutError)
+                breaker.record_failure(timeout=_timed_out, transport=self.service._transport_name())
+                _retry_soon = is_call_timeout(e.__cause__) and not breaker.is_open
                 detail = e.detail if isinstance(e.detail, dict) else {}
                 err = detail.get("error", {})
                 ec_code = err.get("code", "E7002")
                 ec_msg  = err.get("message", str(e))
                 ec_hint = err.get("hint", "")
-                logger.warning(f"On-demand poll failed (failure #{_consecutive_poll_failures}): {ec_code} — {ec_msg}")
+                logger.warning(f"On-demand poll failed (failure #{breaker.failures}): {ec_code} — {ec_msg}")
                 temp_ec = ErrorCode(ec_code, ec_msg, "BLE", "ERROR", ec_hint)
                 await self.service.mqtt_service.send_data_async(
                     f"{topic}/centralDevice/error", ErrorManager.to_json(temp_ec))
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
             except Exception as e:
-                _consecutive_poll_failures += 1
-                logger.warning(f"On-demand poll failed (failure #{_consecutive_poll_failures}): {e}")
+                breaker.record_failure(transport=self.service._transport_name())
+                logger.warning(f"On-demand poll failed (failure #{breaker.failures}): {e}")
                 await self.service.mqtt_service.send_data_async(f"{topic}/centralDevice/error", ErrorManager.to_json(E7002, str(e)))
-                if _consecutive_poll_failures == _CIRCUIT_OPEN_THRESHOLD:
-                    logger.warning(f"Circuit open after {_consecutive_poll_failures} failures — probing every {_CIRCUIT_OPEN_SLEEP}s")
+            BridgeMetrics.POLL_CONSECUTIVE_FAILURES.set(breaker.failures)
+            BridgeMetrics.CIRCUIT_BREAKER_OPEN.set(1 if breaker.is_open else 0)
+            _transport = self.service._transport_name()
+            BridgeMetrics.TRANSPORT_HEALTH.set(transport_health(_transport).score, _transport)
 
     async def _firmware_check_loop(self):
         """Background task: check Geberit cloud for firmware updates on startup and every hour.
@@ -2948,7 +3197,7 @@ class ApiMode:
                             f"{topic}/centralDevice/firmwareUpdate",
                             json.dumps(result),
                         )
-                        await self.rest_api.broadcast_state(self.service.device_state.copy())
+                        await self.service.device_state.publish()
                     except Exception as exc:
                         logger.warning("Firmware check error: %s", exc)
 
@@ -2963,55 +3212,46 @@ class ApiMode:
             return
 
     async def _fetch_state(self, client, _skip_profile: bool = False):
-        result = await client.base_client.get_system_parameter_list_async(SPL_PARAMS_MERA_COMFORT)
+        # Only the SPL indices of the [POLL] fields plan are read.
+        plan = self.service.poll_plan
+        state = FieldCatalog.spl_fields(await FieldCatalog.read_system_parameters(client.base_client, plan))
         # Update device_state before _on_demand's finally fires so the
         # "disconnected" SSE broadcast carries fresh values.
-        self.service.device_state["is_user_sitting"]           = result.data_array[0] != 0
-        self.service.device_state["is_anal_shower_running"]    = result.data_array[3] != 0  # param 3 confirmed = anal shower
-        self.service.device_state["is_lady_shower_running"]    = result.data_array[2] != 0
-        self.service.device_state["is_dryer_running"]          = result.data_array[1] != 0  # param 1, dryer state unknown
-        self.service.device_state["last_error_code"]           = result.data_array[6]
-        self.service.device_state["lid_offset_position"]       = result.data_array[8]  # SPL index 12, position 8
-        self.service.device_state["shower_arm_offset_position"] = result.data_array[9]  # SPL index 13, position 9
-        self.service.device_state["descaling_state"]            = result.data_array[4]  # SPL index 4: 0=idle 1=preparing 2=waiting 3=running
-        self.service.device_state["descaling_duration_min"]     = result.data_array[5]  # SPL index 5: countdown minutes
-        state = {
-            "is_user_sitting":            self.service.device_state["is_user_sitting"],
-            "is_anal_shower_running":     self.service.device_state["is_anal_shower_running"],
-            "is_lady_shower_running":     self.service.device_state["is_lady_shower_running"],
-            "is_dryer_running":           self.service.device_state["is_dryer_running"],
-            "last_error_code":            self.service.device_state["last_error_code"],
-            "lid_offset_position":        self.service.device_state["lid_offset_position"],
-            "shower_arm_offset_position": self.service.device_state["shower_arm_offset_position"],
-            "descaling_state":            self.service.device_state["descaling_state"],
-            "descaling_duration_min":     self.service.device_state["descaling_duration_min"],
-        }
+        self.service.device_state.update(state)
         if _skip_profile:
             return state
-        # Use cached profile settings — they change only on explicit user action via
-        # set_profile_setting(), which updates device_state["profile_settings"] directly.
-        # Re-querying all 11 settings every poll wastes ~2.2 s.
-        if self.service.device_state["profile_settings"] is None:
-            profile_settings = await client.base_client.get_stored_profile_settings_async()
+        await self._preemption_point()
+        # Re-querying all 11 settings every poll wastes ~2.2 s: read them once, then
+        # re-read a few per poll (SettingsRefresher) to pick up changes made in the
+        # Geberit app or on the remote control.
+        if self.service.device_state["profile_settings"] is None and plan.profile_ids:
+            profile_settings = await client.base_client.get_stored_profile_settings_async(ids=plan.profile_ids)
             self.service.device_state["profile_settings"] = profile_settings
+            self.service.settings_refresher.record("profile", profile_settings)
+        else:
+            await self.service._refresh_settings(client.base_client)
         profile_settings = self.service.device_state["profile_settings"]
         return {**state, "profile_settings": profile_settings}
 
     async def _fetch_state_and_info(self, client):
         """Used for the first on-demand poll only: fetch state + identification in one BLE session."""
+        plan = self.service.poll_plan
         ident = await client.base_client.get_device_identification_async(0)
         # GetFilterStatus before GetSPL: read filter data while the device is in a clean state
         # at the start of the session (no prior proc calls that could affect its response).
+        filter_status = None
         try:
-            filter_status = await client.base_client.get_filter_status_async()
+            if plan.filter_status:
+                filter_status = await client.base_client.get_filter_status_async()
         except BLEPeripheralTimeoutError:
             logger.warning("GetFilterStatus (0x59) timed out — device may be stuck for this proc; skipping, filter_status=None")
-            filter_status = None
         state = await self._fetch_state(client, _skip_profile=True)
+        await self._preemption_point()
 
         # Remaining identification calls (safe to do after GetSPL).
         initial_op_date = await client.base_client.get_device_initial_operation_date()
         fw = await client.base_client.get_firmware_version_list_async()
+        await self._preemption_point()
 
         info = {
             "sap_number": ident.sap_number,
@@ -3024,14 +3264,20 @@ class ApiMode:
         }
 
         # Profile settings last — after GetFilterStatus — to avoid exhausting the device.
-        profile_settings = await client.base_client.get_stored_profile_settings_async()
-        self.service.device_state["profile_settings"] = profile_settings
-        try:
-            common_settings = await client.base_client.get_stored_common_settings_async()
-        except BLEPeripheralTimeoutError:
-            logger.warning("GetStoredCommonSettings timed out — common_settings will be unavailable for this poll")
-            common_settings = {}
-        self.service.device_state["common_settings"] = common_settings
+        # Settings outside the [POLL] fields plan are not read (None).
+        profile_settings = common_settings = None
+        if plan.profile_ids:
+            profile_settings = await client.base_client.get_stored_profile_settings_async(ids=plan.profile_ids)
+            self.service.device_state["profile_settings"] = profile_settings
+            self.service.settings_refresher.record("profile", profile_settings)
+        if plan.common_ids:
+            try:
+                common_settings = await client.base_client.get_stored_common_settings_async(ids=plan.common_ids)
+            except BLEPeripheralTimeoutError:
+                logger.warning("GetStoredCommonSettings timed out — common_settings will be unavailable for this poll")
+                common_settings = {}
+            self.service.device_state["common_settings"] = common_settings
+            self.service.settings_refresher.record("common", common_settings)
         return {**state, **info, "profile_settings": profile_settings, "common_settings": common_settings}
 
     async def _fetch_info(self, client):
@@ -3083,7 +3329,7 @@ class ApiMode:
             self.service.device_state["filter_status"] = new_fs
             topic = self.service.mqttConfig['topic']
             await self._publish_filter_status_to_mqtt(new_fs, topic)
-            await self.rest_api.broadcast_state(self.service.device_state.copy())
+            await self.service.device_state.publish()
         elif command == "trigger-flush-manually":
             await client.trigger_flush_manually()
         elif command == "prepare-descaling":
@@ -3114,6 +3360,7 @@ class ApiMode:
     async def get_alba_misc_state(self) -> dict:
         """GET /alba/misc-state — reads all misc DpIds from an Alba device."""
         from aquaclean_console_app.aquaclean_core.Clients.AlbaClient import AlbaClient as _AlbaClient
+        from fastapi import HTTPException
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
@@ -3130,6 +3377,7 @@ class ApiMode:
     async def get_alba_instanced_state(self) -> dict:
         """GET /alba/instanced-state — reads instanced DpIds (progress, versions, statistics)."""
         from aquaclean_console_app.aquaclean_core.Clients.AlbaClient import AlbaClient as _AlbaClient
+        from fastapi import HTTPException
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
@@ -3154,6 +3402,7 @@ class ApiMode:
     async def run_alba_command(self, command: str, value=None) -> dict:
         """POST /alba/command/<cmd> — Alba-specific commands."""
         from aquaclean_console_app.aquaclean_core.Clients.AlbaClient import AlbaClient as _AlbaClient
+        from fastapi import HTTPException
 
         async def _execute(client):
             if not isinstance(client, _AlbaClient):
@@ -3206,9 +3455,9 @@ class ApiMode:
         if self.ble_connection == "persistent":
             if self.service.client is None:
                 self._http_error(503, E4003)
-            await self._persistent_query(lambda client: _execute(client))
+            await self._persistent_query(lambda client: _execute(client), Priority.COMMAND)
         else:
-            await self._on_demand(_execute)
+            await self._command_batcher.submit(f"alba:{command}:{value}", _execute)
         return {"status": "success", "command": command, "value": value}
 
 
@@ -3492,6 +3741,20 @@ def get_ha_discovery_configs(topic_prefix: str) -> list:
                 ("wc_lid_close_automatically",    "WC Lid Close Automatically",    "wcLidCloseAutomatically",     7, "mdi:door-closed",         0, 1),
             ]
         ],
+        # --- Sensor: usage sessions today (published after every session, see UsageSessions.py) ---
+        {
+            "topic": f"{HA}/sensor/geberit_aquaclean/usage_sessions_today/config",
+            "payload": {
+                "name": "Sessions Today",
+                "unique_id": "geberit_aquaclean_usage_sessions_today",
+                "state_topic": f"{t}/peripheralDevice/usage/today",
+                "value_template": "{{ value_json.sessions }}",
+                "json_attributes_topic": f"{t}/peripheralDevice/usage/today",
+                "icon": "mdi:counter",
+                "state_class": "total_increasing",
+                "device": DEVICE,
+            },
+        },
         # --- Sensors: descale statistics (ApiMode.get_statistics_descale) ---
         {
             "topic": f"{HA}/sensor/geberit_aquaclean/days_until_next_descale/config",
@@ -3908,6 +4171,62 @@ def get_ha_discovery_configs(topic_prefix: str) -> list:
     ]
 
 
+def _ha_discovery_for_device(configs: list, device: str) -> list:
+    """Namespace discovery configs for one device of a multi-device bridge.
+
+    Node IDs, unique_ids and device identifiers "geberit_aquaclean…" become
+    "geberit_aquaclean_<device>…" and the HA device names get "(<device>)",
+    so each toilet is its own HA device.  device "" leaves them unchanged —
+    single-device installs keep their entity IDs."""
+    if not device:
+        return configs
+    base, ours = "geberit_aquaclean", f"geberit_aquaclean_{device}"
+
+    def _ns(value: str) -> str:
+        return ours + value[len(base):] if value.startswith(base) else value
+
+    result = []
+    for cfg in configs:
+        payload = dict(cfg["payload"])
+        if "unique_id" in payload:
+            payload["unique_id"] = _ns(payload["unique_id"])
+        if "device" in payload:
+            dev = dict(payload["device"])
+            dev["identifiers"] = [_ns(i) for i in dev.get("identifiers", [])]
+            if "via_device" in dev:
+                dev["via_device"] = _ns(dev["via_device"])
+            dev["name"] = f"{dev['name']} ({device})"
+            payload["device"] = dev
+        parts = cfg["topic"].split("/")
+        parts[2] = _ns(parts[2])             # homeassistant/<component>/<node_id>/<object_id>/config
+        result.append({**cfg, "topic": "/".join(parts), "payload": payload})
+    return result
+
+
+# Serialised discovery messages keyed by (topic prefix, device).  The entity set
+# depends only on those, so it is built and json.dumps()ed once per process.
+_HA_DISCOVERY_MESSAGES: dict[tuple, tuple] = {}
+
+
+def get_ha_discovery_messages(topic_prefix: str, device: str = "") -> tuple:
+    """
+    Return (topic, payload_json, payload_hash) tuples for all HA discovery entities.
+
+    Memoised per (topic_prefix, device).  payload_hash matches
+    MqttService.discovery_payload_hash() of the retained broker copy, so
+    unchanged entities can be skipped on (re)publish.
+    """
+    messages = _HA_DISCOVERY_MESSAGES.get((topic_prefix, device))
+    if messages is None:
+        messages = []
+        for cfg in _ha_discovery_for_device(get_ha_discovery_configs(topic_prefix), device):
+            payload = json.dumps(cfg["payload"])
+            messages.append((cfg["topic"], payload, discovery_payload_hash(payload)))
+        messages = tuple(messages)
+        _HA_DISCOVERY_MESSAGES[(topic_prefix, device)] = messages
+    return messages
+
+
 def run_ha_discovery(remove: bool = False) -> dict:
     """
     Publish or remove Home Assistant MQTT discovery messages.
@@ -3933,11 +4252,16 @@ def run_ha_discovery(remove: bool = False) -> dict:
 
     client.connect(host, port, 60)
 
-    configs = get_ha_discovery_configs(topic_prefix)
+    # Every configured device under its own topic namespace ([DEVICES] names).
+    configs = []
+    for device in device_names() or [""]:
+        device_topic = device_config(device).get("MQTT", "topic", fallback=topic_prefix)
+        configs += [(device, cfg) for cfg in
+                    _ha_discovery_for_device(get_ha_discovery_configs(device_topic), device)]
     published = []
     failed = []
 
-    for cfg in configs:
+    for device, cfg in configs:
         topic = cfg["topic"]
         if remove:
             res = client.publish(topic, payload=None, retain=True)
@@ -3945,6 +4269,8 @@ def run_ha_discovery(remove: bool = False) -> dict:
         else:
             res = client.publish(topic, payload=json.dumps(cfg["payload"]), retain=True)
             label = cfg["payload"]["name"]
+        if device:
+            label = f"{device}: {label}"
 
         if res.rc == mqtt.MQTT_ERR_SUCCESS:
             published.append(label)
@@ -3957,15 +4283,7 @@ def run_ha_discovery(remove: bool = False) -> dict:
 
 async def run_cli(args):
     """Executes the CLI logic and ensures JSON is always printed."""
-    result = {
-        "status": "error",
-        "command": getattr(args, 'command', None),
-        "device": None,
-        "serial_number": None,
-        "data": {},
-        "error_code": None,
-        "message": "Unknown error"
-    }
+    result = CliArgs.cli_result(getattr(args, 'command', None))
 
     if not args.command:
         result["message"] = "CLI mode requires --command"
@@ -3973,31 +4291,9 @@ async def run_cli(args):
         return
 
     # --- Commands that don't need a BLE connection ---
-    if args.command == 'check-config':
-        errors = _check_config_errors()
-        if errors:
-            result["status"] = "error"
-            result["message"] = f"{len(errors)} configuration error(s) found"
-            result["data"] = {"errors": errors}
-        else:
-            result["status"] = "success"
-            result["message"] = "Configuration is valid"
-            result["data"] = {"errors": []}
-        print(json.dumps(result, indent=2))
-        return
-
-    if args.command == 'get-config':
-        result["data"] = {
-            "ble_connection":  config.get("SERVICE", "ble_connection", fallback="persistent"),
-            "poll_interval":   float(config.get("POLL", "interval", fallback="0")),
-            "mqtt_enabled":    config.getboolean("SERVICE", "mqtt_enabled", fallback=True),
-            "device_id":       config.get("BLE", "device_id"),
-            "api_host":        config.get("API", "host", fallback="0.0.0.0"),
-            "api_port":        int(config.get("API", "port", fallback="8080")),
-        }
-        result["status"] = "success"
-        result["message"] = "Config read from config.ini"
-        print(json.dumps(result, indent=2))
+    local = CliArgs.local_command(args)
+    if local is not None:
+        print(json.dumps(local, indent=2))
         return
 
     if args.command in ('publish-ha-discovery', 'remove-ha-discovery'):
@@ -4052,12 +4348,51 @@ async def run_cli(args):
         print(json.dumps(result, indent=2))
         return
 
-    if args.command == 'system-info':
-        result["status"] = "success"
-        result["message"] = "System info collected"
-        result["data"] = get_system_info()
+    if args.command == 'batch':
+        try:
+            batch_items = DataBatch.plan(getattr(args, 'items', '') or '')
+        except ValueError as e:
+            result["error_code"] = E4001.code
+            result["message"] = str(e)
+            print(json.dumps(result, indent=2))
+            return
+
+    # --device: one of [DEVICES] names (default: the first; none configured = [BLE])
+    names = device_names()
+    device = getattr(args, 'device', None) or (names[0] if names else "")
+    if device and device not in names:
+        result["error_code"] = E4001.code
+        result["message"] = f"Unknown device {device!r} — configured: {', '.join(names) or 'none ([BLE] device_id)'}"
         print(json.dumps(result, indent=2))
         return
+    device_cfg = device_config(device)
+
+    # --- Through a running bridge: its BLE session, scheduler and cache (BridgeClient.py) ---
+    if (args.command in BridgeClient.ROUTES and not getattr(args, 'direct', False)
+            and args.address in (None, device_cfg.get("BLE", "device_id", fallback=""))):
+        base_url = BridgeClient.bridge_url(config.get("API", "host", fallback="0.0.0.0"),
+                                           int(config.get("API", "port", fallback="8080")))
+        bridge_version = await BridgeClient.probe(base_url)
+        if bridge_version:
+            logger.info(f"Sending {args.command} through the running bridge at {base_url} ({bridge_version})")
+            result["bridge"] = base_url
+            if device:
+                base_url += f"/devices/{device}"
+            try:
+                result["data"] = await BridgeClient.run(base_url, args.command,
+                                                        items=getattr(args, 'items', '') or '',
+                                                        fmt=getattr(args, 'format', None) or 'json')
+                result["status"] = "success"
+                result["message"] = f"Command {args.command} completed via bridge"
+            except BridgeClient.BridgeError as e:
+                result["error_code"] = e.code or E7004.code
+                result["message"] = str(e)
+            except OSError as e:
+                result["error_code"] = E7004.code
+                result["message"] = f"Bridge at {base_url} stopped answering: {e}"
+            print(json.dumps(result, indent=2))
+            return
+        logger.debug(f"No bridge at {base_url} — connecting directly")
 
     if args.command == 'performance-stats':
         result["status"] = "success"
@@ -4071,8 +4406,8 @@ async def run_cli(args):
     # --- Commands that require a BLE connection ---
     client = None
     try:
-        device_id = args.address or config.get("BLE", "device_id")
-        connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk)
+        device_id = args.address or device_cfg.get("BLE", "device_id")
+        connector = BluetoothLeConnector(esphome_host, esphome_port, esphome_noise_psk, proxy_pool=PROXIES)
         factory = AquaCleanClientFactory(connector)
         client = factory.create_client()
 
@@ -4142,6 +4477,9 @@ async def run_cli(args):
             result["data"] = await client.base_client.get_filter_status_async()
         elif args.command == 'profile-settings':
             result["data"] = await client.base_client.get_stored_profile_settings_async()
+        elif args.command == 'batch':
+            result["data"] = await DataBatch.run(
+                client, batch_items, is_fatal=lambda exc: not isinstance(exc, BLEPeripheralTimeoutError))
         elif args.command == 'toggle-lid':
             await client.toggle_lid_position()
             result["data"] = {"action": "lid_toggled"}
@@ -4240,13 +4578,13 @@ async def main(args):
         config.set('SERVICE', 'ha_discovery_on_startup', str(args.ha_discovery).lower())
 
     if args.mode in ('service', 'api'):
-        errors = _check_config_errors()
+        errors = check_config_errors()
         if errors:
             for e in errors:
                 logging.error(f"Invalid configuration: {e}")
             sys.exit(1)
         _py = sys.version_info
-        logger.info(f"aquaclean-bridge {_bridge_version} (Python {_py.major}.{_py.minor}.{_py.micro})")
+        logger.info(f"aquaclean-bridge {BRIDGE_VERSION} (Python {_py.major}.{_py.minor}.{_py.micro})")
         try:
             _si = get_system_info()
             _bt = _si["bluetooth"]
@@ -4277,135 +4615,43 @@ async def main(args):
         except Exception:
             pass
         _log_startup_config()
+    _configure_adaptive_timeouts()
+    _configure_proxies()
+    if args.mode in ('service', 'api'):
+        _configure_loop_monitor()
+        _configure_transport()
+        _configure_alba_retransmit()
+        LOOP_MONITOR.start()
+    # [DEVICES] names: one ServiceMode / ApiMode per device, sharing TRANSPORT.
+    names = device_names()
     if args.mode == 'service':
-        service = ServiceMode()
-        await shutdown_waits_for(service.run())
+        if len(names) > TRANSPORT.slots:
+            logging.error(f"Invalid configuration: service mode keeps all {len(names)} devices connected — "
+                          f"[DEVICES] max_connections must be >= {len(names)}")
+            sys.exit(1)
+        services = [ServiceMode(device=name) for name in names] or [ServiceMode()]
+        await shutdown_waits_for(asyncio.gather(*(service.run() for service in services)))
+        LOOP_MONITOR.stop()
+        ADAPTIVE_TIMEOUTS.save()
     elif args.mode == 'api':
-        api = ApiMode()
-        await shutdown_waits_for(api.run())
+        api = ApiMode(names[0] if names else "")
+        if names:
+            api.set_devices([api] + [ApiMode(name, shutdown_event=api._shutdown_event) for name in names[1:]])
+        await shutdown_waits_for(asyncio.gather(
+            api.run(), *(other.run(serve=False) for other in api.devices[1:])))
+        LOOP_MONITOR.stop()
+        ADAPTIVE_TIMEOUTS.save()
         # Our signal handler replaced aiorun's, so aiorun won't stop the
         # loop on its own.  Stopping it here lets aiorun enter its normal
         # shutdown phase (cancel remaining tasks like bleak D-Bus, etc.).
         asyncio.get_running_loop().stop()
     else:
         await run_cli(args)
+        ADAPTIVE_TIMEOUTS.save()
         loop = asyncio.get_running_loop()
         loop.stop()
 
 
-class JsonArgumentParser(argparse.ArgumentParser):
-    """Custom parser that outputs argument errors as JSON; help uses standard text."""
-
-    def error(self, message):
-        """Called on invalid choices, missing arguments, or bad types."""
-        result = {
-            "status": "error",
-            "command": "invalid",
-            "message": f"Argument Error: {message}",
-            "data": {}
-        }
-        print(json.dumps(result, indent=2))
-        sys.exit(0)
-
-    def exit(self, status=0, message=None):
-        if message:
-            self.error(message)
-        sys.exit(status)
-
-
 if __name__ == "__main__":
-    parser = JsonArgumentParser(
-        prog=os.path.basename(sys.argv[0]),
-        description="Geberit AquaClean Controller",
-        epilog=(
-            "device state queries (require BLE):\n"
-            "  %(prog)s --mode cli --command status\n"
-            "  %(prog)s --mode cli --command system-parameters\n"
-            "  %(prog)s --mode cli --command user-sitting-state\n"
-            "  %(prog)s --mode cli --command anal-shower-state\n"
-            "  %(prog)s --mode cli --command lady-shower-state\n"
-            "  %(prog)s --mode cli --command dryer-state\n"
-            "\n"
-            "device info queries (require BLE):\n"
-            "  %(prog)s --mode cli --command info\n"
-            "  %(prog)s --mode cli --command identification\n"
-            "  %(prog)s --mode cli --command initial-operation-date\n"
-            "  %(prog)s --mode cli --command soc-versions\n"
-            "  %(prog)s --mode cli --command statistics-descale\n"
-            "  %(prog)s --mode cli --command filter-status\n"
-            "  %(prog)s --mode cli --command firmware-version-list\n"
-            "\n"
-            "device commands (require BLE):\n"
-            "  %(prog)s --mode cli --command toggle-lid\n"
-            "  %(prog)s --mode cli --command toggle-anal\n"
-            "  %(prog)s --mode cli --command toggle-lady\n"
-            "  %(prog)s --mode cli --command toggle-dryer\n"
-            "  %(prog)s --mode cli --command toggle-orientation-light\n"
-            "  %(prog)s --mode cli --command reset-filter-counter\n"
-            "  %(prog)s --mode cli --command trigger-flush-manually\n"
-            "  %(prog)s --mode cli --command prepare-descaling\n"
-            "  %(prog)s --mode cli --command confirm-descaling\n"
-            "  %(prog)s --mode cli --command cancel-descaling\n"
-            "  %(prog)s --mode cli --command postpone-descaling\n"
-            "  %(prog)s --mode cli --command start-cleaning-device\n"
-            "  %(prog)s --mode cli --command execute-next-cleaning-step\n"
-            "  %(prog)s --mode cli --command start-lid-calibration\n"
-            "  %(prog)s --mode cli --command lid-offset-save\n"
-            "  %(prog)s --mode cli --command lid-offset-increment\n"
-            "  %(prog)s --mode cli --command lid-offset-decrement\n"
-            "\n"
-            "app config / home assistant (no BLE required):\n"
-            "  %(prog)s --mode cli --command check-config\n"
-            "  %(prog)s --mode cli --command get-config\n"
-            "  %(prog)s --mode cli --command publish-ha-discovery\n"
-            "  %(prog)s --mode cli --command remove-ha-discovery\n"
-            "  %(prog)s --mode cli --command system-info\n"
-            "  %(prog)s --mode cli --command performance-stats\n"
-            "  %(prog)s --mode cli --command performance-stats --format markdown\n"
-            "\n"
-            "ESPHome proxy (no BLE required):\n"
-            "  %(prog)s --mode cli --command esp32-connect\n"
-            "  %(prog)s --mode cli --command esp32-disconnect\n"
-            "\n"
-            "options:\n"
-            "  --address 38:AB:XX:XX:ZZ:67   override BLE device address from config.ini\n"
-            "  --format json|markdown         output format for performance-stats (default: json)\n"
-            "\n"
-            "CLI results and errors are written to stdout as JSON.\n"
-            "Log output goes to stderr (redirect with 2>logfile)."
-        ),
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-    )
-    parser.add_argument('--mode', choices=['service', 'cli', 'api'], default='service')
-    parser.add_argument('--command', choices=[
-        # device state queries
-        'status', 'system-parameters',
-        'user-sitting-state', 'anal-shower-state', 'lady-shower-state', 'dryer-state',
-        # device info queries
-        'info', 'identification', 'initial-operation-date', 'soc-versions', 'node-list',
-        'statistics-descale', 'filter-status', 'firmware-version-list', 'profile-settings',
-        # device commands
-        'toggle-lid', 'toggle-anal', 'toggle-lady', 'toggle-dryer', 'toggle-orientation-light',
-        'reset-filter-counter', 'trigger-flush-manually',
-        'prepare-descaling', 'confirm-descaling', 'cancel-descaling', 'postpone-descaling',
-        'start-cleaning-device', 'execute-next-cleaning-step',
-        'start-lid-calibration', 'lid-offset-save', 'lid-offset-increment', 'lid-offset-decrement',
-        # app config / home assistant (no BLE required)
-        'check-config', 'get-config', 'publish-ha-discovery', 'remove-ha-discovery',
-        # system info + performance stats (no BLE required)
-        'system-info', 'performance-stats',
-        # ESPHome proxy (no BLE required)
-        'esp32-connect', 'esp32-disconnect',
-    ])
-    parser.add_argument('--address')
-    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
-                        help='Output format for performance-stats (default: json)')
-    parser.add_argument('--ha-discovery', default=None,
-                        action=argparse.BooleanOptionalAction,
-                        dest='ha_discovery',
-                        help='Publish HA MQTT discovery on startup (overrides config ha_discovery_on_startup)')
-    parser.add_argument('--version', action='version',
-                        version=f'aquaclean-bridge {_bridge_version}')
-
-    args = parser.parse_args()
-    run(main(args))
+    from aiorun import run
+    run(main(CliArgs.build_parser(os.path.basename(sys.argv[0])).parse_args()))
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the BLE wire-path codecs, with stored baselines.
+
+One benchmark per component a response passes through between the GATT
+notification and the parsed result:
+
+  Mera / Tuma
+    frame.create_from_bytes     FrameFactory.CreateFrameFromBytes (SINGLE/FIRST/CONS/INFO/CONTROL)
+    frame.collector_reassembly  FrameCollector start_transaction + add_frame × n
+    crc.create                  CrcMessage.create (request build, CRC16)
+    crc.is_valid                CrcMessage.is_valid (response CRC16 check)
+    message.parse_message1      MessageService.parse_message1
+    message.build_message       MessageService.build_message
+    deserializer.deserialize    Deserializer.deserialize (DeviceIdentification, SystemParameterList)
+    filter_status.result        GetFilterStatus.result
+
+  Alba
+    arendi.wrap_for_send        AriendiSecurity.wrap_for_send (COBS + CRC + AES-CTR + HDLC)
+    arendi.feed_att_bytes       AriendiSecurity.feed_att_bytes (the reverse path)
+    ble20.address               Ble20Client encode_address / decode_address
+
+Input frames come from benchmarks/frames.json (see its _comment for provenance).
+Alba frames are encrypted, so they are produced at set-up time with a fixed
+session key instead of being stored.
+
+Results are nanoseconds per operation (best of --repeat runs).  Baselines are
+stored in benchmarks/baseline.json together with a pure-Python calibration
+loop timing; on compare, the baseline is scaled by the calibration ratio so a
+baseline recorded on one machine stays usable on another.  A benchmark fails
+when it is slower than scaled_baseline × threshold.
+
+Usage
+-----
+  python benchmarks/codec_bench.py                   # run, compare with baseline.json
+  python benchmarks/codec_bench.py --update          # re-record baseline.json
+  python benchmarks/codec_bench.py --only crc        # substring filter
+  python benchmarks/codec_bench.py --threshold 1.5   # override the stored threshold
+
+Exit code 1 when any benchmark regressed, 0 otherwise.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+
+# Register SILLY/TRACE log levels before any bridge import (the codecs call logger.trace).
+def _add_level(name: str, value: int) -> None:
+    if hasattr(logging, name):
+        return
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+
+from aquaclean_console_app.aquaclean_core.Frames.FrameFactory import FrameFactory
+from aquaclean_console_app.aquaclean_core.Frames.FrameCollector import FrameCollector
+from aquaclean_console_app.aquaclean_core.Frames.Frames.FrameType import FrameType
+from aquaclean_console_app.aquaclean_core.Message.CrcMessage import CrcMessage
+from aquaclean_console_app.aquaclean_core.Message.MessageService import MessageService
+from aquaclean_console_app.aquaclean_core.Common.Deserializer import Deserializer
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.DeviceIdentification import DeviceIdentification
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.SystemParameterList import SystemParameterList
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.GetFilterStatus import GetFilterStatus
+from aquaclean_console_app.bluetooth_le.LE.AriendiSecurity import AriendiSecurity, _AesCtrState
+from aquaclean_console_app.bluetooth_le.LE.Ble20Client import encode_address, decode_address
+from aquaclean_console_app.bluetooth_le.LE.command_id import CommandId
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FRAMES_PATH = os.path.join(BENCH_DIR, "frames.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 1.30   # fail when > 30 % slower than the (calibrated) baseline
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def load_frames(path: str = FRAMES_PATH) -> dict:
+    """Return frames.json with every hex string converted to bytes."""
+    with open(path) as f:
+        raw = json.load(f)
+    out = {}
+    for key, value in raw.items():
+        if key.startswith("_"):
+            continue
+        out[key] = [bytes.fromhex(v) for v in value] if isinstance(value, list) else bytes.fromhex(value)
+    return out
+
+
+def frame_payloads(frames: list) -> list:
+    """Return [(frame_index, payload)] for a multi-frame response, as FrameService would."""
+    out = []
+    for data in frames:
+        fr = FrameFactory.CreateFrameFromBytes(data)
+        if fr.FrameType == FrameType.SINGLE:
+            index = 0 if fr.IsSubFrameCount else fr.SubFrameCountOrIndex
+            out.append((index, bytes(fr.Payload)))
+        elif fr.FrameType == FrameType.FIRST:
+            out.append((0, bytes(fr.payload)))
+        else:
+            out.append((fr.frame_count_or_number, bytes(fr.payload)))
+    return out
+
+
+def reassemble(frames: list) -> bytes:
+    """Run *frames* through a FrameCollector and return the complete message bytes."""
+    payloads = frame_payloads(frames)
+    collector = FrameCollector()
+    done = []
+
+    async def _on_complete(sender, data):
+        done.append(data)
+
+    collector.TransactionCompleteFC += _on_complete
+
+    async def _run():
+        await collector.start_transaction(len(payloads))
+        for index, payload in payloads:
+            await collector.add_frame(index, payload)
+
+    asyncio.run(_run())
+    return done[0]
+
+
+def message_args(frames: list) -> bytes:
+    """Reassemble *frames* and return the procedure result bytes."""
+    return bytes(MessageService().parse_message1(reassemble(frames)).result_bytes)
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks — each factory takes the fixtures and returns one operation
+# (a plain callable or a coroutine function) to be timed.
+# ---------------------------------------------------------------------------
+
+def _bench_create_from_bytes(fx):
+    frames = ([fx["get_filter_status_request"], fx["info_frame"], fx["control_frame"]]
+              + fx["get_filter_status_response"] + fx["get_device_identification_response"][:2])
+    create = FrameFactory.CreateFrameFromBytes
+
+    def op():
+        for data in frames:
+            create(data)
+    op.items = len(frames)
+    return op
+
+
+def _bench_collector_reassembly(fx):
+    payloads = frame_payloads(fx["get_device_identification_response"])
+    collector = FrameCollector()
+
+    async def op():
+        await collector.start_transaction(len(payloads))
+        for index, payload in payloads:
+            await collector.add_frame(index, payload)
+    return op
+
+
+def _bench_crc_create(fx):
+    body = bytes(GetFilterStatus().get_payload())
+    request = bytes([0x01, 0x01, 0x59, len(body)]) + body
+
+    def op():
+        CrcMessage.create(4, 0xFF, request)
+    return op
+
+
+def _bench_crc_is_valid(fx):
+    msg = CrcMessage.create_from_bytes(reassemble(fx["get_filter_status_response"]))
+
+    def op():
+        return msg.is_valid
+    return op
+
+
+def _bench_parse_message1(fx):
+    data = reassemble(fx["get_filter_status_response"])
+    service = MessageService()
+
+    def op():
+        service.parse_message1(data)
+    return op
+
+
+def _bench_build_message(fx):
+    body = bytes(GetFilterStatus().get_payload())
+    request = bytes([0x01, 0x01, 0x59, len(body)]) + body
+    service = MessageService()
+
+    def op():
+        service.build_message(request)
+    return op
+
+
+def _bench_deserialize(fx):
+    di = message_args(fx["get_device_identification_response"])
+    spl = message_args(fx["get_system_parameter_list_response"])
+    deserialize = Deserializer.deserialize
+
+    def op():
+        # deserialize_to_int reverses in place — hand it a fresh copy each time
+        deserialize(DeviceIdentification, bytearray(di))
+        deserialize(SystemParameterList, bytearray(spl))
+    op.items = 2
+    return op
+
+
+def _bench_filter_status_result(fx):
+    data = message_args(fx["get_filter_status_response"])
+    call = GetFilterStatus()
+
+    def op():
+        call.result(data)
+    return op
+
+
+_ALBA_KEY = bytes(range(16))
+_ALBA_NONCE = bytes(range(16, 32))
+# Plaintext Ble20 frames as seen on a poll: ReadCmd for DP 564, ReadAns with a 4-byte value
+_ALBA_PAYLOADS = (
+    bytes([CommandId.ReadCmd]) + encode_address(564),
+    bytes([CommandId.ReadAns]) + encode_address(1008) + b"\x2a\x00\x00\x00",
+)
+
+
+def _alba_pair():
+    """Return (sender, receiver) AriendiSecurity instances sharing one session key."""
+    sender, receiver = AriendiSecurity(), AriendiSecurity()
+    sender._tx_cipher = _AesCtrState(_ALBA_KEY, _ALBA_NONCE)
+    receiver._rx_cipher = _AesCtrState(_ALBA_KEY, _ALBA_NONCE)
+    sender.handshake_done = receiver.handshake_done = True
+    return sender, receiver
+
+
+def _bench_arendi_wrap(fx):
+    sender, _ = _alba_pair()
+
+    def op():
+        for payload in _ALBA_PAYLOADS:
+            sender.wrap_for_send(payload)
+    op.items = len(_ALBA_PAYLOADS)
+    return op
+
+
+def _bench_arendi_feed(fx):
+    sender, receiver = _alba_pair()
+    att = [sender.wrap_for_send(p) for p in _ALBA_PAYLOADS]
+    cipher = receiver._rx_cipher
+    counter, ks = bytes(cipher._counter), bytearray(cipher._ks)
+
+    def op():
+        # Rewind the AES-CTR keystream (ECB block cipher is stateless) so the
+        # same ciphertext decrypts again on every iteration.
+        cipher._counter[:] = counter
+        cipher._ks = ks
+        cipher._pos = 0
+        for data in att:
+            receiver.feed_att_bytes(data)
+    op.items = len(att)
+    return op
+
+
+def _bench_ble20_address(fx):
+    cases = [(564, None), (1008, None), (60, 3), (0x7FFF, 255)]
+
+    def op():
+        for dp_id, instance in cases:
+            decode_address(b"\x10" + encode_address(dp_id, instance), 1)
+    op.items = len(cases)
+    return op
+
+
+BENCHMARKS = {
+    "frame.create_from_bytes":    _bench_create_from_bytes,
+    "frame.collector_reassembly": _bench_collector_reassembly,
+    "crc.create":                 _bench_crc_create,
+    "crc.is_valid":               _bench_crc_is_valid,
+    "message.parse_message1":     _bench_parse_message1,
+    "message.build_message":      _bench_build_message,
+    "deserializer.deserialize":   _bench_deserialize,
+    "filter_status.result":       _bench_filter_status_result,
+    "arendi.wrap_for_send":       _bench_arendi_wrap,
+    "arendi.feed_att_bytes":      _bench_arendi_feed,
+    "ble20.address":              _bench_ble20_address,
+}
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def _calibration_op():
+    x = 0
+    for i in range(200):
+        x = (x * 31 + i) & 0xFFFF
+    return x
+
+
+def measure(op, min_time: float = 0.05, repeat: int = 5) -> float:
+    """Return the best time per item in ns: *repeat* runs of ≥ *min_time* seconds each."""
+    items = getattr(op, "items", 1)
+    if inspect.iscoroutinefunction(op):
+        return asyncio.run(_measure_async(op, min_time, repeat)) / items
+
+    loops = 1
+    while True:   # calibrate loop count
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter_ns() - t0
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            op()
+        best = min(best, (time.perf_counter_ns() - t0) / loops)
+    return best / items
+
+
+async def _measure_async(op, min_time: float, repeat: int) -> float:
+    loops = 1
+    while True:
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            await op()
+        elapsed = time.perf_counter_ns() - t0
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            await op()
+        best = min(best, (time.perf_counter_ns() - t0) / loops)
+    return best
+
+
+def run(names=None, min_time: float = 0.05, repeat: int = 5) -> dict:
+    """Run the selected benchmarks; return {"calibration_ns": …, "results": {name: ns}}."""
+    fx = load_frames()
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        results[name] = round(measure(factory(fx), min_time, repeat), 1)
+    return {
+        "calibration_ns": round(measure(_calibration_op, min_time, repeat), 1),
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def load_baseline(path: str = BASELINE_PATH):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != BASELINE_VERSION:
+        return None
+    return data
+
+
+def save_baseline(run_result: dict, path: str = BASELINE_PATH,
+                  threshold: float = DEFAULT_THRESHOLD) -> None:
+    data = {
+        "version":        BASELINE_VERSION,
+        "python":         platform.python_version(),
+        "machine":        platform.machine(),
+        "threshold":      threshold,
+        "calibration_ns": run_result["calibration_ns"],
+        "results":        run_result["results"],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def compare(run_result: dict, baseline: dict, threshold=None) -> list:
+    """Return [(name, baseline_ns, current_ns, ratio, regressed)] — ratio is calibrated."""
+    threshold = threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+    base_cal = baseline.get("calibration_ns") or 0
+    scale = run_result["calibration_ns"] / base_cal if base_cal else 1.0
+    rows = []
+    for name, current in run_result["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            rows.append((name, None, current, None, False))
+            continue
+        ratio = current / (base * scale)
+        rows.append((name, base, current, round(ratio, 3), ratio > threshold))
+    return rows
+
+
+def _print_rows(rows, threshold) -> None:
+    print(f"{'Benchmark':<28} {'Baseline ns':>12} {'Now ns':>12} {'Ratio':>7}")
+    print("-" * 62)
+    for name, base, current, ratio, regressed in rows:
+        base_s = f"{base:,.0f}" if base else "—"
+        ratio_s = f"{ratio:.2f}" if ratio is not None else "new"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28} {base_s:>12} {current:>12,.0f} {ratio_s:>7}{flag}")
+    print(f"\nthreshold: {threshold:.2f}× calibrated baseline")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="AquaClean codec micro-benchmarks")
+    parser.add_argument("--update", action="store_true", help="re-record baseline.json")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this string")
+    parser.add_argument("--threshold", type=float, help="max allowed slowdown ratio")
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark (best is kept)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    args = parser.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if args.only in n] if args.only else None
+    result = run(names, args.min_time, args.repeat)
+
+    if args.update:
+        save_baseline(result, args.baseline, args.threshold or DEFAULT_THRESHOLD)
+        for name, ns in result["results"].items():
+            print(f"{name:<28} {ns:>12,.0f} ns")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        for name, ns in result["results"].items():
+            print(f"{name:<28} {ns:>12,.0f} ns")
+        print(f"\nNo baseline at {args.baseline} — run with --update to record one.")
+        return 0
+
+    threshold = args.threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+    rows = compare(result, baseline, threshold)
+    _print_rows(rows, threshold)
+    return 1 if any(r[4] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
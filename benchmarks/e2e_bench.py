@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark: bridge clients against the device mocks over
+the in-process virtual GATT link (aquaclean_ble_relay/virtual_link.py).
+
+Where codec_bench.py times the codecs in isolation, this runs the whole
+request path — ApiMode / client → frame + message codecs → connector →
+virtual link → MeraService / Arendi server → mock device logic → and back —
+with no adapter, no BlueZ and no D-Bus daemon.  bluez_peripheral must be
+importable (the mock modules import it at module level).
+
+Scenarios (one BLE connection each, opened before timing starts):
+
+  mera   ApiMode._fetch_state_and_info — the first on-demand poll: identity,
+         filter status, GetSPL, initial operation date, firmware list,
+         profile and common settings (~25 requests)
+  alba   AlbaBaseClient.get_misc_state_async — every "misc" DpId read
+
+Per scenario:
+  cycles/s        wall-clock throughput.  Bound by the protocol's own pacing
+                  (send_request's settle sleep, the mock's inter-frame
+                  spacing), so it moves with protocol changes, not CPU speed
+  cpu ms/cycle    process CPU time per cycle — the Python cost of one cycle
+  PDUs/cycle      ATT PDUs on the link, both directions
+  retained B/cyc  net traced-heap growth per cycle (tracemalloc) — > 0 over
+                  many cycles means something accumulates per poll
+  peak B/cyc      highest traced-heap rise within a single cycle
+
+Memory is measured in a second pass with tracemalloc running, so it does not
+distort the timing pass.  Mock-side logging is lowered to WARNING; the mock's
+in-memory session log still runs, as it does on the real mock.
+
+Usage
+-----
+  python benchmarks/e2e_bench.py                      # both scenarios
+  python benchmarks/e2e_bench.py --only alba --cycles 200
+  python benchmarks/e2e_bench.py --latency-ms 7.5 --jitter-ms 5 --loss 0.01 --seed 1
+  python benchmarks/e2e_bench.py --json               # machine-readable output
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+
+# Register SILLY/TRACE log levels before any bridge import (the codecs call logger.trace).
+def _add_level(name: str, value: int) -> None:
+    if hasattr(logging, name):
+        return
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+
+from aquaclean_ble_relay.virtual_link import VirtualMeraLink, VirtualAlbaLink, VIRTUAL_ADDRESS
+from aquaclean_console_app import main as bridge
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanClient import AquaCleanClient
+from aquaclean_console_app.aquaclean_core.Clients.AlbaClient import AlbaClient
+
+DEFAULT_CYCLES = {"mera": 5, "alba": 50}
+
+
+class _ApiModeStandIn:
+    """Just enough ApiMode for _fetch_state_and_info, without fastapi.
+
+    The service is a real ServiceMode (poll plan, settings refresher,
+    device_state), so the stand-in follows what the fetch methods read from it.
+    No on-demand session is ever waiting, so _preemption_point is a no-op.
+    """
+
+    _fetch_state = bridge.ApiMode._fetch_state
+    _fetch_state_and_info = bridge.ApiMode._fetch_state_and_info
+    _preemption_point = bridge.ApiMode._preemption_point
+
+    def __init__(self):
+        self.service = bridge.ServiceMode(mqtt_enabled=False)
+        self._open_link_runner = None
+
+
+async def _open_mera(link_kwargs: dict):
+    link = VirtualMeraLink(**link_kwargs)
+    link.logger.setLevel(logging.WARNING)
+    client = AquaCleanClient(link)
+    await client.connect_ble_only(VIRTUAL_ADDRESS)
+    api = _ApiModeStandIn()
+
+    async def cycle():
+        return await api._fetch_state_and_info(client)
+    return link, cycle
+
+
+async def _open_alba(link_kwargs: dict):
+    link = VirtualAlbaLink(**link_kwargs)
+    link.logger.setLevel(logging.WARNING)
+    client = AlbaClient(link)
+    await client.connect_ble_only(VIRTUAL_ADDRESS)
+
+    async def cycle():
+        return await client.base_client.get_misc_state_async()
+    return link, cycle
+
+
+SCENARIOS = {
+    "mera": _open_mera,
+    "alba": _open_alba,
+}
+
+
+def _pdus(link) -> int:
+    return sum(d["pdus"] for d in link.link_stats().values())
+
+
+async def run_scenario(name: str, cycles: int, state_dir: str, latency_ms: float = 0.0,
+                       jitter_ms: float = 0.0, loss: float = 0.0, seed=None) -> dict:
+    """Open one virtual connection, run *cycles* timed cycles, then *cycles* traced cycles."""
+    link_kwargs = {
+        "state_dir": state_dir, "latency_ms": latency_ms, "jitter_ms": jitter_ms,
+        "loss": loss, "seed": seed,
+        # Unique per run: mock_logging caches one logger (and its log file) per adapter name.
+        "adapter": f"bench-{name}-{os.path.basename(state_dir)}",
+    }
+    link, cycle = await SCENARIOS[name](link_kwargs)
+    try:
+        last = await cycle()                  # warm-up: imports, caches, first-call paths
+        pdus0 = _pdus(link)
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        per_cycle = []
+        for _ in range(cycles):
+            t0 = time.perf_counter()
+            last = await cycle()
+            per_cycle.append(time.perf_counter() - t0)
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        pdus = _pdus(link) - pdus0
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            peak_rise = 0
+            for _ in range(cycles):
+                start = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                await cycle()
+                peak_rise = max(peak_rise, tracemalloc.get_traced_memory()[1] - start)
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0] - base
+        finally:
+            tracemalloc.stop()
+    finally:
+        await link.disconnect()
+
+    return {
+        "cycles":                    cycles,
+        "cycles_per_s":              round(cycles / wall, 2) if wall else None,
+        "ms_per_cycle":              round(wall / cycles * 1000, 1),
+        "ms_per_cycle_min":          round(min(per_cycle) * 1000, 1),
+        "ms_per_cycle_max":          round(max(per_cycle) * 1000, 1),
+        "cpu_ms_per_cycle":          round(cpu / cycles * 1000, 2),
+        "pdus_per_cycle":            round(pdus / cycles, 1),
+        "retained_bytes_per_cycle":  round(retained / cycles),
+        "peak_bytes_per_cycle":      peak_rise,
+        "result_keys":               len(last) if isinstance(last, dict) else None,
+    }
+
+
+def run(names=None, cycles=None, **link_params) -> dict:
+    """Run the selected scenarios; return {name: metrics}.  cycles=None → DEFAULT_CYCLES."""
+    state_dir = tempfile.mkdtemp(prefix="aquaclean-e2e-")
+    try:
+        results = {}
+        for name in SCENARIOS:
+            if names is not None and name not in names:
+                continue
+            n = cycles or DEFAULT_CYCLES[name]
+            results[name] = asyncio.run(run_scenario(name, n, state_dir, **link_params))
+        return results
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def _print_results(results: dict, link_params: dict) -> None:
+    print(f"{'Scenario':<8} {'Cycles':>6} {'cycles/s':>9} {'ms/cyc':>8} {'min':>7} {'max':>7} "
+          f"{'CPU ms':>7} {'PDUs':>6} {'retained B':>11} {'peak B':>9}")
+    print("-" * 88)
+    for name, r in results.items():
+        print(f"{name:<8} {r['cycles']:>6} {r['cycles_per_s']:>9} {r['ms_per_cycle']:>8} "
+              f"{r['ms_per_cycle_min']:>7} {r['ms_per_cycle_max']:>7} {r['cpu_ms_per_cycle']:>7} "
+              f"{r['pdus_per_cycle']:>6} {r['retained_bytes_per_cycle']:>11,} {r['peak_bytes_per_cycle']:>9,}")
+    print(f"\nlink: latency {link_params['latency_ms']} ms, jitter {link_params['jitter_ms']} ms, "
+          f"loss {link_params['loss']:.1%}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="AquaClean end-to-end benchmark over the virtual GATT link")
+    parser.add_argument("--only", choices=sorted(SCENARIOS), help="run a single scenario")
+    parser.add_argument("--cycles", type=int, help="timed cycles per scenario (default: mera 5, alba 50)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="one-way link latency per PDU")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random one-way delay 0..N ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="PDU drop probability 0..1")
+    parser.add_argument("--seed", type=int, help="RNG seed for jitter/loss")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    link_params = {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                   "loss": args.loss, "seed": args.seed}
+    results = run([args.only] if args.only else None, args.cycles, **link_params)
+    if args.json:
+        print(json.dumps({"link": link_params, "results": results}, indent=2))
+    else:
+        _print_results(results, link_params)
+    return 0
+
+
+if __name__ == "__main__":
+    # main.py's import-time basicConfig uses the config.ini log level; keep the run quiet.
+    logging.getLogger().setLevel(logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Start-up import budget for aquaclean-bridge, measured with `python -X importtime`.
+
+Each scenario starts a fresh interpreter the way a user does and sums the
+cumulative import time of every top-level module the bridge brings in —
+modules an empty interpreter (`python -c pass`) already loads (site,
+encodings, .pth hooks) are subtracted, so only the bridge's own start-up cost
+is counted.
+
+  version       aquaclean-bridge --version
+  check-config  aquaclean-bridge --mode cli --command check-config
+  get-config    aquaclean-bridge --mode cli --command get-config
+  main          import aquaclean_console_app.main — service mode, the BLE CLI
+                commands and publish/remove-ha-discovery
+
+Each scenario also lists modules it must never import (the CLI fast path
+must not load main.py, bleak or aiorun; main.py must not load fastapi — only
+--mode api does).  Those checks are deterministic and always run in
+tests/test_startup_bench.py; the time budgets are opt-in there
+(AQUACLEAN_BENCH=1), like the codec benchmark.
+
+Budgets are milliseconds on the x86_64 development machine (best of --repeat
+runs).  Like codec_bench, they are scaled by a calibration run: a fixed
+stdlib import workload (CALIBRATION) timed the same way, against the
+CALIBRATION_REFERENCE_MS it took on that machine — so a slower or busier
+machine gets proportionally larger budgets.  --scale multiplies on top of
+that; --no-calibrate uses the budgets as written.
+
+Usage
+-----
+  python benchmarks/startup_bench.py                 # all scenarios
+  python benchmarks/startup_bench.py --only main     # substring filter
+  python benchmarks/startup_bench.py --scale 1.5     # calibrated budgets × 1.5
+  python benchmarks/startup_bench.py --top 10        # slowest imports per scenario
+
+Exit code 1 when a scenario is over budget or imports a forbidden module.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CLI = ["-m", "aquaclean_console_app"]
+_NOT_ON_CLI_PATH = ("aquaclean_console_app.main", "aiorun", "bleak", "paho",
+                    "aioesphomeapi", "fastapi", "uvicorn")
+
+# name → (interpreter arguments, budget ms, modules that must not be imported)
+SCENARIOS = {
+    "version":      (_CLI + ["--version"],                           60, _NOT_ON_CLI_PATH),
+    "check-config": (_CLI + ["--mode", "cli", "--command", "check-config"], 80, _NOT_ON_CLI_PATH),
+    "get-config":   (_CLI + ["--mode", "cli", "--command", "get-config"],   60, _NOT_ON_CLI_PATH),
+    "main":         (["-c", "import aquaclean_console_app.main"],   300, ("fastapi", "uvicorn", "starlette")),
+}
+
+# Stdlib-only import workload timed like a scenario; the budgets above were set where it took
+# CALIBRATION_REFERENCE_MS (best of 3).
+CALIBRATION = ["-c", "import asyncio, decimal, argparse, logging, json"]
+CALIBRATION_REFERENCE_MS = 55.0
+
+
+def parse_importtime(stderr: str) -> list:
+    """`-X importtime` output → [(module, self µs, cumulative µs, depth)] in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue                                   # the header line
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def importtime(args: list) -> list:
+    """Run `python -X importtime <args>` from the repository root → parse_importtime() rows."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=_repo_root,
+                          capture_output=True, text=True, timeout=60)
+    return parse_importtime(proc.stderr)
+
+
+def startup_ms(rows: list, preloaded: set) -> float:
+    """Cumulative ms of the top-level imports not already loaded by an empty interpreter."""
+    return sum(cum for name, _, cum, depth in rows if depth == 0 and name not in preloaded) / 1000
+
+
+def forbidden(rows: list, modules) -> list:
+    """Imported modules that are, or are submodules of, one of modules."""
+    return sorted({name for name, _, _, _ in rows
+                   if any(name == m or name.startswith(m + ".") for m in modules)})
+
+
+def best_ms(args: list, preloaded: set, repeat: int) -> tuple:
+    """(ms, rows) of the fastest of repeat runs of args."""
+    best = None
+    for _ in range(repeat):
+        rows = importtime(args)
+        ms = startup_ms(rows, preloaded)
+        if best is None or ms < best[0]:
+            best = (ms, rows)
+    return best
+
+
+def calibration_scale(preloaded: set, repeat: int = 3) -> float:
+    """How much slower this machine is than the one the budgets were set on (CALIBRATION)."""
+    return best_ms(CALIBRATION, preloaded, repeat)[0] / CALIBRATION_REFERENCE_MS
+
+
+def run(names=None, repeat: int = 3, scale: float = 1.0, calibrate: bool = True) -> dict:
+    """{scenario: {"ms", "budget_ms", "scale", "forbidden", "slowest", "ok"}} — ms is the best of
+    repeat runs; budget_ms is the written budget × scale × the calibration ratio."""
+    preloaded = {name for name, _, _, _ in importtime(["-c", "pass"])}
+    if calibrate:
+        scale *= calibration_scale(preloaded, repeat)
+    results = {}
+    for name, (args, budget_ms, never) in SCENARIOS.items():
+        if names and not any(n in name for n in names):
+            continue
+        ms, rows = best_ms(args, preloaded, repeat)
+        bad = forbidden(rows, never)
+        slowest = sorted(((cum / 1000, mod) for mod, _, cum, depth in rows
+                          if depth == 0 and mod not in preloaded), reverse=True)
+        results[name] = {
+            "ms":        round(ms, 1),
+            "budget_ms": round(budget_ms * scale, 1),
+            "scale":     round(scale, 2),
+            "forbidden": bad,
+            "slowest":   [(mod, round(t, 1)) for t, mod in slowest],
+            "ok":        ms <= budget_ms * scale and not bad,
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--only", action="append", help="substring filter on scenario names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget on top of the calibration")
+    parser.add_argument("--no-calibrate", action="store_true", help="use the budgets as written")
+    parser.add_argument("--top", type=int, default=3, help="slowest top-level imports shown per scenario")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, repeat=args.repeat, scale=args.scale, calibrate=not args.no_calibrate)
+    if results:
+        print(f"budgets × {next(iter(results.values()))['scale']:.2f}")
+    print(f"{'scenario':<14} {'ms':>8} {'budget':>8}")
+    for name, r in results.items():
+        flag = "" if r["ok"] else "  <-- " + ("imports " + ", ".join(r["forbidden"]) if r["forbidden"] else "over budget")
+        print(f"{name:<14} {r['ms']:>8.1f} {r['budget_ms']:>8.0f}{flag}")
+        for mod, ms in r["slowest"][:args.top]:
+            print(f"    {ms:>8.1f}  {mod}")
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,8 @@ from homeassistant.helpers.issue_registry import IssueSeverity, async_create_iss
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from aquaclean_console_app.aquaclean_core.Clients.AquaCleanBaseClient import BLEPeripheralTimeoutError
+from aquaclean_console_app.CircuitBreaker import CircuitBreaker, transport_health
+from aquaclean_console_app import FieldCatalog
 
 from .const import (
     DOMAIN,
@@ -30,9 +32,10 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
-# Circuit breaker constants — match standalone bridge behaviour
+# Circuit breaker constants (see aquaclean_console_app/CircuitBreaker.py)
 _CIRCUIT_OPEN_THRESHOLD = 5    # consecutive failures before opening circuit
-_CIRCUIT_OPEN_PROBE_SLEEP = 60  # extra seconds before each probe when circuit is open
+_CIRCUIT_BASE_DELAY = 60        # first backoff when the circuit opens; doubles per failed probe
+_CIRCUIT_MAX_DELAY = 900        # backoff ceiling
 _ESP32_RESTART_SLEEP = 30       # seconds to wait after sending ESP32 restart command
 
 # Alba fast/slow poll split.
@@ -41,7 +44,7 @@ _ESP32_RESTART_SLEEP = 30       # seconds to wait after sending ESP32 restart co
 _ALBA_SLOW_POLL_EVERY = 10
 
 # Tracks entry_ids that already triggered the onboarding fast-restart in this process.
-# ConfigEntryNotReady causes HA to recreate the coordinator (fresh _consecutive_failures=0),
+# ConfigEntryNotReady causes HA to recreate the coordinator (fresh breaker, failures=0),
 # which would re-fire the restart indefinitely.  Module-level storage survives recreation.
 _onboarding_restart_fired: set = set()
 
@@ -73,6 +76,9 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
     Circuit breaker:
       After _CIRCUIT_OPEN_THRESHOLD consecutive failures the circuit opens.
       If an ESPHome host is configured, an ESP32 restart is attempted immediately.
+      While open, polls are skipped with exponential backoff unless a cheap
+      advertisement probe shows the device is back after it had gone (once
+      per open period, CircuitBreaker.record_probe).
     """
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -127,8 +133,10 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
         self.last_error_hint: str | None = None
         # Circuit breaker state
         self._entry_id: str = entry.entry_id
-        self._consecutive_failures: int = 0
-        self._circuit_open: bool = False
+        self._breaker = CircuitBreaker(
+            "AquaClean poll", threshold=_CIRCUIT_OPEN_THRESHOLD,
+            base_delay=_CIRCUIT_BASE_DELAY, max_delay=_CIRCUIT_MAX_DELAY,
+        )
         self._ble_lock = asyncio.Lock()
         # Persistent ESPHome connector and client (reused across polls).
         # _esphome_client is either AquaCleanClient (mera) or AlbaClient (alba).
@@ -264,6 +272,10 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
     async def _async_update_data(self) -> dict:
         """Circuit-breaker wrapper: tracks consecutive failures, triggers ESP32 restart.
 
+        While the circuit is open and its backoff is running, the poll is skipped
+        (UpdateFailed without touching the link) unless _advertisement_probe() sees
+        the device advertising again after not seeing it (CircuitBreaker.record_probe).
+
         Onboarding fast-restart: if this is the very first poll attempt (_device_type is
         None) and the ESPHome scanner returns E0002, the ESP32 is restarted immediately
         and the poll is retried once silently.  If the retry succeeds the user sees no
@@ -274,28 +286,28 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
             raise UpdateFailed(f"{E0010.code} — {E0010.message}")
 
         # Detect onboarding phase: no successful poll yet, ESPHome path active.
-        # consecutive_failures == 0 ensures the fast-restart fires at most once.
+        # failures == 0 ensures the fast-restart fires at most once.
         _onboarding = (
             self._device_type is None
             and self._esphome_host is not None
             and not self._use_ha_bluetooth
-            and self._consecutive_failures == 0
+            and self._breaker.failures == 0
         )
 
-        if self._circuit_open and self._esphome_host and not self._use_ha_bluetooth:
-            _LOGGER.debug(
-                "Circuit open (%d consecutive failures) — sleeping %d s before probe",
-                self._consecutive_failures,
-                _CIRCUIT_OPEN_PROBE_SLEEP,
-            )
-            await asyncio.sleep(_CIRCUIT_OPEN_PROBE_SLEEP)
-
         _proxy_ctx = (
             _get_proxy_lock(self._esphome_host)
             if self._esphome_host and not self._use_ha_bluetooth
             else contextlib.nullcontext()
         )
         async with _proxy_ctx, self._ble_lock:
+            if not self._breaker.allow():
+                # Backoff still running: poll only if the device is advertising again.
+                if not self._breaker.record_probe(await self._advertisement_probe()):
+                    raise UpdateFailed(
+                        f"Circuit open ({self._breaker.failures} consecutive failures) — "
+                        f"next attempt in {self._breaker.retry_in():.0f} s"
+                    )
+                _LOGGER.info("Circuit open but device is advertising again — polling now")
             try:
                 result = await self._do_poll()
             except UpdateFailed as exc:
@@ -319,11 +331,10 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
                         await asyncio.sleep(_ESP32_RESTART_SLEEP)
                         result = await self._do_poll()
                         # Retry succeeded — no error surfaced to HA
-                        self._consecutive_failures = 0
-                        self._circuit_open = False
+                        self._breaker.record_success(transport=self._transport)
                         return result
                     except UpdateFailed as poll_exc:
-                        self._consecutive_failures += 1
+                        self._breaker.record_failure(transport=self._transport)
                         if "E0002" in str(poll_exc):
                             raise UpdateFailed(
                                 "ESPHome proxy restarted but AquaClean device still not found — "
@@ -334,17 +345,18 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
                         _LOGGER.warning(
                             "ESP32 restart failed: %s — HA will retry via normal path", restart_exc
                         )
-                        self._consecutive_failures += 1
+                        self._breaker.record_failure(transport=self._transport)
                         raise exc  # re-raise original UpdateFailed
 
                 # ── Normal circuit-breaker path ───────────────────────────────────
-                self._consecutive_failures += 1
+                # The breaker logs opening / failed probes itself.
+                _timed_out = isinstance(exc.__cause__, (BLEPeripheralTimeoutError, asyncio.TimeoutError))
+                _opened = self._breaker.record_failure(timeout=_timed_out, transport=self._transport)
 
-                if self._consecutive_failures == _CIRCUIT_OPEN_THRESHOLD and self._esphome_host and not self._use_ha_bluetooth:
-                    self._circuit_open = True
+                if _opened and self._esphome_host and not self._use_ha_bluetooth:
                     _LOGGER.warning(
                         "Circuit breaker open: %d consecutive poll failures — triggering ESP32 restart",
-                        self._consecutive_failures,
+                        self._breaker.failures,
                     )
                     try:
                         await self.async_restart_esp32()
@@ -357,27 +369,34 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
                         _LOGGER.warning(
                             "Failed to send ESP32 restart command: %s", restart_exc,
                         )
-                elif self._consecutive_failures == _CIRCUIT_OPEN_THRESHOLD and (not self._esphome_host or self._use_ha_bluetooth):
-                    self._circuit_open = True
-                    _LOGGER.warning(
-                        "Circuit breaker open: %d consecutive poll failures",
-                        self._consecutive_failures,
-                    )
-                elif self._consecutive_failures > _CIRCUIT_OPEN_THRESHOLD:
-                    _LOGGER.debug(
-                        "Circuit open — consecutive failure %d", self._consecutive_failures
-                    )
                 raise
             else:
-                if self._consecutive_failures > 0:
-                    _LOGGER.info(
-                        "Poll recovered after %d consecutive failure(s)", self._consecutive_failures
-                    )
-                self._consecutive_failures = 0
-                self._circuit_open = False
+                _failures = self._breaker.record_success(
+                    connect_ms=self._last_connect_ms,
+                    rssi=result.get("ble_rssi"),
+                    transport=self._transport,
+                )
+                if _failures > 0:
+                    _LOGGER.info("Poll recovered after %d consecutive failure(s)", _failures)
                 _onboarding_restart_fired.discard(self._entry_id)
+                result["transport_health"] = (
+                    transport_health(self._transport).score if self._transport else None
+                )
                 return result
 
+    async def _advertisement_probe(self) -> bool:
+        """Cheap half-open probe: is the device advertising?  No GATT connection."""
+        try:
+            if self._esphome_host and not self._use_ha_bluetooth:
+                return await self._get_esphome_connector().advertisement_seen(
+                    self._device_id, timeout=5.0
+                )
+            from homeassistant.components import bluetooth
+            return bluetooth.async_address_present(self.hass, self._device_id, connectable=True)
+        except Exception as exc:
+            _LOGGER.debug("Advertisement probe failed: %s", exc)
+            return False
+
     async def _do_poll(self) -> dict:
         """Connect, detect device type (if first poll), fetch data, disconnect."""
         from bleak import BleakError
@@ -711,8 +730,8 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
 
         ident = await client.base_client.get_device_identification_async(0)
         initial_op_date = await client.base_client.get_device_initial_operation_date()
-        state = await client.base_client.get_system_parameter_list_async(
-            [0, 1, 2, 3, 4, 5, 6, 7, 12, 13]  # 12=LidOffset, 13=ShowerArmOffset; data_array[8],[9]
+        state = FieldCatalog.spl_fields(
+            await FieldCatalog.read_system_parameters(client.base_client, FieldCatalog.plan("state"))
         )
         stats = await client.base_client.get_statistics_descale_async()
         soc_versions = await client.base_client.get_soc_application_versions_async()
@@ -733,15 +752,7 @@ class AquaCleanCoordinator(DataUpdateCoordinator):
             "description": ident.description,
             "initial_operation_date": initial_op_date,
             # Live state
-            "is_user_sitting": state.data_array[0] != 0,
-            "is_anal_shower_running": state.data_array[3] != 0,
-            "is_lady_shower_running": state.data_array[2] != 0,
-            "is_dryer_running": state.data_array[1] != 0,
-            "last_error_code": state.data_array[6],
-            "lid_offset_position": state.data_array[8],        # SPL index 12, position 8
-            "shower_arm_offset_position": state.data_array[9], # SPL index 13, position 9
-            "descaling_state": state.data_array[4],            # SPL index 4: 0=idle 1=preparing 2=waiting 3=running
-            "descaling_duration_min": state.data_array[5],     # SPL index 5: countdown minutes
+            **state,
             # Descale statistics
             "days_until_next_descale": stats.days_until_next_descale,
             "days_until_shower_restricted": stats.days_until_shower_restricted,
@@ -0,0 +1,143 @@
+"""Tests for aquaclean_console_app/AdaptiveTimeouts.py and its Ble20Client use.
+
+The Ble20 test reuses the in-process _FakeConnector / _MockBle20Server from
+test_ble20_client.py: after a few answered reads the server goes silent and
+the read must fail within the learned timeout, not RECV_TIMEOUT.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from test_ble20_client import _make   # also registers SILLY/TRACE log levels
+
+from aquaclean_console_app.AdaptiveTimeouts import (
+    ADAPTIVE_TIMEOUTS, AdaptiveTimeouts, CallTimeoutError, is_call_timeout,
+)
+
+KEY = "esp32 0x01/0x0D"
+
+
+def _learned(samples_ms, n=None) -> AdaptiveTimeouts:
+    timeouts = AdaptiveTimeouts()
+    for i in range(n or AdaptiveTimeouts.MIN_SAMPLES):
+        timeouts.record(KEY, samples_ms[i % len(samples_ms)])
+    return timeouts
+
+
+async def test_default_until_enough_samples():
+    timeouts = _learned([100], n=AdaptiveTimeouts.MIN_SAMPLES - 1)
+    assert timeouts.timeout_for(KEY, 5.0) == (5.0, False)
+    assert timeouts.timeout_for("bleak 0x01/0x0D", 5.0) == (5.0, False)
+    timeouts.record(KEY, 100)
+    timeout, adaptive = timeouts.timeout_for(KEY, 5.0)
+    assert adaptive and timeout == AdaptiveTimeouts.FLOOR_S      # 3 × ~100 ms is below the floor
+
+
+async def test_learned_timeout_follows_p99_and_is_capped():
+    timeout, adaptive = _learned([400, 420, 450, 500]).timeout_for(KEY, 5.0)
+    assert adaptive and 1.4 <= timeout <= 1.8                    # p99 ≈ 500 ms (±12.5 % bucket)
+    timeout, adaptive = _learned([3000]).timeout_for(KEY, 5.0)
+    assert (timeout, adaptive) == (5.0, False)                   # never above the fixed default
+    disabled = _learned([100])
+    disabled.enabled = False
+    assert disabled.timeout_for(KEY, 5.0) == (5.0, False)
+
+
+async def test_timeout_backs_off_until_next_success():
+    timeouts = _learned([100])
+    base, _ = timeouts.timeout_for(KEY, 5.0)
+    timeouts.record(KEY, timeout=True)
+    assert timeouts.timeout_for(KEY, 5.0)[0] == base * 2
+    timeouts.record(KEY, timeout=True)
+    assert timeouts.timeout_for(KEY, 5.0)[0] == base * 4
+    timeouts.record(KEY, 100)
+    assert timeouts.timeout_for(KEY, 5.0)[0] == base
+    assert timeouts.to_dict()["calls"][KEY]["samples"] == AdaptiveTimeouts.MIN_SAMPLES + 1
+
+
+async def test_persisted_between_runs():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "timeouts.json")
+        first = AdaptiveTimeouts()
+        first.configure(persist_path=path)
+        for _ in range(AdaptiveTimeouts.MIN_SAMPLES):
+            first.record(KEY, 400)
+        first.save()
+        second = AdaptiveTimeouts()
+        second.configure(persist_path=path)
+        assert second.timeout_for(KEY, 5.0) == first.timeout_for(KEY, 5.0)
+        with open(path, "w") as fh:
+            fh.write("{not json")
+        third = AdaptiveTimeouts()
+        third.configure(persist_path=path)                       # corrupt file → fresh start
+        assert third.timeout_for(KEY, 5.0) == (5.0, False)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_ble20_read_times_out_on_learned_timeout():
+    ADAPTIVE_TIMEOUTS.reset()
+    try:
+        _, client, server = _make()
+        for _ in range(AdaptiveTimeouts.MIN_SAMPLES):
+            srv = asyncio.create_task(server.run_once())
+            await asyncio.wait_for(client.read(564), timeout=5.0)
+            await srv
+        t0 = time.perf_counter()
+        try:
+            await client.read(564)                               # server never answers
+            raise AssertionError("expected CallTimeoutError")
+        except CallTimeoutError as e:
+            assert is_call_timeout(e)
+            assert isinstance(e, asyncio.TimeoutError)           # existing handlers still match
+            assert e.timeout_s == AdaptiveTimeouts.FLOOR_S
+        assert time.perf_counter() - t0 < 2 * AdaptiveTimeouts.FLOOR_S
+        assert ADAPTIVE_TIMEOUTS.to_dict()["calls"]["bleak dp 564 read"]["penalty"] == 2.0
+    finally:
+        ADAPTIVE_TIMEOUTS.reset()
+
+
+def _run_all():
+    async_tests = [
+        test_default_until_enough_samples,
+        test_learned_timeout_follows_p99_and_is_capped,
+        test_timeout_backs_off_until_next_success,
+        test_persisted_between_runs,
+        test_ble20_read_times_out_on_learned_timeout,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_adaptive_timeouts():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,178 @@
+"""Tests for aquaclean_console_app/AirtimeGovernor.py — BLE call budget per priority class.
+
+The governor runs on a fake clock and a fake sleep that only advances that
+clock, so waiting for tokens takes no real time.  The scheduler test checks
+that calls made inside BleScheduler sessions — including a request served on
+a borrowed link — are charged to the right class.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app import BridgeMetrics
+from aquaclean_console_app.AirtimeGovernor import AirtimeGovernor, parse_call_budget
+from aquaclean_console_app.BleScheduler import BleScheduler, Priority
+from aquaclean_console_app.BridgeConfig import CALL_BUDGET_CLASSES
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _governor(clock, budget="command:60, read:60, poll:12", airtime_budget_s=0.0, device="t") -> AirtimeGovernor:
+    governor = AirtimeGovernor(device, clock=clock, sleep=clock.sleep)
+    governor.configure(parse_call_budget(budget), airtime_budget_s)
+    return governor
+
+
+async def test_call_budget_is_parsed():
+    assert parse_call_budget("command:120, read:90.5") == \
+        {Priority.COMMAND: 120.0, Priority.READ: 90.5, Priority.POLL: None}
+    assert parse_call_budget(" POLL:0 ,") == dict.fromkeys(Priority)
+    assert CALL_BUDGET_CLASSES == tuple(p.name.lower() for p in Priority)
+    for bad in ("shower:10", "poll", "read:-1", "read:many"):
+        try:
+            parse_call_budget(bad)
+            raise AssertionError(f"{bad!r} accepted")
+        except ValueError:
+            pass
+
+
+async def test_calls_wait_for_tokens():
+    clock = _Clock()
+    governor = _governor(clock)
+    for _ in range(60):                                # one minute's worth is saved up
+        await governor.spend(Priority.READ)
+    assert clock.slept == []
+    await governor.spend(Priority.READ)                # empty: one token takes 1 s at 60/min
+    await governor.spend(Priority.READ)
+    assert clock.slept == [1.0, 1.0]
+
+    for _ in range(15):                                # a token takes 5 s; polls wait at most MAX_DELAY_S
+        await governor.spend(Priority.POLL)
+    assert clock.slept[2:] == [AirtimeGovernor.MAX_DELAY_S] * 3 and not governor.admit(Priority.POLL)
+
+    slow = _governor(clock, budget="command:6", device="slow")
+    for _ in range(9):                                 # a token takes 10 s; commands wait at most MAX_DELAY_S
+        await slow.spend(Priority.COMMAND)
+    assert clock.slept[5:] == [AirtimeGovernor.MAX_DELAY_S] * 3
+
+    stats = governor.to_dict()["classes"]
+    assert (stats["read"]["calls"], stats["read"]["delayed"], stats["poll"]["delayed"]) == (62, 2, 3)
+    assert stats["poll"]["calls_1m"] == 15 and stats["read"]["calls_1h"] == 62
+    assert BridgeMetrics.AIRTIME_CALLS.value("t", "read") >= 62
+
+    unlimited = _governor(clock, budget="", device="u")
+    for _ in range(500):
+        await unlimited.spend(Priority.POLL)
+    assert unlimited.to_dict()["classes"]["poll"]["used"] is None and len(clock.slept) == 8
+
+
+async def test_polls_are_shed_when_budget_runs_low():
+    clock = _Clock()
+    governor = _governor(clock, airtime_budget_s=600)
+    assert governor.admit(Priority.POLL)
+    for _ in range(10):
+        await governor.spend(Priority.POLL)
+    assert not governor.admit(Priority.POLL)           # 2 of 12 left: below POLL_RESERVE
+    assert governor.admit(Priority.COMMAND) and governor.admit(Priority.READ)
+    clock.now += 10                                    # 2 tokens back: 4 of 12 left
+    assert governor.admit(Priority.POLL)
+    assert not governor.admit(Priority.POLL, calls=5)  # a 5-call poll would wait for tokens
+    clock.now += 5
+    assert governor.admit(Priority.POLL, calls=5)
+    assert governor.admit(Priority.POLL, calls=40) is False
+    clock.now += 60                                    # a full bucket admits a poll larger than it
+    assert governor.admit(Priority.POLL, calls=40)
+
+    governor.link_opened()
+    clock.now += 400
+    governor.link_closed()
+    clock.now += 100
+    governor.link_opened()
+    clock.now += 250
+    assert governor.connected_s() == 650 and not governor.admit(Priority.POLL)
+    governor.link_closed()
+    clock.now += 3600 - 350                            # the first 400 s slide out of the window
+    assert governor.connected_s() == 250 and governor.admit(Priority.POLL)
+    stats = governor.to_dict()
+    assert (stats["classes"]["poll"]["shed"], stats["airtime"]["used"], stats["shedding"]) == (4, round(250 / 600, 3), False)
+
+
+async def test_calls_are_charged_to_the_running_class():
+    clock = _Clock()
+    governor = _governor(clock, budget="", device="sched")
+    sched = BleScheduler()
+
+    async def runner(action):
+        return await action()
+
+    async def poll_session(action):
+        for _ in range(3):
+            await sched.serve_pending(runner)
+            await governor.spend()
+            await asyncio.sleep(0.01)
+        return await action()
+
+    async def command():
+        await governor.spend()
+        return "toggled"
+
+    poll = asyncio.create_task(sched.run(Priority.POLL, poll_session, governor.spend))
+    await asyncio.sleep(0.005)
+    result = await sched.run(Priority.COMMAND, lambda a: a(), command)   # served on the open POLL link
+    await poll
+    await governor.spend()                             # outside any session: READ
+    stats = governor.to_dict()["classes"]
+    assert result == "toggled"
+    assert (stats["poll"]["calls"], stats["command"]["calls"], stats["read"]["calls"]) == (4, 1, 1)
+
+
+def _run_all():
+    async_tests = [
+        test_call_budget_is_parsed,
+        test_calls_wait_for_tokens,
+        test_polls_are_shed_when_budget_runs_low,
+        test_calls_are_charged_to_the_running_class,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_airtime_governor():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
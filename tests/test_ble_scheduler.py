@@ -0,0 +1,182 @@
+"""Tests for aquaclean_console_app/BleScheduler.py and its Ble20Client hook.
+
+Sessions are plain coroutines here — the scheduler only needs session(action)
+to run the action against some "client" and serve_pending() to be called
+between two of its API calls.  The hook test reuses the in-process
+_FakeConnector / _MockBle20Server from test_ble20_client.py.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from test_ble20_client import _make   # also registers SILLY/TRACE log levels
+
+from aquaclean_console_app.BleScheduler import BleScheduler, Priority
+
+
+def _session(sched: BleScheduler, log: list, name: str, calls: int = 3):
+    """A fake BLE session: `calls` API calls with a preemption point before each."""
+
+    async def runner(action):
+        return await action(f"{name}-link")
+
+    async def session(action):
+        log.append(f"open {name}")
+        for _ in range(calls):
+            await sched.serve_pending(runner)
+            await asyncio.sleep(0.01)
+        result = await action(f"{name}-link")
+        log.append(f"close {name}")
+        return result
+    return session
+
+
+def _action(log: list, name: str):
+    async def action(client):
+        log.append(f"{name} on {client}")
+        return name
+    return action
+
+
+async def test_waiting_sessions_start_in_priority_order():
+    sched = BleScheduler()
+    log = []
+    gate = asyncio.Event()
+
+    async def holder(action):
+        await gate.wait()
+        return "holder"
+
+    first = asyncio.create_task(sched.run(Priority.COMMAND, holder, None))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(sched.run(p, _session(sched, log, p.name, calls=0), _action(log, p.name)))
+        for p in (Priority.POLL, Priority.READ, Priority.COMMAND)
+    ]
+    await asyncio.sleep(0.01)
+    assert sched.waiting() == 3
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    opened = [entry for entry in log if entry.startswith("open")]
+    assert opened == ["open COMMAND", "open READ", "open POLL"]
+
+
+async def test_command_runs_on_open_poll_session():
+    sched = BleScheduler()
+    log = []
+    poll = asyncio.create_task(sched.run(
+        Priority.POLL, _session(sched, log, "poll", calls=5), _action(log, "poll")))
+    await asyncio.sleep(0.015)
+    result = await sched.run(Priority.COMMAND, _session(sched, log, "cmd"), _action(log, "cmd"))
+    assert result == "cmd"
+    assert "cmd on poll-link" in log
+    assert "open cmd" not in log                    # no session of its own
+    assert "close poll" not in log                  # answered while the poll is still running
+    assert await poll == "poll"
+    stats = sched.to_dict()
+    assert stats["command"]["piggybacked"] == 1
+    assert stats["command"]["sessions"] == 0
+    assert stats["poll"]["sessions"] == 1
+    assert stats["command"]["queue_wait_ms"]["count"] == 1
+
+
+async def test_equal_priority_is_not_preempted():
+    sched = BleScheduler()
+    log = []
+    first = asyncio.create_task(sched.run(
+        Priority.READ, _session(sched, log, "r1", calls=3), _action(log, "r1")))
+    await asyncio.sleep(0.005)
+    await sched.run(Priority.READ, _session(sched, log, "r2", calls=0), _action(log, "r2"))
+    await first
+    assert log.index("close r1") < log.index("open r2")
+
+
+async def test_failed_piggyback_reaches_its_caller_only():
+    sched = BleScheduler()
+    log = []
+
+    async def failing(client):
+        raise IOError("device said no")
+
+    poll = asyncio.create_task(sched.run(
+        Priority.POLL, _session(sched, log, "poll", calls=4), _action(log, "poll")))
+    await asyncio.sleep(0.005)
+    try:
+        await sched.run(Priority.COMMAND, _session(sched, log, "cmd"), failing)
+        raise AssertionError("expected IOError")
+    except IOError:
+        pass
+    assert await poll == "poll"
+
+
+async def test_cancelled_waiter_does_not_block_the_queue():
+    sched = BleScheduler()
+    log = []
+    first = asyncio.create_task(sched.run(
+        Priority.POLL, _session(sched, log, "p1", calls=2), _action(log, "p1")))
+    await asyncio.sleep(0)
+    doomed = asyncio.create_task(sched.run(
+        Priority.POLL, _session(sched, log, "p2", calls=0), _action(log, "p2")))
+    await asyncio.sleep(0)
+    doomed.cancel()
+    await first
+    assert await asyncio.wait_for(
+        sched.run(Priority.POLL, _session(sched, log, "p3", calls=0), _action(log, "p3")), 1.0) == "p3"
+    assert "open p2" not in log
+    assert not sched.busy
+
+
+async def test_ble20_read_awaits_call_budget_hook():
+    _, client, server = _make()
+    calls = []
+
+    async def hook():
+        calls.append("hook")
+    client.call_budget_hook = hook
+    read_task = asyncio.create_task(client.read(564))
+    srv_task = asyncio.create_task(server.run_once())
+    await asyncio.wait_for(asyncio.gather(read_task, srv_task), timeout=5.0)
+    assert calls == ["hook"]
+
+
+def _run_all():
+    async_tests = [
+        test_waiting_sessions_start_in_priority_order,
+        test_command_runs_on_open_poll_session,
+        test_equal_priority_is_not_preempted,
+        test_failed_piggyback_reaches_its_caller_only,
+        test_cancelled_waiter_does_not_block_the_queue,
+        test_ble20_read_awaits_call_budget_hook,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_ble_scheduler():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,137 @@
+"""Tests for aquaclean_console_app/BridgeClient.py — CLI commands through a running bridge.
+
+A stdlib http.server thread plays the bridge's REST API; no BLE, no FastAPI.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app import BridgeClient
+
+_RESPONSES = {
+    ("GET", "/version"): (200, {"version": "2.4.1", "python": "3.11.7"}),
+    ("GET", "/status"): (200, {"is_user_sitting": True, "is_anal_shower_running": False,
+                               "is_lady_shower_running": False, "is_dryer_running": False,
+                               "ble_status": "connected"}),
+    ("GET", "/data/batch?items=filter-status%2Cnode-list"): (200, {"order": ["filter-status", "node-list"]}),
+    ("POST", "/command/toggle-lid"): (200, {"status": "success", "command": "toggle-lid", "_query_ms": 41}),
+    ("GET", "/data/filter-status"): (503, {"detail": {"status": "error", "error": {
+        "code": "E4003", "message": "BLE client not connected"}}}),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests: list = []
+
+    def _answer(self):
+        self.requests.append((self.command, self.path))
+        status, body = _RESPONSES.get((self.command, self.path), (500, None))
+        payload = json.dumps(body).encode() if body is not None else b"Internal Server Error"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+def _bridge():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, BridgeClient.bridge_url("0.0.0.0", server.server_address[1])
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def test_probe_finds_running_bridge_only():
+    server, url = _bridge()
+    try:
+        assert url.startswith("http://127.0.0.1:")
+        assert await BridgeClient.probe(url) == "2.4.1"
+        assert await BridgeClient.probe(BridgeClient.bridge_url("127.0.0.1", _free_port())) is None
+    finally:
+        server.shutdown()
+
+
+async def test_commands_map_to_rest_routes():
+    server, url = _bridge()
+    _Handler.requests.clear()
+    try:
+        assert await BridgeClient.run(url, "status") == {
+            "is_user_sitting": True, "is_anal_shower_running": False,
+            "is_lady_shower_running": False, "is_dryer_running": False,
+        }
+        assert await BridgeClient.run(url, "toggle-lid") == {"_query_ms": 41}
+        assert await BridgeClient.run(url, "batch", items="filter-status,node-list") == {
+            "order": ["filter-status", "node-list"]}
+        assert [r[0] for r in _Handler.requests] == ["GET", "POST", "GET"]
+    finally:
+        server.shutdown()
+
+
+async def test_bridge_errors_keep_their_code():
+    server, url = _bridge()
+    try:
+        try:
+            await BridgeClient.run(url, "filter-status")
+            raise AssertionError("error response accepted")
+        except BridgeClient.BridgeError as e:
+            assert (e.status, e.code, str(e)) == (503, "E4003", "BLE client not connected")
+        try:
+            await BridgeClient.run(url, "node-list")
+            raise AssertionError("error response accepted")
+        except BridgeClient.BridgeError as e:
+            assert e.code is None and "HTTP 500" in str(e)
+    finally:
+        server.shutdown()
+
+
+def _run_all():
+    async_tests = [
+        test_probe_finds_running_bridge_only,
+        test_commands_map_to_rest_routes,
+        test_bridge_errors_keep_their_code,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_bridge_client():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,108 @@
+"""Tests for aquaclean_console_app/BridgeMetrics.py and the GET /metrics route.
+
+BridgeMetrics is stdlib-only; the route test uses FastAPI's TestClient
+against a bare RestApiService (no ApiMode, no BLE).
+
+Pattern mirrors test_ble20_client.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app import BridgeMetrics
+from aquaclean_console_app.BridgeMetrics import MetricsRegistry
+
+
+def test_counter_and_gauge_exposition():
+    reg = MetricsRegistry()
+    c = reg.counter("t_requests", "Requests", ("context", "procedure"))
+    g = reg.gauge("t_heap_bytes", "Heap")
+    c.inc("0x01", "0x0D")
+    c.inc("0x01", "0x0D")
+    g.set(51200)
+    text = reg.render()
+    assert "# TYPE t_requests counter" in text
+    assert 't_requests_total{context="0x01",procedure="0x0D"} 2' in text
+    assert "t_heap_bytes 51200" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_gauge_set_none_removes_series():
+    reg = MetricsRegistry()
+    g = reg.gauge("t_rssi_dbm", "RSSI")
+    g.set(-60)
+    g.set(None)
+    assert "t_rssi_dbm -60" not in reg.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = MetricsRegistry()
+    h = reg.histogram("t_poll_seconds", "Poll", ("transport",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.7, 3.0):
+        h.observe(v, "bleak")
+    text = reg.render()
+    assert 't_poll_seconds_bucket{transport="bleak",le="0.1"} 1' in text
+    assert 't_poll_seconds_bucket{transport="bleak",le="1"} 3' in text
+    assert 't_poll_seconds_bucket{transport="bleak",le="+Inf"} 4' in text
+    assert 't_poll_seconds_count{transport="bleak"} 4' in text
+    assert 't_poll_seconds_sum{transport="bleak"} 4.25' in text
+
+
+def test_label_values_are_escaped():
+    reg = MetricsRegistry()
+    c = reg.counter("t_x", "X", ("name",))
+    c.inc('a"b\\c')
+    assert 't_x_total{name="a\\"b\\\\c"} 1' in reg.render()
+
+
+def test_metrics_route():
+    from fastapi.testclient import TestClient
+    from aquaclean_console_app.RestApiService import RestApiService
+
+    BridgeMetrics.MQTT_PUBLISHES.inc("ok")
+    api = RestApiService("127.0.0.1", 0)
+    resp = TestClient(api.app).get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/openmetrics-text")
+    assert "aquaclean_mqtt_publishes_total{result=\"ok\"}" in resp.text
+    assert "aquaclean_circuit_breaker_open 0" in resp.text
+    assert resp.text.endswith("# EOF\n")
+
+
+def _run_all():
+    tests = [
+        test_counter_and_gauge_exposition,
+        test_gauge_set_none_removes_series,
+        test_histogram_buckets_are_cumulative,
+        test_label_values_are_escaped,
+        test_metrics_route,
+    ]
+    passed = 0
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_bridge_metrics():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
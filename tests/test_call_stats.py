@@ -0,0 +1,123 @@
+"""Tests for aquaclean_console_app/CallStats.py and its Ble20Client wiring.
+
+CallStats is stdlib-only.  The round-trip tests reuse the in-process
+_FakeConnector / _MockBle20Server from test_ble20_client.py, so no BLE
+hardware is needed.
+
+Pattern mirrors test_ble20_client.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from test_ble20_client import _make   # also registers SILLY/TRACE log levels
+
+from aquaclean_console_app.CallStats import CALL_STATS, CallStats
+
+
+def test_record_aggregates_per_key():
+    s = CallStats()
+    key = CallStats.mera_key(0x01, 0x0D)
+    assert key == "0x01/0x0D"
+    s.record(key, "GetSOCApplicationVersions", queue_wait_ms=0, first_frame_ms=40,
+             reassembly_ms=20, frames_received=3, control_frames_sent=1)
+    s.record(key, "GetSOCApplicationVersions", queue_wait_ms=10, timeout=True)
+    d = s.to_dict()[key]
+    assert d["name"] == "GetSOCApplicationVersions"
+    assert d["calls"] == 2
+    assert d["timeouts"] == 1
+    assert d["frames_received"] == 3
+    assert d["control_frames_sent"] == 1
+    assert d["first_frame_ms"]["max_ms"] == 40
+    assert d["queue_wait_ms"]["avg_ms"] == 5
+
+
+def test_overflow_keys_fold_into_other():
+    s = CallStats()
+    for i in range(CallStats.MAX_KEYS + 5):
+        s.record(CallStats.dp_key(i, "read"))
+    d = s.to_dict()
+    assert len(d) == CallStats.MAX_KEYS + 1
+    assert d[CallStats.OVERFLOW_KEY]["calls"] == 5
+
+
+def test_markdown_table():
+    s = CallStats()
+    assert "No data collected yet" in s.to_markdown()
+    s.record(CallStats.mera_key(0x01, 0x59), "GetFilterStatus", first_frame_ms=120)
+    md = s.to_markdown()
+    assert "| 0x01/0x59" in md
+    assert "GetFilterStatus" in md
+
+
+async def test_ble20_read_is_recorded():
+    CALL_STATS.reset()
+    _, client, server = _make()
+    read_task = asyncio.create_task(client.read(564))
+    srv_task = asyncio.create_task(server.run_once())
+    await asyncio.wait_for(asyncio.gather(read_task, srv_task), timeout=5.0)
+    d = CALL_STATS.to_dict()["dp 564 read"]
+    assert d["calls"] == 1
+    assert d["errors"] == 0
+    assert d["frames_received"] == 1
+    assert d["first_frame_ms"]["max_ms"] is not None
+
+
+async def test_ble20_read_error_is_recorded():
+    CALL_STATS.reset()
+    _, client, server = _make()
+    read_task = asyncio.create_task(client.read(9999))
+    srv_task = asyncio.create_task(server.run_once())
+    try:
+        await asyncio.wait_for(asyncio.gather(read_task, srv_task), timeout=5.0)
+        assert False, "expected IOError"
+    except IOError:
+        pass
+    d = CALL_STATS.to_dict()["dp 9999 read"]
+    assert d["calls"] == 1
+    assert d["errors"] == 1
+
+
+def _run_all():
+    sync_tests = [
+        test_record_aggregates_per_key,
+        test_overflow_keys_fold_into_other,
+        test_markdown_table,
+    ]
+    async_tests = [
+        test_ble20_read_is_recorded,
+        test_ble20_read_error_is_recorded,
+    ]
+    passed = 0
+    failed = 0
+    for t in sync_tests + async_tests:
+        try:
+            if asyncio.iscoroutinefunction(t):
+                asyncio.run(t())
+            else:
+                t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_call_stats():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,179 @@
+"""Tests for aquaclean_console_app/CircuitBreaker.py — backoff, probes, health.
+
+The breaker runs on a fake clock and a fixed "random" source so backoff
+values are exact.  Stdlib only.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.CircuitBreaker import CircuitBreaker, TransportHealth, _HEALTH
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock, rng=0.5, **kwargs) -> CircuitBreaker:
+    kwargs.setdefault("threshold", 3)
+    return CircuitBreaker("test", base_delay=30, max_delay=600, clock=clock, rng=lambda: rng, **kwargs)
+
+
+async def test_opens_at_threshold_and_backs_off_exponentially():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    assert not breaker.record_failure() and not breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    assert breaker.record_failure() is True                      # third failure opens
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    delays = [breaker.retry_in()]
+    for _ in range(6):
+        clock.now += breaker.retry_in()
+        assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow()
+        assert breaker.record_failure() is False                 # failed probe re-opens
+        delays.append(breaker.retry_in())
+    assert delays == [30, 60, 120, 240, 480, 600, 600]
+    assert breaker.opened == 1
+
+
+async def test_jitter_stays_within_bounds():
+    for rng, expected in ((0.0, 24.0), (1.0, 36.0)):
+        breaker = _breaker(_Clock(), rng=rng, threshold=1)
+        breaker.record_failure()
+        assert abs(breaker.retry_in() - expected) < 1e-9
+
+
+async def test_success_closes_and_resets_backoff():
+    clock = _Clock()
+    breaker = _breaker(clock, threshold=1)
+    breaker.record_failure()
+    clock.now += breaker.retry_in()
+    breaker.record_failure()
+    assert breaker.record_success() == 2
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.retry_in() == 0
+    breaker.record_failure()
+    assert breaker.retry_in() == 30                              # back to base delay
+
+
+async def test_probe_ends_wait_early_and_stop_event_aborts():
+    breaker = CircuitBreaker("test", threshold=1, base_delay=30, jitter=0)
+    breaker.record_failure()
+    probes = []
+
+    async def probe():
+        probes.append(1)
+        if len(probes) == 1:
+            raise OSError("proxy unreachable")                   # ignored, keeps waiting
+        return len(probes) == 3
+
+    assert await asyncio.wait_for(breaker.wait(probe=probe, probe_interval=0.01), timeout=2)
+    assert len(probes) == 3 and breaker.allow() and breaker.failures == 1
+
+    breaker.record_failure()
+    stop = asyncio.Event()
+    asyncio.get_running_loop().call_later(0.02, stop.set)
+    assert await asyncio.wait_for(breaker.wait(stop_event=stop), timeout=2) is False
+
+
+async def test_always_advertising_device_still_backs_off():
+    # GATT link stuck, advertisements fine: a probe every 15 s must not force a connect.
+    clock = _Clock()
+    breaker = _breaker(clock, threshold=1)
+    breaker.record_failure()
+    attempts = []
+    for _ in range(6):
+        while not breaker.allow():
+            clock.now += min(15, breaker.retry_in())
+            breaker.record_probe(True)
+        attempts.append(clock.now)
+        breaker.record_failure()
+    assert [b - a for a, b in zip(attempts, attempts[1:])] == [60, 120, 240, 480, 600]
+
+
+async def test_probe_cuts_backoff_once_per_open_period():
+    clock = _Clock()
+    breaker = _breaker(clock, threshold=1)
+    breaker.record_failure()
+    assert not breaker.record_probe(False)
+    clock.now += 15
+    assert breaker.record_probe(True) and breaker.allow()        # not seen → seen: half-open
+    breaker.record_failure()                                     # that attempt failed
+    assert not breaker.record_probe(False) and not breaker.record_probe(True)
+    assert breaker.retry_in() == 60                              # exponential delay again
+    clock.now += 60
+    breaker.record_success()
+    breaker.record_failure()                                     # a new open period
+    assert not breaker.record_probe(False) and breaker.record_probe(True)
+
+
+async def test_health_score_and_backoff_stretch():
+    _HEALTH.clear()
+    try:
+        good = TransportHealth("esp32-eth")
+        assert good.score is None
+        for _ in range(10):
+            good.record(True, connect_ms=800, rssi=-50)
+        assert good.score == 100
+        bad = TransportHealth("esp32-wifi")
+        for i in range(10):
+            bad.record(i % 2 == 0, timeout=i % 2 == 1, connect_ms=8000, rssi=-90)
+        assert bad.score < 50 < good.score
+
+        breaker = _breaker(_Clock(), threshold=1)
+        for _ in range(20):
+            breaker.record_failure(timeout=True, transport="esp32-wifi")
+            breaker.record_success(transport="esp32-wifi")        # keeps the breaker at base delay
+        breaker.record_failure(timeout=True, transport="esp32-wifi")
+        assert 30 < breaker.retry_in() <= 60                     # poor health stretches the backoff
+        assert breaker.to_dict()["transport"] == "esp32-wifi"
+        assert breaker.to_dict()["health"] < 50
+    finally:
+        _HEALTH.clear()
+
+
+def _run_all():
+    async_tests = [
+        test_opens_at_threshold_and_backs_off_exponentially,
+        test_jitter_stays_within_bounds,
+        test_success_closes_and_resets_backoff,
+        test_probe_ends_wait_early_and_stop_event_aborts,
+        test_always_advertising_device_still_backs_off,
+        test_probe_cuts_backoff_once_per_open_period,
+        test_health_score_and_backoff_stretch,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_circuit_breaker():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
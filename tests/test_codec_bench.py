@@ -0,0 +1,105 @@
+"""Tests for benchmarks/codec_bench.py — the codec micro-benchmark suite.
+
+The always-on tests check that the recorded frames decode to the expected
+values (so a benchmark never silently times an error path) and that the
+baseline comparison flags regressions.  The timing comparison against
+benchmarks/baseline.json is opt-in, because wall-clock ratios are noisy on
+shared CI runners:
+
+    AQUACLEAN_BENCH=1 python -m pytest tests/test_codec_bench.py -v
+
+Pattern mirrors test_ble20_client.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import os
+import sys
+import traceback
+
+import pytest
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from benchmarks import codec_bench   # also registers SILLY/TRACE log levels
+
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.GetFilterStatus import GetFilterStatus
+from aquaclean_console_app.aquaclean_core.Common.Deserializer import Deserializer
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.DeviceIdentification import DeviceIdentification
+
+
+def test_recorded_frames_decode():
+    fx = codec_bench.load_frames()
+    status = GetFilterStatus().result(codec_bench.message_args(fx["get_filter_status_response"]))
+    assert status["days_until_filter_change"] == 348
+    assert status["filter_reset_count"] == 5
+    di = Deserializer.deserialize(
+        DeviceIdentification,
+        bytearray(codec_bench.message_args(fx["get_device_identification_response"])))
+    assert di.description == "AquaClean Mera Comfort"
+
+
+def test_alba_pair_round_trip():
+    sender, receiver = codec_bench._alba_pair()
+    for payload in codec_bench._ALBA_PAYLOADS:
+        assert receiver.feed_att_bytes(sender.wrap_for_send(payload)) == [payload]
+
+
+def test_every_benchmark_runs():
+    result = codec_bench.run(min_time=0.0, repeat=1)
+    assert set(result["results"]) == set(codec_bench.BENCHMARKS)
+    assert all(ns > 0 for ns in result["results"].values())
+
+
+def test_compare_scales_by_calibration():
+    baseline = {"calibration_ns": 100.0, "threshold": 1.3,
+                "results": {"a": 1000.0, "b": 1000.0}}
+    # Machine is 2× slower overall: a scales with it, b is 3× slower → regression
+    current = {"calibration_ns": 200.0, "results": {"a": 2100.0, "b": 6000.0, "c": 5.0}}
+    rows = {r[0]: r for r in codec_bench.compare(current, baseline)}
+    assert rows["a"][4] is False
+    assert rows["b"][4] is True
+    assert rows["c"][1] is None and rows["c"][4] is False   # new benchmark, no baseline
+
+
+@pytest.mark.skipif(not os.environ.get("AQUACLEAN_BENCH"),
+                    reason="timing comparison is opt-in: set AQUACLEAN_BENCH=1")
+def test_no_regression_against_baseline():
+    baseline = codec_bench.load_baseline()
+    assert baseline is not None, "benchmarks/baseline.json missing — run codec_bench.py --update"
+    rows = codec_bench.compare(codec_bench.run(), baseline)
+    regressed = [f"{name}: {ratio}×" for name, _, _, ratio, bad in rows if bad]
+    assert not regressed, "slower than baseline: " + ", ".join(regressed)
+
+
+def _run_all():
+    tests = [
+        test_recorded_frames_decode,
+        test_alba_pair_round_trip,
+        test_every_benchmark_runs,
+        test_compare_scales_by_calibration,
+    ]
+    passed = 0
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_codec_bench():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,153 @@
+"""Tests for aquaclean_console_app/CommandBatcher.py — on-demand command coalescing.
+
+The session is a plain coroutine that "connects" (short sleep), runs the
+batch body against a fake client and returns a timing dict, the way
+ApiMode._on_demand does.  Stdlib only.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.CommandBatcher import CommandBatcher
+
+CONNECT_S = 0.03
+
+
+class _Sessions:
+    """Counts sessions and records every command sent on them."""
+
+    def __init__(self, fail_connect: Exception | None = None):
+        self.opened = 0
+        self.sent = []
+        self._fail_connect = fail_connect
+
+    async def run(self, body):
+        self.opened += 1
+        await asyncio.sleep(CONNECT_S)
+        if self._fail_connect is not None:
+            raise self._fail_connect
+        try:
+            await body(f"link-{self.opened}")
+        except Exception as e:
+            raise RuntimeError(f"503: {e}") from e      # mapped, like _on_demand_inner
+        return {"_connect_ms": int(CONNECT_S * 1000)}
+
+    def command(self, name: str, fail: Exception | None = None):
+        async def action(client):
+            if fail is not None:
+                raise fail
+            self.sent.append((client, name))
+        return action
+
+
+async def test_commands_within_window_share_one_session():
+    sessions = _Sessions()
+    batcher = CommandBatcher(0.02, sessions.run)
+    names = ["toggle-orientation-light", "toggle-odour-extraction", "toggle-lid"]
+    results = await asyncio.gather(*(batcher.submit(n, sessions.command(n)) for n in names))
+    assert sessions.opened == 1
+    assert sessions.sent == [("link-1", n) for n in names]
+    assert [r["_batch_position"] for r in results] == [1, 2, 3]
+    assert all(r["_batch_size"] == 3 and r["_connect_ms"] == 30 for r in results)
+    assert not any("_duplicate" in r for r in results)
+
+
+async def test_command_arriving_while_connecting_joins_the_batch():
+    sessions = _Sessions()
+    batcher = CommandBatcher(0.0, sessions.run)
+    first = asyncio.create_task(batcher.submit("toggle-lid", sessions.command("toggle-lid")))
+    await asyncio.sleep(CONNECT_S / 2)
+    assert len(batcher._tasks) == 1      # the running batch is referenced by the batcher
+    second = await batcher.submit("toggle-anal", sessions.command("toggle-anal"))
+    assert (await first)["_batch_size"] == 2 and second["_batch_position"] == 2
+    assert sessions.opened == 1
+    await asyncio.sleep(0)
+    assert not batcher._tasks            # ... and released once it has finished
+    third = await batcher.submit("toggle-lid", sessions.command("toggle-lid"))
+    assert third["_batch_size"] == 1 and sessions.opened == 2
+
+
+async def test_duplicate_toggle_is_executed_and_flagged():
+    sessions = _Sessions()
+    batcher = CommandBatcher(0.02, sessions.run)
+    first, second = await asyncio.gather(
+        batcher.submit("toggle-lid", sessions.command("toggle-lid")),
+        batcher.submit("toggle-lid", sessions.command("toggle-lid")),
+    )
+    assert len(sessions.sent) == 2
+    assert "_duplicate" not in first and second["_duplicate"] is True
+    assert batcher.to_dict()["duplicates"] == 1
+
+
+async def test_errors_reach_their_own_callers():
+    sessions = _Sessions()
+    batcher = CommandBatcher(0.02, sessions.run, is_fatal=lambda exc: not isinstance(exc, ValueError))
+    results = await asyncio.gather(
+        batcher.submit("a", sessions.command("a")),
+        batcher.submit("bad", sessions.command("bad", fail=ValueError("out of range"))),
+        batcher.submit("c", sessions.command("c")),
+        batcher.submit("lost", sessions.command("lost", fail=TimeoutError("no answer"))),
+        batcher.submit("d", sessions.command("d")),
+        return_exceptions=True,
+    )
+    assert results[0]["_batch_position"] == 1 and results[2]["_batch_position"] == 3
+    assert isinstance(results[1], ValueError)                  # validation error: own caller only
+    assert isinstance(results[3], RuntimeError) and "503" in str(results[3])
+    assert isinstance(results[4], RuntimeError)                # not run — gets the session error
+    assert [name for _, name in sessions.sent] == ["a", "c"]
+
+
+async def test_connect_failure_fails_the_whole_batch():
+    sessions = _Sessions(fail_connect=ConnectionError("device not found"))
+    batcher = CommandBatcher(0.01, sessions.run)
+    results = await asyncio.gather(
+        batcher.submit("a", sessions.command("a")),
+        batcher.submit("b", sessions.command("b")),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, ConnectionError) for r in results)
+    ok = _Sessions()
+    batcher._run_session = ok.run
+    assert (await batcher.submit("a", ok.command("a")))["_batch_size"] == 1
+
+
+def _run_all():
+    async_tests = [
+        test_commands_within_window_share_one_session,
+        test_command_arriving_while_connecting_joins_the_batch,
+        test_duplicate_toggle_is_executed_and_flagged,
+        test_errors_reach_their_own_callers,
+        test_connect_failure_fails_the_whole_batch,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_command_batcher():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,135 @@
+"""Tests for aquaclean_console_app/DataBatch.py — batch planning and execution.
+
+A fake client records the order of the base_client calls; no BLE.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app import DataBatch
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.StatisticsDescale import StatisticsDescale
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanBaseClient import BLEPeripheralTimeoutError
+
+
+class _SplResult:
+    data_array = [1, 0, 0, 1, 0, 0, 7, 0, 3, 4]
+
+
+class _FakeBaseClient:
+    def __init__(self, fail: dict | None = None):
+        self.calls = []
+        self._fail = fail or {}
+
+    async def _call(self, name, value):
+        self.calls.append(name)
+        await asyncio.sleep(0)
+        if name in self._fail:
+            raise self._fail[name]
+        return value
+
+    def get_system_parameter_list_async(self, params):
+        return self._call("GetSystemParameterList", _SplResult())
+
+    def get_filter_status_async(self):
+        return self._call("GetFilterStatus", {"days_until_filter_change": 42})
+
+    def get_statistics_descale_async(self):
+        return self._call("GetStatisticsDescale", StatisticsDescale(number_of_descale_cycles=3))
+
+    def get_stored_profile_settings_async(self):
+        return self._call("GetStoredProfileSetting", {0: 1})
+
+    def get_node_list_async(self):
+        return self._call("GetNodeList", {"count": 0, "node_ids": []})
+
+
+class _FakeClient:
+    def __init__(self, **kwargs):
+        self.base_client = _FakeBaseClient(**kwargs)
+
+
+async def test_plan_orders_dedupes_and_validates():
+    names = DataBatch.plan("profile-settings, system-parameters,filter-status,system-parameters")
+    assert names == ["filter-status", "system-parameters", "profile-settings"]
+    assert DataBatch.plan(["node-list"]) == ["node-list"]
+    for bad in ("", " , ", "filter-status,bogus"):
+        try:
+            DataBatch.plan(bad)
+            raise AssertionError(f"plan({bad!r}) accepted")
+        except ValueError as e:
+            assert "Valid items" in str(e)
+
+
+async def test_run_executes_in_device_safe_order_with_timing():
+    client = _FakeClient()
+    names = DataBatch.plan("statistics-descale,system-parameters,filter-status")
+    result = await DataBatch.run(client, names)
+    assert client.base_client.calls == ["GetFilterStatus", "GetSystemParameterList", "GetStatisticsDescale"]
+    assert result["order"] == names
+    items = result["items"]
+    assert items["filter-status"]["data"] == {"days_until_filter_change": 42}
+    assert items["system-parameters"]["data"]["is_anal_shower_running"] is True
+    assert items["system-parameters"]["data"]["last_error_code"] == 7
+    assert items["statistics-descale"]["data"]["number_of_descale_cycles"] == 3
+    assert all(isinstance(item["ms"], int) for item in items.values())
+
+
+async def test_non_fatal_error_fails_only_its_item():
+    client = _FakeClient(fail={"GetFilterStatus": BLEPeripheralTimeoutError("0x59 stuck")})
+    names = DataBatch.plan("filter-status,system-parameters,node-list")
+    result = await DataBatch.run(client, names,
+                                 is_fatal=lambda exc: not isinstance(exc, BLEPeripheralTimeoutError))
+    assert result["items"]["filter-status"]["error"] == "0x59 stuck"
+    assert "data" in result["items"]["system-parameters"] and "data" in result["items"]["node-list"]
+
+
+async def test_fatal_error_ends_the_batch():
+    client = _FakeClient(fail={"GetSystemParameterList": ConnectionError("link lost")})
+    names = DataBatch.plan("filter-status,system-parameters,node-list")
+    try:
+        await DataBatch.run(client, names)
+        raise AssertionError("fatal error swallowed")
+    except ConnectionError:
+        pass
+    assert client.base_client.calls == ["GetFilterStatus", "GetSystemParameterList"]
+
+
+def _run_all():
+    async_tests = [
+        test_plan_orders_dedupes_and_validates,
+        test_run_executes_in_device_safe_order_with_timing,
+        test_non_fatal_error_fails_only_its_item,
+        test_fatal_error_ends_the_batch,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_data_batch():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,104 @@
+"""Tests for aquaclean_console_app/FieldCatalog.py — catalogue, planner, SPL decode.
+
+A fake base client records the GetSPL index lists; no BLE.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app import FieldCatalog
+from aquaclean_console_app.aquaclean_core.Api.CallClasses.Dtos.SystemParameterList import SystemParameterList
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanClient import SPL_PARAMS_MERA_COMFORT
+
+
+class _FakeBaseClient:
+    def __init__(self):
+        self.calls = []
+
+    async def get_system_parameter_list_async(self, params):
+        self.calls.append(params)
+        # Position-based like the device: data_array[i] answers params[i].
+        data = [100 + p for p in params]
+        return SystemParameterList(a=0, data_array=data + [0] * (12 - len(data)))
+
+
+async def test_full_plan_stays_within_mera_safe_indices():
+    plan = FieldCatalog.plan()
+    assert plan == FieldCatalog.plan("all") == FieldCatalog.plan(" , ")
+    assert set(plan.spl_params) <= set(SPL_PARAMS_MERA_COMFORT)
+    assert plan.spl_batches == ((0, 1, 2, 3, 4, 5, 6, 12, 13),)     # index 7 is read by nobody
+    assert plan.filter_status and plan.descale
+    assert plan.profile_ids == (2, 1, 3, 4, 6, 7, 5, 8, 0, 9, 13)   # iPhone read order
+    assert plan.common_ids == (2, 1, 3, 0, 4, 6, 7)
+    assert plan.calls == 1 + 1 + 11 + 7 + 1
+
+
+async def test_unread_sources_are_dropped():
+    plan = FieldCatalog.plan("is_user_sitting,lid_offset_position, ps_wc_seat_heat")
+    assert plan.spl_batches == ((0, 12),) and plan.profile_ids == (7,)
+    assert not plan.filter_status and not plan.descale and plan.common_ids == ()
+    assert plan.calls == 2 and "ps_wc_seat_heat" in plan
+    assert FieldCatalog.plan("filter").calls == 1 and FieldCatalog.plan("filter").spl_batches == ()
+    try:
+        FieldCatalog.plan("state,is_user_standing")
+        raise AssertionError("unknown field accepted")
+    except ValueError as e:
+        assert "is_user_standing" in str(e)
+
+
+async def test_spl_batches_hold_at_most_twelve_ids():
+    batches = FieldCatalog._batches(list(range(15)))
+    assert [len(b) for b in batches] == [12, 3]
+    assert all(len(b) <= FieldCatalog.MAX_SPL_IDS for b in FieldCatalog.plan().spl_batches)
+
+
+async def test_read_decodes_by_position():
+    client = _FakeBaseClient()
+    plan = FieldCatalog.plan("shower_arm_offset_position,is_dryer_running,last_error_code")
+    values = await FieldCatalog.read_system_parameters(client, plan)
+    assert client.calls == [[1, 6, 13]]
+    assert values == {1: 101, 6: 106, 13: 113}
+    assert FieldCatalog.spl_fields(values) == {
+        "is_dryer_running": True, "last_error_code": 106, "shower_arm_offset_position": 113,
+    }
+
+
+def _run_all():
+    async_tests = [
+        test_full_plan_stays_within_mera_safe_indices,
+        test_unread_sources_are_dropped,
+        test_spl_batches_hold_at_most_twelve_ids,
+        test_read_decodes_by_position,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_field_catalog():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,133 @@
+"""Tests for the memoised, hash-gated HA MQTT discovery publish in main.py.
+
+get_ha_discovery_messages() serialises the discovery set once per topic
+prefix; ServiceMode._publish_ha_discovery() republishes only the topics whose
+payload hash differs from the retained copy reported by the MQTT service.
+
+No broker required — _FakeMqttService records publishes and returns a
+canned retained-hash map.
+
+Pattern mirrors test_ble20_client.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import traceback
+from types import SimpleNamespace
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+# Register SILLY/TRACE log levels before any bridge import (myEvent uses logger.trace).
+def _add_level(name: str, value: int) -> None:
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+logging.basicConfig(level=logging.WARNING)
+
+from aquaclean_console_app import main as bridge
+from aquaclean_console_app.MqttService import MqttService, discovery_payload_hash, ha_discovery_topic_filters
+
+
+class _FakeMqttService:
+    def __init__(self, retained: dict):
+        self._retained = retained
+        self.published: list[tuple[str, str]] = []
+
+    async def get_discovery_hashes_async(self, settle: float = 0.5, timeout: float = 3.0) -> dict:
+        return dict(self._retained)
+
+    async def send_data_async(self, topic, value):
+        self.published.append((topic, value))
+
+
+def _publish(retained: dict, device: str = "") -> _FakeMqttService:
+    svc = _FakeMqttService(retained)
+    fake_self = SimpleNamespace(mqttConfig={"topic": "Test/AquaClean"}, mqtt_service=svc,
+                                config=bridge.config, device=device)
+    bridge.config.set("SERVICE", "ha_discovery_on_startup", "true")
+    asyncio.run(bridge.ServiceMode._publish_ha_discovery(fake_self))
+    return svc
+
+
+def test_messages_memoised_per_prefix():
+    a = bridge.get_ha_discovery_messages("Test/AquaClean")
+    b = bridge.get_ha_discovery_messages("Test/AquaClean")
+    c = bridge.get_ha_discovery_messages("Other/AquaClean")
+    assert a is b
+    assert a is not c
+    assert len(a) == len(bridge.get_ha_discovery_configs("Test/AquaClean"))
+
+
+def test_message_hash_matches_payload():
+    for topic, payload, payload_hash in bridge.get_ha_discovery_messages("Test/AquaClean"):
+        assert payload_hash == discovery_payload_hash(payload.encode("utf-8")), topic
+
+
+def test_empty_broker_publishes_everything():
+    messages = bridge.get_ha_discovery_messages("Test/AquaClean")
+    svc = _publish({})
+    assert len(svc.published) == len(messages)
+
+
+def test_unchanged_topics_are_skipped():
+    messages = bridge.get_ha_discovery_messages("Test/AquaClean")
+    retained = {t: h for t, _, h in messages}
+    stale_topic = messages[0][0]
+    retained[stale_topic] = discovery_payload_hash('{"name": "old"}')
+    svc = _publish(retained)
+    assert [t for t, _ in svc.published] == [stale_topic]
+
+
+def test_named_device_configs_match_its_filters():
+    filters = ha_discovery_topic_filters("upstairs", "38abcdef0012")
+    matches = lambda f, topic: MqttService.is_discovery_topic(SimpleNamespace(discovery_filters=f), topic)
+    messages = bridge.get_ha_discovery_messages("Test/AquaClean", "upstairs")
+    assert all(matches(filters, t) for t, _, _ in messages)
+    assert not any(matches(ha_discovery_topic_filters(), t) for t, _, _ in messages)
+    assert not any(matches(filters, t) for t, _, _ in bridge.get_ha_discovery_messages("Test/AquaClean"))
+    assert matches(filters, "homeassistant/sensor/aquaclean_38abcdef0012/esphome_proxy_error/config")
+
+    retained = {t: h for t, _, h in messages}
+    assert _publish(retained, device="upstairs").published == []
+
+
+def _run_all():
+    tests = [
+        test_messages_memoised_per_prefix,
+        test_message_hash_matches_payload,
+        test_empty_broker_publishes_everything,
+        test_unchanged_topics_are_skipped,
+        test_named_device_configs_match_its_filters,
+    ]
+    passed = 0
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_ha_discovery():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
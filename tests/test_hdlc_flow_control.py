@@ -0,0 +1,186 @@
+"""Tests for HDLC flow control in AriendiSecurity — cumulative RR, send window, REJ.
+
+Both ends run in-process: the bridge side is AriendiSecurity, the device side
+is _ServerSide from test_arendi_security.py.  After the handshake every ATT
+write from the bridge is captured, so RR / REJ / retransmissions can be
+counted and fed to the device side by hand (or "lost").  No BLE.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from test_arendi_security import _ServerSide, _make_pipe
+
+from aquaclean_console_app.bluetooth_le.LE.AriendiSecurity import AriendiSecurity, _cobs_decode
+
+
+async def _link():
+    """Handshaken (client, server, writes) — writes collects the client's ATT writes."""
+    client = AriendiSecurity()
+    server = _ServerSide()
+    c_send, s_send = _make_pipe(client, server)
+    task = asyncio.create_task(server.run_handshake(s_send))
+    await client.perform_handshake(c_send)
+    await task
+    writes = []
+
+    async def raw_write(att: bytes) -> None:
+        writes.append(att)
+
+    client._ack_send_fn = raw_write
+    return client, server, writes
+
+
+def _ctrl(att: bytes) -> int:
+    return _cobs_decode(att[1:-1])[0]
+
+
+def _s_frames(writes, s_type: int) -> list[int]:
+    """N(R) of every S-frame of s_type (0 = RR, 2 = REJ) in writes."""
+    return [(c >> 5) & 7 for c in map(_ctrl, writes) if c & 0x03 == 0x01 and (c >> 2) & 0x03 == s_type]
+
+
+def _s_frame(server: _ServerSide, s_type: int, nr: int) -> bytes:
+    return server._build_att(((nr << 5) & 0xE0) | (s_type << 2) | 0x01, b'')
+
+
+async def test_acks_are_delayed_and_cumulative():
+    client, server, writes = await _link()
+    payloads = [os.urandom(12) for _ in range(10)]
+    received = []
+    for p in payloads:                                   # one notification burst
+        received += client.feed_att_bytes(server.encrypt(p))
+    await asyncio.sleep(0)
+    assert received == payloads
+    assert _s_frames(writes, 0) == [server._tx_seq]      # one RR covers all ten
+    assert client.acks_sent == 1 and client.acks_saved == 9
+
+    client.feed_att_bytes(server.encrypt(b'\x01\x02'))
+    await asyncio.sleep(0)
+    assert len(writes) == 1                              # below ACK_EVERY: timer pending
+    await asyncio.sleep(client.ACK_DELAY * 5)
+    assert _s_frames(writes, 0) == [server._tx_seq - 1, server._tx_seq]
+
+    client.feed_att_bytes(server.encrypt(b'\x03\x04'))
+    await client.send_data(b'\x05\x06', client._ack_send_fn)
+    await asyncio.sleep(client.ACK_DELAY * 5)
+    assert len(_s_frames(writes, 0)) == 2                # the I-frame's N(R) acked it
+    assert (_ctrl(writes[-1]) >> 5) & 7 == server._tx_seq
+    assert client.acks_saved == 10
+
+
+async def test_send_window_stalls_until_n_r_advances():
+    client, server, writes = await _link()
+    payloads = [bytes([i]) * 8 for i in range(9)]
+    sent = []
+
+    async def send(att):
+        sent.append(att)
+
+    tasks = [asyncio.create_task(client.send_data(p, send)) for p in payloads]
+    await asyncio.sleep(0.01)
+    assert len(sent) == client.TX_WINDOW and client.window_stalls == 2
+    assert [server.decrypt_next(att) for att in sent] == payloads[:7]
+
+    client.feed_att_bytes(server.encrypt(b'\xAA'))      # piggybacked N(R) frees the window
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+    assert [server.decrypt_next(att) for att in sent[7:]] == payloads[7:]
+    assert client.link_stats()["tx_unacked"] == 2
+
+    client.feed_att_bytes(_s_frame(server, 0, server._rx_ack))
+    assert client.link_stats()["tx_unacked"] == 0
+
+
+async def test_rej_resends_from_n_r_with_the_same_ciphertext():
+    client, server, writes = await _link()
+    client.RETRANSMIT = True
+    payloads = [os.urandom(10) for _ in range(3)]
+    for p in payloads:
+        await client.send_data(p, client._ack_send_fn)
+    frames = list(writes)
+    assert server.decrypt_next(frames[0]) == payloads[0]  # frames 1 and 2 lost on the air
+
+    client.feed_att_bytes(_s_frame(server, 2, server._rx_ack))
+    await asyncio.sleep(0.01)
+    assert writes[3:] == frames[1:]
+    assert [server.decrypt_next(att) for att in writes[3:]] == payloads[1:]
+    assert client.rejects_received == 1 and client.retransmits == 2
+    assert client.link_stats()["tx_unacked"] == 2
+
+
+async def test_timeout_retransmits_then_releases_window():
+    client, server, writes = await _link()
+    client.RETRANSMIT = True
+    client.RETX_TIMEOUT = 0.02
+    await client.send_data(b'\x10\x20\x30', client._ack_send_fn)
+    await asyncio.sleep(client.RETX_TIMEOUT * (client.MAX_RETX + 3))
+    assert writes == [writes[0]] * (1 + client.MAX_RETX)
+    assert client.retransmits == client.MAX_RETX
+    assert client.link_stats()["tx_unacked"] == 0        # peer never acks: window released
+
+
+async def test_nothing_is_resent_by_default():
+    client, server, writes = await _link()
+    assert not AriendiSecurity.RETRANSMIT
+    client.RETX_TIMEOUT = 0.02
+    for p in (b'\x01' * 4, b'\x02' * 4):
+        await client.send_data(p, client._ack_send_fn)
+    client.feed_att_bytes(_s_frame(server, 2, server._rx_ack))
+    await asyncio.sleep(client.RETX_TIMEOUT * 3)
+    assert len(writes) == 2 and client.retransmits == 0 and client.rejects_received == 1
+    assert client.link_stats()["tx_unacked"] == 0        # released at the first timeout
+
+
+async def test_duplicate_i_frame_is_dropped_with_one_rej():
+    client, server, writes = await _link()
+    first = server.encrypt(b'\x11' * 6)
+    assert client.feed_att_bytes(first) == [b'\x11' * 6]
+    assert client.feed_att_bytes(first) == []
+    assert client.feed_att_bytes(first) == []
+    await asyncio.sleep(0)
+    assert _s_frames(writes, 2) == [server._tx_seq]      # one REJ for the condition
+    assert client.out_of_sequence == 2
+    assert client.feed_att_bytes(server.encrypt(b'\x22' * 6)) == [b'\x22' * 6]   # stream in sync
+
+
+def _run_all():
+    async_tests = [
+        test_acks_are_delayed_and_cumulative,
+        test_send_window_stalls_until_n_r_advances,
+        test_rej_resends_from_n_r_with_the_same_ciphertext,
+        test_timeout_retransmits_then_releases_window,
+        test_nothing_is_resent_by_default,
+        test_duplicate_i_frame_is_dropped_with_one_rej,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_hdlc_flow_control():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,180 @@
+"""Tests for aquaclean_console_app/HistoryStore.py — compact on-disk history of device state.
+
+Every test works in its own temporary directory on a fake clock.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.HistoryStore import HistoryStore, parse_time
+
+DAY = 86400
+T0 = 1_700_000_000 // 3600 * 3600        # on an hour boundary
+
+
+class _Clock:
+    def __init__(self):
+        self.now = float(T0)
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_flags_are_run_length_encoded():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = _Clock()
+        store = HistoryStore(tmp, clock=clock)
+        for dt, sitting in ((0, False), (10, False), (20, True), (30, True), (40, None), (50, False)):
+            clock.now = T0 + dt
+            store.record({"is_user_sitting": sitting})
+        assert store.fields()["is_user_sitting"]["records"] == 4       # changes only
+        result = store.query("is_user_sitting", T0 + 25, T0 + 45)
+        assert result["type"] == "bool"
+        assert result["runs"] == [[T0 + 25, True], [T0 + 40, None]]     # run in effect at from, clamped
+        assert store.query("is_dryer_running", T0, T0 + 60)["runs"] == []
+        try:
+            store.query("no_such_field", T0, T0 + 60)
+            raise AssertionError("unknown field accepted")
+        except KeyError:
+            pass
+
+
+async def test_numbers_are_downsampled_after_raw_days():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = _Clock()
+        store = HistoryStore(tmp, raw_days=1, clock=clock)
+        for i in range(2 * 360):                     # two hours of 10 s polls
+            clock.now = T0 + i * 10
+            store.record({"last_poll": {"ble_rssi": -60 - i % 2, "wifi_rssi": None, "poll_ms": 1000 + i,
+                                        "ble_ms": 0, "esphome_api_ms": 0}})
+        fields = store.fields()
+        assert (fields["ble_rssi"]["records"], fields["poll_ms"]["records"]) == (720, 720)
+        assert (fields["wifi_rssi"]["records"], fields["ble_ms"]["records"]) == (0, 0)   # None / reused: skipped
+        assert fields["ble_rssi"]["bytes"] == 2 * 8 + 720 * 8
+
+        clock.now = T0 + DAY + 3600 + 5              # first hour is now older than raw_days
+        store.record({"days_until_next_descale": 42})
+        fields = store.fields()
+        assert (fields["ble_rssi"]["records"], fields["ble_rssi"]["hourly_records"]) == (360, 1)
+        result = store.query("poll_ms", T0, T0 + 2 * 3600)
+        assert result["hourly"] == [[T0, 1000.0, 1179.5, 1359.0, 360]]
+        assert len(result["raw"]) == 360 and result["raw"][0] == [T0 + 3600, 1360.0]
+        assert store.query("ble_rssi", T0, T0 + 3599)["hourly"][0][1:4] == [-61.0, -60.5, -60.0]
+
+        reopened = HistoryStore(tmp, raw_days=1, clock=clock)
+        assert reopened.query("poll_ms", T0, T0 + 2 * 3600) == result
+        assert reopened.query("days_until_next_descale", T0, clock.now)["raw"] == [[int(clock.now), 42.0]]
+
+
+async def test_max_points_averages_raw_samples():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = _Clock()
+        store = HistoryStore(tmp, clock=clock)
+        for i in range(100):
+            store.record_number("poll_ms", i, now=T0 + i)
+        result = store.query("poll_ms", T0, T0 + 100, max_points=10)
+        assert result["raw_step_s"] == 10.0
+        assert result["raw"][0] == [float(T0), 4.5] and len(result["raw"]) == 10
+        assert len(store.query("poll_ms", T0, T0 + 100)["raw"]) == 100
+
+
+async def test_torn_record_and_bad_file_recover():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = _Clock()
+        store = HistoryStore(tmp, clock=clock)
+        for i in range(3):
+            store.record_number("ble_rssi", -70 + i, now=T0 + i)
+        with open(os.path.join(tmp, "ble_rssi.raw"), "ab") as f:
+            f.write(b"\x01\x02\x03")                 # crash in the middle of an append
+        with open(os.path.join(tmp, "poll_ms.raw"), "wb") as f:
+            f.write(b"garbage")
+        store = HistoryStore(tmp, clock=clock)
+        assert store.query("ble_rssi", T0, T0 + 10)["raw"] == [[T0, -70.0], [T0 + 1, -69.0], [T0 + 2, -68.0]]
+        assert store.fields()["poll_ms"]["records"] == 0
+        store.record_number("ble_rssi", -50, now=T0 - 100)     # clock stepped back: stays sorted
+        assert store.query("ble_rssi", T0, T0 + 10)["raw"][-1] == [T0 + 2, -50.0]
+
+
+async def test_descaling_state_and_queries_during_compact():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = _Clock()
+        store = HistoryStore(tmp, raw_days=1, clock=clock)
+        for dt, state in ((0, 0), (60, 1), (120, 3)):
+            store.record({"descaling_state": state}, now=T0 + dt)
+        assert store.query("descaling_state", T0, T0 + 200)["raw"] == [[T0, 0.0], [T0 + 60, 1.0], [T0 + 120, 3.0]]
+
+        for i in range(3 * 360):
+            store.record_number("poll_ms", i, now=T0 + i * 10)
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(200):
+                    store.query("poll_ms", T0, T0 + 3 * 3600)
+            except Exception as e:                    # unpack on a replaced, shorter file
+                errors.append(e)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for hour in range(1, 4):                       # each compact() rewrites poll_ms.raw shorter
+            store.compact(T0 + 86400 + hour * 3600)
+            await asyncio.sleep(0)
+        thread.join()
+        assert errors == [] and store.fields()["poll_ms"]["hourly_records"] == 3
+
+
+async def test_parse_time():
+    assert parse_time(None, 5.0) == 5.0 and parse_time("", 5.0) == 5.0
+    assert parse_time("1700000000", 0) == 1700000000.0
+    assert parse_time("2023-11-14T22:13:20Z", 0) == 1700000000.0
+    assert parse_time("2023-11-14T23:13:20+01:00", 0) == 1700000000.0
+    try:
+        parse_time("yesterday", 0)
+        raise AssertionError("bad time accepted")
+    except ValueError:
+        pass
+
+
+def _run_all():
+    async_tests = [
+        test_flags_are_run_length_encoded,
+        test_numbers_are_downsampled_after_raw_days,
+        test_max_points_averages_raw_samples,
+        test_torn_record_and_bad_file_recover,
+        test_descaling_state_and_queries_during_compact,
+        test_parse_time,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_history_store():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,123 @@
+"""Tests for aquaclean_console_app/LoopMonitor.py — loop lag, stalls, task inventory.
+
+Each test runs its own LoopMonitor on the asyncio.run() loop and blocks it
+with time.sleep() to produce a stall.  Stdlib only.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.LoopMonitor import LoopMonitor
+
+
+def _blocking_helper(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def _idle_worker() -> None:
+    await asyncio.sleep(10)
+
+
+async def test_stall_records_stack_of_blocking_code():
+    monitor = LoopMonitor()
+    monitor.configure(threshold_ms=150)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.15)
+        _blocking_helper(0.5)
+        await asyncio.sleep(0.25)
+        assert monitor.stalls_total == 1
+        stall = monitor.snapshot()["loop"]["stalls"][0]
+        assert "_blocking_helper" in stall["stack"][-1]
+        assert "tests/test_loop_monitor.py" in stall["stack"][-1]
+        assert "test_stall_records_stack_of_blocking_code" in stall["task"]
+        assert stall["duration_ms"] >= 400
+        assert monitor.lag.max_ms >= 400
+    finally:
+        monitor.stop()
+
+
+async def test_short_delays_are_lag_not_stalls():
+    monitor = LoopMonitor()
+    monitor.configure(threshold_ms=300)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.15)
+        _blocking_helper(0.15)                       # longer than one heartbeat: always late
+        await asyncio.sleep(0.25)
+        assert monitor.stalls_total == 0
+        assert monitor.lag.count >= 3 and monitor.lag.max_ms >= 40
+    finally:
+        monitor.stop()
+
+
+async def test_task_inventory_has_age_and_creation_site():
+    loop = asyncio.get_running_loop()
+    monitor = LoopMonitor()
+    monitor.start()
+    try:
+        worker = asyncio.create_task(_idle_worker(), name="idle-worker")
+        await asyncio.sleep(0.05)
+        snapshot = monitor.snapshot()
+        entry = next(t for t in snapshot["tasks"] if t["name"] == "idle-worker")
+        assert entry["coro"] == "_idle_worker"
+        assert entry["age_s"] is not None and entry["age_s"] >= 0
+        assert entry["created_at"].startswith("tests/test_loop_monitor.py:")
+        assert "test_task_inventory_has_age_and_creation_site" in entry["created_at"]
+        assert entry["waiting_at"].startswith("tests/test_loop_monitor.py:")
+        assert snapshot["num_tasks"] == len(snapshot["tasks"])
+        assert "loop-watchdog" in {t["name"] for t in snapshot["threads"]}
+        worker.cancel()
+    finally:
+        monitor.stop()
+    assert loop.get_task_factory() is None and not monitor.running
+
+
+async def test_disabled_monitor_does_not_start():
+    monitor = LoopMonitor()
+    monitor.configure(enabled=False)
+    monitor.start()
+    assert not monitor.running and asyncio.get_running_loop().get_task_factory() is None
+    assert monitor.snapshot()["loop"]["monitoring"] is False
+
+
+def _run_all():
+    async_tests = [
+        test_stall_records_stack_of_blocking_code,
+        test_short_delays_are_lag_not_stalls,
+        test_task_inventory_has_age_and_creation_site,
+        test_disabled_monitor_does_not_start,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_loop_monitor():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -299,8 +299,10 @@ async def test_advertisement_single_manufacturer_entry():
 
     pressed = mera_mock._MeraAdvertisement("14621", state_b=1, rs_prefix="30")
     md_pressed = pressed.ManufacturerData
-    assert set(md_pressed.keys()) == {0x0100}
-    assert bytes(md_pressed[0x0100].value) == b"\x0114621\x0030"
+    # Still one entry; since 2026-07-20 its company ID flips to 0x01AA while
+    # the button is pressed (IsEmergencyConnectPermitted, see _MeraAdvertisement).
+    assert set(md_pressed.keys()) == {0x01AA}
+    assert bytes(md_pressed[0x01AA].value) == b"\x0114621\x0030"
 
 
 async def test_factory_reset_restores_defaults():
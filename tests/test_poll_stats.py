@@ -0,0 +1,138 @@
+"""Tests for aquaclean_console_app/PollStats.py: log-bucketed latency
+histograms, rolling 1 h / 24 h windows and optional persistence.
+
+PollStats.py is stdlib-only, so these tests run in any environment.
+
+Pattern mirrors test_ble20_client.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.PollStats import (
+    PollStats, _MetricStats, _bucket_index, _bucket_upper, _NUM_BUCKETS,
+)
+
+
+def test_bucket_bounds_cover_value():
+    for v in (0.2, 1.0, 1.9, 2.0, 37.5, 365.0, 1500.0, 99999.0):
+        i = _bucket_index(v)
+        assert 0 <= i < _NUM_BUCKETS
+        assert v <= _bucket_upper(i)
+        # ≤ 12.5 % relative error above 1 ms
+        if v >= 1.0:
+            assert _bucket_upper(i) <= v * 1.125 + 1e-9
+    assert _bucket_index(10 ** 9) == _NUM_BUCKETS - 1
+
+
+def test_percentiles_from_histogram():
+    m = _MetricStats(histogram=True)
+    for v in range(1, 101):          # 1 … 100 ms, uniform
+        m.record(v, now=0.0)
+    p = m.percentiles()
+    assert 45 <= p["p50_ms"] <= 57
+    assert 85 <= p["p90_ms"] <= 100
+    assert 95 <= p["p99_ms"] <= 100   # clamped to observed max
+
+
+def test_rssi_metrics_have_no_histogram():
+    m = _MetricStats()
+    m.record(-70)
+    assert "p50_ms" not in m.to_dict()
+    assert m.percentiles()["p99_ms"] is None
+
+
+def test_rolling_window_expires_old_samples():
+    m = _MetricStats(histogram=True)
+    t0 = 1_700_000_000.0
+    m.record(100, now=t0)
+    assert m.window("1h", now=t0)["count"] == 1
+    assert m.window("1h", now=t0 + 2 * 3600)["count"] == 0
+    assert m.window("24h", now=t0 + 2 * 3600)["count"] == 1
+    assert m.window("24h", now=t0 + 25 * 3600)["count"] == 0
+    # Reusing an expired slot must not resurrect the old sample
+    m.record(200, now=t0 + 24 * 3600)
+    assert m.window("24h", now=t0 + 24 * 3600)["count"] == 1
+    assert m.count == 2
+
+
+def test_persistence_round_trip():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "stats.json")
+        a = PollStats(path)
+        for ms in (300, 350, 900):
+            a.record("on-demand", 40, 1200, ms, ble_rssi=-71, transport="esp32-wifi")
+        a.save()
+        b = PollStats(path)
+        da = a.to_dict()["on-demand"]
+        db = b.to_dict()["on-demand"]
+        assert db["sample_count"] == 3
+        assert db["transport"]["esp32-wifi"] == 3
+        assert db["poll_ms"]["p99_ms"] == da["poll_ms"]["p99_ms"]
+        assert db["poll_ms"]["windows"]["1h"]["count"] == 3
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_corrupt_stats_file_starts_fresh():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "stats.json")
+        with open(path, "w") as f:
+            f.write("{not json")
+        s = PollStats(path)
+        assert s.to_dict()["persistent"]["sample_count"] == 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_markdown_has_percentile_table():
+    s = PollStats()
+    s.record("persistent", None, None, 250, transport="bleak")
+    md = s.to_markdown()
+    assert "| Poll (query)     | lifetime |" in md
+    assert "p99" in md
+
+
+def _run_all():
+    tests = [
+        test_bucket_bounds_cover_value,
+        test_percentiles_from_histogram,
+        test_rssi_metrics_have_no_histogram,
+        test_rolling_window_expires_old_samples,
+        test_persistence_round_trip,
+        test_corrupt_stats_file_starts_fresh,
+        test_markdown_has_percentile_table,
+    ]
+    passed = 0
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_poll_stats():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
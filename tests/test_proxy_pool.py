@@ -0,0 +1,180 @@
+"""Tests for aquaclean_console_app/ProxyPool.py — several ESP32 proxies, best first, failover.
+
+The pool runs on a fake clock.  The failover test drives a real
+BluetoothLeConnector whose per-proxy connect is replaced, so no ESP32 and no
+BLE adapter are involved.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+# Register SILLY/TRACE log levels before any bridge import (the bridge logs via logger.trace/silly).
+def _add_level(name: str, value: int) -> None:
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+logging.basicConfig(level=logging.WARNING)
+
+from aquaclean_console_app.PollStats import PollStats
+from aquaclean_console_app.ProxyPool import ProxyPool, parse_hosts
+from aquaclean_console_app.bluetooth_le.LE.BluetoothLeConnector import (
+    BluetoothLeConnector, ESPHomeConnectionError, ESPHomeDeviceNotFoundError,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pool(clock, hosts="kitchen, hall, attic:6054") -> ProxyPool:
+    pool = ProxyPool(clock=clock)
+    pool.configure(parse_hosts(hosts))
+    return pool
+
+
+async def test_hosts_are_parsed():
+    assert parse_hosts("192.168.0.154") == [("192.168.0.154", 6053)]
+    assert parse_hosts(" a.local:6054 , b ,", default_port=7000) == [("a.local", 6054), ("b", 7000)]
+    assert parse_hosts("fe80::1") == [("fe80::1", 6053)]          # bare IPv6 is not host:port
+    assert parse_hosts("") == []
+
+
+async def test_best_proxy_first_with_hysteresis_and_hold():
+    clock = _Clock()
+    pool = _pool(clock)
+    kitchen, hall, attic = pool.proxies
+    assert pool.candidates() == [kitchen, hall, attic]            # untried: config order
+
+    pool.record_success(kitchen, connect_ms=1500, rssi=-80)      # score 80
+    assert pool.current is kitchen
+    assert pool.candidates()[0] is hall                          # untried ranks as 100: explore it
+    pool.record_success(hall, connect_ms=1500, rssi=-74)         # score 83
+    pool.record_success(attic, connect_ms=900, rssi=-55)         # score 97
+    assert pool.current is attic
+    assert pool.candidates() == [attic, hall, kitchen]
+
+    pool.record_failure(attic, "scan timeout", failover=True)    # score 92
+    assert pool.candidates()[-1] is attic                        # just failed: last
+    clock.now += ProxyPool.FAILED_HOLD_S
+    assert pool.candidates()[0] is attic
+    pool.record_success(hall, connect_ms=1500, rssi=-74)
+    assert pool.current is hall
+    assert attic.health.score > hall.health.score
+    assert pool.candidates()[0] is hall                          # not SWITCH_MARGIN better: no flapping
+    (entry,) = [p for p in pool.to_dict() if p["host"] == "attic"]
+    assert (entry["port"], entry["failures"], entry["failovers"], entry["selected"]) == (6054, 1, 1, False)
+    assert entry["last_error"] == "scan timeout"
+
+    pool.configure(parse_hosts("kitchen"))
+    assert pool.proxies == [kitchen] and pool.current is None    # kept its history; hall is gone
+
+
+class _FakeConnector(BluetoothLeConnector):
+    """BluetoothLeConnector whose connect through one proxy is scripted per host."""
+
+    def __init__(self, pool, outcomes):
+        super().__init__("kitchen", 6053, proxy_pool=pool)
+        self.outcomes = outcomes
+        self.tried = []
+
+    async def _connect_via_esphome(self, device_id):
+        self.tried.append(self.esphome_host)
+        outcome = self.outcomes[self.esphome_host]
+        if outcome is not None:
+            raise outcome
+        self.esphome_proxy_name = f"{self.esphome_host}-proxy"
+        self.rssi = -60
+
+
+async def test_connect_fails_over_within_one_session():
+    clock = _Clock()
+    pool = _pool(clock)
+    connector = _FakeConnector(pool, {
+        "kitchen": ESPHomeConnectionError("Timeout connecting to ESPHome proxy at kitchen:6053", timeout=True),
+        "hall": ESPHomeDeviceNotFoundError("not found via hall"),
+        "attic": None,
+    })
+    await connector.connect_async("38:AB:00:00:00:01")
+    assert connector.tried == ["kitchen", "hall", "attic"]
+    assert (connector.esphome_host, connector.esphome_port) == ("attic", 6054)
+    assert pool.current.host == "attic" and pool.current.name == "attic-proxy"
+    kitchen, hall, _ = pool.proxies
+    assert (kitchen.failovers, hall.failovers, kitchen.health.to_dict()["timeout_rate"]) == (1, 1, 1.0)
+
+    # next session starts at the proxy that worked
+    connector.tried.clear()
+    await connector.connect_async("38:AB:00:00:00:01")
+    assert connector.tried == ["attic"]
+
+    # every proxy failing raises the last error; other errors are not retried elsewhere
+    clock.now += ProxyPool.FAILED_HOLD_S
+    connector.outcomes["attic"] = asyncio.TimeoutError()
+    connector.tried.clear()
+    try:
+        await connector.connect_async("38:AB:00:00:00:01")
+        raise AssertionError("connect succeeded")
+    except asyncio.TimeoutError:
+        pass
+    assert connector.tried == ["attic"] and pool.proxies[2].failures == 1
+
+
+async def test_poll_stats_count_polls_per_proxy():
+    stats = PollStats()
+    for proxy in ("attic", "attic", "hall"):
+        stats.record("on-demand", 0, 900, 120, transport="esp32-wifi", proxy=proxy)
+    stats.record("on-demand", None, None, 80, transport="bleak")
+    assert stats.to_dict()["on-demand"]["proxy"] == {"attic": 2, "hall": 1}
+    assert "Proxy: attic: 2  hall: 1" in stats.to_markdown()
+    restored = PollStats()
+    restored._modes["on-demand"].load_state(stats._modes["on-demand"].to_state())
+    assert restored.to_dict()["on-demand"]["proxy"] == {"attic": 2, "hall": 1}
+
+
+def _run_all():
+    async_tests = [
+        test_hosts_are_parsed,
+        test_best_proxy_first_with_hysteresis_and_hold,
+        test_connect_fails_over_within_one_session,
+        test_poll_stats_count_polls_per_proxy,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_proxy_pool():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
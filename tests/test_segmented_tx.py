@@ -0,0 +1,223 @@
+"""Tests for segmented TX in aquaclean_core/Frames — FrameService.send_message_async.
+
+_Peer plays the device side the way mera_mock.py does: it acks every request
+frame with a CONTROL frame carrying the cumulative bitmask and reassembles the
+request with the bridge's own FrameCollector.  It can drop frames (first
+transmission only), stop acking, and state its own UnackdFrameLimit.  No BLE,
+no mock device module.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+# Register SILLY/TRACE log levels before any bridge import (the bridge logs via logger.trace/silly).
+def _add_level(name: str, value: int) -> None:
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+logging.basicConfig(level=logging.WARNING)
+
+from aquaclean_console_app.aquaclean_core.Frames.FrameCollector import FrameCollector
+from aquaclean_console_app.aquaclean_core.Frames.FrameFactory import FrameFactory
+from aquaclean_console_app.aquaclean_core.Frames.FrameService import FrameService, SegmentedTxError
+from aquaclean_console_app.aquaclean_core.Frames.Frames.FrameType import FrameType
+
+
+class _Peer:
+    """Device side of the link.  See module docstring."""
+
+    def __init__(self, service: FrameService, drop=(), ack=True, limit=8, latency=0):
+        self.service = service
+        self.drop = set(drop)
+        self.ack = ack
+        self.limit = limit
+        self.latency = latency
+        self.writes = []                 # (channel, frame index)
+        self.in_flight_max = 0
+        self.received = None
+        self._bitmap = bytearray(8)
+        self._collector = FrameCollector()
+        self._collector.TransactionCompleteFC += self._complete
+        service.SendData += self._write_0
+        service.SendDataCons += self._write_1
+
+    async def _complete(self, sender, data):
+        self.received = bytes(data)
+
+    async def _write_0(self, sender, data):
+        await self._write(0, data)
+
+    async def _write_1(self, sender, data):
+        await self._write(1, data)
+
+    async def _write(self, channel, data):
+        frame = FrameFactory.CreateFrameFromBytes(bytes(data))
+        if frame.FrameType == FrameType.SINGLE:
+            first = frame.IsSubFrameCount
+            index = 0 if first else frame.SubFrameCountOrIndex
+            count, payload = frame.SubFrameCountOrIndex + 1, frame.Payload
+        else:
+            first = frame.FrameType == FrameType.FIRST
+            index = 0 if first else frame.frame_count_or_number
+            count, payload = frame.frame_count_or_number, frame.payload
+        self.writes.append((channel, index))
+        sent = {i for _, i in self.writes}
+        self.in_flight_max = max(self.in_flight_max,
+                                 len([i for i in sent if not self._bitmap[i // 8] >> (i % 8) & 1]))
+        if index in self.drop:
+            self.drop.discard(index)     # lost on the air, once
+            return
+        if first:
+            self._bitmap = bytearray(8)
+            await self._collector.start_transaction(count)
+        self._bitmap[index // 8] |= 1 << (index % 8)
+        await self._collector.add_frame(index, payload)
+        if self.ack:
+            control = FrameFactory.BuildControlFrame(bytes(self._bitmap))
+            control.UnackdFrameLimit = self.limit
+            control.TransactionLatency = self.latency
+            asyncio.ensure_future(self.service.process_data(bytes(control.serialize())))
+
+
+def _message(length: int) -> bytes:
+    return bytes((i * 7 + 3) & 0xFF for i in range(length))
+
+
+async def test_short_message_is_one_unacked_frame():
+    service = FrameService()
+    peer = _Peer(service, ack=False)
+    await asyncio.wait_for(service.send_message_async(_message(15)), timeout=1)
+    assert peer.writes == [(0, 0)]
+    assert peer.received == _message(15) + bytes(4)          # padded to 19
+
+
+async def test_first_cons_wire_format_unchanged():
+    service = FrameService()
+    frames = []
+
+    async def capture(sender, data):
+        frames.append(bytes(data))
+        bitmap = bytes([(1 << len(frames)) - 1]) + bytes(7)  # per-frame ack, like the device
+        ack = FrameFactory.BuildControlFrame(bitmap).serialize()
+        asyncio.ensure_future(service.process_data(bytes(ack)))
+
+    service.SendData += capture
+    service.SendDataCons += capture
+    message = _message(23)
+    await asyncio.wait_for(service.send_message_async(message, min_frames=2), timeout=2)
+    assert frames == [bytes([0x13]) + message[:19], bytes([0x12]) + message[19:] + bytes(15)]
+
+
+async def test_short_multi_frame_request_is_an_unpaced_burst():
+    service = FrameService()
+    peer = _Peer(service, drop={2})
+    message = _message(60)                                    # 4 SINGLE sub-frames
+    await asyncio.wait_for(service.send_message_async(message), timeout=0.2)   # no ack wait
+    assert peer.writes == [(0, 0), (1, 1), (1, 2), (1, 3)]
+    assert service.call_frames_sent == 4 and service.call_frames_retransmitted == 0
+
+
+async def test_long_message_uses_first_cons_within_peer_window():
+    service = FrameService()
+    peer = _Peer(service, limit=3)
+    message = _message(200)                                   # 12 FIRST/CONS frames
+    await asyncio.wait_for(service.send_message_async(message), timeout=2)
+    assert peer.received[:200] == message
+    assert [i for _, i in peer.writes] == list(range(12))     # no limit stated yet: one burst
+    assert peer.writes[0][0] == 0 and {c for c, _ in peer.writes[1:]} == {1}
+    assert service.call_frames_sent == 12 and service.call_frames_retransmitted == 0
+
+    peer.writes, peer.in_flight_max, peer.received = [], 0, None
+    await asyncio.wait_for(service.send_message_async(message), timeout=2)
+    assert peer.received[:200] == message
+    assert [i for _, i in peer.writes] == list(range(12))
+    assert peer.in_flight_max <= 3                            # the limit from the first request's acks
+
+
+async def test_lost_frames_are_retransmitted_selectively():
+    service = FrameService()
+    peer = _Peer(service, drop={5, 9}, latency=20)
+    message = _message(200)
+    await asyncio.wait_for(service.send_message_async(message), timeout=3)
+    assert peer.received[:200] == message
+    assert sorted(i for _, i in peer.writes).count(5) == 2
+    assert sorted(i for _, i in peer.writes).count(9) == 2
+    assert len(peer.writes) == 14 and service.call_frames_retransmitted == 2
+
+
+async def test_unacked_frames_fail_after_max_retransmits():
+    service = FrameService()
+    service.TX_ACK_TIMEOUT = 0.02
+    peer = _Peer(service, limit=8)
+    peer.drop = {3}
+
+    async def never_deliver(sender, data):
+        frame = FrameFactory.CreateFrameFromBytes(bytes(data))
+        if frame.frame_count_or_number == 3:
+            peer.writes.append((1, 3))                        # lost every time
+            return
+        await peer._write(1, data)
+
+    service.SendDataCons -= peer._write_1
+    service.SendDataCons += never_deliver
+    try:
+        await asyncio.wait_for(service.send_message_async(_message(120)), timeout=3)
+        raise AssertionError("expected SegmentedTxError")
+    except SegmentedTxError as e:
+        assert "[3]" in str(e)
+    assert [i for _, i in peer.writes].count(3) == 1 + FrameService.TX_MAX_RETRANSMITS
+    assert service.tl_msg_out_ctl.nTxState == 0
+
+    silent = FrameService()
+    silent.TX_ACK_TIMEOUT = 0.02
+    peer = _Peer(silent, ack=False)                           # never acks: every frame once, no retransmit
+    await asyncio.wait_for(silent.send_message_async(_message(120)), timeout=2)
+    assert [i for _, i in peer.writes] == list(range(7)) and peer.received[:120] == _message(120)
+
+
+def _run_all():
+    async_tests = [
+        test_short_message_is_one_unacked_frame,
+        test_first_cons_wire_format_unchanged,
+        test_short_multi_frame_request_is_an_unpaced_burst,
+        test_long_message_uses_first_cons_within_peer_window,
+        test_lost_frames_are_retransmitted_selectively,
+        test_unacked_frames_fail_after_max_retransmits,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_segmented_tx():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
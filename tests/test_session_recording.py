@@ -0,0 +1,278 @@
+"""Tests for bluetooth_le/LE/BleSessionRecording.py — BLE session record / replay.
+
+A fake connector answers every write with a notification after a short delay;
+sessions recorded through RecordingConnector are then played back through
+ReplayConnector to a minimal request/response consumer.  Stdlib only — no
+adapter, no mock device.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test, since pyproject.toml sets asyncio_mode = "auto") plus
+a _run_all() aggregator and a test_all_*() pytest entry point.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+
+# Register SILLY/TRACE log levels before any bridge import (myEvent uses logger.trace).
+def _add_level(name: str, value: int) -> None:
+    if hasattr(logging, name):
+        return
+    logging.addLevelName(value, name)
+    setattr(logging, name, value)
+    setattr(logging.Logger, name.lower(),
+            lambda self, msg, *a, **kw: self.log(value, msg, *a, **kw))
+
+_add_level('SILLY', 4)
+_add_level('TRACE', 5)
+
+from aquaclean_console_app.bluetooth_le.LE import BleSessionRecording as rec
+from aquaclean_console_app.bluetooth_le.LE.BleSessionRecording import (
+    RecordingConnector, ReplayConnector, ReplayMismatchError, SessionCursor, read_session,
+)
+from aquaclean_console_app.bluetooth_le.LE.BluetoothLeConnector import ESPHomeDeviceNotFoundError
+from aquaclean_console_app.myEvent.myEvent import EventHandler
+
+DELAY_S = 0.03
+
+
+class _EchoConnector:
+    """Stands in for BluetoothLeConnector: answers each write with its bytes reversed."""
+
+    def __init__(self, fail: Exception | None = None):
+        self.data_received_handlers = EventHandler()
+        self.connection_status_changed_handlers = EventHandler()
+        self.device_name = "Fake AquaClean"
+        self.device_address = "Unknown"
+        self.is_variant_a = False
+        self.rssi = -60
+        self.last_ble_ms = 12
+        self.last_esphome_api_ms = None
+        self._fail = fail
+        self._tasks = set()
+
+    async def connect_async(self, device_id):
+        if self._fail is not None:
+            raise self._fail
+        self.device_address = device_id
+        self.connection_status_changed_handlers(self, True, device_id, self.device_name)
+
+    async def _answer(self, data: bytes) -> None:
+        await asyncio.sleep(DELAY_S)
+        await self.data_received_handlers.invoke_async(bytearray(data[::-1]))
+
+    async def send_message(self, data):
+        task = asyncio.ensure_future(self._answer(bytes(data)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def send_message_cons(self, data):
+        await self.send_message(data)
+
+    async def disconnect(self):
+        self.connection_status_changed_handlers(self, False)
+
+
+class _Client:
+    """Minimal request/response consumer, like a client's frame handler."""
+
+    def __init__(self, connector):
+        self.connector = connector
+        self._responses: asyncio.Queue = asyncio.Queue()
+        connector.data_received_handlers += self._on_data
+
+    async def _on_data(self, data) -> None:
+        await self._responses.put(bytes(data))
+
+    async def request(self, data: bytes, timeout: float = 1.0) -> bytes:
+        await self.connector.send_message(data)
+        return await asyncio.wait_for(self._responses.get(), timeout)
+
+
+_REQUESTS = [b"\x01\x02\x03", b"\x10\x20", b"\xAA" * 20]
+
+
+async def _record(path: str, requests=_REQUESTS) -> list[bytes]:
+    connector = RecordingConnector(_EchoConnector(), path)
+    client = _Client(connector)
+    await connector.connect_async("AA:BB:CC:DD:EE:FF")
+    responses = [await client.request(r) for r in requests]
+    await connector.disconnect()
+    connector.close()
+    return responses
+
+
+async def test_recording_captures_writes_and_notifications():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "s.aqbs")
+        responses = await _record(path)
+        assert responses == [r[::-1] for r in _REQUESTS]
+        records = read_session(path)
+        kinds = [k for k, _, _ in records]
+        assert kinds == [rec.CONNECT, rec.CONNECTED] + [rec.WRITE, rec.NOTIFY] * 3 + [rec.DISCONNECT]
+        notify_dt = [dt for k, dt, _ in records if k == rec.NOTIFY]
+        assert all(dt >= DELAY_S * 1_000_000 * 0.8 for dt in notify_dt)
+        meta_len = sum(len(p) for k, _, p in records if k == rec.CONNECTED)
+        assert os.path.getsize(path) - meta_len < 120       # 2 × 25 payload bytes, device id, framing
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_replay_as_fast_as_possible():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "s.aqbs")
+        responses = await _record(path)
+        replay = ReplayConnector(path, speed=None)
+        client = _Client(replay)
+        await replay.connect_async("AA:BB:CC:DD:EE:FF")
+        assert replay.device_name == "Fake AquaClean"
+        assert replay.rssi == -60
+        t0 = time.perf_counter()
+        assert [await client.request(r) for r in _REQUESTS] == responses
+        assert time.perf_counter() - t0 < DELAY_S * len(_REQUESTS)
+        await replay.disconnect()
+        stats = replay.stats()
+        assert stats["matched"] == 3 and stats["mismatches"] == 0 and stats["notifications"] == 3
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_replay_keeps_original_timing():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "s.aqbs")
+        await _record(path)
+        replay = ReplayConnector(path, speed=1.0)
+        client = _Client(replay)
+        await replay.connect_async("AA:BB:CC:DD:EE:FF")
+        t0 = time.perf_counter()
+        for r in _REQUESTS:
+            await client.request(r)
+        assert time.perf_counter() - t0 >= DELAY_S * len(_REQUESTS) * 0.8
+        await replay.disconnect()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_mismatched_write_is_counted_or_raised():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "s.aqbs")
+        await _record(path)
+        replay = ReplayConnector(path, speed=None)
+        client = _Client(replay)
+        await replay.connect_async("x")
+        assert await client.request(b"\xFF") == _REQUESTS[0][::-1]   # recorded answer, not an echo
+        await replay.disconnect()
+        assert replay.stats()["mismatches"] == 1
+        assert replay.stats()["unplayed"] == 4
+
+        strict = ReplayConnector(path, speed=None, strict=True)
+        await strict.connect_async("x")
+        try:
+            await strict.send_message(b"\xFF")
+            raise AssertionError("expected ReplayMismatchError")
+        except ReplayMismatchError:
+            pass
+        await strict.send_message(_REQUESTS[1])   # next recorded write still lines up
+        await strict.disconnect()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_connect_error_and_session_sequence():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "s.aqbs")
+        failing = RecordingConnector(_EchoConnector(fail=ESPHomeDeviceNotFoundError("not found")), path)
+        try:
+            await failing.connect_async("AA:BB")
+        except ESPHomeDeviceNotFoundError:
+            pass
+        failing.close()
+        await _record(path, _REQUESTS[:1])               # appended as the second connection
+
+        cursor = SessionCursor(path)
+        assert cursor.sessions_left == 2
+        first = ReplayConnector(cursor, speed=None)
+        try:
+            await first.connect_async("AA:BB")
+            raise AssertionError("expected ESPHomeDeviceNotFoundError")
+        except ESPHomeDeviceNotFoundError as e:
+            assert "not found" in str(e)
+        second = ReplayConnector(cursor, speed=None)     # fresh connector, same cursor
+        client = _Client(second)
+        await second.connect_async("AA:BB")
+        assert await client.request(_REQUESTS[0]) == _REQUESTS[0][::-1]
+        await second.disconnect()
+        assert cursor.sessions_left == 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_directory_target_and_truncated_file():
+    tmp = tempfile.mkdtemp()
+    try:
+        connector = RecordingConnector(_EchoConnector(), tmp)
+        client = _Client(connector)
+        for _ in range(2):
+            await connector.connect_async("AA:BB")
+            await client.request(b"\x01")
+            await connector.disconnect()
+            await asyncio.sleep(0.001)           # distinct file names
+        files = sorted(os.listdir(tmp))
+        assert len(files) == 2 and all(f.endswith(".aqbs") for f in files)
+
+        path = os.path.join(tmp, files[0])
+        with open(path, "rb") as fh:
+            data = fh.read()
+        with open(path, "wb") as fh:
+            fh.write(data[:-3])                  # bridge killed mid-record
+        assert [k for k, _, _ in read_session(path)][:3] == [rec.CONNECT, rec.CONNECTED, rec.WRITE]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _run_all():
+    async_tests = [
+        test_recording_captures_writes_and_notifications,
+        test_replay_as_fast_as_possible,
+        test_replay_keeps_original_timing,
+        test_mismatched_write_is_counted_or_raised,
+        test_connect_error_and_session_sequence,
+        test_directory_target_and_truncated_file,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_session_recording():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
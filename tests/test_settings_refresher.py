@@ -0,0 +1,151 @@
+"""Tests for aquaclean_console_app/SettingsRefresher.py — round-robin, written settings, ages.
+
+A fake base client serves the stored settings from dicts and records the IDs
+read; device_state is a real StateStore.  No BLE.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import traceback
+import types
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.SettingsRefresher import SettingsRefresher
+from aquaclean_console_app.StateStore import StateStore
+from aquaclean_console_app.aquaclean_core.Clients.AquaCleanBaseClient import (
+    AquaCleanBaseClient, BLEPeripheralTimeoutError)
+
+
+class _FakeBaseClient:
+    def __init__(self, profile: dict, common: dict, timeout_ids=()):
+        self.profile = profile
+        self.common = common
+        self.timeout_ids = set(timeout_ids)
+        self.reads = []
+
+    async def _read(self, kind, settings, ids):
+        self.reads += [f"{kind}:{sid}" for sid in ids]
+        if self.timeout_ids.intersection(ids):
+            raise BLEPeripheralTimeoutError("0x53 timed out")
+        return {sid: settings[sid] for sid in ids}
+
+    async def get_stored_profile_settings_async(self, ids=None):
+        return await self._read("profile", self.profile, ids)
+
+    async def get_stored_common_settings_async(self, ids=None):
+        return await self._read("common", self.common, ids)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state(client):
+    return StateStore({"profile_settings": dict(client.profile), "common_settings": dict(client.common)})
+
+
+async def test_round_robin_covers_every_setting_per_cycle():
+    client = _FakeBaseClient({2: 1, 1: 0, 3: 2}, {2: 5, 1: 3})
+    refresher = SettingsRefresher([2, 1, 3], [2, 1], per_poll=2)
+    state = _state(client)
+    for _ in range(3):
+        assert await refresher.refresh(client, state) == []
+    assert client.reads == ["profile:2", "profile:1", "profile:3", "common:2", "common:1", "profile:2"]
+    assert refresher.to_dict()["cycle_polls"] == 3 and state.version == 0
+
+
+async def test_device_side_change_is_picked_up():
+    client = _FakeBaseClient({6: 2, 7: 1}, {})
+    refresher = SettingsRefresher([6, 7], per_poll=1)
+    state = _state(client)
+    before = state["profile_settings"]
+    client.profile[7] = 3                              # changed with the remote control
+    assert await refresher.refresh(client, state) == []
+    assert await refresher.refresh(client, state) == [("profile", 7, 3)]
+    assert state["profile_settings"] == {6: 2, 7: 3} and before == {6: 2, 7: 1}   # replaced, not mutated
+    assert state.pending == {"profile_settings"}
+
+
+async def test_written_setting_is_reread_alone_first():
+    client = _FakeBaseClient({2: 1, 1: 0, 3: 2}, {3: 1})
+    refresher = SettingsRefresher([2, 1, 3], [3], per_poll=1)
+    state = _state(client)
+    await refresher.refresh(client, state)
+    refresher.written("common", 3)
+    await refresher.refresh(client, state)
+    await refresher.refresh(client, state)
+    assert client.reads == ["profile:2", "common:3", "profile:1"]
+    assert refresher.to_dict()["pending"] == []
+
+
+async def test_ages_and_timeouts():
+    clock = _Clock()
+    client = _FakeBaseClient({2: 1, 1: 0}, {}, timeout_ids=[1])
+    refresher = SettingsRefresher([2, 1], per_poll=2, clock=clock)
+    refresher.record("profile", {2: 1})
+    clock.now += 30
+    assert refresher.ages() == {"profile": {2: 30.0, 1: None}, "common": {}}
+    await refresher.refresh(client, _state(client))   # 2 re-read, 1 times out
+    assert refresher.ages()["profile"] == {2: 0.0, 1: None}
+    assert refresher.timeouts == 1 and refresher.reads == 1
+
+
+async def test_partial_profile_read_merges_into_client_cache():
+    # The refresher reads one ID at a time; the client's cache must keep the rest.
+    values = {2: 1, 1: 0, 3: 2}
+    client = object.__new__(AquaCleanBaseClient)
+    client.profile_settings = {}
+
+    async def send_request(api_call):
+        client.message_context = types.SimpleNamespace(
+            result_bytes=values[api_call._payload[1]].to_bytes(2, "little"))
+    client.send_request = send_request
+
+    assert await client.get_stored_profile_settings_async(ids=[2, 1, 3]) == values
+    values[1] = 4
+    assert await client.get_stored_profile_settings_async(ids=[1]) == {1: 4}
+    assert client.profile_settings == {2: 1, 1: 4, 3: 2}
+
+
+def _run_all():
+    async_tests = [
+        test_round_robin_covers_every_setting_per_cycle,
+        test_device_side_change_is_picked_up,
+        test_written_setting_is_reread_alone_first,
+        test_ages_and_timeouts,
+        test_partial_profile_read_merges_into_client_cache,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_settings_refresher():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,96 @@
+"""Tests for benchmarks/startup_bench.py — the start-up import budget.
+
+The always-on tests parse recorded `-X importtime` output and check, in fresh
+interpreters, that the CLI fast path never imports main.py / bleak / aiorun
+and that main.py never imports fastapi.  The time budgets are opt-in, because
+wall-clock timings are noisy on shared CI runners:
+
+    AQUACLEAN_BENCH=1 python -m pytest tests/test_startup_bench.py -v
+
+Pattern mirrors test_codec_bench.py: plain test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import os
+import sys
+import traceback
+
+import pytest
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from benchmarks import startup_bench
+
+_IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       900 |        900 | site
+import time:       120 |        120 |   _json
+import time:      1600 |       1720 | json
+import time:       300 |        300 |     aquaclean_console_app.FieldCatalog
+import time:      1100 |       1400 |   aquaclean_console_app.BridgeConfig
+import time:       400 |       1800 | aquaclean_console_app.CliArgs
+"""
+
+
+def test_importtime_output_is_parsed():
+    rows = startup_bench.parse_importtime(_IMPORTTIME)
+    assert rows[0] == ("site", 900, 900, 0)
+    assert rows[3] == ("aquaclean_console_app.FieldCatalog", 300, 300, 2)
+    assert startup_bench.startup_ms(rows, {"site"}) == 3.52          # json + CliArgs
+    assert startup_bench.forbidden(rows, ["aquaclean_console_app.Field", "_json"]) == ["_json"]
+
+
+def test_cli_fast_path_skips_main():
+    for name in ("version", "check-config"):
+        args, _, never = startup_bench.SCENARIOS[name]
+        rows = startup_bench.importtime(args)
+        assert "aquaclean_console_app.CliArgs" in {r[0] for r in rows}
+        assert startup_bench.forbidden(rows, never) == [], name
+
+
+def test_main_does_not_import_fastapi():
+    args, _, never = startup_bench.SCENARIOS["main"]
+    rows = startup_bench.importtime(args)
+    assert "aquaclean_console_app.main" in {r[0] for r in rows}
+    assert startup_bench.forbidden(rows, never) == []
+
+
+@pytest.mark.skipif(not os.environ.get("AQUACLEAN_BENCH"),
+                    reason="timing budget is opt-in: set AQUACLEAN_BENCH=1")
+def test_startup_within_budget():
+    results = startup_bench.run()
+    over = [f"{name}: {r['ms']} ms > {r['budget_ms']} ms" for name, r in results.items() if not r["ok"]]
+    assert not over, "start-up over budget: " + ", ".join(over)
+
+
+def _run_all():
+    tests = [
+        test_importtime_output_is_parsed,
+        test_cli_fast_path_skips_main,
+        test_main_does_not_import_fastapi,
+    ]
+    passed = 0
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_startup_bench():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,127 @@
+"""Tests for aquaclean_console_app/StateStore.py — versions, snapshots, change sets.
+
+The last test wires a StateStore to a bare RestApiService (no ApiMode, no
+BLE) and checks the SSE event it queues.  Stdlib + FastAPI only.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.StateStore import StateStore
+
+
+async def test_version_counts_changes_only():
+    store = StateStore({"is_user_sitting": None, "last_poll_ms": None})
+    assert store.version == 0
+    store["is_user_sitting"] = False
+    store["is_user_sitting"] = False                    # same value: no change
+    store["last_poll_ms"] = 120
+    assert store.version == 2 and store.pending == {"is_user_sitting", "last_poll_ms"}
+    store["last_poll_ms"] = 120.0                       # int → float is a change
+    store["is_user_sitting"] = 0                        # bool → int is a change
+    assert store.version == 4
+    store.update({"last_poll_ms": 120.0, "ble_rssi": -70})
+    assert store.version == 5 and store["ble_rssi"] == -70
+
+
+async def test_snapshots_are_immutable_and_share_values():
+    settings = {1: 3, 2: 0}
+    store = StateStore({"profile_settings": settings, "ble_status": "connected"})
+    first = store.snapshot()
+    assert store.snapshot() is first                    # cached until the next change
+    try:
+        first["ble_status"] = "error"
+        raise AssertionError("snapshot accepted a write")
+    except TypeError:
+        pass
+
+    store["ble_status"] = "disconnected"
+    second = store.snapshot()
+    assert first["ble_status"] == "connected" and second["ble_status"] == "disconnected"
+    assert second["profile_settings"] is first["profile_settings"] is settings
+
+    store["ble_status"] = "connecting"                  # copies once (second is frozen) ...
+    data = store._data
+    store["ble_rssi"] = -61                             # ... then writes in place
+    assert store._data is data and "ble_rssi" not in second and second["ble_status"] == "disconnected"
+
+
+async def test_publish_delivers_one_change_set():
+    store = StateStore({"is_dryer_running": None, "poll_epoch": None})
+    received = []
+
+    async def subscriber(change):
+        received.append(change)
+
+    async def broken(change):
+        raise RuntimeError("MQTT down")
+
+    store.Changed += broken
+    store.Changed += subscriber
+    assert await store.publish() is None                # nothing changed
+    store["is_dryer_running"] = True
+    store["poll_epoch"] = 1700000000.0
+    store["is_dryer_running"] = False
+    change = await store.publish()
+    assert received == [change]                         # a failing subscriber does not stop the others
+    assert change.version == 3 and store.published_version == 3
+    assert change.changes == {"is_dryer_running", "poll_epoch"} and "poll_epoch" in change
+    assert change.snapshot["is_dryer_running"] is False
+    assert await store.publish() is None and len(received) == 1
+
+
+async def test_sse_event_is_serialised_once_for_all_clients():
+    from aquaclean_console_app.RestApiService import RestApiService
+    api = RestApiService("127.0.0.1", 0)
+    store = StateStore({"is_user_sitting": None, "ble_status": "disconnected"})
+    store.Changed += api.on_state_changed
+    api._sse_queues += [asyncio.Queue(), asyncio.Queue()]
+    store["is_user_sitting"] = True
+    await store.publish()
+    first, second = [q.get_nowait() for q in api._sse_queues]
+    assert first is second
+    data = json.loads(first.removeprefix("data: "))
+    assert data == {"type": "state", "version": 1, "changed": ["is_user_sitting"],
+                    "is_user_sitting": True, "ble_status": "disconnected"}
+
+
+def _run_all():
+    async_tests = [
+        test_version_counts_changes_only,
+        test_snapshots_are_immutable_and_share_values,
+        test_publish_delivers_one_change_set,
+        test_sse_event_is_serialised_once_for_all_clients,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_state_store():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
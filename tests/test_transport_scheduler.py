@@ -0,0 +1,183 @@
+"""Tests for aquaclean_console_app/TransportScheduler.py — several devices, one BLE transport.
+
+Also covers the per-device config (BridgeConfig.device_config) and the
+namespaced Home Assistant discovery of a multi-device bridge.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import configparser
+import os
+import sys
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.BleScheduler import Priority
+from aquaclean_console_app.BridgeConfig import _check_device_errors, device_config, device_names
+from aquaclean_console_app.TransportScheduler import TransportScheduler
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def test_slot_limit_and_priority():
+    transport = TransportScheduler(slots=1)
+    for device in ("a", "b"):
+        transport.register(device)
+    first = await transport.acquire("a")
+    poll = asyncio.create_task(transport.acquire("a", Priority.POLL))
+    command = asyncio.create_task(transport.acquire("b", Priority.COMMAND))
+    await asyncio.sleep(0)
+    assert (transport.in_use(), transport.waiting()) == (1, 2)
+    transport.release(first)
+    await asyncio.sleep(0)
+    assert command.done() and not poll.done()      # a command on b goes before a poll on a
+    transport.release(command.result())
+    await asyncio.sleep(0)
+    assert poll.done()
+    transport.release(poll.result())
+    transport.release(poll.result())               # idempotent
+    assert transport.in_use() == 0
+
+
+async def test_devices_take_turns():
+    transport = TransportScheduler(slots=1)
+    order = []
+    for device in ("a", "b", "c"):
+        transport.register(device)
+    holder = await transport.acquire("a")
+
+    async def session(device):                     # stands in for BleScheduler.submit
+        order.append(device)
+
+    async def run(device):
+        await transport.run(device, Priority.POLL, session, device)
+
+    # a queues three polls before b and c queue one each: b and c must not wait for all of a's
+    tasks = [asyncio.create_task(run(d)) for d in ("a", "a", "a", "b", "c")]
+    await asyncio.sleep(0)
+    transport.release(holder)
+    await asyncio.gather(*tasks)
+    assert order == ["b", "c", "a", "a", "a"]
+
+    # a cancelled waiter gives up its place
+    holder = await transport.acquire("a")
+    waiter = asyncio.create_task(transport.acquire("b"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert transport.waiting() == 0
+    transport.release(holder)
+    assert transport.in_use() == 0
+
+
+async def test_airtime_and_poll_budget():
+    clock = _Clock()
+    transport = TransportScheduler(slots=2, clock=clock)
+    transport.register("a", poll_interval=10)
+    transport.register("b", poll_interval=10)
+    a = await transport.acquire("a")
+    b = await transport.acquire("b")
+    clock.now += 3
+    transport.release(b)
+    clock.now += 6
+    for _ in range(3):                             # a polls every 10 s, b every 30 s
+        transport.record_poll("a")
+        clock.now += 10
+    transport.record_poll("b")
+    clock.now += 30
+    transport.record_poll("b")
+    transport.release(a)
+
+    stats = transport.to_dict()
+    assert (stats["slots"], stats["in_use"], stats["waiting"]) == (2, 0, 0)
+    dev_a, dev_b = stats["devices"]["a"], stats["devices"]["b"]
+    assert (dev_a["sessions"], dev_a["airtime_s"], dev_b["airtime_s"]) == (1, 69.0, 3.0)
+    assert dev_a["airtime_share"] == round(69 / 72, 3)
+    assert (dev_a["polls"], dev_a["poll_interval_s"], dev_a["budget_met"]) == (3, 10.0, True)
+    assert (dev_b["poll_interval_s"], dev_b["budget_met"]) == (30.0, False)
+    assert dev_a["queue_wait_ms"]["count"] == 1
+
+
+async def test_device_config_and_discovery():
+    cfg = configparser.ConfigParser(inline_comment_prefixes=('#',))
+    cfg.read_string(
+        "[MQTT]\nclient = aquaclean\ntopic = Geberit/AquaClean\n"
+        "[BLE]\ndevice_id = 38:AB:00:00:00:01\n"
+        "[POLL]\ninterval = 10\nstats_file = poll-stats.json\n"
+        "[SERVICE]\nble_connection = persistent\n"
+        "[DEVICES]\nnames = up, down\nmax_connections = 2\n"
+        "[DEVICE up]\ndevice_id = 38:AB:00:00:00:02\n"
+        "[DEVICE down]\ndevice_id = 38:AB:00:00:00:03\ntopic = Home/Loo\ninterval = 30\n"
+    )
+    assert device_names(cfg) == ["up", "down"]
+    assert device_config("", cfg) is cfg
+    up, down = device_config("up", cfg), device_config("down", cfg)
+    assert (up.get("BLE", "device_id"), up.get("MQTT", "topic"), up.get("MQTT", "client")) == \
+        ("38:AB:00:00:00:02", "Geberit/AquaClean/up", "aquaclean-up")
+    assert (down.get("MQTT", "topic"), down.get("POLL", "interval"), down.get("POLL", "stats_file")) == \
+        ("Home/Loo", "30", "poll-stats-down.json")
+    assert cfg.get("BLE", "device_id") == "38:AB:00:00:00:01"           # shared config untouched
+    assert _check_device_errors(["up", "down"], cfg) == []
+
+    cfg.set("DEVICES", "max_connections", "1")
+    cfg.set("DEVICE down", "device_id", "38:ab:00:00:00:02")
+    errors = _check_device_errors(["up", "down", "Spare"], cfg)
+    assert any("already used by [DEVICE up]" in e for e in errors)
+    assert any("'Spare'" in e for e in errors) and any("[DEVICE Spare] is missing" in e for e in errors)
+    assert any("max_connections >= 3" in e for e in errors)
+
+    from aquaclean_console_app.main import _ha_discovery_for_device
+    configs = [{"topic": "homeassistant/sensor/geberit_aquaclean/filter/config",
+                "payload": {"unique_id": "geberit_aquaclean_filter", "name": "Filter",
+                            "device": {"identifiers": ["geberit_aquaclean"], "name": "Geberit AquaClean",
+                                       "via_device": "geberit_aquaclean_bridge"}}}]
+    assert _ha_discovery_for_device(configs, "") is configs
+    (ns,) = _ha_discovery_for_device(configs, "up")
+    assert ns["topic"] == "homeassistant/sensor/geberit_aquaclean_up/filter/config"
+    assert ns["payload"]["unique_id"] == "geberit_aquaclean_up_filter"
+    assert ns["payload"]["device"] == {"identifiers": ["geberit_aquaclean_up"], "name": "Geberit AquaClean (up)",
+                                       "via_device": "geberit_aquaclean_up_bridge"}
+    assert configs[0]["payload"]["unique_id"] == "geberit_aquaclean_filter"   # input untouched
+
+
+def _run_all():
+    async_tests = [
+        test_slot_limit_and_priority,
+        test_devices_take_turns,
+        test_airtime_and_poll_budget,
+        test_device_config_and_discovery,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_transport_scheduler():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
@@ -0,0 +1,151 @@
+"""Tests for aquaclean_console_app/UsageSessions.py — usage sessions from SPL flag transitions.
+
+Change sets are fed in by hand on a fake clock; no device and no bridge.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test) plus a _run_all() aggregator and a test_all_*()
+pytest entry point.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import traceback
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from aquaclean_console_app.BridgeConfig import device_config
+from aquaclean_console_app.UsageSessions import UsageSessions
+
+T0 = 1_700_000_000.0
+
+
+class _Clock:
+    def __init__(self):
+        self.now = T0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _feed(usage, clock, script):
+    """script: [(seconds after T0, {flag: value})] → the sessions completed along the way."""
+    completed = []
+    for dt, values in script:
+        clock.now = T0 + dt
+        completed += usage.observe(values)
+    return completed
+
+
+async def test_sit_shower_dry_leave():
+    clock = _Clock()
+    usage = UsageSessions(clock=clock)
+    assert usage.phase == "idle"
+    completed = _feed(usage, clock, [
+        (0,   {"is_user_sitting": True}),
+        (60,  {"is_anal_shower_running": True}),
+        (90,  {"is_anal_shower_running": False, "is_dryer_running": True}),
+    ])
+    assert (completed, usage.phase) == ([], "dryer")
+    assert usage.to_dict()["current"]["dryer_s"] == 0 and usage.to_dict()["current"]["sitting_s"] == 90
+    completed = _feed(usage, clock, [
+        (150, {"is_dryer_running": False}),
+        (200, {"is_user_sitting": False}),
+        (210, {"last_poll": {}}),                       # within LEAVE_GRACE_S: still leaving
+    ])
+    assert (completed, usage.phase) == ([], "leaving")
+    (session,) = _feed(usage, clock, [(240, {})])
+    assert session == {"start": int(T0), "end": int(T0) + 200, "duration_s": 200.0, "sitting_s": 200.0,
+                       "anal_shower_s": 30.0, "lady_shower_s": 0.0, "dryer_s": 60.0,
+                       "showers": 1, "dryer_runs": 1}
+    assert usage.phase == "idle" and usage.last_session == session
+    today = usage.today()
+    assert (today["date"], today["sessions"], today["sitting_s"], today["showers"]) == \
+        (UsageSessions.day_of(T0), 1, 200.0, 1)
+
+
+async def test_grace_short_events_and_unknown():
+    clock = _Clock()
+    usage = UsageSessions(clock=clock)
+    completed = _feed(usage, clock, [
+        (0,   {"is_user_sitting": True}),
+        (20,  {"is_user_sitting": False}),
+        (30,  {"is_user_sitting": True}),                # back within the grace period: same session
+        (40,  {"is_lady_shower_running": True}),
+        (40,  {"is_lady_shower_running": False}),        # shorter than a poll: still counted
+        (50,  {"is_user_sitting": None}),                # unknown changes nothing
+        (100, {"is_user_sitting": False}),
+        (200, {}),
+    ])
+    (session,) = completed
+    assert (session["duration_s"], session["sitting_s"], session["showers"], session["lady_shower_s"]) == \
+        (100.0, 90.0, 1, 0.0)
+
+    # a shower without the sitting flag opens a session too; a stale session is dropped
+    completed = _feed(usage, clock, [(300, {"is_anal_shower_running": True}),
+                                     (300 + UsageSessions.MAX_SESSION_S, {})])
+    assert completed == [] and usage.phase == "idle"
+    assert usage.to_dict()["days"][UsageSessions.day_of(T0)]["sessions"] == 1
+
+
+async def test_day_counters_persist():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "usage.json")
+        clock = _Clock()
+        usage = UsageSessions(path, clock=clock)
+        for day in range(3):
+            base = day * 86400
+            _feed(usage, clock, [(base, {"is_user_sitting": True}), (base + 120, {"is_user_sitting": False}),
+                                 (base + 200, {})])
+        usage.save()
+        restored = UsageSessions(path, clock=clock)
+        days = restored.to_dict(days=2)["days"]
+        assert list(days) == [UsageSessions.day_of(T0 + 2 * 86400), UsageSessions.day_of(T0 + 86400)]
+        assert all(d["sessions"] == 1 and d["sitting_s"] == 120.0 for d in days.values())
+        assert restored.last_session["start"] == int(T0) + 2 * 86400
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert UsageSessions(path, clock=clock).to_dict()["days"] == {}
+
+
+async def test_usage_file_is_per_device():
+    import configparser
+    cfg = configparser.ConfigParser()
+    cfg.read_string("[POLL]\nusage_file = usage.json\nstats_file = stats\n[DEVICE up]\ndevice_id = x\n")
+    up = device_config("up", cfg)
+    assert (up.get("POLL", "usage_file"), up.get("POLL", "stats_file")) == ("usage-up.json", "stats-up")
+
+
+def _run_all():
+    async_tests = [
+        test_sit_shower_dry_leave,
+        test_grace_short_events_and_unknown,
+        test_day_counters_persist,
+        test_usage_file_is_per_device,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_usage_sessions():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)
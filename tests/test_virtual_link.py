@@ -0,0 +1,165 @@
+"""In-process tests for aquaclean_ble_relay/virtual_link.py and benchmarks/e2e_bench.py.
+
+The bridge's own AquaCleanClient / AlbaClient talk to the unmodified Mera and
+Alba mock request handlers over in-memory pipes — no adapter, no BlueZ, no
+D-Bus daemon.  Requires bluez_peripheral to be importable (both mock modules
+import it at module level); skipped automatically via pytest.importorskip
+when it is missing — except under CI (CI set), which installs it with the
+[test] extra, so there a missing module fails the run instead of skipping it.
+
+Pattern mirrors test_ble20_client.py: async test_*() functions (each also a
+standalone pytest test, since pyproject.toml sets asyncio_mode = "auto") plus
+a _run_all() aggregator and a test_all_*() pytest entry point.
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import pytest
+
+if os.environ.get("CI"):
+    import bluez_peripheral   # noqa: F401
+else:
+    pytest.importorskip("bluez_peripheral")
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+from benchmarks import e2e_bench   # also registers SILLY/TRACE log levels
+
+from aquaclean_ble_relay.virtual_link import _Pipe, VirtualAlbaLink, VIRTUAL_ADDRESS
+from aquaclean_console_app.aquaclean_core.Clients.AlbaClient import AlbaClient
+from aquaclean_console_app.bluetooth_le.LE.BleSessionRecording import RecordingConnector, ReplayConnector
+
+
+async def test_pipe_keeps_order_and_applies_latency():
+    got = []
+
+    async def deliver(data):
+        got.append((data, time.perf_counter()))
+
+    pipe = _Pipe("t", deliver, latency_ms=20, jitter_ms=10, loss=0.0, rng=random.Random(1))
+    pipe.start()
+    t0 = time.perf_counter()
+    for i in range(5):
+        pipe.put(bytes([i]))
+    await asyncio.sleep(0.1)
+    await pipe.stop()
+    assert [d for d, _ in got] == [bytes([i]) for i in range(5)]
+    assert got[0][1] - t0 >= 0.019
+    assert pipe.stats() == {"pdus": 5, "dropped": 0, "bytes": 5}
+
+
+async def test_pipe_loss_is_counted():
+    got = []
+
+    async def deliver(data):
+        got.append(data)
+
+    pipe = _Pipe("t", deliver, latency_ms=0, jitter_ms=0, loss=1.0, rng=random.Random(1))
+    pipe.start()
+    pipe.put(b"\x01")
+    await asyncio.sleep(0.01)
+    await pipe.stop()
+    assert got == []
+    assert pipe.stats()["dropped"] == 1
+
+
+async def test_alba_client_over_virtual_link():
+    tmp = tempfile.mkdtemp()
+    try:
+        link = VirtualAlbaLink(state_dir=tmp, adapter=os.path.basename(tmp))
+        client = AlbaClient(link)
+        await client.connect_ble_only(VIRTUAL_ADDRESS)
+        assert link.arendi_handshake_done
+        assert client._inventory
+        misc = await client.base_client.get_misc_state_async()
+        assert misc["spray_arm_cleaning_status"] == "Ready"
+        await link.disconnect()
+        assert not link.arendi_handshake_done
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_alba_session_record_and_replay():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "alba.aqbs")
+        link = VirtualAlbaLink(state_dir=tmp, adapter=os.path.basename(tmp) + "-rec")
+        recorder = RecordingConnector(link, path)
+        client = AlbaClient(recorder)
+        await client.connect_ble_only(VIRTUAL_ADDRESS)
+        live = await client.base_client.get_misc_state_async()
+        await recorder.disconnect()
+        recorder.close()
+
+        replay = ReplayConnector(path, speed=None, strict=True)
+        client = AlbaClient(replay)
+        await client.connect_ble_only(VIRTUAL_ADDRESS)   # plaintext replay: no handshake
+        assert await client.base_client.get_misc_state_async() == live
+        await replay.disconnect()
+        assert replay.stats()["mismatches"] == 0
+        assert replay.stats()["unplayed"] == 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_mera_fetch_state_and_info_cycle():
+    tmp = tempfile.mkdtemp()
+    try:
+        r = await e2e_bench.run_scenario("mera", 1, tmp)
+        assert r["cycles"] == 1
+        assert r["result_keys"] > 10         # state + identity + settings
+        assert r["pdus_per_cycle"] > 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def test_alba_bench_cycle():
+    tmp = tempfile.mkdtemp()
+    try:
+        r = await e2e_bench.run_scenario("alba", 2, tmp, latency_ms=1.0, seed=1)
+        assert r["cycles_per_s"] > 0
+        assert r["peak_bytes_per_cycle"] > 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _run_all():
+    async_tests = [
+        test_pipe_keeps_order_and_applies_latency,
+        test_pipe_loss_is_counted,
+        test_alba_client_over_virtual_link,
+        test_alba_session_record_and_replay,
+        test_mera_fetch_state_and_info_cycle,
+        test_alba_bench_cycle,
+    ]
+    passed = 0
+    failed = 0
+    for t in async_tests:
+        try:
+            asyncio.run(t())
+            passed += 1
+        except Exception as e:
+            print(f"  {t.__name__}: FAIL — {e}")
+            traceback.print_exc()
+            failed += 1
+    total = passed + failed
+    print(f"\n{'OK' if failed == 0 else 'FAILED'}: {passed}/{total} tests passed")
+    return failed == 0
+
+
+def test_all_virtual_link():
+    """pytest entry point."""
+    assert _run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _run_all() else 1)